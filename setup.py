@@ -11,31 +11,33 @@ setuptools.setup(
     author_email="skeller88@gmail.com",
     description="A trading system platform",
     install_requires=[
+        # ccxt.async_support needs aiohttp >= 3.0.1, and the streaming code uses it directly
+        'aiohttp>=3.0.1,<3.8.99',
         'awscli',
         'beautifulsoup4',
         'boto3>=1.7,<1.7.99',
         'ccxt>=1.15,<1.15.99',
         'matplotlib>=2.0, <= 2.0.99',
         'nose>=1.3,<1.3.99',
-        'numpy>=1.14,<1.14.99',
-        # Latest version supported by zipline: https://github.com/quantopian/zipline/pull/2194
-        'pandas==0.22',
+        # pyarrow 7 needs numpy >= 1.16.6, and pandas 1.3 needs numpy >= 1.17.3
+        'numpy>=1.17.3,<1.21.99',
+        'pandas>=1.3,<1.3.99',
         'pg8000>=1.12,<=1.12.1',
+        # Table.sort_by and pyarrow.dataset.write_dataset(existing_data_behavior=...) are in 7.0
+        'pyarrow>=7,<7.0.99',
         'pytest',
         'pytz',
         'simplejson>=3.16,<3.16.99',
-        'smart_open',
         'SQLAlchemy>=1.2,<=1.2.8',
         'requests>=2.19,<2.19.99',
         'tweepy>=3.6,<3.6.99',
-        'zipline>=1.3, <=1.3.99'
     ],
     include_package_data=True,
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/skeller88/trading_platform",
     packages=setuptools.find_packages(),
-    python_requires='>=3',
+    python_requires='>=3.7',
     classifiers=(
         "Programming Language :: Python :: 3",
         "Operating System :: OS Independent",
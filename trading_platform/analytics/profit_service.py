@@ -19,6 +19,7 @@ from trading_platform.exchanges.data.financial_data import zero, one, one_hundre
 from trading_platform.exchanges.data.pair import Pair
 from trading_platform.exchanges.data.ticker import Ticker
 from trading_platform.exchanges.exchange_service_abc import ExchangeServiceAbc
+from trading_platform.exchanges.ticker_archive import TickerArchive
 
 
 class ProfitService:
@@ -141,6 +142,13 @@ class ProfitService:
         self.profit_history.append(profit_summary)
         return profit_summary
 
+    def profit_summary_from_archive(self, ticker_archive: TickerArchive, timestamp: float):
+        """
+        Profit summary valued with the latest tickers in ticker_archive as of timestamp, without loading the archive.
+        """
+        return self.profit_summary(datetime.datetime.utcfromtimestamp(timestamp),
+                                   ticker_archive.latest_tickers(timestamp))
+
     def save_profit_history(self, dest_path):
         """
         Convert list of dicts in self.profit_history to a pandas.DataFrame, and save to "dest_path".
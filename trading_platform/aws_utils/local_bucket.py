@@ -0,0 +1,96 @@
+"""
+Filesystem-backed stand-in for the subset of the boto3 s3.Bucket resource used by this package, so S3 code can run
+offline. Object keys are paths relative to the bucket's root directory.
+
+Example usage:
+    bucket = LocalBucket('/tmp/arbitrage-bot')
+    bucket.put_object(Key='ticker/ticker_v4_2018-05-01T00:00.csv', Body=b'...')
+    S3ObjectService(object_version='4', bucket=bucket).window_objects_streaming(...)
+"""
+import datetime
+import hashlib
+import io
+import os
+from typing import Dict, Iterator, Union
+
+
+class LocalObject:
+    """
+    Stand-in for a boto3 s3.ObjectSummary.
+    """
+    def __init__(self, bucket: 'LocalBucket', key: str):
+        self.bucket_name = bucket.name
+        self.key = key
+        self.path = bucket.path(key)
+
+    @property
+    def size(self) -> int:
+        return os.path.getsize(self.path)
+
+    @property
+    def last_modified(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(os.path.getmtime(self.path), tz=datetime.timezone.utc)
+
+    @property
+    def e_tag(self) -> str:
+        with open(self.path, 'rb') as fileobj:
+            return '"{0}"'.format(hashlib.md5(fileobj.read()).hexdigest())
+
+    def get(self) -> Dict:
+        with open(self.path, 'rb') as fileobj:
+            return {'Body': io.BytesIO(fileobj.read()), 'ContentLength': self.size, 'ETag': self.e_tag}
+
+
+class LocalObjectCollection:
+    """
+    Stand-in for a boto3 s3.Bucket.objects collection.
+    """
+    def __init__(self, bucket: 'LocalBucket'):
+        self.bucket = bucket
+
+    def all(self) -> Iterator[LocalObject]:
+        return self.filter(Prefix='')
+
+    def filter(self, Prefix: str = '') -> Iterator[LocalObject]:
+        """
+        Yields: objects with keys that start with Prefix, in key order, like S3 list requests
+        """
+        keys = []
+        for dirpath, _, filenames in os.walk(self.bucket.root_dir):
+            for filename in filenames:
+                key: str = os.path.relpath(os.path.join(dirpath, filename), self.bucket.root_dir).replace(os.sep, '/')
+                if key.startswith(Prefix):
+                    keys.append(key)
+        for key in sorted(keys):
+            yield LocalObject(self.bucket, key)
+
+    def __iter__(self) -> Iterator[LocalObject]:
+        return self.all()
+
+
+class LocalBucket:
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self.name = os.path.basename(os.path.normpath(root_dir))
+        self.objects = LocalObjectCollection(self)
+        os.makedirs(root_dir, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root_dir, *key.split('/'))
+
+    def Object(self, key: str) -> LocalObject:
+        return LocalObject(self, key)
+
+    def put_object(self, Key: str, Body: Union[bytes, str]) -> LocalObject:
+        path: str = self.path(Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if isinstance(Body, str):
+            Body = Body.encode('utf-8')
+        temp_path: str = path + '.tmp'
+        with open(temp_path, 'wb') as fileobj:
+            fileobj.write(Body)
+        os.replace(temp_path, path)
+        return LocalObject(self, Key)
+
+    def upload_fileobj(self, Fileobj, Key: str, Config=None):
+        self.put_object(Key=Key, Body=Fileobj.read())
@@ -0,0 +1,246 @@
+"""
+Local on-disk cache of S3 object bodies, so rerunning S3ObjectService windowing over the same dates reads from disk
+instead of the network.
+
+Entries are keyed by bucket name, object key, and ETag, so an object that's overwritten in S3 is downloaded again.
+Bodies are stored once per sha256 hash of their contents in <cache_dir>/objects/, and the entries are stored in
+<cache_dir>/cache_index.json. When the total size of the bodies exceeds max_bytes, the least recently used entries are
+evicted. In offline mode, objects are listed and read only from the cache.
+
+Bodies are written as they're downloaded, but the index is only written by save(). When a cache is opened, bodies that
+aren't referenced by the index, such as those written before a crash, and partially written bodies are deleted, so
+they don't take up space that isn't counted against max_bytes. A cache_dir should only be used by one process at a
+time.
+"""
+import collections
+import hashlib
+import io
+import json
+import os
+import threading
+import uuid
+from typing import Dict, Iterator, Optional
+
+index_filename: str = 'cache_index.json'
+
+
+def entry_key(bucket_name: str, object_key: str) -> str:
+    return '{0}/{1}'.format(bucket_name, object_key)
+
+
+class CachedObject:
+    """
+    Stand-in for a boto3 s3.ObjectSummary that's read from the cache.
+    """
+    def __init__(self, cache: 'S3ObjectCache', bucket_name: str, key: str, e_tag: str, size: int):
+        self.cache = cache
+        self.bucket_name = bucket_name
+        self.key = key
+        self.e_tag = e_tag
+        self.size = size
+
+    def get(self) -> Dict:
+        return {'Body': io.BytesIO(self.cache.get(self.bucket_name, self)), 'ContentLength': self.size,
+                'ETag': self.e_tag}
+
+
+class CachedObjectCollection:
+    def __init__(self, cache: 'S3ObjectCache', bucket_name: str):
+        self.cache = cache
+        self.bucket_name = bucket_name
+
+    def all(self) -> Iterator[CachedObject]:
+        return self.filter(Prefix='')
+
+    def filter(self, Prefix: str = '') -> Iterator[CachedObject]:
+        bucket_prefix: str = entry_key(self.bucket_name, Prefix)
+        with self.cache.lock:
+            entries = sorted((key, dict(entry)) for key, entry in self.cache.entries.items() if
+                             key.startswith(bucket_prefix))
+        for key, entry in entries:
+            yield CachedObject(self.cache, self.bucket_name, key[len(self.bucket_name) + 1:], entry['e_tag'],
+                               entry['size'])
+
+
+class CachedBucket:
+    """
+    Stand-in for a boto3 s3.Bucket that lists and reads only the objects in the cache. Used in offline mode.
+    """
+    def __init__(self, cache: 'S3ObjectCache', bucket_name: str):
+        self.name = bucket_name
+        self.objects = CachedObjectCollection(cache, bucket_name)
+
+
+class S3ObjectCache:
+    def __init__(self, cache_dir: str, max_bytes: int = 10 * 1000 * 1000 * 1000, offline: bool = False):
+        """
+        Args:
+            cache_dir:
+            max_bytes: maximum total size of the cached bodies
+            offline: if True, get() only returns cached bodies and never downloads
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.lock = threading.Lock()
+        # Entries by bucket name/object key, from least to most recently used
+        self.entries: collections.OrderedDict = collections.OrderedDict()
+        # Number of entries with each body, by sha256
+        self.references_by_sha256: Dict[str, int] = {}
+        self.total_bytes: int = 0
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.bytes_read: int = 0
+        self.bytes_downloaded: int = 0
+
+        os.makedirs(os.path.join(cache_dir, 'objects'), exist_ok=True)
+        index_path: str = os.path.join(cache_dir, index_filename)
+        if os.path.exists(index_path):
+            with open(index_path, 'r') as fileobj:
+                for key, entry in json.load(fileobj)['entries']:
+                    # Skip entries whose bodies were deleted outside of the cache.
+                    if os.path.exists(self.blob_path(entry['sha256'])):
+                        self.add_entry(key, entry)
+        self.remove_unreferenced_blobs()
+        self.evict()
+
+    def remove_unreferenced_blobs(self) -> int:
+        """
+        Returns: number of files deleted from <cache_dir>/objects/
+        """
+        removed: int = 0
+        for dir_path, dir_names, filenames in os.walk(os.path.join(self.cache_dir, 'objects')):
+            for filename in filenames:
+                # Temporary files of interrupted writes end in .tmp, and are never referenced.
+                if filename not in self.references_by_sha256:
+                    os.remove(os.path.join(dir_path, filename))
+                    removed += 1
+        return removed
+
+    def evict(self):
+        """
+        Evicts least recently used entries until the bodies fit in max_bytes. The most recently used entry is kept even
+        if it doesn't fit. Must be called with the lock held, or before the cache is shared between threads.
+        """
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            self.remove_entry(next(iter(self.entries)))
+            self.evictions += 1
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.cache_dir, 'objects', sha256[:2], sha256)
+
+    def add_entry(self, key: str, entry: Dict):
+        self.entries[key] = entry
+        self.total_bytes += entry['size']
+        self.references_by_sha256[entry['sha256']] = self.references_by_sha256.get(entry['sha256'], 0) + 1
+
+    def remove_entry(self, key: str):
+        entry: Dict = self.entries.pop(key)
+        self.total_bytes -= entry['size']
+        self.release(entry['sha256'])
+
+    def release(self, sha256: str):
+        """
+        Deletes the body with the given hash if no entries reference it.
+        """
+        references: int = self.references_by_sha256[sha256] - 1
+        if references == 0:
+            del self.references_by_sha256[sha256]
+            try:
+                os.remove(self.blob_path(sha256))
+            except FileNotFoundError:
+                pass
+        else:
+            self.references_by_sha256[sha256] = references
+
+    def bucket(self, bucket_name: str) -> CachedBucket:
+        return CachedBucket(self, bucket_name)
+
+    def get(self, bucket_name: str, object) -> Optional[bytes]:
+        """
+        Args:
+            bucket_name:
+            object: boto3 s3.ObjectSummary, or an object with the same key and e_tag attributes and get() method
+
+        Returns: the object's body, from the cache if it has an entry with the object's ETag. None if offline and the
+            object isn't cached.
+        """
+        key: str = entry_key(bucket_name, object.key)
+        e_tag: str = object.e_tag
+        with self.lock:
+            entry: Optional[Dict] = self.entries.get(key)
+            if entry is not None and entry['e_tag'] == e_tag:
+                self.entries.move_to_end(key)
+
+        if entry is not None and entry['e_tag'] == e_tag:
+            try:
+                with open(self.blob_path(entry['sha256']), 'rb') as fileobj:
+                    body: bytes = fileobj.read()
+                with self.lock:
+                    self.hits += 1
+                    self.bytes_read += len(body)
+                return body
+            except FileNotFoundError:
+                # Evicted by another thread after the lookup
+                pass
+
+        with self.lock:
+            self.misses += 1
+        if self.offline:
+            return None
+
+        body = object.get()['Body'].read()
+        self.put(bucket_name, object.key, e_tag, body)
+        with self.lock:
+            self.bytes_downloaded += len(body)
+        return body
+
+    def put(self, bucket_name: str, object_key: str, e_tag: str, body: bytes):
+        sha256: str = hashlib.sha256(body).hexdigest()
+        blob_path: str = self.blob_path(sha256)
+        # Unique temporary name, so threads writing the same body don't collide
+        temp_path: str = '{0}.{1}.tmp'.format(blob_path, uuid.uuid4().hex)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        with open(temp_path, 'wb') as fileobj:
+            fileobj.write(body)
+
+        key: str = entry_key(bucket_name, object_key)
+        with self.lock:
+            # Replaced under the lock, so an eviction can't delete the body before the entry is added.
+            os.replace(temp_path, blob_path)
+            previous_entry: Optional[Dict] = self.entries.pop(key, None)
+            self.add_entry(key, {'e_tag': e_tag, 'sha256': sha256, 'size': len(body)})
+            # Released after the new entry is added, in case the new entry has the same body.
+            if previous_entry is not None:
+                self.total_bytes -= previous_entry['size']
+                self.release(previous_entry['sha256'])
+            self.evict()
+
+    def metrics(self) -> Dict:
+        with self.lock:
+            requests: int = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests > 0 else 0,
+                'evictions': self.evictions,
+                'bytes_read': self.bytes_read,
+                'bytes_downloaded': self.bytes_downloaded,
+                'entries': len(self.entries),
+                'total_bytes': self.total_bytes,
+            }
+
+    def save(self):
+        """
+        Saves the index, in least to most recently used order. Writes to a temporary file first, so an interrupted save
+        can't corrupt the index.
+        """
+        index_path: str = os.path.join(self.cache_dir, index_filename)
+        temp_path: str = index_path + '.tmp'
+        with self.lock:
+            entries = list(self.entries.items())
+        with open(temp_path, 'w') as fileobj:
+            json.dump({'entries': entries}, fileobj)
+        os.replace(temp_path, index_path)
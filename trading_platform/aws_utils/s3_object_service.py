@@ -1,28 +1,108 @@
+"""
+Fetches ticker objects from S3 and writes them to csv files by time window.
+
+window_objects() buffers all objects of a window in memory. window_objects_streaming() keeps at most max_in_flight
+object bodies in memory, parses each object into typed columns as soon as it arrives, and appends the rows to the
+window's output file of each version every flush_rows rows, so memory use doesn't depend on the size of the window.
+"""
 import csv
 import datetime
+import io
 import os
 import random
 import time
 import traceback
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from typing import List, Dict, Optional, Set, Tuple
 
 import boto3
 import pandas
 from botocore.exceptions import EndpointConnectionError
 
+from trading_platform.aws_utils.s3_object_cache import S3ObjectCache
 from trading_platform.core.services.file_service import FileService
 
 
+class VersionedCsvWriter:
+    """
+    Buffers parsed rows by version, and appends them to the csv file of each version every flush_rows rows. Each file is
+    truncated when its first rows are written.
+    """
+    def __init__(self, output_dir: str, file_prefix_template: str, flush_rows: int):
+        """
+        Args:
+            output_dir:
+            file_prefix_template: format string with a {0} for the version. Example, 'ticker_v{0}_2018-05-01'
+            flush_rows:
+        """
+        self.output_dir = output_dir
+        self.file_prefix_template = file_prefix_template
+        self.flush_rows = flush_rows
+        self.buffers_by_version: Dict[str, List[pandas.DataFrame]] = {}
+        self.buffered_rows_by_version: Dict[str, int] = {}
+        # Columns of each version's file, from the first rows written to it
+        self.columns_by_version: Dict[str, List[str]] = {}
+        self.rows_written: int = 0
+
+    def output_filepath(self, version: str) -> str:
+        # Example, ticker_v1_2018-05-01.csv
+        return os.path.join(self.output_dir, '{0}.csv'.format(self.file_prefix_template.format(version)))
+
+    def add(self, df: pandas.DataFrame):
+        # Deal with the case in which the file name doesn't match the version of the file, and a case in which a file
+        # has data for multiple versions. See ticker_schema_version_changelog.md for details.
+        for version, df_for_version in df.groupby('version', sort=False):
+            version = str(version)
+            self.buffers_by_version.setdefault(version, []).append(df_for_version)
+            self.buffered_rows_by_version[version] = self.buffered_rows_by_version.get(version, 0) + len(
+                df_for_version)
+            if self.buffered_rows_by_version[version] >= self.flush_rows:
+                self.flush(version)
+
+    def flush(self, version: str):
+        buffer: List[pandas.DataFrame] = self.buffers_by_version.pop(version, [])
+        self.buffered_rows_by_version.pop(version, None)
+        if len(buffer) == 0:
+            return
+        df: pandas.DataFrame = pandas.concat(buffer, ignore_index=True, sort=False)
+        columns: Optional[List[str]] = self.columns_by_version.get(version)
+        if columns is None:
+            self.columns_by_version[version] = list(df.columns)
+            df.to_csv(self.output_filepath(version), index=False, mode='w')
+        else:
+            df.reindex(columns=columns).to_csv(self.output_filepath(version), index=False, header=False, mode='a')
+        self.rows_written += len(df)
+
+    def close(self):
+        for version in list(self.buffers_by_version):
+            self.flush(version)
+
+
 class S3ObjectService():
-    def __init__(self, bucket_name='arbitrage-bot', object_type='ticker', object_version='0', max_workers=1500):
+    def __init__(self, bucket_name='arbitrage-bot', object_type='ticker', object_version='0', max_workers=32,
+                 bucket=None, cache: Optional[S3ObjectCache] = None):
+        """
+        Args:
+            bucket_name:
+            object_type:
+            object_version:
+            max_workers: threads that fetch objects
+            bucket: bucket to use instead of connecting to bucket_name, for example a LocalBucket
+            cache: if set, object bodies are read through the cache. If the cache is offline, objects are also listed
+                from the cache.
+        """
         self.bucket_name = bucket_name
         self.object_type = object_type
         self.object_version = object_version
         self.max_workers = max_workers
-        # self.max_workers = 2
+        self.bucket = bucket
+        self.cache = cache
 
     def bucket_connection(self):
+        if self.cache is not None and self.cache.offline:
+            return self.cache.bucket(self.bucket_name)
+        if self.bucket is not None:
+            return self.bucket
         session = boto3.session.Session()
         s3 = session.resource('s3')
         return s3.Bucket(self.bucket_name)
@@ -37,6 +117,14 @@ class S3ObjectService():
 
         return output_file, prefix
 
+    def read_object(self, object) -> Optional[bytes]:
+        """
+        Returns: the object's body, through the cache if there is one
+        """
+        if self.cache is not None:
+            return self.cache.get(self.bucket_name, object)
+        return object.get()['Body'].read()
+
     def get_data_for_object(self, object) -> Tuple[str, Optional[str]]:
         """
 
@@ -48,9 +136,8 @@ class S3ObjectService():
         """
         for attempt in range(3):
             try:
-                response: Dict = object.get()
-                body: str = response['Body'].read().decode('utf-8')
-                return object.key, body
+                body: Optional[bytes] = self.read_object(object)
+                return object.key, body.decode('utf-8') if body is not None else None
             except EndpointConnectionError:
                 print('Failed endpoint connection when fetching object {0}'.format(object.key))
                 time.sleep(random.randint(4, 10))
@@ -99,7 +186,7 @@ class S3ObjectService():
             datetime_prefix = datetime_instance.strftime(strftime)
             file_prefix = '{0}_v{1}_{2}'.format(self.object_type, self.object_version, datetime_prefix)
             prefix = '{0}/{1}'.format(self.object_type, file_prefix)
-            objects = self.bucket_connection().objects.filter(Prefix=prefix)
+            objects = list(self.bucket_connection().objects.filter(Prefix=prefix))
             successes: List[str] = []
             failures: List[str] = []
             data_for_prefix: List = []
@@ -159,12 +246,131 @@ class S3ObjectService():
                 print('No objects found with prefix {0}'.format(prefix))
 
             end = time.time()
-            print('Fetched and wrote data for {0} objects in {1} seconds'.format(len(list(objects.all())), (end - start)))
+            print('Fetched and wrote data for {0} objects in {1} seconds'.format(len(objects), (end - start)))
 
         generator = FileService.datetime_generator(start_datetime, end_datetime, timedelta)
         list(map(fetch_and_write_objects_with_datetime_prefix, generator))
         end_windowing = time.time()
         print('Windowed data in {0} seconds'.format(end_windowing - start_windowing))
+        self.save_cache()
+
+    def window_prefixes(self, start_datetime: datetime.datetime, end_datetime: datetime.datetime,
+                        timedelta: datetime.timedelta, strftime: str) -> List[Tuple[str, str]]:
+        """
+        Returns: (datetime prefix, object key prefix) of each window
+        """
+        prefixes: List[Tuple[str, str]] = []
+        for datetime_instance in FileService.datetime_generator(start_datetime, end_datetime, timedelta):
+            datetime_prefix: str = datetime_instance.strftime(strftime)
+            prefixes.append((datetime_prefix, '{0}/{0}_v{1}_{2}'.format(self.object_type, self.object_version,
+                                                                         datetime_prefix)))
+        return prefixes
+
+    @staticmethod
+    def parse_object_body(body: bytes) -> Optional[pandas.DataFrame]:
+        """
+        Parses an object into typed columns. Repeated header lines and rows without a version are dropped.
+        """
+        lines: List[bytes] = body.replace(b'\r', b'').split(b'\n')
+        lines = lines[:1] + [line for line in lines[1:] if line and not line.startswith(b'ask')]
+        if len(lines) < 2:
+            return None
+        df: pandas.DataFrame = pandas.read_csv(io.BytesIO(b'\n'.join(lines)))
+        if 'version' not in df.columns:
+            return None
+        return df[df['version'].notnull()]
+
+    def get_body_for_object(self, object) -> Tuple[str, Optional[bytes]]:
+        for attempt in range(3):
+            try:
+                return object.key, self.read_object(object)
+            except EndpointConnectionError:
+                print('Failed endpoint connection when fetching object {0}'.format(object.key))
+                time.sleep(random.randint(4, 10))
+
+        return object.key, None
+
+    def window_objects_streaming(self, output_dir: str, start_datetime: datetime.datetime,
+                                 end_datetime: datetime.datetime, timedelta: datetime.timedelta, strftime: str,
+                                 max_in_flight: Optional[int] = None, flush_rows: int = 100000) -> Dict:
+        """
+        Windows objects according to timedelta, and writes to output_dir, like window_objects(), with memory use bounded
+        by max_in_flight and flush_rows rather than by the size of each window. Rows in each file are not in the same
+        order as the objects.
+
+        Args:
+            output_dir:
+            start_datetime:
+            end_datetime:
+            timedelta:
+            strftime:
+            max_in_flight: maximum objects being fetched or waiting to be parsed. Defaults to 2 * max_workers.
+            flush_rows: rows of a version to buffer before appending them to the version's file
+
+        Returns: number of objects and rows windowed, and seconds taken
+        """
+        start_windowing: float = time.time()
+        FileService.create_dir_if_null(output_dir)
+        max_in_flight = max_in_flight if max_in_flight is not None else 2 * self.max_workers
+        bucket = self.bucket_connection()
+        num_objects: int = 0
+        num_rows: int = 0
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max_in_flight)) as executor:
+            for datetime_prefix, prefix in self.window_prefixes(start_datetime, end_datetime, timedelta, strftime):
+                start: float = time.time()
+                writer: VersionedCsvWriter = VersionedCsvWriter(
+                    output_dir, '{0}_v{{0}}_{1}'.format(self.object_type, datetime_prefix), flush_rows)
+                failures: List[str] = []
+                pending: Set[Future] = set()
+                objects_in_window: int = 0
+
+                def handle(done: Set[Future]):
+                    for future in done:
+                        try:
+                            object_key, body = future.result()
+                        except Exception:
+                            traceback.print_exc()
+                            failures.append('exception')
+                            continue
+                        if body is None:
+                            failures.append(object_key)
+                            continue
+                        df: Optional[pandas.DataFrame] = self.parse_object_body(body)
+                        if df is not None:
+                            writer.add(df)
+
+                # Objects are listed lazily, and listing waits while max_in_flight objects are pending.
+                for object in bucket.objects.filter(Prefix=prefix):
+                    if len(pending) >= max_in_flight:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        handle(done)
+                    pending.add(executor.submit(self.get_body_for_object, object))
+                    objects_in_window += 1
+                handle(pending)
+                writer.close()
+
+                if len(failures) > 0:
+                    list(map(print, failures))
+                    raise Exception('failed to fetch one of the objects in the window')
+                if objects_in_window == 0:
+                    print('No objects found with prefix {0}'.format(prefix))
+
+                num_objects += objects_in_window
+                num_rows += writer.rows_written
+                print('Fetched and wrote data for {0} objects in {1} seconds'.format(objects_in_window,
+                                                                                     time.time() - start))
+
+        seconds: float = time.time() - start_windowing
+        print('Windowed data in {0} seconds'.format(seconds))
+        self.save_cache()
+        return {'objects': num_objects, 'rows': num_rows, 'seconds': seconds,
+                'cache': self.cache.metrics() if self.cache is not None else None}
+
+    def save_cache(self):
+        if self.cache is not None:
+            self.cache.save()
+            print('Cache metrics: {0}'.format(self.cache.metrics()))
 
     @staticmethod
     def is_header_line(line):
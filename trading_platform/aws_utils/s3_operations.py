@@ -1,49 +1,140 @@
+"""
+Writes results such as tickers to S3 or to local disk.
+
+Results are serialized in one pass to csv, gzipped csv, or parquet bytes, then uploaded with a single PUT, or a multipart
+upload if the payload is larger than multipart_threshold_bytes. The local disk branch writes the same bytes.
+"""
 import csv
+import decimal
+import gzip
 import io
 import os
+import time
 from datetime import datetime
+from typing import Dict, List
 
-import smart_open
+import boto3
+import pandas
+from boto3.s3.transfer import TransferConfig
 
 from trading_platform.exchanges.data.ticker import Ticker
 
 LOCAL_DATA_DIR = "/Users/shanekeller/Documents/arbitrage_bot/data"
 
+extensions_by_output_format: Dict[str, str] = {
+    'csv': 'csv',
+    'csv.gz': 'csv.gz',
+    'parquet': 'parquet',
+}
+gzip_compress_level: int = 6
+multipart_threshold_bytes: int = 64 * 1024 * 1024
+
+
+def write_tickers(write_to_s3, bucket='arbitrage-bot', tickers=[], output_format='csv', s3_bucket=None):
+    return write_result(write_to_s3, bucket, tickers, Ticker, Ticker.current_version, output_format=output_format,
+                        s3_bucket=s3_bucket)
+
+
+def serialize_results(results, fieldnames: List[str], output_format: str = 'csv') -> bytes:
+    """
+    Args:
+        results: objects with an attribute for each fieldname
+        fieldnames:
+        output_format: one of extensions_by_output_format
 
-def write_tickers(write_to_s3, bucket='arbitrage-bot', tickers=[]):
-    return write_result(write_to_s3, bucket, tickers, Ticker, Ticker.current_version)
+    Returns: serialized results, with a header row for csv formats
+    """
+    rows: List[List] = [[getattr(result, fieldname) for fieldname in fieldnames] for result in results]
 
+    if output_format == 'parquet':
+        df: pandas.DataFrame = pandas.DataFrame(rows, columns=fieldnames)
+        for column in df.columns:
+            # Decimal columns, such as FinancialData fields, are written as doubles.
+            non_null = df[column].dropna()
+            if len(non_null) > 0 and isinstance(non_null.iloc[0], decimal.Decimal):
+                df[column] = df[column].astype(float)
+        buffer: io.BytesIO = io.BytesIO()
+        df.to_parquet(buffer, index=False)
+        return buffer.getvalue()
+
+    string_buffer: io.StringIO = io.StringIO()
+    writer = csv.writer(string_buffer)
+    writer.writerow(fieldnames)
+    writer.writerows(rows)
+    payload: bytes = string_buffer.getvalue().encode('utf-8')
+    if output_format == 'csv.gz':
+        # mtime=0 so identical results produce identical objects
+        return gzip.compress(payload, compresslevel=gzip_compress_level, mtime=0)
+    return payload
+
+
+def upload(s3_bucket, key: str, payload: bytes):
+    """
+    Args:
+        s3_bucket: boto3 s3.Bucket, or a LocalBucket
+        key:
+        payload:
+    """
+    if len(payload) < multipart_threshold_bytes:
+        s3_bucket.put_object(Key=key, Body=payload)
+    else:
+        s3_bucket.upload_fileobj(io.BytesIO(payload), key, Config=TransferConfig(
+            multipart_threshold=multipart_threshold_bytes, multipart_chunksize=multipart_threshold_bytes))
 
-def write_result(write_to_s3, bucket, results, result_class, file_version, filename_date_suffix=True):
+
+def write_result_report(write_to_s3, bucket, results, result_class, file_version, filename_date_suffix=True,
+                        output_format='csv', s3_bucket=None, local_data_dir=LOCAL_DATA_DIR) -> Dict:
+    """
+    Args:
+        write_to_s3:
+        bucket: name of the bucket
+        results:
+        result_class:
+        file_version:
+        filename_date_suffix:
+        output_format: one of extensions_by_output_format
+        s3_bucket: bucket to write to instead of connecting to bucket, for example a LocalBucket
+        local_data_dir:
+
+    Returns: filepath written to, size of the payload in bytes, and seconds taken to serialize and to upload or write
+    """
     result_class_name = result_class.__name__.lower()
     date_suffix = '_{0}'.format(datetime.utcnow().strftime("%Y-%m-%dT%H:%M")) if filename_date_suffix else ''
-    filename = '{0}_v{1}{2}.csv'.format(result_class_name, file_version, date_suffix)
-    fieldnames = result_class.csv_fieldnames()
-    if write_to_s3:
-        filepath = '{0}/{1}/{2}'.format(bucket, result_class_name, filename)
-        with smart_open.smart_open('s3://{0}'.format(filepath), 'wb') as fout:
-            string_buffer = io.StringIO()
-            writer = csv.DictWriter(string_buffer, fieldnames=fieldnames)
-            writer.writeheader()
-            fout.write(string_buffer.getvalue().encode('utf-8'))
+    filename = '{0}_v{1}{2}.{3}'.format(result_class_name, file_version, date_suffix,
+                                        extensions_by_output_format[output_format])
 
-            for result in results:
-                string_buffer.seek(0)
-                string_buffer.truncate(0)
+    results = list(results)
+    start: float = time.time()
+    payload: bytes = serialize_results(results, result_class.csv_fieldnames(), output_format)
+    serialize_seconds: float = time.time() - start
 
-                writer.writerow(result.to_dict())
-
-                fout.write(string_buffer.getvalue().encode('utf-8'))
+    start = time.time()
+    if write_to_s3:
+        filepath = '{0}/{1}/{2}'.format(bucket, result_class_name, filename)
+        if s3_bucket is None:
+            s3_bucket = boto3.session.Session().resource('s3').Bucket(bucket)
+        upload(s3_bucket, '{0}/{1}'.format(result_class_name, filename), payload)
     else:
-        local_dir = os.path.join(LOCAL_DATA_DIR, result_class_name)
+        local_dir = os.path.join(local_data_dir, result_class_name)
         if not os.path.exists(local_dir):
             os.makedirs(local_dir)
         filepath = os.path.join(local_dir, filename)
-        with open(filepath, 'w+') as history:
-            writer = csv.DictWriter(history, fieldnames=fieldnames)
-            writer.writeheader()
+        with open(filepath, 'wb') as history:
+            history.write(payload)
+    write_seconds: float = time.time() - start
+
+    print('Serialized {0} results to {1} bytes in {2:.3f} seconds, wrote to {3} in {4:.3f} seconds'.format(
+        len(results), len(payload), serialize_seconds, filepath, write_seconds))
+    return {
+        'filepath': filepath,
+        'bytes': len(payload),
+        'serialize_seconds': serialize_seconds,
+        'write_seconds': write_seconds,
+    }
 
-            for result in results:
-                writer.writerow(result.to_dict())
 
-    return filepath
+def write_result(write_to_s3, bucket, results, result_class, file_version, filename_date_suffix=True,
+                 output_format='csv', s3_bucket=None, local_data_dir=LOCAL_DATA_DIR):
+    return write_result_report(write_to_s3, bucket, results, result_class, file_version,
+                               filename_date_suffix=filename_date_suffix, output_format=output_format,
+                               s3_bucket=s3_bucket, local_data_dir=local_data_dir)['filepath']
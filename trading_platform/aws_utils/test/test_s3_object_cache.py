@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from nose.tools import eq_
+
+from trading_platform.aws_utils.local_bucket import LocalBucket
+from trading_platform.aws_utils.s3_object_cache import S3ObjectCache
+
+bucket_name = 'arbitrage-bot'
+
+
+class TestS3ObjectCache(unittest.TestCase):
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.working_dir, 'cache')
+        self.bucket = LocalBucket(os.path.join(self.working_dir, bucket_name))
+        for index in range(3):
+            self.bucket.put_object(Key='ticker/object_{0}.csv'.format(index), Body='body {0}'.format(index))
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def get(self, cache, object_key):
+        return cache.get(bucket_name, self.bucket.Object(object_key))
+
+    def test_hits_and_misses(self):
+        cache = S3ObjectCache(self.cache_dir)
+        eq_(self.get(cache, 'ticker/object_0.csv'), b'body 0')
+        eq_(self.get(cache, 'ticker/object_0.csv'), b'body 0')
+        metrics = cache.metrics()
+        eq_((metrics['hits'], metrics['misses'], metrics['bytes_downloaded'], metrics['bytes_read']), (1, 1, 6, 6))
+
+        # A changed object has a new ETag, so it's downloaded again.
+        self.bucket.put_object(Key='ticker/object_0.csv', Body='new body')
+        eq_(self.get(cache, 'ticker/object_0.csv'), b'new body')
+        eq_(cache.metrics()['misses'], 2)
+        eq_(cache.metrics()['total_bytes'], 8)
+
+    def test_identical_bodies_are_stored_once(self):
+        self.bucket.put_object(Key='ticker/copy.csv', Body='body 0')
+        cache = S3ObjectCache(self.cache_dir)
+        self.get(cache, 'ticker/object_0.csv')
+        self.get(cache, 'ticker/copy.csv')
+        eq_(len(cache.references_by_sha256), 1)
+        eq_(cache.references_by_sha256[list(cache.references_by_sha256)[0]], 2)
+
+    def test_lru_eviction(self):
+        cache = S3ObjectCache(self.cache_dir, max_bytes=12)
+        self.get(cache, 'ticker/object_0.csv')
+        self.get(cache, 'ticker/object_1.csv')
+        # object_0 is now the most recently used
+        self.get(cache, 'ticker/object_0.csv')
+        self.get(cache, 'ticker/object_2.csv')
+
+        eq_(cache.metrics()['evictions'], 1)
+        eq_(sorted(cache.entries), ['arbitrage-bot/ticker/object_0.csv', 'arbitrage-bot/ticker/object_2.csv'])
+        blob_count = sum(len(filenames) for _, _, filenames in os.walk(os.path.join(self.cache_dir, 'objects')))
+        eq_(blob_count, 2)
+
+    def test_offline(self):
+        cache = S3ObjectCache(self.cache_dir)
+        self.get(cache, 'ticker/object_1.csv')
+        cache.save()
+
+        offline_cache = S3ObjectCache(self.cache_dir, offline=True)
+        eq_(self.get(offline_cache, 'ticker/object_1.csv'), b'body 1')
+        eq_(self.get(offline_cache, 'ticker/object_2.csv'), None)
+        cached_objects = list(offline_cache.bucket(bucket_name).objects.filter(Prefix='ticker/'))
+        eq_([cached_object.key for cached_object in cached_objects], ['ticker/object_1.csv'])
+        eq_(cached_objects[0].get()['Body'].read(), b'body 1')
+
+    def test_unreferenced_blobs_are_removed_on_open(self):
+        cache = S3ObjectCache(self.cache_dir)
+        self.get(cache, 'ticker/object_0.csv')
+        cache.save()
+        # Bodies written after the last save, before a crash, and a partially written body
+        self.get(cache, 'ticker/object_1.csv')
+        self.get(cache, 'ticker/object_2.csv')
+        saved_blob_path = cache.blob_path(cache.entries['arbitrage-bot/ticker/object_0.csv']['sha256'])
+        with open(saved_blob_path + '.0123.tmp', 'wb') as fileobj:
+            fileobj.write(b'body')
+
+        reopened_cache = S3ObjectCache(self.cache_dir)
+        blob_paths = [os.path.join(dir_path, filename) for dir_path, _, filenames in
+                      os.walk(os.path.join(self.cache_dir, 'objects')) for filename in filenames]
+        eq_(blob_paths, [saved_blob_path])
+        eq_(reopened_cache.metrics()['total_bytes'], 6)
+
+    def test_index_larger_than_max_bytes_is_evicted_on_open(self):
+        cache = S3ObjectCache(self.cache_dir)
+        for index in range(3):
+            self.get(cache, 'ticker/object_{0}.csv'.format(index))
+        cache.save()
+
+        reopened_cache = S3ObjectCache(self.cache_dir, max_bytes=12)
+        eq_(sorted(reopened_cache.entries), ['arbitrage-bot/ticker/object_1.csv', 'arbitrage-bot/ticker/object_2.csv'])
+        blob_count = sum(len(filenames) for _, _, filenames in os.walk(os.path.join(self.cache_dir, 'objects')))
+        eq_(blob_count, 2)
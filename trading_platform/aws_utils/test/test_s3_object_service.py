@@ -1,16 +1,19 @@
 import datetime
 import os
 import shutil
+import tempfile
 import unittest
 
 import pandas
-from nose.tools import eq_, assert_true
+from nose.tools import eq_, assert_raises, assert_true
 
+from trading_platform.aws_utils.local_bucket import LocalBucket
+from trading_platform.aws_utils.s3_object_cache import S3ObjectCache
 from trading_platform.aws_utils.s3_object_service import S3ObjectService
 from trading_platform.core.services.file_service import FileService
 from trading_platform.core.test.util_methods import disable_debug_logging
 from trading_platform.exchanges.data.ticker import Ticker
-from trading_platform.utils.datetime_operations import strftime_minutes, strftime_hours
+from trading_platform.utils.datetime_operations import strftime_days, strftime_minutes, strftime_hours
 
 
 @unittest.skip('this service doesn\'t work reliably yet because s3 reads time out.' )
@@ -56,4 +59,79 @@ class TestS3ObjectService(unittest.TestCase):
         eq_(len(df.columns), len(Ticker.csv_fieldnames()))
         for fieldname in Ticker.csv_fieldnames():
             print(fieldname)
-            assert_true(fieldname in df.columns)
\ No newline at end of file
+            assert_true(fieldname in df.columns)
+
+def ticker_object_body(version, timestamps):
+    lines = ['ask,bid,app_create_timestamp,version']
+    for timestamp in timestamps:
+        lines.append('1.5,1.0,{0},{1}'.format(timestamp, version))
+    return '\r\n'.join(lines) + '\r\n'
+
+
+class TestS3ObjectServiceLocalBucket(unittest.TestCase):
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.working_dir, 'output')
+        self.bucket = LocalBucket(os.path.join(self.working_dir, 'arbitrage-bot'))
+        for minute in range(10):
+            self.bucket.put_object(Key='ticker/ticker_v0_2018-05-01T00:{0:02d}.csv'.format(minute),
+                                   Body=ticker_object_body(1, [minute * 60 + second for second in range(3)]))
+        # Object with rows of two versions and a repeated header
+        self.bucket.put_object(Key='ticker/ticker_v0_2018-05-02T00:00.csv',
+                               Body=ticker_object_body(1, [86400]) + ticker_object_body(2, [86401, 86402]))
+        self.s3_object_service = S3ObjectService(object_version='0', max_workers=2, bucket=self.bucket)
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def window(self, streaming, **kwargs):
+        window_objects = self.s3_object_service.window_objects_streaming if streaming else \
+            self.s3_object_service.window_objects
+        return window_objects(output_dir=self.output_dir, start_datetime=datetime.datetime(2018, 5, 1),
+                              end_datetime=datetime.datetime(2018, 5, 3), timedelta=datetime.timedelta(days=1),
+                              strftime=strftime_days, **kwargs)
+
+    def test_window_objects_streaming(self):
+        summary = self.window(streaming=True, max_in_flight=3, flush_rows=4)
+        eq_(summary['objects'], 11)
+        eq_(summary['rows'], 33)
+        eq_(sorted(os.listdir(self.output_dir)), ['ticker_v1_2018-05-01.csv', 'ticker_v1_2018-05-02.csv',
+                                                  'ticker_v2_2018-05-02.csv'])
+        df = pandas.read_csv(os.path.join(self.output_dir, 'ticker_v1_2018-05-01.csv'))
+        eq_(sorted(df['app_create_timestamp'].tolist()), [minute * 60 + second for minute in range(10) for second in
+                                                          range(3)])
+        eq_(df['ask'].unique().tolist(), [1.5])
+        df = pandas.read_csv(os.path.join(self.output_dir, 'ticker_v2_2018-05-02.csv'))
+        eq_(df['app_create_timestamp'].tolist(), [86401, 86402])
+
+    def test_streaming_matches_buffered(self):
+        self.window(streaming=False, multithreading=True)
+        buffered_df = pandas.read_csv(os.path.join(self.output_dir, 'ticker_v1_2018-05-01.csv'))
+        # Rewindowing overwrites the previous files.
+        self.window(streaming=True, flush_rows=1)
+        streamed_df = pandas.read_csv(os.path.join(self.output_dir, 'ticker_v1_2018-05-01.csv'))
+        eq_(sorted(streamed_df['app_create_timestamp'].tolist()),
+            sorted(buffered_df['app_create_timestamp'].tolist()))
+
+    def test_failed_object(self):
+        self.s3_object_service.get_body_for_object = lambda object: (object.key, None)
+        with assert_raises(Exception):
+            self.window(streaming=True)
+
+    def test_window_objects_with_cache(self):
+        cache_dir = os.path.join(self.working_dir, 'cache')
+        self.s3_object_service.cache = S3ObjectCache(cache_dir)
+        summary = self.window(streaming=True)
+        eq_(summary['cache']['misses'], 11)
+
+        summary = self.window(streaming=True)
+        eq_(summary['cache']['hits'], 11)
+
+        # Offline windowing doesn't need the bucket.
+        shutil.rmtree(self.bucket.root_dir)
+        os.remove(os.path.join(self.output_dir, 'ticker_v1_2018-05-01.csv'))
+        self.s3_object_service = S3ObjectService(object_version='0', bucket_name=self.bucket.name,
+                                                 cache=S3ObjectCache(cache_dir, offline=True))
+        summary = self.window(streaming=True)
+        eq_((summary['objects'], summary['rows']), (11, 33))
+        eq_(len(pandas.read_csv(os.path.join(self.output_dir, 'ticker_v1_2018-05-01.csv'))), 30)
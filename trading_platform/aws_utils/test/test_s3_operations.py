@@ -0,0 +1,70 @@
+import csv
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas
+from nose.tools import eq_
+
+from trading_platform.aws_utils import s3_operations
+from trading_platform.aws_utils.local_bucket import LocalBucket
+from trading_platform.aws_utils.s3_operations import serialize_results, write_result_report, write_tickers
+from trading_platform.exchanges.data.enums import exchange_ids
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.ticker import Ticker
+
+
+def tickers(num_tickers):
+    return [Ticker(base='BTC', quote='ETH', exchange_id=exchange_ids.binance, ask=FinancialData('0.0501'),
+                   bid=FinancialData('0.05'), last=FinancialData('0.0505'), base_volume=None, quote_volume=None,
+                   app_create_timestamp=1527811200.0 + index, version=Ticker.current_version) for index in
+            range(num_tickers)]
+
+
+class TestS3Operations(unittest.TestCase):
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+        self.bucket = LocalBucket(os.path.join(self.working_dir, 'arbitrage-bot'))
+        self.multipart_threshold_bytes = s3_operations.multipart_threshold_bytes
+
+    def tearDown(self):
+        s3_operations.multipart_threshold_bytes = self.multipart_threshold_bytes
+        shutil.rmtree(self.working_dir)
+
+    def test_csv_matches_dict_writer(self):
+        string_buffer = io.StringIO()
+        writer = csv.DictWriter(string_buffer, fieldnames=Ticker.csv_fieldnames())
+        writer.writeheader()
+        for ticker in tickers(3):
+            writer.writerow(ticker.to_dict())
+        eq_(serialize_results(tickers(3), Ticker.csv_fieldnames()).decode('utf-8'), string_buffer.getvalue())
+
+    def test_write_tickers_to_s3(self):
+        filepath = write_tickers(True, bucket='arbitrage-bot', tickers=tickers(2), output_format='csv.gz',
+                                 s3_bucket=self.bucket)
+        key = filepath[len('arbitrage-bot/'):]
+        eq_(key.startswith('ticker/ticker_v5_'), True)
+        eq_(key.endswith('.csv.gz'), True)
+        df = pandas.read_csv(io.BytesIO(gzip.decompress(self.bucket.Object(key).get()['Body'].read())))
+        eq_(df['ask'].tolist(), [0.0501, 0.0501])
+        eq_(list(df.columns), Ticker.csv_fieldnames())
+
+    def test_multipart_upload(self):
+        s3_operations.multipart_threshold_bytes = 10
+        report = write_result_report(True, 'arbitrage-bot', tickers(2), Ticker, Ticker.current_version,
+                                     filename_date_suffix=False, s3_bucket=self.bucket)
+        eq_(report['filepath'], 'arbitrage-bot/ticker/ticker_v5.csv')
+        eq_(len(self.bucket.Object('ticker/ticker_v5.csv').get()['Body'].read()), report['bytes'])
+
+    def test_write_parquet_locally(self):
+        report = write_result_report(False, 'arbitrage-bot', tickers(3), Ticker, Ticker.current_version,
+                                     filename_date_suffix=False, output_format='parquet',
+                                     local_data_dir=self.working_dir)
+        eq_(report['filepath'], os.path.join(self.working_dir, 'ticker', 'ticker_v5.parquet'))
+        df = pandas.read_parquet(report['filepath'])
+        eq_(df['bid'].tolist(), [0.05, 0.05, 0.05])
+        eq_(df['app_create_timestamp'].tolist(), [1527811200.0, 1527811201.0, 1527811202.0])
+        eq_(report['serialize_seconds'] >= 0 and report['write_seconds'] >= 0, True)
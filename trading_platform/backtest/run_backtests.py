@@ -0,0 +1,159 @@
+"""
+Runs a backtest for every combination of strategy parameters in a parameter grid.
+
+Combinations are sharded over a process pool. Each worker process builds its own BacktestExchangeService instances via
+backtest_subclasses.instantiate() and its own ProfitService per combination, so no exchange or profit state is shared
+between backtests.
+
+The ticker history is written once to a TickerArchive file, and every worker memory-maps that file. The history is
+therefore read-only, shared through the OS page cache, and never pickled to the workers. Only the parameter
+combinations and the resulting profit summary rows cross process boundaries.
+"""
+import datetime
+import itertools
+import multiprocessing
+import os
+import shutil
+import tempfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas
+
+from trading_platform.analytics.profit_service import ProfitService
+from trading_platform.exchanges.backtest import backtest_subclasses
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.ticker import Ticker
+from trading_platform.exchanges.exchange_service_abc import ExchangeServiceAbc
+from trading_platform.exchanges.ticker_archive import TickerArchive, write_ticker_archive
+from trading_platform.strategy.services.strategy_executer_service_abc import StrategyExecuterServiceAbc
+
+# Set in each worker process by init_worker()
+worker_ticker_archive: Optional[TickerArchive] = None
+
+
+def parameter_combinations(parameter_grid: Dict[str, List]) -> List[Dict]:
+    """
+    Args:
+        parameter_grid: Example, {'short_ema_periods': [5, 10], 'long_ema_periods': [20, 50]}
+
+    Returns: Example, [{'short_ema_periods': 5, 'long_ema_periods': 20}, {'short_ema_periods': 5, 'long_ema_periods': 50},
+        ...]
+
+    """
+    parameter_names: List[str] = sorted(parameter_grid.keys())
+    return [dict(zip(parameter_names, values)) for values in
+            itertools.product(*[parameter_grid[parameter_name] for parameter_name in parameter_names])]
+
+
+def init_worker(ticker_archive_path: str):
+    global worker_ticker_archive
+    worker_ticker_archive = TickerArchive(ticker_archive_path)
+
+
+def run_backtest(strategy_factory: Callable[..., StrategyExecuterServiceAbc], parameters: Dict,
+                 initial_balances: Dict[int, Dict[str, FinancialData]], summary_interval: Optional[int]) -> List[Dict]:
+    """
+    Run a single backtest over the ticker history of the current worker process.
+
+    Returns: the profit summary rows of the backtest, each including the parameters of the backtest.
+
+    """
+    exchanges_by_id: Dict[int, ExchangeServiceAbc] = backtest_subclasses.instantiate()
+    for exchange_id, balances in initial_balances.items():
+        for currency, amount in balances.items():
+            exchanges_by_id[exchange_id].deposit_immediately(currency, amount)
+
+    strategy: StrategyExecuterServiceAbc = strategy_factory(**parameters)
+    profit_service: Optional[ProfitService] = None
+    rows: List[Dict] = []
+
+    step_bounds: List[Tuple[int, int]] = worker_ticker_archive.step_bounds()
+    num_steps: int = len(step_bounds)
+    for step_index, (step_start, step_end) in enumerate(step_bounds):
+        timestamp: float = float(worker_ticker_archive.timestamps[step_start])
+        tickers_by_exchange: Dict[int, Dict[str, Ticker]] = worker_ticker_archive.tickers_by_exchange(step_start,
+                                                                                                      step_end)
+        # ProfitService assumes that tickers are the same across all exchanges.
+        tickers_by_pair_name: Dict[str, Ticker] = {}
+        for exchange_id, exchange in exchanges_by_id.items():
+            exchange_tickers: Dict[str, Ticker] = tickers_by_exchange.get(exchange_id, {})
+            exchange.set_tickers(exchange_tickers)
+            exchange.update_pending_deposits(timestamp)
+            tickers_by_pair_name.update(exchange_tickers)
+
+        summary_datetime: datetime.datetime = datetime.datetime.utcfromtimestamp(timestamp)
+        if profit_service is None:
+            profit_service = ProfitService(exchanges_by_id=exchanges_by_id, initial_datetime=summary_datetime,
+                                           initial_tickers=tickers_by_pair_name)
+
+        strategy.step(exchanges_by_id=exchanges_by_id, tickers_by_pair_name=tickers_by_pair_name, timestamp=timestamp)
+
+        is_last_step: bool = step_index == num_steps - 1
+        if is_last_step or (summary_interval is not None and (step_index + 1) % summary_interval == 0):
+            rows.append(dict(parameters, **profit_service.profit_summary(summary_datetime, tickers_by_pair_name)))
+
+    return rows
+
+
+def run_backtest_star(args) -> List[Dict]:
+    return run_backtest(*args)
+
+
+class BacktestSweepRunner:
+    """
+    Example usage:
+        runner = BacktestSweepRunner(strategy_factory=EmaStrategy, ticker_df=ticker_df,
+                                     initial_balances={exchange_ids.binance: {'USDT': FinancialData(10000)}})
+        results_df = runner.run({'short_ema_periods': [5, 10], 'long_ema_periods': [20, 50]})
+    """
+
+    def __init__(self, strategy_factory: Callable[..., StrategyExecuterServiceAbc], ticker_df: pandas.DataFrame,
+                 initial_balances: Dict[int, Dict[str, FinancialData]], num_processes: Optional[int] = None,
+                 summary_interval: Optional[int] = None, working_dir: Optional[str] = None):
+        """
+        Args:
+            strategy_factory: called with the keyword arguments of a parameter combination. Must return a
+                StrategyExecuterServiceAbc whose step() accepts "exchanges_by_id", "tickers_by_pair_name", and
+                "timestamp" keyword arguments. Must be picklable, so should be a module-level class or function.
+            ticker_df: ticker history of all exchanges, such as the output of FileService.read_ticker_parquet(), in the
+                format accepted by write_ticker_archive().
+            initial_balances: amount of each currency deposited on each exchange before a backtest starts.
+            num_processes: defaults to os.cpu_count().
+            summary_interval: if set, record a profit summary every "summary_interval" ticker timestamps in addition
+                to the final one.
+            working_dir: directory for the ticker archive. Defaults to a temporary directory.
+        """
+        self.strategy_factory = strategy_factory
+        self.ticker_df: pandas.DataFrame = ticker_df
+        self.initial_balances: Dict[int, Dict[str, FinancialData]] = initial_balances
+        self.num_processes: int = num_processes if num_processes is not None else os.cpu_count()
+        self.summary_interval: Optional[int] = summary_interval
+        self.working_dir: Optional[str] = working_dir
+
+    def run(self, parameter_grid: Dict[str, List]) -> pandas.DataFrame:
+        """
+        Returns: one profit summary row per backtest summary, with a column for each parameter and each
+            ProfitService.profit_summary_fields field.
+
+        """
+        tasks: List = [(self.strategy_factory, parameters, self.initial_balances, self.summary_interval) for
+                       parameters in parameter_combinations(parameter_grid)]
+        if len(tasks) == 0:
+            return pandas.DataFrame()
+
+        working_dir: str = self.working_dir if self.working_dir is not None else tempfile.mkdtemp()
+        ticker_archive_path: str = write_ticker_archive(self.ticker_df,
+                                                        os.path.join(working_dir, 'ticker_history.tickers'))
+
+        try:
+            with multiprocessing.Pool(processes=min(self.num_processes, len(tasks)), initializer=init_worker,
+                                      initargs=(ticker_archive_path,)) as pool:
+                # chunksize of 1 so that a few slow backtests don't leave other workers idle
+                results: List[List[Dict]] = list(pool.imap_unordered(run_backtest_star, tasks, chunksize=1))
+        finally:
+            if self.working_dir is None:
+                shutil.rmtree(working_dir, ignore_errors=True)
+            else:
+                os.remove(ticker_archive_path)
+
+        return pandas.DataFrame(list(itertools.chain.from_iterable(results)))
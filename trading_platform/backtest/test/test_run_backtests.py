@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas
+from nose.tools import eq_, assert_greater, assert_true
+
+from trading_platform.analytics.profit_service import ProfitService
+from trading_platform.backtest import run_backtests
+from trading_platform.backtest.run_backtests import BacktestSweepRunner, parameter_combinations
+from trading_platform.exchanges.data.enums import exchange_ids
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.ticker_archive import write_ticker_archive
+from trading_platform.strategy.services.strategy_executer_service_abc import StrategyExecuterServiceAbc
+
+eth_usdt_pair = Pair(base='USDT', quote='ETH')
+btc_usdt_pair = Pair(base='USDT', quote='BTC')
+
+
+class ThresholdStrategy(StrategyExecuterServiceAbc):
+    """
+    Buys all ETH on Binance when the ask is below "buy_below", and sells all ETH when the bid is above "sell_above".
+    """
+
+    def __init__(self, buy_below, sell_above):
+        self.buy_below = FinancialData(buy_below)
+        self.sell_above = FinancialData(sell_above)
+        self.holding_eth = False
+
+    def step(self, **kwargs):
+        exchange = kwargs['exchanges_by_id'][exchange_ids.binance]
+        ticker = kwargs['tickers_by_pair_name'][eth_usdt_pair.name]
+        if not self.holding_eth and ticker.ask < self.buy_below:
+            exchange.buy_all(eth_usdt_pair, ticker.ask)
+            self.holding_eth = True
+        elif self.holding_eth and ticker.bid > self.sell_above:
+            exchange.sell_all(eth_usdt_pair, ticker.bid)
+            self.holding_eth = False
+
+
+def ticker_df(num_timestamps):
+    rows = []
+    for timestamp_index in range(num_timestamps):
+        eth_price = 400 + 50 * np.sin(timestamp_index / 5)
+        for pair, price in [(eth_usdt_pair, eth_price), (btc_usdt_pair, 5000)]:
+            rows.append({
+                'app_create_timestamp': 1530000000 + 60 * timestamp_index,
+                'exchange_id': exchange_ids.binance,
+                'base': pair.base,
+                'quote': pair.quote,
+                'bid': price - 1,
+                'ask': price + 1,
+                'last': price
+            })
+    return pandas.DataFrame(rows)
+
+
+class TestRunBacktests(unittest.TestCase):
+    def setUp(self):
+        self.initial_balances = {exchange_ids.binance: {'USDT': FinancialData(10000)}}
+        self.ticker_df = ticker_df(60)
+
+    def test_parameter_combinations(self):
+        combinations = parameter_combinations({'sell_above': [420, 440], 'buy_below': [360, 380, 400]})
+        eq_(len(combinations), 6)
+        eq_(combinations[0], {'buy_below': 360, 'sell_above': 420})
+        eq_(combinations[-1], {'buy_below': 400, 'sell_above': 440})
+
+    def test_init_worker(self):
+        working_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(working_dir.cleanup)
+        path = write_ticker_archive(self.ticker_df.sample(frac=1, random_state=1), os.path.join(working_dir.name, 'th'))
+        run_backtests.init_worker(path)
+
+        ticker_archive = run_backtests.worker_ticker_archive
+        # Cleanups run in reverse order, so the archive is closed before its directory is removed
+        self.addCleanup(ticker_archive.close)
+        eq_(len(ticker_archive), len(self.ticker_df))
+        assert_true((np.diff(ticker_archive.timestamps) >= 0).all())
+        # one step per timestamp
+        eq_(len(ticker_archive.step_bounds()), 60)
+
+    def test_run(self):
+        runner = BacktestSweepRunner(strategy_factory=ThresholdStrategy, ticker_df=self.ticker_df,
+                                     initial_balances=self.initial_balances, num_processes=2)
+        results_df = runner.run({'buy_below': [370, 400], 'sell_above': [420, 440]})
+
+        eq_(len(results_df), 4)
+        for field in ['buy_below', 'sell_above'] + ProfitService.profit_summary_fields:
+            assert_true(field in results_df.columns)
+        # buying near the bottom and selling near the top of each cycle is profitable
+        best = results_df.sort_values('gross_profits').iloc[-1]
+        assert_greater(best.gross_profits, 0)
+
+    def test_run_matches_single_process(self):
+        grid = {'buy_below': [370, 400], 'sell_above': [420]}
+        parallel_df = BacktestSweepRunner(strategy_factory=ThresholdStrategy, ticker_df=self.ticker_df,
+                                          initial_balances=self.initial_balances, num_processes=2).run(grid)
+        serial_df = BacktestSweepRunner(strategy_factory=ThresholdStrategy, ticker_df=self.ticker_df,
+                                        initial_balances=self.initial_balances, num_processes=1).run(grid)
+
+        sort_columns = ['buy_below', 'sell_above']
+        parallel_df = parallel_df.sort_values(sort_columns).reset_index(drop=True)
+        serial_df = serial_df.sort_values(sort_columns).reset_index(drop=True)
+        eq_(parallel_df.gross_profits.tolist(), serial_df.gross_profits.tolist())
+
+    def test_summary_interval(self):
+        runner = BacktestSweepRunner(strategy_factory=ThresholdStrategy, ticker_df=self.ticker_df,
+                                     initial_balances=self.initial_balances, num_processes=1, summary_interval=20)
+        results_df = runner.run({'buy_below': [370], 'sell_above': [420]})
+        # summaries at steps 20, 40, and 60, where 60 is also the last step
+        eq_(len(results_df), 3)
@@ -2,24 +2,60 @@
 Used for file-related operations such as finding csv files for exchanges, concatenating csv files into a dataframe,
 and grouping csv files by time.
 
+Also reads and writes ticker history as parquet files partitioned by exchange_id, pair_name, and day. Compared to the
+csv files, the columns are typed, so timestamps don't need to be parsed with a Python function, and reads only open the
+partitions and row groups that match the requested exchanges, pairs, and time range.
+
 Also performs other file operations such as creating parent directories for a new directory.
 """
 import csv
 import datetime
 import re
+import uuid
 
 import os
 from pandas.errors import EmptyDataError
-from typing import Generator, Optional
+from typing import Generator, List, Optional, Tuple
 
 import pandas as pd
 from setuptools import glob
 
-from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.data.pair import pair_registry
 from trading_platform.exchanges.data.ticker import Ticker
+from trading_platform.utils.datetime_operations import strftime_days
 from trading_platform.utils.exceptions import DuplicateDataException
 
 
+def ticker_parquet_schema_and_partitioning() -> Tuple['pyarrow.Schema', 'pyarrow.dataset.Partitioning']:
+    """
+    pyarrow is imported here instead of at module level, because this module is imported by the ticker-fetcher Lambda,
+    which doesn't package pyarrow.
+
+    Returns: schema of the ticker columns, and the hive partitioning by exchange_id, pair_name, and day
+    """
+    import pyarrow
+    import pyarrow.dataset
+
+    schema: pyarrow.Schema = pyarrow.schema([
+        ('app_create_timestamp', pyarrow.float64()),
+        ('exchange_timestamp', pyarrow.float64()),
+        ('base', pyarrow.string()),
+        ('quote', pyarrow.string()),
+        ('bid', pyarrow.float64()),
+        ('ask', pyarrow.float64()),
+        ('last', pyarrow.float64()),
+        ('base_volume', pyarrow.float64()),
+        ('quote_volume', pyarrow.float64()),
+        ('version', pyarrow.int16()),
+    ])
+    partitioning: pyarrow.dataset.Partitioning = pyarrow.dataset.partitioning(pyarrow.schema([
+        ('exchange_id', pyarrow.int16()),
+        ('pair_name', pyarrow.string()),
+        ('day', pyarrow.string()),
+    ]), flavor='hive')
+    return schema, partitioning
+
+
 class FileService:
     @staticmethod
     def create_dirs_if_null(dir_names):
@@ -42,17 +78,112 @@ class FileService:
     @staticmethod
     def read_csv(filename, parse_dates: bool) -> Optional[pd.DataFrame]:
         try:
-            if parse_dates:
-                def second_parser(arg):
-                    return pd.to_datetime(arg=arg, unit='s')
-
-                return pd.read_csv(filename, date_parser=second_parser, parse_dates=['app_create_timestamp'])
-            else:
-                return pd.read_csv(filename)
+            df: pd.DataFrame = pd.read_csv(filename)
         # Happens if .csv file is empty
         except EmptyDataError:
             return
 
+        if parse_dates:
+            # Vectorized conversion, instead of calling a Python date parser for every row.
+            df['app_create_timestamp'] = pd.to_datetime(df['app_create_timestamp'], unit='s')
+        return df
+
+    @staticmethod
+    def write_ticker_parquet(ticker_df: pd.DataFrame, dest_dir: str) -> int:
+        """
+        Appends tickers to the parquet dataset in dest_dir, partitioned as
+        <dest_dir>/exchange_id=<exchange_id>/pair_name=<pair_name>/day=<YYYY-MM-DD>/<file>.parquet.
+
+        Args:
+            ticker_df: tickers with float app_create_timestamp, as written by TickerService
+            dest_dir:
+
+        Returns: number of tickers written
+        """
+        if len(ticker_df) == 0:
+            return 0
+        import pyarrow
+        import pyarrow.dataset
+
+        ticker_parquet_schema, ticker_parquet_partitioning = ticker_parquet_schema_and_partitioning()
+        app_create_timestamp: pd.Series = pd.to_numeric(ticker_df['app_create_timestamp'])
+        columns = {}
+        for field in ticker_parquet_schema:
+            if field.name == 'app_create_timestamp':
+                values = app_create_timestamp
+            elif field.name in ticker_df.columns:
+                values = ticker_df[field.name]
+            else:
+                values = None
+            columns[field.name] = pyarrow.array(values, type=field.type, from_pandas=True) if values is not None else \
+                pyarrow.nulls(len(ticker_df), type=field.type)
+        columns['exchange_id'] = pyarrow.array(ticker_df['exchange_id'], type=pyarrow.int16())
+        columns['pair_name'] = pyarrow.array(ticker_df['quote'].astype(str) + '_' + ticker_df['base'].astype(str))
+        columns['day'] = pyarrow.array(pd.to_datetime(app_create_timestamp, unit='s').dt.strftime(strftime_days))
+        table: pyarrow.Table = pyarrow.table(columns)
+
+        # Sorting by time within each file keeps the row group statistics tight, which helps time range pushdown.
+        table = table.sort_by([('exchange_id', 'ascending'), ('pair_name', 'ascending'),
+                               ('app_create_timestamp', 'ascending')])
+        pyarrow.dataset.write_dataset(table, dest_dir, format='parquet', partitioning=ticker_parquet_partitioning,
+                                      basename_template='tickers-{0}-{{i}}.parquet'.format(uuid.uuid4().hex),
+                                      existing_data_behavior='overwrite_or_ignore',
+                                      file_options=pyarrow.dataset.ParquetFileFormat().make_write_options(
+                                          compression='zstd'))
+        return len(ticker_df)
+
+    @staticmethod
+    def read_ticker_parquet(source_dir: str, start_timestamp: Optional[float] = None,
+                            end_timestamp: Optional[float] = None, exchange_ids: Optional[List[int]] = None,
+                            pair_names: Optional[List[str]] = None, parse_dates: bool = False) -> pd.DataFrame:
+        """
+        Reads tickers written by write_ticker_parquet(). The filters are pushed down to the dataset, so partitions for
+        other exchanges, pairs, and days aren't opened.
+
+        Args:
+            source_dir:
+            start_timestamp: fetch tickers >= this utc timestamp
+            end_timestamp: fetch tickers < this utc timestamp
+            exchange_ids:
+            pair_names: Example, ['ETH_BTC']
+            parse_dates: if True, app_create_timestamp is converted to a datetime, like read_csv()
+
+        Returns: tickers sorted by app_create_timestamp, with the columns of ticker_parquet_schema_and_partitioning()
+            and exchange_id
+        """
+        import pyarrow
+        import pyarrow.dataset
+
+        ticker_parquet_schema, ticker_parquet_partitioning = ticker_parquet_schema_and_partitioning()
+        dataset: pyarrow.dataset.Dataset = pyarrow.dataset.dataset(source_dir, format='parquet',
+                                                                   partitioning=ticker_parquet_partitioning)
+        conditions: List[pyarrow.dataset.Expression] = []
+        if start_timestamp is not None:
+            conditions.append(pyarrow.dataset.field('app_create_timestamp') >= start_timestamp)
+            conditions.append(pyarrow.dataset.field('day') >= datetime.datetime.utcfromtimestamp(
+                start_timestamp).strftime(strftime_days))
+        if end_timestamp is not None:
+            conditions.append(pyarrow.dataset.field('app_create_timestamp') < end_timestamp)
+            conditions.append(pyarrow.dataset.field('day') <= datetime.datetime.utcfromtimestamp(
+                end_timestamp).strftime(strftime_days))
+        if exchange_ids is not None:
+            conditions.append(pyarrow.dataset.field('exchange_id').isin(exchange_ids))
+        if pair_names is not None:
+            conditions.append(pyarrow.dataset.field('pair_name').isin(pair_names))
+
+        condition: Optional[pyarrow.dataset.Expression] = None
+        for next_condition in conditions:
+            condition = next_condition if condition is None else condition & next_condition
+
+        columns: List[str] = ticker_parquet_schema.names + ['exchange_id']
+        table: pyarrow.Table = dataset.to_table(columns=columns, filter=condition)
+        df: pd.DataFrame = table.to_pandas()
+        df.sort_values(by='app_create_timestamp', inplace=True, kind='mergesort')
+        df.reset_index(drop=True, inplace=True)
+        if parse_dates:
+            df['app_create_timestamp'] = pd.to_datetime(df['app_create_timestamp'], unit='s')
+        return df
+
     @staticmethod
     def csv_filenames_for_exchange_names_and_pair_name(exchange_names, pair_name, source_dir):
         """
@@ -138,7 +269,7 @@ class FileService:
                     if ticker.exchange_id != exchange_id:
                         print(',', end='')
                         continue
-                    pair_name = Pair(base=ticker.base, quote=ticker.quote).name
+                    pair_name = pair_registry.get(base=ticker.base, quote=ticker.quote).name
                     # Need to address the issue that exchange data is not in UTC :/.
                     #                             exchange_timestamp = ticker.exchange_timestamp / 1000
                     exchange_timestamp = ticker.app_create_timestamp
@@ -25,6 +25,16 @@ class StrategyStateMachineServiceAbc(ABC):
         self.state['current_state'] = next.__name__
         return next(*args, **kwargs)
 
+    def on_order_status_event(self, event):
+        """
+        Subscriber for OrderStatusReconciler. Subclasses can override it to move to a new state when an order is
+        filled or cancelled.
+
+        Args:
+            event: OrderStatusEvent
+        """
+        self.logger.info('order_id {0} changed to order_status {1}'.format(event.order_id, event.order_status))
+
     def place_orders(self, orders: Set[Order], session: Session):
         # if preload_db_state,
         #   insert trade_saga with "pending" status if it doesn't exist
@@ -169,7 +169,11 @@ def balance(exchange_id):
 
 
 def order(exchange_id=exchange_ids.bittrex, order_status=OrderStatus.open, order_side=OrderSide.buy,
-          strategy_execution_id='0', app_create_timestamp=None, numerical_fields=True):
+          strategy_execution_id='0', app_create_timestamp=None, numerical_fields=True, **fields):
+    """
+    Args:
+        fields: Order fields that replace the defaults. Example, base='BTC', quote='ETH', exchange_order_id=None
+    """
     app_create_timestamp = datetime_operations.utc_timestamp() if app_create_timestamp is None else app_create_timestamp
     kwargs = {
         # app metadata
@@ -204,6 +208,7 @@ def order(exchange_id=exchange_ids.bittrex, order_status=OrderStatus.open, order
         kwargs['filled'] = decimal_num
         kwargs['price'] = decimal_num
         kwargs['remaining'] = decimal_num
+    kwargs.update(fields)
 
     return Order(**kwargs)
 
@@ -1,10 +1,17 @@
 import datetime
+import os
+import shutil
+import tempfile
 import unittest
 from typing import Generator, List
 
-from nose.tools import eq_
+import numpy as np
+import pandas
+from nose.tools import eq_, assert_true
 
 from trading_platform.core.services.file_service import FileService
+from trading_platform.exchanges.data.enums import exchange_ids
+from trading_platform.exchanges.data.ticker import Ticker
 from trading_platform.utils.datetime_operations import strftime_minutes
 
 
@@ -29,4 +36,45 @@ class TestFileService(unittest.TestCase):
         eq_(len(dts), 8)
         eq_(dts[0].strftime(strftime_minutes), start_datetime.strftime(strftime_minutes))
         end_datetime_inclusive: datetime.datetime = datetime.datetime(2018, 1, 1, 7)
-        eq_(dts[-1].strftime(strftime_minutes), end_datetime_inclusive.strftime(strftime_minutes))
\ No newline at end of file
+        eq_(dts[-1].strftime(strftime_minutes), end_datetime_inclusive.strftime(strftime_minutes))
+
+class TestTickerParquet(unittest.TestCase):
+    def setUp(self):
+        self.dest_dir = tempfile.mkdtemp()
+        rows = []
+        # 2018-06-01 and 2018-06-02
+        for timestamp in [1527811200.0, 1527811260.0, 1527897600.0]:
+            for exchange_id in [exchange_ids.binance, exchange_ids.bittrex]:
+                for quote in ['ETH', 'XLM']:
+                    rows.append({'app_create_timestamp': timestamp, 'exchange_id': exchange_id, 'base': 'BTC',
+                                 'quote': quote, 'bid': .05, 'ask': .06, 'last': .055,
+                                 'version': Ticker.current_version})
+        self.ticker_df = pandas.DataFrame(rows)
+        FileService.write_ticker_parquet(self.ticker_df, self.dest_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.dest_dir)
+
+    def test_partitions(self):
+        eq_(sorted(os.listdir(os.path.join(self.dest_dir, 'exchange_id={0}'.format(exchange_ids.binance)))),
+            ['pair_name=ETH_BTC', 'pair_name=XLM_BTC'])
+        eq_(sorted(os.listdir(os.path.join(self.dest_dir, 'exchange_id={0}'.format(exchange_ids.binance),
+                                           'pair_name=ETH_BTC'))), ['day=2018-06-01', 'day=2018-06-02'])
+
+    def test_read_ticker_parquet(self):
+        df = FileService.read_ticker_parquet(self.dest_dir)
+        eq_(len(df), len(self.ticker_df))
+        eq_(df['bid'].dtype, np.float64)
+        eq_(df['app_create_timestamp'].tolist(), sorted(self.ticker_df['app_create_timestamp'].tolist()))
+        assert_true(df['base_volume'].isnull().all())
+
+    def test_read_ticker_parquet_filters(self):
+        df = FileService.read_ticker_parquet(self.dest_dir, start_timestamp=1527811260.0, end_timestamp=1527897600.0,
+                                             exchange_ids=[exchange_ids.bittrex], pair_names=['ETH_BTC'])
+        eq_(len(df), 1)
+        eq_(df.iloc[0]['app_create_timestamp'], 1527811260.0)
+        eq_(df.iloc[0]['exchange_id'], exchange_ids.bittrex)
+        eq_(df.iloc[0]['quote'], 'ETH')
+
+        parsed_df = FileService.read_ticker_parquet(self.dest_dir, parse_dates=True, pair_names=['XLM_BTC'])
+        eq_(parsed_df.iloc[0]['app_create_timestamp'], pandas.Timestamp('2018-06-01'))
@@ -0,0 +1,109 @@
+"""
+Record of the input files an ETL stage has processed, so reruns only process new or changed files.
+
+The manifest is a JSON file in the stage's output directory. Each processed input file is recorded with its size, mtime,
+and sha256 hash. A file is unchanged if its size and mtime match. If they don't, the hash is compared, so files that
+were only touched or copied aren't reprocessed. Files that failed are recorded in a dead-letter list with the error,
+and are retried on the next run.
+"""
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+from trading_platform.utils.datetime_operations import utc_timestamp
+
+manifest_filename: str = 'etl_manifest.json'
+hash_chunk_bytes: int = 1024 * 1024
+
+
+def file_sha256(filepath: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(filepath, 'rb') as fileobj:
+        for chunk in iter(lambda: fileobj.read(hash_chunk_bytes), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def file_signature(filepath: str) -> Dict:
+    """
+    Returns: size, mtime, and sha256 of the file, to be passed to EtlManifest.record_success(). The file is stat'ed
+        before it's hashed, so if it changes after it's stat'ed, its mtime won't match on the next run and it's
+        reprocessed.
+    """
+    stat: os.stat_result = os.stat(filepath)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': file_sha256(filepath)}
+
+
+class EtlManifest:
+    def __init__(self, output_dir: str):
+        self.manifest_path: str = os.path.join(output_dir, manifest_filename)
+        # Entries by input filepath
+        self.processed: Dict[str, Dict] = {}
+        self.dead_letters: Dict[str, Dict] = {}
+
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r') as fileobj:
+                manifest: Dict = json.load(fileobj)
+            self.processed = manifest.get('processed', {})
+            self.dead_letters = manifest.get('dead_letters', {})
+
+    def needs_processing(self, filepath: str) -> bool:
+        entry: Optional[Dict] = self.processed.get(filepath)
+        if entry is None:
+            return True
+
+        stat: os.stat_result = os.stat(filepath)
+        if entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            return False
+
+        if entry['size'] == stat.st_size and entry['sha256'] == file_sha256(filepath):
+            entry['mtime'] = stat.st_mtime
+            return False
+        return True
+
+    def record_success(self, filepath: str, signature: Dict, output_path: Optional[str]):
+        """
+        Args:
+            filepath:
+            signature: file_signature() of the file, taken before it was read for processing
+            output_path:
+        """
+        self.processed[filepath] = {
+            'size': signature['size'],
+            'mtime': signature['mtime'],
+            'sha256': signature['sha256'],
+            'output_path': output_path,
+            'processed_timestamp': utc_timestamp(),
+        }
+        self.dead_letters.pop(filepath, None)
+
+    def record_failure(self, filepath: str, error: str):
+        self.processed.pop(filepath, None)
+        self.dead_letters[filepath] = {
+            'error': error,
+            'failed_timestamp': utc_timestamp(),
+        }
+
+    def remove_missing(self) -> List[str]:
+        """
+        Removes the entries of input files that no longer exist, because they were deleted or renamed.
+
+        Returns: input filepaths of the removed processed entries, whose outputs the stage should remove
+        """
+        for filepath in [filepath for filepath in self.dead_letters if not os.path.exists(filepath)]:
+            del self.dead_letters[filepath]
+        missing_filepaths: List[str] = [filepath for filepath in self.processed if not os.path.exists(filepath)]
+        for filepath in missing_filepaths:
+            del self.processed[filepath]
+        return missing_filepaths
+
+    def save(self):
+        """
+        Writes to a temporary file first, so an interrupted save can't corrupt the manifest.
+        """
+        temp_path: str = self.manifest_path + '.tmp'
+        with open(temp_path, 'w') as fileobj:
+            json.dump({'processed': self.processed, 'dead_letters': self.dead_letters}, fileobj, indent=2,
+                      sort_keys=True)
+        os.replace(temp_path, self.manifest_path)
@@ -0,0 +1,95 @@
+"""
+External merge sort of DataFrames that don't fit in memory together.
+
+DataFrames are buffered until their in-memory size reaches a byte budget, then sorted and spilled to a csv "run" file.
+merge_sorted_runs() then merges the runs by reading each one in chunks. Each merge step takes every buffered row up to
+the smallest of the runs' largest buffered sort values, which can't be preceded by an unread row of any run, and sorts
+just those rows. At most one chunk per run is in memory at a time.
+"""
+import os
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas
+
+
+class SortedRunWriter:
+    """
+    Buffers DataFrames and spills them to sorted csv runs in run_dir when the buffer reaches max_buffer_bytes.
+    """
+    def __init__(self, run_dir: str, sort_column: str, max_buffer_bytes: int):
+        self.run_dir = run_dir
+        self.sort_column = sort_column
+        self.max_buffer_bytes = max_buffer_bytes
+        self.run_paths: List[str] = []
+        self.buffer: List[pandas.DataFrame] = []
+        self.buffer_bytes: int = 0
+        # Largest in-memory row size seen, used to size the merge chunks
+        self.bytes_per_row: float = 0
+
+    def add(self, df: pandas.DataFrame):
+        if len(df) == 0:
+            return
+        df_bytes: int = int(df.memory_usage(deep=True).sum())
+        self.bytes_per_row = max(self.bytes_per_row, df_bytes / len(df))
+        self.buffer.append(df)
+        self.buffer_bytes += df_bytes
+        if self.buffer_bytes >= self.max_buffer_bytes:
+            self.spill()
+
+    def spill(self):
+        if len(self.buffer) == 0:
+            return
+        run_df: pandas.DataFrame = pandas.concat(self.buffer, ignore_index=True, sort=False)
+        run_df.sort_values(by=self.sort_column, kind='mergesort', inplace=True)
+        run_path: str = os.path.join(self.run_dir, 'run_{0}.csv'.format(len(self.run_paths)))
+        run_df.to_csv(run_path, index=False)
+        self.run_paths.append(run_path)
+        self.buffer = []
+        self.buffer_bytes = 0
+
+    def merge_chunk_rows(self) -> int:
+        """
+        Returns: rows to read from each run per merge step, so all runs' chunks and the merged rows fit in
+            max_buffer_bytes
+        """
+        if self.bytes_per_row == 0:
+            return 1
+        return max(1, int(self.max_buffer_bytes / self.bytes_per_row / (2 * max(len(self.run_paths), 1))))
+
+
+def merge_sorted_runs(run_paths: List[str], sort_column: str, chunk_rows: int) -> Iterator[pandas.DataFrame]:
+    """
+    k-way merge of csv files that are each sorted by sort_column. Rows with equal sort values keep the order of
+    run_paths.
+
+    Yields: DataFrames of merged rows, in order
+    """
+    readers: List = [pandas.read_csv(run_path, chunksize=chunk_rows) for run_path in run_paths]
+    try:
+        yield from merge_chunks(readers, sort_column)
+    finally:
+        for reader in readers:
+            reader.close()
+
+
+def merge_chunks(readers: List[Iterator[pandas.DataFrame]], sort_column: str) -> Iterator[pandas.DataFrame]:
+    buffers: List[Optional[pandas.DataFrame]] = [next(reader, None) for reader in readers]
+
+    while any(buffer is not None for buffer in buffers):
+        # Rows up to the smallest buffered maximum can't be preceded by an unread row, because each run is sorted.
+        boundary = min(buffer[sort_column].iloc[-1] for buffer in buffers if buffer is not None)
+
+        ready: List[pandas.DataFrame] = []
+        for run_index, buffer in enumerate(buffers):
+            if buffer is None:
+                continue
+            num_ready: int = int(np.searchsorted(buffer[sort_column].values, boundary, side='right'))
+            ready.append(buffer.iloc[:num_ready])
+            remaining: pandas.DataFrame = buffer.iloc[num_ready:]
+            if len(remaining) == 0:
+                remaining = next(readers[run_index], None)
+            buffers[run_index] = remaining
+
+        merged: pandas.DataFrame = pandas.concat(ready, ignore_index=True, sort=False)
+        yield merged.sort_values(by=sort_column, kind='mergesort')
@@ -0,0 +1,38 @@
+import shutil
+import tempfile
+import unittest
+
+import pandas
+from nose.tools import eq_, assert_true
+
+from trading_platform.data_engineering.external_merge_sort import SortedRunWriter, merge_sorted_runs
+
+
+class TestExternalMergeSort(unittest.TestCase):
+    def setUp(self):
+        self.run_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.run_dir)
+
+    def test_merge_sorted_runs(self):
+        run_writer = SortedRunWriter(self.run_dir, 'key', max_buffer_bytes=500)
+        for start in range(5):
+            run_writer.add(pandas.DataFrame({'key': [start + 10 * step for step in range(10)][::-1],
+                                             'source': start}))
+        run_writer.spill()
+        assert_true(len(run_writer.run_paths) > 1)
+
+        merged_dfs = list(merge_sorted_runs(run_writer.run_paths, 'key', chunk_rows=3))
+        assert_true(len(merged_dfs) > 1)
+        merged_df = pandas.concat(merged_dfs)
+        eq_(merged_df['key'].tolist(), sorted(start + 10 * step for start in range(5) for step in range(10)))
+
+    def test_equal_keys_keep_run_order(self):
+        run_writer = SortedRunWriter(self.run_dir, 'key', max_buffer_bytes=1)
+        run_writer.add(pandas.DataFrame({'key': [1, 2], 'source': 0}))
+        run_writer.add(pandas.DataFrame({'key': [1, 2], 'source': 1}))
+        eq_(len(run_writer.run_paths), 2)
+
+        merged_df = pandas.concat(merge_sorted_runs(run_writer.run_paths, 'key', chunk_rows=1))
+        eq_(merged_df['source'].tolist(), [0, 1, 0, 1])
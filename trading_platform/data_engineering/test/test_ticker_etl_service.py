@@ -1,9 +1,158 @@
+import os
+import shutil
+import tempfile
 import unittest
+from unittest import mock
+
+import pandas
+from nose.tools import assert_true, eq_
+
+from trading_platform.core.services.file_service import FileService
+from trading_platform.data_engineering.etl_manifest import EtlManifest
+from trading_platform.data_engineering.ticker_etl_service import TickerEtlService
+from trading_platform.exchanges.data.enums import exchange_ids
+from trading_platform.exchanges.data.ticker import Ticker
+
+
+def fail_on_xlm(ticker_df):
+    if (ticker_df['quote'] == 'XLM').any():
+        raise ValueError('bad file')
+    return ticker_df
+
+
+def write_ticker_file(input_dir, filename, quote, bid):
+    pandas.DataFrame([{'app_create_timestamp': 1527811200.0, 'exchange_id': exchange_ids.binance, 'base': 'BTC',
+                       'quote': quote, 'bid': bid, 'ask': bid + .001, 'last': bid,
+                       'version': Ticker.current_version}]).to_csv(os.path.join(input_dir, filename), index=False)
 
 
 class TestTickerEtlService(unittest.TestCase):
     def setUp(self):
-        pass
+        self.input_dir = tempfile.mkdtemp()
+        self.output_dir = tempfile.mkdtemp()
+        self.ticker_etl_service = TickerEtlService(FileService())
+
+    def tearDown(self):
+        shutil.rmtree(self.input_dir)
+        shutil.rmtree(self.output_dir)
 
     def test_by_exchange_and_pair(self):
-        pass
\ No newline at end of file
+        pass
+
+    def test_run_pipeline(self):
+        write_ticker_file(self.input_dir, 'ETH_ticker.csv', 'ETH', .05)
+        write_ticker_file(self.input_dir, 'ADA_ticker.csv', 'ADA', .00002)
+        write_ticker_file(self.input_dir, 'XLM_ticker.csv', 'XLM', .00003)
+        pipeline = [TickerEtlService.standardize, fail_on_xlm]
+
+        summary = self.ticker_etl_service.run_pipeline(self.input_dir, self.output_dir, pipeline, num_processes=2)
+        eq_(summary['files_processed'], 2)
+        eq_(summary['files_failed'], 1)
+        eq_(summary['dead_letters'], [os.path.join(self.input_dir, 'XLM_ticker.csv')])
+        eq_(sorted(filename for filename in os.listdir(self.output_dir) if filename.endswith('.csv')),
+            ['ADA_ticker.csv', 'ETH_ticker.csv'])
+        eq_(pandas.read_csv(os.path.join(self.output_dir, 'ETH_ticker.csv'))['standard_version'].tolist(), [0])
+
+        # Only the failed file is retried.
+        summary = self.ticker_etl_service.run_pipeline(self.input_dir, self.output_dir, pipeline, num_processes=1)
+        eq_(summary['files_skipped'], 2)
+        eq_(summary['files_failed'], 1)
+
+        # Touched files with the same contents are skipped, changed files are reprocessed.
+        eth_path = os.path.join(self.input_dir, 'ETH_ticker.csv')
+        os.utime(eth_path, (0, 0))
+        write_ticker_file(self.input_dir, 'ADA_ticker.csv', 'ADA', .00003)
+        write_ticker_file(self.input_dir, 'XLM_ticker.csv', 'ETH', .05)
+        summary = self.ticker_etl_service.run_pipeline(self.input_dir, self.output_dir, pipeline, num_processes=1)
+        eq_(summary['files_processed'], 2)
+        eq_(summary['files_skipped'], 1)
+        eq_(summary['dead_letters'], [])
+
+        manifest = EtlManifest(self.output_dir)
+        eq_(sorted(manifest.processed), sorted(os.path.join(self.input_dir, filename) for filename in
+                                               ['ADA_ticker.csv', 'ETH_ticker.csv', 'XLM_ticker.csv']))
+        eq_(manifest.processed[eth_path]['mtime'], 0)
+
+    def test_run_pipeline_file_changed_while_processing(self):
+        write_ticker_file(self.input_dir, 'ETH_ticker.csv', 'ETH', .05)
+        eth_path = os.path.join(self.input_dir, 'ETH_ticker.csv')
+        read_csv = FileService.read_csv
+
+        def change_then_read_csv(filename, parse_dates):
+            # The file is rewritten with a later mtime after it's hashed
+            write_ticker_file(self.input_dir, 'ETH_ticker.csv', 'ETH', .06)
+            os.utime(filename, (os.stat(filename).st_atime, os.stat(filename).st_mtime + 10))
+            return read_csv(filename, parse_dates)
+
+        with mock.patch.object(FileService, 'read_csv', side_effect=change_then_read_csv):
+            summary = self.ticker_etl_service.run_pipeline(self.input_dir, self.output_dir,
+                                                           [TickerEtlService.standardize], num_processes=1)
+        eq_(summary['files_processed'], 1)
+        # The manifest has the size and mtime from before the change, so the change is processed on the next run
+        assert_true(EtlManifest(self.output_dir).needs_processing(eth_path))
+        summary = self.ticker_etl_service.run_pipeline(self.input_dir, self.output_dir, [TickerEtlService.standardize],
+                                                       num_processes=1)
+        eq_(summary['files_processed'], 1)
+        eq_(pandas.read_csv(os.path.join(self.output_dir, 'ETH_ticker.csv'))['bid'].tolist(), [.06])
+
+    def test_to_parquet(self):
+        for file_index in range(3):
+            ticker_df = pandas.DataFrame([{
+                'app_create_timestamp': 1527811200.0 + file_index * 60, 'exchange_id': exchange_id, 'base': 'BTC',
+                'quote': 'ETH', 'bid': .05, 'ask': .06, 'last': .055, 'version': Ticker.current_version
+            } for exchange_id in [exchange_ids.binance, exchange_ids.bittrex]])
+            ticker_df.to_csv(os.path.join(self.input_dir, 'ticker_{0}.csv'.format(file_index)), index=False)
+
+        eq_(self.ticker_etl_service.to_parquet(self.input_dir, self.output_dir, windows_per_batch=2), 6)
+        df = FileService.read_ticker_parquet(self.output_dir, exchange_ids=[exchange_ids.binance])
+        eq_(df['app_create_timestamp'].tolist(), [1527811200.0, 1527811260.0, 1527811320.0])
+
+    def write_window_files(self, num_windows, num_quotes):
+        # Files are named in reverse time order, so the merge has to reorder them.
+        for window in range(num_windows):
+            pandas.DataFrame([{
+                'app_create_timestamp': 1527811200.0 + window * 60, 'exchange_id': exchange_ids.binance,
+                'base': 'BTC', 'quote': 'Q{0}'.format(quote), 'bid': .05, 'ask': .06, 'last': .055,
+                'version': Ticker.current_version
+            } for quote in range(num_quotes)]).to_csv(
+                os.path.join(self.input_dir, 'ticker_{0}.csv'.format(num_windows - window)), index=False)
+
+    def test_aggregate(self):
+        self.write_window_files(num_windows=10, num_quotes=3)
+        # A small budget forces several sorted runs
+        output_paths = self.ticker_etl_service.aggregate(self.input_dir, self.output_dir, max_memory_bytes=2000,
+                                                         rows_per_file=7)
+
+        agg_dfs = [pandas.read_csv(output_path) for output_path in output_paths]
+        # The tail batch is written
+        eq_([len(agg_df) for agg_df in agg_dfs], [7, 7, 7, 7, 2])
+        eq_(sorted(os.listdir(self.output_dir)), sorted(os.path.basename(path) for path in output_paths))
+
+        timestamps = pandas.concat(agg_dfs)['app_create_timestamp'].tolist()
+        eq_(timestamps, sorted(timestamps))
+        eq_(timestamps[0], '2018-06-01 00:00:00')
+        eq_(len(set(timestamps)), 10)
+
+    def test_aggregate_appends_merged_chunks(self):
+        self.write_window_files(num_windows=10, num_quotes=3)
+        appended_rows = []
+        append_aggregated_rows = TickerEtlService.append_aggregated_rows
+
+        def record_append(agg_ticker_df, output_path, header):
+            appended_rows.append(len(agg_ticker_df))
+            append_aggregated_rows(agg_ticker_df, output_path, header)
+
+        with mock.patch.object(TickerEtlService, 'append_aggregated_rows', side_effect=record_append):
+            output_paths = self.ticker_etl_service.aggregate(self.input_dir, self.output_dir, max_memory_bytes=2000,
+                                                             rows_per_file=100)
+        # Files are written a merged chunk at a time, rather than buffered up to rows_per_file
+        eq_(len(output_paths), 1)
+        eq_(len(pandas.read_csv(output_paths[0])), 30)
+        assert_true(len(appended_rows) > 1)
+        assert_true(max(appended_rows) < 30)
+
+    def test_aggregate_single_run(self):
+        self.write_window_files(num_windows=4, num_quotes=2)
+        output_paths = self.ticker_etl_service.aggregate(self.input_dir, self.output_dir, rows_per_file=100)
+        eq_(len(output_paths), 1)
+        eq_(len(pandas.read_csv(output_paths[0])), 8)
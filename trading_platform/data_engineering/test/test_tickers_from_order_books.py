@@ -0,0 +1,79 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+from nose.tools import eq_
+
+from trading_platform.data_engineering import tickers_from_order_books
+from trading_platform.data_engineering.tickers_from_order_books import bid_ask_df_and_stats_from_ob_file, \
+    group_min_max
+from trading_platform.exchanges.data.enums import exchange_names
+from trading_platform.exchanges.data.pair import Pair
+
+# 2017-12-18 23:59:00 in ms
+start_ms = 1513641540000
+
+
+def ob_rows(date, bids, asks):
+    return [{'date': date, 'type': 'b', 'price': price, 'amount': 1} for price in bids] + \
+           [{'date': date, 'type': 'a', 'price': price, 'amount': 1} for price in asks]
+
+
+class TestTickersFromOrderBooks(unittest.TestCase):
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+        self.pair = Pair(base='BTC', quote='ADA')
+        self.source_dir = os.path.join(self.working_dir, 'order_books', exchange_names.binance, self.pair.kaiko_name)
+        os.makedirs(self.source_dir)
+        self.ob_path = os.path.join(self.source_dir, 'Binance_ADABTC_ob_10_2017_12_18.csv.gz')
+        rows = ob_rows(start_ms, [1.0, 1.1], [1.3, 1.2]) + \
+            ob_rows(start_ms + 60000, [1.0, 1.2], [1.4, 1.3]) + \
+            [{'date': start_ms + 60000, 'type': 'x', 'price': 5.0, 'amount': 1}] + \
+            ob_rows(start_ms + 120000, [1.1], []) + \
+            ob_rows(start_ms + 180000, [1.5], [1.4, 1.6])
+        with gzip.open(self.ob_path, 'wt') as fileobj:
+            pd.DataFrame(rows).to_csv(fileobj, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def test_group_min_max(self):
+        keys, mins, maxes = group_min_max(pd.Series([3, 1, 3, 1, 2]).values, pd.Series([5., 2., 1., 4., 7.]).values)
+        eq_(keys.tolist(), [1, 2, 3])
+        eq_(mins.tolist(), [2., 7., 1.])
+        eq_(maxes.tolist(), [4., 7., 5.])
+
+    def test_bid_ask_df_and_stats_from_ob_file(self):
+        # Small chunks split snapshots across chunks
+        for chunk_rows in [3, 1000]:
+            res, stats = bid_ask_df_and_stats_from_ob_file(self.ob_path, chunk_rows=chunk_rows)
+            eq_(res['exchange_timestamp'].tolist(), [start_ms, start_ms + 60000])
+            eq_(res['bid'].tolist(), [1.1, 1.2])
+            eq_(res['ask'].tolist(), [1.2, 1.3])
+            eq_(stats, {'rows': 13, 'rows_rejected': 1, 'snapshots': 4, 'snapshots_missing_side': 1,
+                        'snapshots_crossed': 1})
+
+    def test_main(self):
+        target_dir = os.path.join(self.working_dir, 'tickers')
+        all_stats = tickers_from_order_books.main([exchange_names.binance], [self.pair],
+                                                  os.path.join(self.working_dir, 'order_books'), target_dir,
+                                                  num_processes=1)
+        eq_(len(all_stats), 1)
+        eq_(all_stats[0]['error'], None)
+
+        pair_dir = os.path.join(target_dir, exchange_names.binance, self.pair.kaiko_name)
+        eq_(sorted(os.listdir(pair_dir)), ['day=2017-12-18', 'day=2017-12-19'])
+        ticker_df = pd.read_csv(os.path.join(pair_dir, 'day=2017-12-19', 'Binance_ADABTC_ticker_v2_2017_12_18.csv'))
+        eq_(ticker_df['bid'].tolist(), [1.2])
+        eq_(ticker_df['quote'].tolist(), ['ADA'])
+
+    def test_main_bad_file(self):
+        with open(os.path.join(self.source_dir, 'Binance_ADABTC_ob_10_2017_12_19.csv.gz'), 'wb') as fileobj:
+            fileobj.write(b'not gzip')
+        all_stats = tickers_from_order_books.main([exchange_names.binance], [self.pair],
+                                                  os.path.join(self.working_dir, 'order_books'),
+                                                  os.path.join(self.working_dir, 'tickers'), num_processes=2)
+        eq_(sorted(stats['error'] is None for stats in all_stats), [False, True])
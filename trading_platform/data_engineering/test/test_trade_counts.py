@@ -0,0 +1,104 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+from nose.tools import eq_
+
+from trading_platform.data_engineering import trade_counts
+from trading_platform.data_engineering.trade_counts import TradeCountStore, trade_counts_by_min
+from trading_platform.exchanges.data.enums import exchange_names
+
+# 2017-12-18 in ms
+start_ms = 1513555200000
+ms_per_minute = 60 * 1000
+
+
+def write_trade_file(source_dir, kaiko_name, file_date, trade_dates):
+    trade_dir = os.path.join(source_dir, exchange_names.binance, kaiko_name)
+    os.makedirs(trade_dir, exist_ok=True)
+    trade_path = os.path.join(trade_dir, '{0}_{1}_trades_{2}.csv.gz'.format(exchange_names.binance, kaiko_name,
+                                                                           file_date))
+    with gzip.open(trade_path, 'wt') as fileobj:
+        pd.DataFrame({'id': range(len(trade_dates)), 'date': trade_dates, 'price': 1.0, 'amount': 1.0}).to_csv(
+            fileobj, index=False)
+    return trade_path
+
+
+class TestTradeCounts(unittest.TestCase):
+    def setUp(self):
+        self.source_dir = tempfile.mkdtemp()
+        self.target_dir = tempfile.mkdtemp()
+        self.trade_count_store = TradeCountStore(self.target_dir, num_processes=1)
+        write_trade_file(self.source_dir, 'ADABTC', '2017_12_18', [start_ms, start_ms + 1000, start_ms + 6 * 60000])
+        write_trade_file(self.source_dir, 'ETHBTC', '2017_12_18', [start_ms + 90000])
+
+    def tearDown(self):
+        shutil.rmtree(self.source_dir)
+        shutil.rmtree(self.target_dir)
+
+    def test_trade_counts_by_min(self):
+        df = pd.DataFrame({'id': [1, 2, 3]}, index=[start_ms, start_ms + 59999, start_ms + 60000])
+        eq_(trade_counts_by_min(df)['trades_per_minute'].tolist(), [2, 1])
+        eq_(str(trade_counts_by_min(df).index[1]), '2017-12-18 00:01:00')
+
+    def test_rollup(self):
+        eq_(self.trade_count_store.update(exchange_names.binance, self.source_dir), 2)
+
+        rollup_df = self.trade_count_store.rollup(exchange_names.binance)
+        eq_(list(rollup_df.columns), ['ADABTC', 'ETHBTC'])
+        eq_([str(date) for date in rollup_df.index], ['2017-12-18 00:00:00', '2017-12-18 00:01:00',
+                                                      '2017-12-18 00:06:00'])
+        eq_(rollup_df['ADABTC'].tolist(), [2, 0, 1])
+
+        rollup_df = self.trade_count_store.rollup(exchange_names.binance, '5m')
+        eq_(rollup_df['ADABTC'].tolist(), [2, 1])
+        eq_(rollup_df['ETHBTC'].tolist(), [1, 0])
+
+        rollup_df = self.trade_count_store.rollup(exchange_names.binance, '1d')
+        eq_(rollup_df.values.tolist(), [[3, 1]])
+
+    def test_incremental_update(self):
+        self.trade_count_store.update(exchange_names.binance, self.source_dir)
+        eq_(self.trade_count_store.update(exchange_names.binance, self.source_dir), 0)
+
+        # A new file is added and a changed file replaces its previous counts.
+        write_trade_file(self.source_dir, 'ADABTC', '2017_12_19', [start_ms + 24 * 60 * ms_per_minute])
+        write_trade_file(self.source_dir, 'ETHBTC', '2017_12_18', [start_ms + 90000, start_ms + 100000])
+        eq_(self.trade_count_store.update(exchange_names.binance, self.source_dir), 2)
+
+        rollup_df = self.trade_count_store.rollup(exchange_names.binance, '1d')
+        eq_(rollup_df.values.tolist(), [[3, 2], [1, 0]])
+
+    def test_deleted_and_renamed_files(self):
+        self.trade_count_store.update(exchange_names.binance, self.source_dir)
+        eth_dir = os.path.join(self.source_dir, exchange_names.binance, 'ETHBTC')
+        os.remove(os.path.join(eth_dir, 'Binance_ETHBTC_trades_2017_12_18.csv.gz'))
+        ada_dir = os.path.join(self.source_dir, exchange_names.binance, 'ADABTC')
+        os.rename(os.path.join(ada_dir, 'Binance_ADABTC_trades_2017_12_18.csv.gz'),
+                  os.path.join(ada_dir, 'Binance_ADABTC_trades_2017_12_18_v2.csv.gz'))
+
+        # The renamed file is counted again, and the counts of both old paths are dropped
+        eq_(self.trade_count_store.update(exchange_names.binance, self.source_dir), 1)
+        counts_df = self.trade_count_store.load_minute_counts(exchange_names.binance)
+        eq_(sorted(set(counts_df['source'].astype(str))), [os.path.join(ada_dir,
+                                                                        'Binance_ADABTC_trades_2017_12_18_v2.csv.gz')])
+        rollup_df = self.trade_count_store.rollup(exchange_names.binance, '1d')
+        eq_(list(rollup_df.columns), ['ADABTC'])
+        eq_(rollup_df.values.tolist(), [[3]])
+
+        # Deleting the last file empties the store
+        os.remove(os.path.join(ada_dir, 'Binance_ADABTC_trades_2017_12_18_v2.csv.gz'))
+        eq_(self.trade_count_store.update(exchange_names.binance, self.source_dir), 0)
+        eq_(len(self.trade_count_store.load_minute_counts(exchange_names.binance)), 0)
+        eq_(self.trade_count_store.update(exchange_names.binance, self.source_dir), 0)
+
+    def test_trade_count_by_exchange(self):
+        trade_counts.trade_count_by_exchange(exchange_names.binance, self.source_dir, self.target_dir)
+        exchange_dir = os.path.join(self.target_dir, exchange_names.binance)
+        agg_df = pd.read_csv(os.path.join(exchange_dir, 'Binance_trades_agg.csv'), index_col='date')
+        eq_(agg_df['ETHBTC'].tolist(), [0, 1, 0])
+        agg_df = pd.read_csv(os.path.join(exchange_dir, 'Binance_trades_agg_1h.csv'), index_col='date')
+        eq_(agg_df['ADABTC'].tolist(), [3])
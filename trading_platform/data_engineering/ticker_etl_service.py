@@ -1,19 +1,55 @@
 """
 Split ticker files containing tickers for all pairs and all exchanges into separate ticker files by pair and exchange.
 """
+import multiprocessing
+import multiprocessing.pool
+import shutil
+import tempfile
 import time
+import traceback
 
 import glob
 import ntpath
 import os
 import pandas
-import random
-from typing import List, Callable, Optional
+from typing import List, Callable, Dict, Optional, Tuple
 
 from trading_platform.core.services.file_service import FileService
+from trading_platform.data_engineering.etl_manifest import EtlManifest, file_signature
+from trading_platform.data_engineering.external_merge_sort import SortedRunWriter, merge_sorted_runs
 from trading_platform.exchanges.data.enums import exchange_ids
 
 
+def process_ticker_file(args) -> Tuple[str, Optional[Dict], Optional[str], Optional[str]]:
+    """
+    Runs the pipeline of TickerEtlService.run_pipeline() on a single file. Exceptions are returned rather than raised,
+    so one bad file doesn't stop the other files in the process pool.
+
+    Args:
+        args: (ticker_filename, output_dir, pipeline)
+
+    Returns: (ticker_filename, file_signature() of the input file, output path or None if the pipeline skipped the file, error
+        traceback or None)
+    """
+    ticker_filename, output_dir, pipeline = args
+    try:
+        signature: Dict = file_signature(ticker_filename)
+        ticker_df: Optional[pandas.DataFrame] = FileService.read_csv(ticker_filename, False)
+
+        for method in pipeline:
+            if ticker_df is None:
+                break
+            ticker_df = method(ticker_df)
+
+        output_path: Optional[str] = None
+        if ticker_df is not None:
+            output_path = os.path.join(output_dir, ntpath.basename(ticker_filename))
+            ticker_df.to_csv(output_path, sep=',', mode='w+')
+        return ticker_filename, signature, output_path, None
+    except Exception:
+        return ticker_filename, None, None, traceback.format_exc()
+
+
 class TickerEtlService:
     # Version of standardized ticker files
     standard_version: int = 0
@@ -21,28 +57,87 @@ class TickerEtlService:
     def __init__(self, file_service: FileService):
         self.file_service = file_service
 
-    def run_pipeline(self, input_dir, output_dir, pipeline: List[Callable[[pandas.DataFrame], Optional[pandas.DataFrame]]]):
+    def run_pipeline(self, input_dir, output_dir,
+                     pipeline: List[Callable[[pandas.DataFrame], Optional[pandas.DataFrame]]],
+                     num_processes: Optional[int] = None, progress_interval_seconds: float = 10) -> Dict:
+        """
+        Applies the pipeline methods in order to each ticker csv file in input_dir, and writes the result to a file with
+        the same name in output_dir. Files are processed by a process pool.
+
+        The processed files are recorded in an EtlManifest in output_dir, so reruns only process new or changed files,
+        and an interrupted run can be resumed. Files whose processing raises an exception are added to the manifest's
+        dead-letter list instead of stopping the run.
+
+        Args:
+            input_dir:
+            output_dir:
+            pipeline: methods that take and return a DataFrame, or return None to skip the file. Must be picklable, so
+                module-level functions or static methods.
+            num_processes: defaults to os.cpu_count(). If 1, files are processed in the current process.
+            progress_interval_seconds: minimum time between progress reports and manifest saves
+
+        Returns: summary of the run, with the number of files processed, skipped, and failed, and throughput
+        """
         self.file_service.create_dir_if_null(output_dir)
         glob_path: str = os.path.join(input_dir, '**', '*ticker*.csv')
+        ticker_filenames: List[str] = sorted(glob.glob(glob_path, recursive=True))
+
+        manifest: EtlManifest = EtlManifest(output_dir)
+        pending_filenames: List[str] = [ticker_filename for ticker_filename in ticker_filenames if
+                                        manifest.needs_processing(ticker_filename)]
+        print('{0} of {1} files need processing'.format(len(pending_filenames), len(ticker_filenames)))
+
+        tasks: List[Tuple] = [(ticker_filename, output_dir, pipeline) for ticker_filename in pending_filenames]
+        num_processes = num_processes if num_processes is not None else os.cpu_count()
 
-        ticker_filenames: List[str] = glob.glob(glob_path, recursive=True)
         files_processed: int = 0
-        start_time = time.time()
-        for ticker_filename in ticker_filenames:
-            files_processed += 1
-            if random.randint(0, 1000) == 0:
-                print('{0} files processed in {1} seconds'.format(files_processed, (time.time() - start_time)))
+        files_failed: int = 0
+        bytes_processed: int = 0
+        start_time: float = time.time()
+        last_report_time: float = start_time
 
-            ticker_df = TickerEtlService.read_csv(ticker_filename, False)
+        def report(elapsed: float):
+            print('{0} of {1} files processed, {2} failed, {3:.1f} files/second, {4:.2f} MB/second'.format(
+                files_processed + files_failed, len(tasks), files_failed,
+                (files_processed + files_failed) / elapsed if elapsed > 0 else 0,
+                bytes_processed / 1e6 / elapsed if elapsed > 0 else 0))
 
-            for method in pipeline:
-                if ticker_df is None:
-                    break
-                ticker_df = method(ticker_df)
+        pool: Optional[multiprocessing.pool.Pool] = multiprocessing.Pool(processes=min(num_processes, len(tasks))) if \
+            num_processes > 1 and len(tasks) > 1 else None
+        try:
+            results = pool.imap_unordered(process_ticker_file, tasks) if pool is not None else map(
+                process_ticker_file, tasks)
+            for ticker_filename, signature, output_path, error in results:
+                bytes_processed += os.path.getsize(ticker_filename)
+                if error is None:
+                    files_processed += 1
+                    manifest.record_success(ticker_filename, signature, output_path)
+                else:
+                    files_failed += 1
+                    manifest.record_failure(ticker_filename, error)
 
-            if ticker_df is not None:
-                basename:str = ntpath.basename(ticker_filename)
-                ticker_df.to_csv(os.path.join(output_dir, basename), sep=',', mode='w+')
+                now: float = time.time()
+                if now - last_report_time >= progress_interval_seconds:
+                    last_report_time = now
+                    report(now - start_time)
+                    manifest.save()
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            manifest.save()
+
+        elapsed: float = time.time() - start_time
+        report(elapsed)
+        return {
+            'files_processed': files_processed,
+            'files_skipped': len(ticker_filenames) - len(tasks),
+            'files_failed': files_failed,
+            'dead_letters': sorted(manifest.dead_letters),
+            'seconds': elapsed,
+            'files_per_second': (files_processed + files_failed) / elapsed if elapsed > 0 else 0,
+            'megabytes_per_second': bytes_processed / 1e6 / elapsed if elapsed > 0 else 0,
+        }
 
     @staticmethod
     def standardize(ticker_df: pandas.DataFrame) -> Optional[pandas.DataFrame]:
@@ -108,35 +203,99 @@ class TickerEtlService:
             except Exception:
                 print('foo')
 
-    def aggregate(self, input_dir, output_dir, windows_per_file=3300):
+    def aggregate(self, input_dir, output_dir, max_memory_bytes: int = 500 * 1000 * 1000,
+                  rows_per_file: int = 1000000) -> List[str]:
         """
-        Aggregate ticker files and write to csv.
+        Aggregate ticker files into csv files of rows_per_file tickers each, sorted by app_create_timestamp. The last
+        file has the remaining tickers.
+
+        Uses an external merge sort, so memory use is bounded by max_memory_bytes rather than by the number or size of
+        the input files or by rows_per_file: input files are buffered and spilled to sorted runs in a temporary
+        directory, and the runs are merged in chunks that are appended to the output files.
 
-        Each ticker file is about 150KB. 0.5 GB is a safe amount of memory per file.
-        0.5 GB * 1000MB/GB * 1000KB/MB * 1/150KB = 3333 files.
+        Returns: paths of the aggregated files, in time order
         """
         self.file_service.create_dir_if_null(output_dir)
         glob_path = os.path.join(input_dir, '**', '*ticker*.csv')
         ticker_filenames: List[str] = glob.glob(glob_path, recursive=True)
         ticker_filenames.sort()
 
-        windows_added: int = 0
-        ticker_dfs: List[pandas.DataFrame] = []
+        run_dir: str = tempfile.mkdtemp(dir=output_dir)
+        try:
+            run_writer: SortedRunWriter = SortedRunWriter(run_dir, 'app_create_timestamp', max_memory_bytes)
+            for ticker_filename in ticker_filenames:
+                ticker_df: Optional[pandas.DataFrame] = FileService.read_csv(ticker_filename, False)
+                if ticker_df is not None:
+                    run_writer.add(ticker_df)
+            run_writer.spill()
 
+            # Runs written from input files of different schema versions can have different columns.
+            columns: List[str] = []
+            for run_path in run_writer.run_paths:
+                columns += [column for column in pandas.read_csv(run_path, nrows=0).columns if column not in columns]
+
+            # Merged chunks are appended to the current file as they're produced, so only one chunk is in memory.
+            output_paths: List[str] = []
+            file_rows: int = rows_per_file
+            for merged_df in merge_sorted_runs(run_writer.run_paths, 'app_create_timestamp',
+                                               run_writer.merge_chunk_rows()):
+                merged_df = merged_df.reindex(columns=columns)
+                while len(merged_df) > 0:
+                    if file_rows == rows_per_file:
+                        output_paths.append(self.aggregated_file_path(merged_df.iloc[0]['app_create_timestamp'],
+                                                                      output_dir))
+                        file_rows = 0
+                    file_df: pandas.DataFrame = merged_df.iloc[:rows_per_file - file_rows]
+                    self.append_aggregated_rows(file_df, output_paths[-1], header=file_rows == 0)
+                    file_rows += len(file_df)
+                    merged_df = merged_df.iloc[len(file_df):]
+            return output_paths
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+    @staticmethod
+    def aggregated_file_path(earliest_timestamp: float, output_dir: str) -> str:
+        filename: str = 'ticker_agg_{0}'.format(pandas.to_datetime(earliest_timestamp, unit='s'))
+        print('aggregated tickers in file {0}'.format(filename))
+        output_path: str = os.path.join(output_dir, filename)
+        # Files that start in the same window would overwrite each other.
+        duplicate_index: int = 1
+        while os.path.exists(output_path):
+            output_path = os.path.join(output_dir, '{0}_{1}'.format(filename, duplicate_index))
+            duplicate_index += 1
+        return output_path
+
+    @staticmethod
+    def append_aggregated_rows(agg_ticker_df: pandas.DataFrame, output_path: str, header: bool):
+        agg_ticker_df = agg_ticker_df.copy()
+        agg_ticker_df['app_create_timestamp'] = pandas.to_datetime(agg_ticker_df['app_create_timestamp'], unit='s')
+        agg_ticker_df.to_csv(output_path, index=False, mode='a', header=header)
+
+    def to_parquet(self, input_dir: str, output_dir: str, windows_per_batch: int = 3300) -> int:
+        """
+        Converts ticker csv files to the parquet dataset read by FileService.read_ticker_parquet(). Files are
+        standardized and written in batches, so memory use is bounded like aggregate().
+
+        Returns: number of tickers written
+        """
+        self.file_service.create_dir_if_null(output_dir)
+        glob_path = os.path.join(input_dir, '**', '*ticker*.csv')
+        ticker_filenames: List[str] = glob.glob(glob_path, recursive=True)
+        ticker_filenames.sort()
+
+        tickers_written: int = 0
+        ticker_dfs: List[pandas.DataFrame] = []
         for ticker_filename in ticker_filenames:
-            if windows_added < windows_per_file:
-                ticker_df = FileService.read_csv(ticker_filename, True)
-                if ticker_df is not None:
-                    ticker_dfs.append(ticker_df)
-                windows_added += 1
-            else:
-                if len(ticker_dfs) > 0:
-                    agg_ticker_df: pandas.DataFrame = pandas.concat(ticker_dfs)
-                    agg_ticker_df.sort_values(by='app_create_timestamp', inplace=True)
-                    earliest_window: str = str(agg_ticker_df.iloc[0]['app_create_timestamp'])
-                    filename: str = 'ticker_agg_{0}'.format(earliest_window)
-                    print('aggregated tickers in file {0}'.format(filename))
-                    agg_ticker_df.to_csv(os.path.join(output_dir, filename))
-
-                windows_added = 0
+            ticker_df: Optional[pandas.DataFrame] = FileService.read_csv(ticker_filename, False)
+            if ticker_df is not None:
+                ticker_df = TickerEtlService.standardize(ticker_df)
+            if ticker_df is not None:
+                ticker_dfs.append(ticker_df)
+
+            if len(ticker_dfs) >= windows_per_batch:
+                tickers_written += self.file_service.write_ticker_parquet(pandas.concat(ticker_dfs), output_dir)
                 ticker_dfs = []
+
+        if len(ticker_dfs) > 0:
+            tickers_written += self.file_service.write_ticker_parquet(pandas.concat(ticker_dfs), output_dir)
+        return tickers_written
@@ -1,116 +1,262 @@
+"""
+Derive tickers from Kaiko order book snapshots.
+
+Each gzipped order book file has one row per order book level, with the snapshot's date in ms, the side ('a' or 'b'),
+and the price. The bid of a snapshot is the highest bid level and the ask is the lowest ask level. Files are read in
+chunks, and the min and max price of each (date, side) group are computed with NumPy reductions on sorted arrays and
+combined across chunks. Files are processed by a process pool, and the tickers are written to one csv file per day.
+"""
 import glob
+import multiprocessing
+import multiprocessing.pool
 import os
-# from concurrent.futures import ThreadPoolExecutor
+import re
+import time
 import traceback
-from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
-import regex
 
-# from core.src.constants.arbitrage_pairs import arbitrage_pairs
 from trading_platform.core.constants.currency_pairs import currency_pairs_list
 from trading_platform.core.services.file_service import FileService
 from trading_platform.exchanges.data.enums import exchange_names
+from trading_platform.exchanges.data.pair import Pair
+
+date_matcher = re.compile('.*(20.*).csv.gz')
+# Order book rows read from a file at a time
+ob_chunk_rows: int = 1000000
+ob_columns: List[str] = ['date', 'type', 'price']
+ms_per_day: int = 24 * 60 * 60 * 1000
+
+
+def group_min_max(keys: np.ndarray, prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns: (unique keys in ascending order, min price of each key, max price of each key)
+    """
+    if len(keys) == 0:
+        return keys, prices, prices
+    order: np.ndarray = np.argsort(keys, kind='mergesort')
+    sorted_keys: np.ndarray = keys[order]
+    sorted_prices: np.ndarray = prices[order]
+    starts: np.ndarray = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+    return sorted_keys[starts], np.minimum.reduceat(sorted_prices, starts), np.maximum.reduceat(sorted_prices,
+                                                                                                 starts)
+
+
+def read_ob_chunks(fpath: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    with pd.read_csv(fpath, compression='gzip', usecols=ob_columns, chunksize=chunk_rows) as reader:
+        yield from reader
+
 
-date_matcher = regex.compile('.*(20.*).csv.gz')
+def bid_ask_df_and_stats_from_ob_file(fpath: str, chunk_rows: int = ob_chunk_rows) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Args:
+        fpath: gzipped order book csv file
+        chunk_rows: order book rows to decompress and aggregate at a time
 
+    Returns: (DataFrame with exchange_timestamp, bid, and ask columns, stats dict with the number of rows read and
+        rejected and snapshots dropped)
+    """
+    fname: str = os.path.split(fpath)[1]
+    stats: Dict = {
+        'rows': 0,
+        # Rows with a side other than 'a' or 'b', or a missing price
+        'rows_rejected': 0,
+        'snapshots': 0,
+        'snapshots_missing_side': 0,
+        'snapshots_crossed': 0,
+    }
 
-def bid_ask_df_from_ob_file(fpath):
-    fname = os.path.split(fpath)[1]
-    df = pd.read_csv(fpath, compression='gzip')
+    # Partial aggregates of each chunk. A snapshot can span two chunks, so they're reduced again at the end.
+    partial_keys: List[np.ndarray] = []
+    partial_mins: List[np.ndarray] = []
+    partial_maxes: List[np.ndarray] = []
+    for chunk in read_ob_chunks(fpath, chunk_rows):
+        stats['rows'] += len(chunk)
+        sides: np.ndarray = chunk['type'].values
+        is_bid: np.ndarray = sides == 'b'
+        prices: np.ndarray = chunk['price'].values.astype(np.float64)
+        valid: np.ndarray = ((sides == 'a') | is_bid) & ~np.isnan(prices)
+        stats['rows_rejected'] += int(len(chunk) - np.count_nonzero(valid))
 
-    #table indexed by date with 4 columns:
-    # (min, a), (max, a), (min, b), (max, b)
-    pvt = df.pivot_table(index='date', columns='type',
-                         values='price', aggfunc=(min, max))
+        # Key of each (date, side) group. Even keys are side 'a' and odd keys are side 'b'.
+        keys: np.ndarray = chunk['date'].values.astype(np.int64)[valid] * 2 + is_bid[valid]
+        chunk_keys, chunk_mins, chunk_maxes = group_min_max(keys, prices[valid])
+        partial_keys.append(chunk_keys)
+        partial_mins.append(chunk_mins)
+        partial_maxes.append(chunk_maxes)
 
-    n_rows = len(pvt)
-    n_missing = np.count_nonzero(pvt.isnull().values.any(axis=1))
+    all_keys: np.ndarray = np.concatenate(partial_keys) if partial_keys else np.empty(0, dtype=np.int64)
+    keys, mins, _ = group_min_max(all_keys, np.concatenate(partial_mins) if partial_mins else np.empty(0))
+    _, _, maxes = group_min_max(all_keys, np.concatenate(partial_maxes) if partial_maxes else np.empty(0))
 
+    dates, date_indexes = np.unique(keys // 2, return_inverse=True)
+    is_bid_key: np.ndarray = (keys % 2).astype(bool)
+    # min and max price of each side by snapshot. NaN if the snapshot doesn't have that side.
+    min_a, max_a, min_b, max_b = (np.full(len(dates), np.nan) for _ in range(4))
+    min_a[date_indexes[~is_bid_key]] = mins[~is_bid_key]
+    max_a[date_indexes[~is_bid_key]] = maxes[~is_bid_key]
+    min_b[date_indexes[is_bid_key]] = mins[is_bid_key]
+    max_b[date_indexes[is_bid_key]] = maxes[is_bid_key]
+
+    stats['snapshots'] = len(dates)
+    complete: np.ndarray = ~(np.isnan(min_a) | np.isnan(min_b))
+    n_missing: int = int(len(dates) - np.count_nonzero(complete))
     if n_missing > 0:
-        perc = n_missing / n_rows * 100.0
-        print("{}: rows: {}, missing rows: {}. {:0.3f}%. Dropping them.".format(fname, n_rows, n_missing, perc))
-        pvt = pvt.dropna()
+        print("{}: rows: {}, missing rows: {}. {:0.3f}%. Dropping them.".format(fname, len(dates), n_missing,
+                                                                               n_missing / len(dates) * 100.0))
+        dates, min_a, max_a, min_b, max_b = (values[complete] for values in (dates, min_a, max_a, min_b, max_b))
+    stats['snapshots_missing_side'] = n_missing
 
     # this checks if 'a' and 'b' roles are inverted
-    if (pvt[('min', 'a')] <= pvt[('max', 'b')]).all():
-        res = pvt[[('max', 'a'), ('min', 'b')]].reset_index()
-    elif (pvt[('min', 'b')] <= pvt[('max', 'a')]).all():
-        res = pvt[[('max', 'b'), ('min', 'a')]].reset_index()
+    if (min_a <= max_b).all():
+        bids, asks = max_a, min_b
+    elif (min_b <= max_a).all():
+        bids, asks = max_b, min_a
     else:
         raise Exception("Data does not make sense. Please check it.")
 
-    res.columns = ['exchange_timestamp', 'bid', 'ask']
+    res: pd.DataFrame = pd.DataFrame({'exchange_timestamp': dates, 'bid': bids, 'ask': asks})
+
+    check: np.ndarray = bids > asks
+    n_wrong: int = int(np.count_nonzero(check))
+    if n_wrong > 0:
+        print("{}: rows: {}, rows with crossed spread: {}. {:0.3f}%. Dropping them".format(
+            fname, len(res), n_wrong, n_wrong / len(res) * 100.0))
+        res = res[~check].reset_index(drop=True)
+    stats['snapshots_crossed'] = n_wrong
+    return res, stats
+
+
+def bid_ask_df_from_ob_file(fpath: str) -> pd.DataFrame:
+    return bid_ask_df_and_stats_from_ob_file(fpath)[0]
+
+
+def write_daily_ticker_files(orders: pd.DataFrame, exchange_name: str, pair: Pair, source_date: str,
+                             target_filepath: str) -> List[str]:
+    """
+    Writes the tickers of each day to target_filepath/day=<YYYY-MM-DD>/. Filenames include the date of the source file,
+    so files derived from different source files don't overwrite each other.
+
+    Returns: paths of the written files
+    """
+    # complete the schema
+    orders['base'] = pair.base
+    orders['quote'] = pair.quote
+    orders['exchange_name'] = exchange_name
+    orders['app_create_timestamp'] = orders['exchange_timestamp']
+    orders['version'] = 2
 
-    check = res['bid'] > res['ask']
-    if check.any():
-        n_wrong = len(check[check])
-        n_rows = len(check)
-        perc = n_wrong / n_rows * 100.0
-        print("{}: rows: {}, rows with crossed spread: {}. {:0.3f}%. Dropping them".format(fname, n_rows, n_wrong, perc))
-        res = res[~check]
-    assert ((res['bid'] <= res['ask']).all())
-    return res
+    dest_paths: List[str] = []
+    days: np.ndarray = orders['exchange_timestamp'].values // ms_per_day
+    for day in np.unique(days):
+        day_string: str = str(pd.to_datetime(day * ms_per_day, unit='ms').date())
+        # Example: Binance_ADABTC_ticker_v2_2017_11_10.csv
+        dest_fname: str = '{0}_{1}_ticker_v2_{2}.csv'.format(exchange_name, pair.kaiko_name, source_date)
+        dest_dir: str = os.path.join(target_filepath, 'day={0}'.format(day_string))
+        FileService.create_dirs_if_null([dest_dir])
+        dest_path: str = os.path.join(dest_dir, dest_fname)
+        orders[days == day][['ask', 'bid', 'base', 'exchange_name', 'exchange_timestamp', 'quote',
+                             'app_create_timestamp', 'version']].to_csv(dest_path, index=False)
+        dest_paths.append(dest_path)
+    return dest_paths
 
 
-def main(exchange_name, pair, source_filepath, target_filepath):
+def derive_tickers_from_ob_file(args) -> Dict:
+    """
+    Process pool task. Exceptions are returned in the stats rather than raised, so one bad file doesn't stop the other
+    files.
+
+    Args:
+        args: (gzip_filename, exchange_name, pair, target_filepath)
+
+    Returns: stats of the file, with the filename, seconds taken, paths written, and error traceback or None
+    """
+    gzip_filename, exchange_name, pair, target_filepath = args
+    start_time: float = time.time()
+    stats: Dict = {'filename': gzip_filename, 'dest_paths': [], 'error': None}
+    try:
+        orders, ob_stats = bid_ask_df_and_stats_from_ob_file(gzip_filename)
+        stats.update(ob_stats)
+        match = date_matcher.match(gzip_filename)
+        source_date: str = match.group(1) if match is not None else os.path.basename(gzip_filename).split('.')[0]
+        stats['dest_paths'] = write_daily_ticker_files(orders, exchange_name, pair, source_date, target_filepath)
+    except Exception:
+        stats['error'] = traceback.format_exc()
+    stats['seconds'] = time.time() - start_time
+    return stats
+
+
+def ob_files(exchange_name: str, pair: Pair, source_filepath: str) -> List[str]:
     # Example: Binance_ADABTC_ob_10_2017_12_18.csv.gz
-    glob_path = os.path.join(source_filepath, exchange_name, pair.kaiko_name, '**', '*{0}*.csv.gz'.format(pair.kaiko_name))
-    files = glob.glob(glob_path, recursive=True)
-    files.sort()
-
-    if len(files) == 0:
-        # print('No data found for exchange {0} and pair {1}'.format(exchange_name, pair))
-        return
-
-    # print('order_book data to tickers for exchange {0} and pair {1}'.format(exchange_name, pair))
-
-    target_filepath = os.path.join(target_filepath, exchange_name, pair.kaiko_name)
-    if not os.path.exists(target_filepath):
-        os.makedirs(target_filepath)
-
-    # Example: Binance_ADABTC_ticker_v2_2017_11_10.csv
-    for gzip_filename in files:
-        try:
-            orders = bid_ask_df_from_ob_file(gzip_filename)
-        except Exception:
-            print('Exception during bid_ask_df_from_ob_file', gzip_filename)
-            traceback.print_exc()
-
-        # complete the schema
-        orders['base'] = pair.base
-        orders['quote'] = pair.quote
-        orders['exchange_name'] = exchange_name
-        orders['app_create_timestamp'] = orders['exchange_timestamp']
-        orders['version'] = 2
-
-        file_date = str(pd.to_datetime(orders['exchange_timestamp'].values.min(), unit='ms').date())
-        dest_fname = '{0}_{1}_ticker_v2_{2}.csv'.format(exchange_name, pair.kaiko_name, file_date)
-        dest_path = os.path.join(target_filepath, pair.kaiko_name, dest_fname)
-        FileService.create_dirs_if_null([dest_path])
-        # write to file
-        orders[['ask', 'bid', 'base', 'exchange_name',
-                'exchange_timestamp', 'quote',
-                'app_create_timestamp', 'version']].to_csv(dest_path, index=False)
-
-    print('Success: order_book data to tickers for exchange {0} and pair {1}'.format(exchange_name, pair))
+    glob_path: str = os.path.join(source_filepath, exchange_name, pair.kaiko_name, '**',
+                                  '*{0}*.csv.gz'.format(pair.kaiko_name))
+    return sorted(glob.glob(glob_path, recursive=True))
+
+
+def main(exchange_names_to_derive: List[str], pairs: List[Pair], source_filepath: str, target_filepath: str,
+         num_processes: Optional[int] = None) -> List[Dict]:
+    """
+    Derives tickers from the order book files of each exchange and pair, in a process pool.
+
+    Args:
+        exchange_names_to_derive:
+        pairs:
+        source_filepath: directory with order book files in <exchange_name>/<kaiko pair name>/ subdirectories
+        target_filepath: tickers are written to <exchange_name>/<kaiko pair name>/day=<YYYY-MM-DD>/ subdirectories
+        num_processes: defaults to os.cpu_count(). If 1, files are processed in the current process.
+
+    Returns: stats of each file, in completion order
+    """
+    tasks: List[Tuple] = []
+    for exchange_name in exchange_names_to_derive:
+        for pair in pairs:
+            pair_target_filepath: str = os.path.join(target_filepath, exchange_name, pair.kaiko_name)
+            tasks.extend((gzip_filename, exchange_name, pair, pair_target_filepath) for gzip_filename in
+                         ob_files(exchange_name, pair, source_filepath))
+    print('order_book data to tickers for {0} files'.format(len(tasks)))
+
+    num_processes = num_processes if num_processes is not None else os.cpu_count()
+    pool: Optional[multiprocessing.pool.Pool] = multiprocessing.Pool(processes=min(num_processes, len(tasks))) if \
+        num_processes > 1 and len(tasks) > 1 else None
+
+    all_stats: List[Dict] = []
+    try:
+        results = pool.imap_unordered(derive_tickers_from_ob_file, tasks) if pool is not None else map(
+            derive_tickers_from_ob_file, tasks)
+        for stats in results:
+            all_stats.append(stats)
+            if stats['error'] is None:
+                print('{0}: {1:.2f} seconds, rows: {2}, rejected rows: {3}, snapshots: {4}, missing side: {5}, '
+                      'crossed: {6}'.format(stats['filename'], stats['seconds'], stats['rows'],
+                                            stats['rows_rejected'], stats['snapshots'],
+                                            stats['snapshots_missing_side'], stats['snapshots_crossed']))
+            else:
+                print('Exception during bid_ask_df_from_ob_file', stats['filename'])
+                print(stats['error'])
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return all_stats
+
 
 def test():
     source_filepath = './data/kaiko/order_books'
     target_filepath = './data/kaiko/derived/tickers'
-    with ThreadPoolExecutor(max_workers=25) as executor:
-        for exchange in [exchange_names.bittrex, exchange_names.binance, exchange_names.kraken]:
-            for pair in currency_pairs_list:
-                executor.submit(main, exchange, pair, source_filepath, target_filepath)
+    main([exchange_names.bittrex, exchange_names.binance, exchange_names.kraken], currency_pairs_list,
+         source_filepath, target_filepath)
+
 
 def all_kaiko_data():
     source_filepath = '../kaiko_data/order_books/unzipped'
     target_filepath = '../kaiko/derived/tickers'
-    with ThreadPoolExecutor(max_workers=25) as executor:
-        for exchange in [exchange_names.bittrex, exchange_names.binance, exchange_names.kraken]:
-            for pair in currency_pairs_list:
-                executor.submit(main, exchange, pair, source_filepath, target_filepath)
+    main([exchange_names.bittrex, exchange_names.binance, exchange_names.kraken], currency_pairs_list,
+         source_filepath, target_filepath)
+
 
-all_kaiko_data()
-# test()
\ No newline at end of file
+if __name__ == '__main__':
+    all_kaiko_data()
+    # test()
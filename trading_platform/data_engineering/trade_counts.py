@@ -1,24 +1,54 @@
+"""
+Trade counts per minute from Kaiko trade files, and 5 minute, hourly, and daily rollups.
+
+TradeCountStore keeps the per-minute counts of each exchange in a compact parquet file, and an EtlManifest of the trade
+files they were counted from, so updates only read new or changed trade files. Rollups are derived from the minute
+counts rather than from the raw trades.
+"""
 import glob
+import multiprocessing
+import multiprocessing.pool
 import os
+import re
+import traceback
 # from concurrent.futures import ThreadPoolExecutor
 from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
-import regex
 
 # from core.src.constants.arbitrage_pairs import arbitrage_pairs
 from trading_platform.core.constants.currency_pairs import currency_pairs_list
 from trading_platform.core.services.file_service import FileService
+from trading_platform.data_engineering.etl_manifest import EtlManifest, file_signature
 from trading_platform.exchanges.data.enums import exchange_names
 
-date_matcher = regex.compile('.*(20.*).csv.gz')
+date_matcher = re.compile('.*(20.*).csv.gz')
+ms_per_minute: int = 60 * 1000
+# Rollup resolutions, in minutes
+minutes_by_resolution: Dict[str, int] = {
+    '1m': 1,
+    '5m': 5,
+    '1h': 60,
+    '1d': 24 * 60,
+}
+
+
+def minute_counts(trade_dates: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Args:
+        trade_dates: trade timestamps in ms
+
+    Returns: (minutes since the epoch with at least one trade, in ascending order, number of trades in each minute)
+    """
+    return np.unique(trade_dates.astype(np.int64) // ms_per_minute, return_counts=True)
 
 
 def trade_counts_by_min(df):
-    df.index = pd.to_datetime(df.index, unit='ms')
-    df = df.groupby(pd.TimeGrouper(freq='min')).count()
-    df['trades_per_minute'] = df.id
-    return df[['trades_per_minute']]
+    minutes, counts = minute_counts(df.index.values)
+    return pd.DataFrame({'trades_per_minute': counts},
+                        index=pd.Index(pd.to_datetime(minutes * ms_per_minute, unit='ms'), name='date'))
 
 
 def trade_counts_for_file(exchange_name, pair, target_dir, filename):
@@ -92,31 +122,170 @@ def trade_count_by_exchange_and_pair(exchange_name, pair, source_dir, target_dir
     trades_df.to_csv(os.path.join(target_dir, trades_filename), index=False)
 
 
-def trade_count_by_exchange(exchange_name, source_dir, target_dir):
-    target_dir = os.path.join(target_dir, exchange_name)
-    FileService.create_dir_if_null(target_dir)
-    glob_path = os.path.join(source_dir, exchange_name, '**', '*trades*.csv'.format(exchange_name))
-    trade_files = glob.glob(glob_path, recursive=True)
+def trade_count_by_exchange(exchange_name, source_dir, target_dir, resolutions=tuple(minutes_by_resolution)):
+    """
+    Updates the TradeCountStore in target_dir with new or changed trade files, and writes the trade counts of each
+    currency pair of the exchange at each resolution. The 1m counts are written to <exchange_name>_trades_agg.csv and
+    the other resolutions to <exchange_name>_trades_agg_<resolution>.csv.
 
-    if len(trade_files) == 0:
-        # print('No data found for exchange {0} and pair {1}'.format(exchange_name, pair.kaiko_name))
-        return
+    Args:
+        exchange_name:
+        source_dir: directory with Kaiko trade files in <exchange_name>/ subdirectories
+        target_dir:
+        resolutions: keys of minutes_by_resolution
 
-    def df_with_currency_column(trade_file):
-        match = regex.search('{0}_(.*)_trades'.format(exchange_name), trade_file)
-        try:
-            trades_df = pd.read_csv(trade_file, index_col='date')
-            trades_df['currency'] = match.group(1)
-            return trades_df
-        except Exception:
+    Returns:
+
+    """
+    trade_count_store: TradeCountStore = TradeCountStore(target_dir)
+    trade_count_store.update(exchange_name, source_dir)
+
+    target_dir = os.path.join(target_dir, exchange_name)
+    for resolution in resolutions:
+        rollup_df: pd.DataFrame = trade_count_store.rollup(exchange_name, resolution)
+        if len(rollup_df) == 0:
             return
+        trades_filename = '{0}_trades_agg.csv'.format(exchange_name) if resolution == '1m' else \
+            '{0}_trades_agg_{1}.csv'.format(exchange_name, resolution)
+        rollup_df.to_csv(os.path.join(target_dir, trades_filename))
 
-    trade_df_for_exchange = pd.concat(filter(lambda x: x is not None, map(df_with_currency_column, trade_files)))
-    trade_df_for_exchange_group_by_minute = pd.pivot_table(trade_df_for_exchange, index=['date'], columns='currency',
-                                                           values=['trades_per_minute'])
-    trade_df_for_exchange_group_by_minute = trade_df_for_exchange_group_by_minute.fillna(0)
-    trades_filename = '{0}_trades_agg.csv'.format(exchange_name)
-    trade_df_for_exchange_group_by_minute['trades_per_minute'].to_csv(os.path.join(target_dir, trades_filename))
+
+def minute_counts_for_file(args) -> Tuple[str, Optional[Dict], Optional[np.ndarray], Optional[np.ndarray],
+                                          Optional[str]]:
+    """
+    Process pool task of TradeCountStore.update(). Exceptions are returned rather than raised, so one bad file doesn't
+    stop the other files.
+
+    Args:
+        args: (trade_filename,)
+
+    Returns: (trade_filename, file_signature() of the file, minutes, trade counts, error traceback or None)
+    """
+    trade_filename, = args
+    try:
+        signature: Dict = file_signature(trade_filename)
+        trade_dates: np.ndarray = pd.read_csv(trade_filename, compression='gzip', usecols=['date'])['date'].values
+        minutes, counts = minute_counts(trade_dates)
+        return trade_filename, signature, minutes, counts, None
+    except Exception:
+        return trade_filename, None, None, None, traceback.format_exc()
+
+
+class TradeCountStore:
+    """
+    Per-minute trade counts by exchange and currency pair, updated incrementally from Kaiko trade files.
+
+    The counts of each exchange are stored in <store_dir>/<exchange_name>/minute_counts.parquet with one row per
+    (trade file, minute), so the counts of a changed trade file can be replaced. The trade files that were counted are
+    recorded in an EtlManifest in the same directory.
+    """
+    minute_counts_filename: str = 'minute_counts.parquet'
+
+    def __init__(self, store_dir: str, num_processes: Optional[int] = None):
+        """
+        Args:
+            store_dir:
+            num_processes: processes used to count new trade files. Defaults to os.cpu_count(). If 1, files are
+                counted in the current process.
+        """
+        self.store_dir = store_dir
+        self.num_processes = num_processes if num_processes is not None else os.cpu_count()
+
+    def minute_counts_path(self, exchange_name: str) -> str:
+        return os.path.join(self.store_dir, exchange_name, self.minute_counts_filename)
+
+    def load_minute_counts(self, exchange_name: str) -> pd.DataFrame:
+        """
+        Returns: DataFrame with source, currency, minute, and trades columns. Minutes are since the epoch.
+        """
+        path: str = self.minute_counts_path(exchange_name)
+        if not os.path.exists(path):
+            return pd.DataFrame({'source': pd.Series([], dtype='category'),
+                                 'currency': pd.Series([], dtype='category'),
+                                 'minute': np.empty(0, dtype=np.int32), 'trades': np.empty(0, dtype=np.int32)})
+        return pd.read_parquet(path)
+
+    def update(self, exchange_name: str, source_dir: str) -> int:
+        """
+        Counts the trades of the trade files in source_dir/<exchange_name> that are new or changed since the last
+        update. The counts of trade files that were deleted or renamed since they were counted are removed.
+
+        Returns: number of trade files counted
+        """
+        exchange_dir: str = os.path.join(self.store_dir, exchange_name)
+        FileService.create_dir_if_null(exchange_dir)
+        manifest: EtlManifest = EtlManifest(exchange_dir)
+
+        glob_path: str = os.path.join(source_dir, exchange_name, '**', '*_trades*.csv.gz')
+        currency_regex = re.compile('{0}_(.*)_trades'.format(re.escape(exchange_name)))
+        tasks: List[Tuple] = [(trade_filename,) for trade_filename in sorted(glob.glob(glob_path, recursive=True))
+                              if manifest.needs_processing(trade_filename)]
+        removed_sources: List[str] = manifest.remove_missing()
+        if len(tasks) == 0 and len(removed_sources) == 0:
+            return 0
+        print('counting trades in {0} files for exchange {1}'.format(len(tasks), exchange_name))
+
+        pool: Optional[multiprocessing.pool.Pool] = multiprocessing.Pool(
+            processes=min(self.num_processes, len(tasks))) if self.num_processes > 1 and len(tasks) > 1 else None
+        new_counts_dfs: List[pd.DataFrame] = []
+        try:
+            results = pool.imap_unordered(minute_counts_for_file, tasks) if pool is not None else map(
+                minute_counts_for_file, tasks)
+            for trade_filename, signature, minutes, counts, error in results:
+                match = currency_regex.search(os.path.basename(trade_filename))
+                if error is None and match is None:
+                    error = 'No currency pair in filename {0}'.format(trade_filename)
+                if error is not None:
+                    print('Exception while counting trades in', trade_filename)
+                    print(error)
+                    manifest.record_failure(trade_filename, error)
+                    continue
+
+                new_counts_dfs.append(pd.DataFrame({
+                    'source': trade_filename, 'currency': match.group(1), 'minute': minutes.astype(np.int32),
+                    'trades': counts.astype(np.int32)}))
+                manifest.record_success(trade_filename, signature, None)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        if len(new_counts_dfs) > 0 or len(removed_sources) > 0:
+            counts_df: pd.DataFrame = self.load_minute_counts(exchange_name)
+            new_sources: List[str] = [new_counts_df['source'].iloc[0] for new_counts_df in new_counts_dfs]
+            # Changed files replace their previous counts, and removed files' counts are dropped.
+            counts_df = counts_df[~counts_df['source'].isin(new_sources + removed_sources)].astype(
+                {'source': str, 'currency': str})
+            counts_df = pd.concat([counts_df] + new_counts_dfs, ignore_index=True)
+            counts_df = counts_df.astype({'source': 'category', 'currency': 'category'})
+
+            # Save the counts before the manifest, so files are counted again rather than lost if this is interrupted.
+            path: str = self.minute_counts_path(exchange_name)
+            temp_path: str = path + '.tmp'
+            counts_df.to_parquet(temp_path, index=False, compression='zstd')
+            os.replace(temp_path, path)
+        manifest.save()
+        return len(new_counts_dfs)
+
+    def rollup(self, exchange_name: str, resolution: str = '1m') -> pd.DataFrame:
+        """
+        Args:
+            exchange_name:
+            resolution: one of minutes_by_resolution
+
+        Returns: DataFrame indexed by the start datetime of each period with at least one trade, with the number of
+            trades of each currency pair in the period
+        """
+        counts_df: pd.DataFrame = self.load_minute_counts(exchange_name)
+        period_minutes: np.ndarray = counts_df['minute'].values.astype(np.int64) // \
+            minutes_by_resolution[resolution] * minutes_by_resolution[resolution]
+        rollup_df: pd.DataFrame = counts_df.assign(date=period_minutes).groupby(
+            ['date', 'currency'], observed=True)['trades'].sum().unstack('currency', fill_value=0)
+        rollup_df.index = pd.to_datetime(rollup_df.index.values * ms_per_minute, unit='ms')
+        rollup_df.index.name = 'date'
+        rollup_df.columns = rollup_df.columns.astype(str)
+        rollup_df.columns.name = None
+        return rollup_df.sort_index(axis=1)
 
 
 derived_trades_dir = os.getcwd().replace('data_engineering', 'kaiko/derived/trades')
@@ -139,11 +308,12 @@ def all_kaiko_data_trade_count_by_exchange_and_pair():
                 executor.submit(trade_count_by_exchange_and_pair, exchange_name, pair, source_dir, target_dir)
 
 def all_kaiko_data_trade_count_by_exchange():
-    source_dir = os.getcwd().replace('core/data_engineering', 'data/kaiko/derived/trades')
+    source_dir = os.getcwd().replace('core/data_engineering', 'data/kaiko/trades/zipped')
     target_dir = os.getcwd().replace('core/data_engineering', 'data/kaiko/derived/trades')
     for exchange_name in [exchange_names.bittrex, exchange_names.binance, exchange_names.kraken]:
         trade_count_by_exchange(exchange_name, source_dir, target_dir)
 
-# all_kaiko_data_trade_files_to_trade_counts()
-# all_kaiko_data_trade_count_by_exchange_and_pair()
-all_kaiko_data_trade_count_by_exchange()
\ No newline at end of file
+if __name__ == '__main__':
+    # all_kaiko_data_trade_files_to_trade_counts()
+    # all_kaiko_data_trade_count_by_exchange_and_pair()
+    all_kaiko_data_trade_count_by_exchange()
\ No newline at end of file
@@ -0,0 +1,224 @@
+"""
+Asyncio counterpart of OrderExecutionService, for AsyncLiveExchangeServices. Every order in a set is placed at once,
+across exchanges, and the fill status of every open order is checked in one polling loop, instead of one blocking
+placement and polling sequence per order.
+
+Orders are written to the database by a background thread, so writes are never on the placement path. A write is
+queued with a copy of the order, so later changes to the order don't change what is written. execute_order_set waits
+for its writes before returning.
+
+Each order's OrderLatency has the seconds spent in each stage:
+    placement: request to the exchange until it acknowledged the order
+    fill: acknowledgement until polling found the order filled
+    pending_write, placed_write, filled_write: database writes of each snapshot, in the background thread
+
+Example usage:
+    service = AsyncOrderExecutionService(logger=logger, exchanges_by_id=async_services_by_id, order_dao=OrderDao(),
+                                         scoped_session_maker=engine.scoped_session_maker)
+    executed_orders_by_order_id = await service.execute_order_set(orders, write_pending_order=True,
+                                                                  check_if_orders_filled=True)
+    service.latencies_by_order_id[order_id].stage_seconds
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
+from logging import Logger
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import scoped_session
+
+from trading_platform.exchanges.data.enums.order_side import OrderSide
+from trading_platform.exchanges.data.enums.order_status import OrderStatus
+from trading_platform.exchanges.data.order import Order
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.order_execution_service import OrderExecutionService
+from trading_platform.storage.daos.order_dao import OrderDao
+from trading_platform.utils.circuit_breaker import CircuitBreakerRegistry, circuit_breakers
+from trading_platform.utils.exceptions import CircuitOpenException
+
+placement: str = 'placement'
+fill: str = 'fill'
+pending_write: str = 'pending_write'
+placed_write: str = 'placed_write'
+filled_write: str = 'filled_write'
+
+
+class OrderLatency:
+    def __init__(self, order_id: str):
+        self.order_id = order_id
+        self.stage_seconds: Dict[str, float] = {}
+        self.status_checks: int = 0
+
+    def record(self, stage: str, start_time: float):
+        self.stage_seconds[stage] = time.perf_counter() - start_time
+
+    def __repr__(self):
+        return 'OrderLatency(order_id={0}, stage_seconds={1}, status_checks={2})'.format(
+            self.order_id, self.stage_seconds, self.status_checks)
+
+
+class AsyncOrderExecutionService:
+    def __init__(self, **kwargs):
+        self.logger: Logger = kwargs.get('logger')
+        # AsyncLiveExchangeServices by exchange id
+        self.exchanges_by_id: Dict[int, object] = kwargs.get('exchanges_by_id')
+        self.order_dao: OrderDao = kwargs.get('order_dao')
+        self.num_order_status_checks = kwargs.get('num_order_status_checks', 3)
+        self.scoped_session_maker: scoped_session = kwargs.get('scoped_session_maker')
+        self.sleep_time_sec_between_order_checks = kwargs.get('sleep_time_sec_between_order_checks', 4)
+        self.circuit_breakers: CircuitBreakerRegistry = kwargs.get('circuit_breakers', circuit_breakers)
+
+        # One writer thread, so an order's snapshots are written in the order they were queued
+        self.db_executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1)
+        self.pending_writes: List[asyncio.Future] = []
+        self.latencies_by_order_id: Dict[str, OrderLatency] = {}
+
+    async def execute_order_set(self, orders: Iterable[Order], write_pending_order: bool,
+                                check_if_orders_filled: bool) -> Dict[str, Order]:
+        """
+        Places every order at once. Orders on exchanges whose circuit breakers are open are skipped, and orders that
+        fail to be placed are logged and left out of the result.
+
+        Returns: latest snapshots of the placed orders by order_id
+        """
+        available_orders: List[Order] = []
+        for order in orders:
+            exchange = self.exchanges_by_id.get(order.exchange_id)
+            method_name: str = OrderExecutionService.limit_order_method_name(order)
+            if self.circuit_breakers.exchange_service_allows_requests(exchange, method_name):
+                available_orders.append(order)
+            else:
+                self.logger.warning('skipping order_id {0}, circuit breaker is open for exchange {1}'.format(
+                    order.order_id, order.exchange_id))
+
+        results: List = await asyncio.gather(
+            *[self.execute_order(order, write_pending_order) for order in available_orders], return_exceptions=True)
+        executed_orders: Dict[str, Order] = {}
+        for order, result in zip(available_orders, results):
+            if isinstance(result, BaseException):
+                self.logger.error('order_id {0} was not placed: {1!r}'.format(order.order_id, result))
+            elif result is not None:
+                executed_orders[order.order_id] = result
+
+        if check_if_orders_filled:
+            executed_orders.update(await self.poll_open_orders(executed_orders.values(), OrderStatus.filled))
+
+        await self.wait_for_writes()
+        return executed_orders
+
+    async def execute_order(self, order: Order, write_pending_order: bool) -> Optional[Order]:
+        """
+        Returns: the order acknowledged by the exchange, with order_status OrderStatus.open or OrderStatus.filled
+        """
+        self.logger.info('executing order with order_id {0} on exchange {1} on order_side {2}'.format(
+            order.order_id, order.exchange_id, order.order_side))
+        exchange = self.exchanges_by_id.get(order.exchange_id)
+        method_name: str = OrderExecutionService.limit_order_method_name(order)
+        if not self.circuit_breakers.exchange_service_allows_requests(exchange, method_name):
+            raise CircuitOpenException('Circuit breaker is open for {0} on exchange {1}'.format(method_name,
+                                                                                               order.exchange_id))
+        latency: OrderLatency = OrderLatency(order.order_id)
+        self.latencies_by_order_id[order.order_id] = latency
+
+        if write_pending_order:
+            order.order_status = OrderStatus.pending
+            self.write_order(order, pending_write)
+
+        exchange_method = exchange.create_limit_buy_order if order.order_side == OrderSide.buy else \
+            exchange.create_limit_sell_order
+        params = order.params if order.params is not None else {}
+        start_time: float = time.perf_counter()
+        executed_order: Optional[Order] = await exchange_method(order, params=params)
+        latency.record(placement, start_time)
+
+        if executed_order is not None:
+            self.write_order(executed_order, placed_write)
+        return executed_order
+
+    async def poll_open_orders(self, orders: Iterable[Order], order_status: OrderStatus) -> Dict[str, Order]:
+        """
+        Checks the status of every order that doesn't have order_status yet on each iteration, with one concurrent
+        fetch_order per order. Orders on exchanges whose fetch_order circuit breaker opens stop being polled.
+
+        Returns: latest snapshots of the orders by order_id
+        """
+        snapshots_by_order_id: Dict[str, Order] = {order.order_id: order for order in orders}
+        open_orders: List[Order] = [order for order in snapshots_by_order_id.values()
+                                    if order.order_status != order_status]
+        start_time: float = time.perf_counter()
+
+        for attempt in range(self.num_order_status_checks):
+            if len(open_orders) == 0:
+                break
+            if attempt > 0:
+                await asyncio.sleep(self.sleep_time_sec_between_order_checks)
+
+            results: List = await asyncio.gather(*[self.fetch_order(order) for order in open_orders],
+                                                 return_exceptions=True)
+            still_open_orders: List[Order] = []
+            for order, result in zip(open_orders, results):
+                latency: Optional[OrderLatency] = self.latencies_by_order_id.get(order.order_id)
+                if latency is not None:
+                    latency.status_checks += 1
+                if isinstance(result, CircuitOpenException):
+                    self.logger.warning('stopped polling order_id {0}: {1}'.format(order.order_id, result))
+                    continue
+                if isinstance(result, BaseException):
+                    self.logger.error('checking order_id {0} failed: {1!r}'.format(order.order_id, result))
+                    still_open_orders.append(order)
+                    continue
+                if result is None:
+                    still_open_orders.append(order)
+                    continue
+
+                snapshots_by_order_id[order.order_id] = result
+                if result.order_status == order_status:
+                    self.logger.info('order_id {0} has order_status {1}'.format(order.order_id, order_status))
+                    if latency is not None:
+                        latency.record(fill, start_time)
+                    self.write_order(result, filled_write)
+                else:
+                    still_open_orders.append(order)
+            open_orders = still_open_orders
+
+        return snapshots_by_order_id
+
+    async def fetch_order(self, order: Order) -> Optional[Order]:
+        exchange = self.exchanges_by_id.get(order.exchange_id)
+        return await exchange.fetch_order(order.exchange_order_id, pair=Pair(base=order.base, quote=order.quote),
+                                          params=None)
+
+    ###########################################
+    # Database writes
+    ###########################################
+
+    def write_order(self, order: Order, stage: str):
+        """
+        Queues a write of a snapshot of order, without waiting for it.
+        """
+        snapshot: Order = copy(order)
+        latency: Optional[OrderLatency] = self.latencies_by_order_id.get(order.order_id)
+
+        def save():
+            start_time: float = time.perf_counter()
+            session = self.scoped_session_maker()
+            self.order_dao.save(popo=snapshot, session=session, commit=True)
+            if latency is not None:
+                latency.record(stage, start_time)
+
+        self.pending_writes.append(asyncio.get_running_loop().run_in_executor(self.db_executor, save))
+
+    async def wait_for_writes(self):
+        """
+        Waits for queued writes. Failed writes are logged.
+        """
+        pending_writes: List[asyncio.Future] = self.pending_writes
+        self.pending_writes = []
+        results: List = await asyncio.gather(*pending_writes, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                self.logger.error('order write failed: {0!r}'.format(result))
+
+    def close(self):
+        self.db_executor.shutdown(wait=True)
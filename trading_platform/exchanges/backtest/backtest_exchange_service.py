@@ -3,7 +3,8 @@ Exchange services that are composed of a BacktestExchangeService instance are us
 
 This class uses in-memory data structures to maintain exchange balance and order state, while stub exchange operations
 such as buying, selling, and fetching balances. That way, the live exchange can be mocked.
-The class fetches historical ticker data from csv files and exposes that data as a stream to enable scalable backtesting.
+Historical ticker data is streamed to instances by TickerReplayFeed, via set_tickers(), to enable scalable
+backtesting.
 
 The class supports managing state of balances for multiple currencies, but only keeps track of capital gains and losses
 with respect to a single base currency. This seems fine for now because historical data is split up by exchange and pair.
@@ -31,7 +32,7 @@ from trading_platform.exchanges.data.enums.order_status import OrderStatus
 from trading_platform.exchanges.data.enums.order_type import OrderType
 from trading_platform.exchanges.data.financial_data import FinancialData, zero, one
 from trading_platform.exchanges.data.order import Order
-from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.data.pair import Pair, pair_registry
 from trading_platform.exchanges.data.ticker import Ticker
 from trading_platform.exchanges.exchange_service_abc import ExchangeServiceAbc
 from trading_platform.utils.exceptions import InsufficientFundsException
@@ -229,7 +230,7 @@ class BacktestExchangeService(ExchangeServiceAbc):
             self.__balances[quote].locked -= amount
             self.__balances[quote].total -= amount
 
-            pair: Pair = Pair(base=base, quote=quote)
+            pair: Pair = pair_registry.get(base=base, quote=quote)
             gross = (price - self.__buy_prices[pair.name]) * FinancialData(amount)
             usdt_value = self.usdt_value_for_currency(pair.base, self.get_tickers())
             gross_usdt = usdt_value * gross
@@ -380,15 +381,15 @@ class BacktestExchangeService(ExchangeServiceAbc):
         """
 
         def usdt_value(total_usdt_value: FinancialData, currency: str) -> FinancialData:
-            usdt_pair: Pair = Pair(base='USDT', quote=currency)
+            usdt_pair: Pair = pair_registry.get(base='USDT', quote=currency)
             currency_usdt_price: FinancialData = tickers.get(usdt_pair.name).last
 
             if currency_usdt_price is None:
                 for base in ['BTC', 'ETH']:
-                    pair: Pair = Pair(base=base, quote=currency)
+                    pair: Pair = pair_registry.get(base=base, quote=currency)
                     currency_base_price: FinancialData = tickers.get(pair.name).last
                     if currency_base_price is not None:
-                        usdt_pair: Pair = Pair(base='USDT', quote=base)
+                        usdt_pair: Pair = pair_registry.get(base='USDT', quote=base)
                         base_usdt_price: FinancialData = tickers.get(usdt_pair.name).last
                         currency_usdt_price: FinancialData = currency_base_price * base_usdt_price
                         break
@@ -0,0 +1,159 @@
+"""
+Streams historical tickers to backtests, instead of loading the whole date range into a DataFrame.
+
+A ticker stream is any iterator of Tickers in app_create_timestamp order. The stream functions in this module read
+tickers from csv files, the parquet dataset written by FileService.write_ticker_parquet(), a TickerArchive, or the
+tickers table, one file, day, batch, or query window at a time. TickerReplayFeed merges any number of streams with a
+k-way heap merge and yields one snapshot per timestamp. Memory use depends on the number of streams, the size of a
+single file, day, or window, and the number of pairs, but not on the length of the date range.
+"""
+import datetime
+import heapq
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas
+
+from trading_platform.core.services.file_service import FileService
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.pair import pair_registry
+from trading_platform.exchanges.data.ticker import Ticker
+from trading_platform.exchanges.exchange_service_abc import ExchangeServiceAbc
+from trading_platform.exchanges.ticker_archive import TickerArchive
+from trading_platform.storage.daos.ticker_dao import TickerDao
+from trading_platform.utils.datetime_operations import seconds_per_day, seconds_per_hour
+
+financial_data_fields: List[str] = ['ask', 'bid', 'last', 'base_volume', 'quote_volume']
+
+
+def tickers_from_df(ticker_df: pandas.DataFrame) -> Iterator[Ticker]:
+    """
+    Yields: a Ticker for each row of ticker_df, in app_create_timestamp order, with FinancialData numerical fields.
+    """
+    ticker_df = ticker_df.sort_values('app_create_timestamp', kind='mergesort')
+    for row in ticker_df.to_dict(orient='records'):
+        for field in financial_data_fields:
+            value = row.get(field)
+            row[field] = FinancialData(value) if value is not None and value == value else None
+        exchange_timestamp = row.get('exchange_timestamp')
+        if exchange_timestamp is not None and exchange_timestamp != exchange_timestamp:
+            row['exchange_timestamp'] = None
+        yield Ticker(**row)
+
+
+def csv_ticker_stream(start_timestamp: float, end_timestamp: float, csv_operation_config) -> Iterator[Ticker]:
+    """
+    Streams the csv files found by FileService.csv_filename_generator(), one file at a time. The files are read in
+    the order of the date in their filenames, so they must not overlap in time. Use one stream per file otherwise.
+
+    Args:
+        start_timestamp: stream tickers >= this utc timestamp
+        end_timestamp: stream tickers < this utc timestamp
+        csv_operation_config: see FileService.csv_filename_generator()
+    """
+    date_string_regex = re.compile('(.*){0}(.*).csv'.format(csv_operation_config.source_prefix))
+    # Include the file containing start_timestamp, which is named for an earlier date.
+    csv_filenames: List[str] = list(FileService.csv_filename_generator(start_timestamp - seconds_per_day,
+                                                                       end_timestamp, csv_operation_config))
+    csv_filenames.sort(key=lambda csv_filename: pandas.Timestamp(date_string_regex.match(csv_filename).group(2)))
+    for csv_filename in csv_filenames:
+        ticker_df: Optional[pandas.DataFrame] = FileService.read_csv(csv_filename, False)
+        if ticker_df is None:
+            continue
+        ticker_df = ticker_df[(ticker_df['app_create_timestamp'] >= start_timestamp) &
+                              (ticker_df['app_create_timestamp'] < end_timestamp)]
+        yield from tickers_from_df(ticker_df)
+
+
+def parquet_ticker_stream(source_dir: str, start_timestamp: float, end_timestamp: float,
+                          exchange_ids: Optional[List[int]] = None,
+                          pair_names: Optional[List[str]] = None) -> Iterator[Ticker]:
+    """
+    Streams the parquet dataset written by FileService.write_ticker_parquet(), one day partition at a time.
+    """
+    day_start: float = start_timestamp
+    while day_start < end_timestamp:
+        day_end: float = min(datetime.datetime.utcfromtimestamp(day_start).replace(
+            hour=0, minute=0, second=0, microsecond=0, tzinfo=datetime.timezone.utc).timestamp() + seconds_per_day,
+                             end_timestamp)
+        yield from tickers_from_df(FileService.read_ticker_parquet(source_dir, start_timestamp=day_start,
+                                                                   end_timestamp=day_end, exchange_ids=exchange_ids,
+                                                                   pair_names=pair_names))
+        day_start = day_end
+
+
+def archive_ticker_stream(ticker_archive: TickerArchive, start_timestamp: Optional[float] = None,
+                          end_timestamp: Optional[float] = None) -> Iterator[Ticker]:
+    return ticker_archive.tickers(start_timestamp=start_timestamp, end_timestamp=end_timestamp)
+
+
+def dao_ticker_stream(ticker_dao: TickerDao, session, start_timestamp: float, end_timestamp: float,
+                      window_seconds: float = seconds_per_hour) -> Iterator[Ticker]:
+    """
+    Streams the tickers table with one query per window of window_seconds.
+    """
+    window_start: float = start_timestamp
+    while window_start < end_timestamp:
+        window_end: float = min(window_start + window_seconds, end_timestamp)
+        yield from ticker_dao.fetch_by_app_create_timestamp_between_range(session, window_start, window_end)
+        window_start = window_end
+
+
+def ticker_sort_key(ticker: Ticker) -> float:
+    return ticker.app_create_timestamp
+
+
+class TickerReplayFeed:
+    """
+    Example usage:
+        feed = TickerReplayFeed([parquet_ticker_stream(parquet_dir, start, end), dao_ticker_stream(...)])
+        for timestamp in feed.replay(exchanges_by_id):
+            strategy.step(...)
+    """
+    def __init__(self, ticker_streams: List[Iterator[Ticker]], carry_forward: bool = True):
+        """
+        Args:
+            ticker_streams: iterators of Tickers, each in app_create_timestamp order
+            carry_forward: if True, each snapshot includes the latest earlier ticker for pairs that didn't update at
+                that timestamp. Otherwise a snapshot only has the tickers with that exact timestamp.
+        """
+        self.ticker_streams = ticker_streams
+        self.carry_forward = carry_forward
+
+    def tickers(self) -> Iterator[Ticker]:
+        """
+        Yields: Tickers of all streams, in app_create_timestamp order
+        """
+        return heapq.merge(*self.ticker_streams, key=ticker_sort_key)
+
+    def __iter__(self) -> Iterator[Tuple[float, Dict[int, Dict[str, Ticker]]]]:
+        """
+        Yields: (timestamp, tickers by pair name by exchange id) for each distinct app_create_timestamp. The dicts
+            are new for each snapshot, but the Tickers are shared between snapshots.
+        """
+        latest_tickers_by_exchange: Dict[int, Dict[str, Ticker]] = {}
+        snapshot_timestamp: Optional[float] = None
+        for ticker in self.tickers():
+            if snapshot_timestamp is not None and ticker.app_create_timestamp != snapshot_timestamp:
+                yield snapshot_timestamp, {exchange_id: dict(tickers) for exchange_id, tickers in
+                                           latest_tickers_by_exchange.items()}
+                if not self.carry_forward:
+                    latest_tickers_by_exchange = {}
+            snapshot_timestamp = ticker.app_create_timestamp
+            pair_name: str = pair_registry.get(base=ticker.base, quote=ticker.quote).name
+            latest_tickers_by_exchange.setdefault(ticker.exchange_id, {})[pair_name] = ticker
+
+        if snapshot_timestamp is not None:
+            yield snapshot_timestamp, latest_tickers_by_exchange
+
+    def replay(self, exchanges_by_id: Dict[int, ExchangeServiceAbc]) -> Iterator[float]:
+        """
+        Sets the tickers of each exchange to each snapshot in turn, and updates their pending deposits.
+
+        Yields: timestamp of the snapshot that was just set
+        """
+        for timestamp, tickers_by_exchange in self:
+            for exchange_id, exchange in exchanges_by_id.items():
+                exchange.set_tickers(tickers_by_exchange.get(exchange_id, {}))
+                exchange.update_pending_deposits(timestamp)
+            yield timestamp
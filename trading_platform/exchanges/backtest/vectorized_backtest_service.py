@@ -0,0 +1,259 @@
+"""
+Columnar counterpart of BacktestExchangeService. Instead of stepping through historical tickers one Ticker instance at a
+time and pushing every fill through create_limit_buy_order/create_limit_sell_order, the service takes a matrix of
+ticker data and a matrix of strategy signals and computes balances, fills, capital gains and losses, and equity curves
+with batched numpy operations.
+
+Ticker data is a float64 array of shape (time, pair, 2), where the last axis is (bid, ask). Signals are an array of
+shape (time, pair) containing buy_signal, sell_signal, or hold_signal.
+
+Each pair is traded as an independent sleeve of its base currency, with the same semantics as
+BacktestExchangeService.buy_all() and BacktestExchangeService.sell_all():
+- a buy spends the entire base balance of the sleeve at the ask. The base spent is
+  amount * price * (1 + trade_fee), see BacktestExchangeService.base_needed_to_buy_currency_after_trade_fees().
+- a sell sells the entire quote balance of the sleeve at the bid. The base received is
+  price * amount / (1 + trade_fee), see BacktestExchangeService.create_limit_sell_order().
+- capital gains and losses are (sell price - last buy price) * amount, converted to USDT with the price of the base
+  currency at the time of the sale.
+
+Because a sleeve is always either all base or all quote, the sleeve balance is the initial capital multiplied by the
+cumulative product of the conversion factors of every fill, which removes the sequential dependency between time steps.
+
+Values are float64, unlike the FinancialData values used by BacktestExchangeService, so results agree with
+BacktestExchangeService to around 1e-9 relative precision. See test_vectorized_backtest_service.py.
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas
+
+from trading_platform.exchanges.data.balance import Balance
+from trading_platform.exchanges.data.enums.order_side import OrderSide
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.pair import Pair, pair_registry
+
+buy_signal = 1
+sell_signal = -1
+hold_signal = 0
+
+bid_index = 0
+ask_index = 1
+
+
+class VectorizedBacktestResult:
+    """
+    Output of VectorizedBacktestService.run(). All arrays are indexed by (time, pair) unless otherwise noted, and
+    reflect state after the fills at that time step.
+    """
+
+    def __init__(self, **kwargs):
+        """
+        Args:
+            **kwargs:
+                timestamps: np.ndarray. Shape (time,).
+                pairs: List[Pair]. Pair for each column.
+                base_balances: np.ndarray. Base currency held by each pair's sleeve.
+                quote_balances: np.ndarray. Quote currency held by each pair's sleeve.
+                buys: np.ndarray[bool]. True where a buy was filled.
+                sells: np.ndarray[bool]. True where a sell was filled.
+                fill_prices: np.ndarray. Price of the fill, nan where there was no fill.
+                fill_amounts: np.ndarray. Quote amount of the fill, nan where there was no fill.
+                capital_gains: np.ndarray. Capital gains in USDT realized by each fill.
+                capital_losses: np.ndarray. Capital losses in USDT realized by each fill. Positive values.
+                equity: np.ndarray. Value of each sleeve in its base currency, marked to the bid.
+                equity_curve: np.ndarray. Shape (time,). Value of all sleeves in USDT.
+        """
+        self.timestamps: np.ndarray = kwargs.get('timestamps')
+        self.pairs: List[Pair] = kwargs.get('pairs')
+
+        self.base_balances: np.ndarray = kwargs.get('base_balances')
+        self.quote_balances: np.ndarray = kwargs.get('quote_balances')
+
+        self.buys: np.ndarray = kwargs.get('buys')
+        self.sells: np.ndarray = kwargs.get('sells')
+        self.fill_prices: np.ndarray = kwargs.get('fill_prices')
+        self.fill_amounts: np.ndarray = kwargs.get('fill_amounts')
+
+        self.capital_gains: np.ndarray = kwargs.get('capital_gains')
+        self.capital_losses: np.ndarray = kwargs.get('capital_losses')
+
+        self.equity: np.ndarray = kwargs.get('equity')
+        self.equity_curve: np.ndarray = kwargs.get('equity_curve')
+
+    @property
+    def total_capital_gains(self) -> FinancialData:
+        return FinancialData(float(self.capital_gains.sum()))
+
+    @property
+    def total_capital_losses(self) -> FinancialData:
+        return FinancialData(float(self.capital_losses.sum()))
+
+    def final_balances(self) -> Dict[str, Balance]:
+        """
+        Balances by currency after the last time step, summed over all sleeves. Same shape as the return value of
+        BacktestExchangeService.fetch_balances().
+
+        Returns:
+
+        """
+        totals: Dict[str, float] = defaultdict(float)
+        for pair_index, pair in enumerate(self.pairs):
+            totals[pair.base] += self.base_balances[-1, pair_index]
+            totals[pair.quote] += self.quote_balances[-1, pair_index]
+
+        balances: Dict[str, Balance] = defaultdict(Balance.instance_with_zero_value_fields)
+        for currency, total in totals.items():
+            amount: FinancialData = FinancialData(float(total))
+            balances[currency] = Balance(currency=currency, free=amount, locked=amount, total=amount)
+        return balances
+
+    def fills_df(self) -> pandas.DataFrame:
+        """
+        One row per fill, in time order, with the Order fields that the backtest sets.
+
+        Returns:
+
+        """
+        time_indices, pair_indices = np.nonzero(self.buys | self.sells)
+        return pandas.DataFrame({
+            'timestamp': self.timestamps[time_indices],
+            'base': [self.pairs[pair_index].base for pair_index in pair_indices],
+            'quote': [self.pairs[pair_index].quote for pair_index in pair_indices],
+            'order_side': np.where(self.buys[time_indices, pair_indices], OrderSide.buy, OrderSide.sell),
+            'price': self.fill_prices[time_indices, pair_indices],
+            'amount': self.fill_amounts[time_indices, pair_indices],
+            'capital_gains': self.capital_gains[time_indices, pair_indices],
+            'capital_losses': self.capital_losses[time_indices, pair_indices],
+        })
+
+
+class VectorizedBacktestService:
+    def __init__(self, trade_fee: FinancialData):
+        """
+        Args:
+            trade_fee FinancialData: percent trade fee. Adds to base amount spent on buy orders and subtracts from base
+                amount received on sell orders.
+        """
+        self.trade_fee = trade_fee
+
+    def run(self, timestamps: np.ndarray, pairs: List[Pair], tickers: np.ndarray, signals: np.ndarray,
+            initial_base_capital: np.ndarray, base_usdt_prices: Optional[np.ndarray] = None) -> VectorizedBacktestResult:
+        """
+        Args:
+            timestamps: shape (time,). Sorted in ascending order.
+            pairs: Pair for each column of tickers and signals.
+            tickers: shape (time, pair, 2). Bid and ask of each pair. nan where there is no ticker, in which case
+                signals that would fill at that price are ignored.
+            signals: shape (time, pair). buy_signal, sell_signal, or hold_signal. A buy signal while a sleeve holds
+                quote, or a sell signal while a sleeve holds base, is ignored.
+            initial_base_capital: shape (pair,). Base currency allocated to each pair's sleeve.
+            base_usdt_prices: shape (time, pair). Price of each pair's base currency in USDT, used to value capital
+                gains and equity. Defaults to 1, which is correct for pairs with a USDT base.
+
+        Returns:
+
+        """
+        num_timestamps, num_pairs = signals.shape
+        bids: np.ndarray = tickers[:, :, bid_index].astype(np.float64)
+        asks: np.ndarray = tickers[:, :, ask_index].astype(np.float64)
+        if base_usdt_prices is None:
+            base_usdt_prices = np.ones((num_timestamps, num_pairs))
+        fee: float = float(self.trade_fee)
+
+        signals = np.where(((signals == buy_signal) & np.isnan(asks)) | ((signals == sell_signal) & np.isnan(bids)),
+                           hold_signal, signals)
+
+        # A sleeve holds quote from a buy signal until the next sell signal.
+        holding_quote: np.ndarray = self.forward_fill(signals, signals != hold_signal) == buy_signal
+        held_quote_previously: np.ndarray = np.vstack([np.zeros((1, num_pairs), dtype=bool), holding_quote[:-1]])
+        buys: np.ndarray = holding_quote & ~held_quote_previously
+        sells: np.ndarray = ~holding_quote & held_quote_previously
+
+        # Conversion factor from the currency held before a fill to the currency held after it.
+        conversion: np.ndarray = np.ones((num_timestamps, num_pairs))
+        conversion[buys] = 1 / (asks[buys] * (1 + fee))
+        conversion[sells] = bids[sells] / (1 + fee)
+        sleeve_balances: np.ndarray = initial_base_capital[np.newaxis, :] * np.cumprod(conversion, axis=0)
+        previous_sleeve_balances: np.ndarray = np.vstack([initial_base_capital[np.newaxis, :], sleeve_balances[:-1]])
+
+        base_balances: np.ndarray = np.where(holding_quote, 0.0, sleeve_balances)
+        quote_balances: np.ndarray = np.where(holding_quote, sleeve_balances, 0.0)
+
+        fill_prices: np.ndarray = np.full((num_timestamps, num_pairs), np.nan)
+        fill_prices[buys] = asks[buys]
+        fill_prices[sells] = bids[sells]
+        fill_amounts: np.ndarray = np.full((num_timestamps, num_pairs), np.nan)
+        fill_amounts[buys] = sleeve_balances[buys]
+        fill_amounts[sells] = previous_sleeve_balances[sells]
+
+        buy_prices: np.ndarray = self.forward_fill(np.where(buys, asks, np.nan), buys)
+        gross_usdt: np.ndarray = np.zeros((num_timestamps, num_pairs))
+        gross_usdt[sells] = (bids[sells] - buy_prices[sells]) * fill_amounts[sells] * base_usdt_prices[sells]
+        capital_gains: np.ndarray = np.where(gross_usdt >= 0, gross_usdt, 0.0)
+        capital_losses: np.ndarray = np.where(gross_usdt < 0, -gross_usdt, 0.0)
+
+        equity: np.ndarray = base_balances + quote_balances * np.nan_to_num(self.forward_fill(bids, ~np.isnan(bids)))
+        equity_curve: np.ndarray = (equity * base_usdt_prices).sum(axis=1)
+
+        return VectorizedBacktestResult(**{
+            'timestamps': timestamps,
+            'pairs': pairs,
+
+            'base_balances': base_balances,
+            'quote_balances': quote_balances,
+
+            'buys': buys,
+            'sells': sells,
+            'fill_prices': fill_prices,
+            'fill_amounts': fill_amounts,
+
+            'capital_gains': capital_gains,
+            'capital_losses': capital_losses,
+
+            'equity': equity,
+            'equity_curve': equity_curve,
+        })
+
+    @staticmethod
+    def forward_fill(values: np.ndarray, is_set: np.ndarray) -> np.ndarray:
+        """
+        For each column, replace every value where "is_set" is False with the most recent value where "is_set" is
+        True. Values before the first set value are taken from the first row.
+
+        Args:
+            values: shape (time, pair)
+            is_set: shape (time, pair)
+
+        Returns:
+
+        """
+        num_timestamps, num_pairs = values.shape
+        source_rows: np.ndarray = np.where(is_set, np.arange(num_timestamps)[:, np.newaxis], 0)
+        np.maximum.accumulate(source_rows, axis=0, out=source_rows)
+        return values[source_rows, np.arange(num_pairs)[np.newaxis, :]]
+
+    @staticmethod
+    def ticker_matrix_from_df(ticker_df: pandas.DataFrame, pairs: Optional[List[Pair]] = None):
+        """
+        Pivot a DataFrame of tickers, such as one read via FileService.read_csv(), into the inputs of run().
+
+        Args:
+            ticker_df: must have "app_create_timestamp", "base", "quote", "bid", and "ask" columns. Should contain the
+                tickers of a single exchange.
+            pairs: columns of the matrix. Defaults to every pair in ticker_df.
+
+        Returns: (np.ndarray, List[Pair], np.ndarray): timestamps, pairs, and tickers of shape (time, pair, 2)
+
+        """
+        pair_names: pandas.Series = ticker_df['quote'] + '_' + ticker_df['base']
+        if pairs is None:
+            pairs = [pair_registry.from_dto_string(pair_name) for pair_name in sorted(pair_names.unique())]
+        columns: List[str] = [pair.name for pair in pairs]
+
+        bid_ask_df: pandas.DataFrame = ticker_df.assign(pair_name=pair_names).pivot_table(
+            index='app_create_timestamp', columns='pair_name', values=['bid', 'ask'], aggfunc='last')
+        bid_ask_df = bid_ask_df.reindex(columns=pandas.MultiIndex.from_product([['bid', 'ask'], columns]))
+
+        tickers: np.ndarray = np.stack([bid_ask_df['bid'].values, bid_ask_df['ask'].values], axis=2).astype(np.float64)
+        return bid_ask_df.index.values, pairs, tickers
@@ -0,0 +1,214 @@
+"""
+Compact variants of Ticker, Order, Balance, and Pair for holding large numbers of instances in memory, such as a day of
+tickers for every exchange.
+
+The variants use __slots__ instead of a per-instance __dict__, and compute __hash__ once at construction instead of
+sorting __dict__.items() on every call. Constructors take the same kwargs as the original classes, and the to_dict()
+and csv_fieldnames() contracts are unchanged, because both are delegated to the original classes.
+
+The precomputed hash only covers identity fields, which are listed in "hash_fields" for each class. Equal instances
+therefore always have equal hashes, even after a numerical field such as "bid" or "free" is updated. The identity
+fields should not be changed after an instance has been added to a set or used as a dict key.
+"""
+from typing import List
+
+from trading_platform.exchanges.data.balance import Balance
+from trading_platform.exchanges.data.order import Order
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.data.ticker import Ticker
+from trading_platform.utils.datetime_operations import utc_timestamp
+
+
+def slots_eq(self, other):
+    """
+    Shared __eq__ implementation. Like the __dict__ comparison of the original classes, but over __slots__.
+    """
+    if isinstance(self, other.__class__):
+        return all(getattr(self, field) == getattr(other, field) for field in self.value_fields)
+    return NotImplemented
+
+
+class CompactTicker:
+    value_fields: List[str] = Ticker.csv_fieldnames() + ['db_id', 'db_create_timestamp', 'db_update_timestamp']
+    hash_fields: List[str] = ['exchange_id', 'base', 'quote', 'app_create_timestamp']
+    __slots__ = tuple(value_fields) + ('hash_value',)
+
+    first_version_with_volume_fields = Ticker.first_version_with_volume_fields
+    current_version = Ticker.current_version
+    numerical_fields = Ticker.numerical_fields
+    required_fields = Ticker.required_fields
+    nullable_fields = Ticker.nullable_fields
+
+    def __init__(self, **kwargs):
+        """
+        Args:
+            kwargs: See Ticker.__init__()
+        """
+        # Same assignments as Ticker.__init__(), inlined because delegating to it re-packs kwargs for every instance.
+        get = kwargs.get
+        self.ask = get('ask')
+        self.bid = get('bid')
+        self.last = get('last')
+
+        self.base_volume = get('base_volume')
+        self.quote_volume = get('quote_volume')
+
+        self.base = get('base')
+        self.quote = get('quote')
+
+        self.exchange_id = get('exchange_id')
+        self.exchange_timestamp = get('exchange_timestamp')
+
+        app_create_timestamp = get('app_create_timestamp')
+        self.app_create_timestamp = app_create_timestamp if app_create_timestamp is not None else utc_timestamp()
+        self.db_id = get('db_id')
+        self.db_create_timestamp = get('db_create_timestamp')
+        self.db_update_timestamp = get('db_update_timestamp')
+        self.version = get('version')
+
+        self.hash_value = hash((self.exchange_id, self.base, self.quote, self.app_create_timestamp))
+
+    __eq__ = slots_eq
+
+    def __hash__(self):
+        return self.hash_value
+
+    to_dict = Ticker.to_dict
+    from_exchange_data = classmethod(Ticker.from_exchange_data.__func__)
+    from_csv_data = classmethod(Ticker.from_csv_data.__func__)
+    classname = staticmethod(Ticker.classname)
+    csv_fieldnames = staticmethod(Ticker.csv_fieldnames)
+
+
+class CompactOrder:
+    value_fields: List[str] = [
+        'app_create_timestamp',
+        'version',
+        'strategy_execution_id',
+
+        'db_id',
+        'db_create_timestamp',
+        'db_update_timestamp',
+
+        'exchange_id',
+        'exchange_timestamp',
+        'exchange_order_id',
+        'order_type',
+
+        'amount',
+        'filled',
+        'price',
+        'remaining',
+        'params',
+
+        'base',
+        'quote',
+        'order_status',
+        'order_side',
+        'order_id',
+    ]
+    hash_fields: List[str] = ['exchange_id', 'order_id']
+    __slots__ = tuple(value_fields) + ('hash_value',)
+
+    current_version = Order.current_version
+    required_fields = Order.required_fields
+    financial_data_fields = Order.financial_data_fields
+    index_fields = Order.index_fields
+    financial_data_index_fields = Order.financial_data_index_fields
+    nullable_fields = Order.nullable_fields
+
+    def __init__(self, **kwargs):
+        """
+        Args:
+            kwargs: See Order.__init__()
+        """
+        Order.__init__(self, **kwargs)
+        self.hash_value = hash((self.exchange_id, self.order_id))
+
+    __eq__ = slots_eq
+
+    def __hash__(self):
+        return self.hash_value
+
+    to_dict = Order.to_dict
+    filled_order_copy = Order.filled_order_copy
+    copy_updated_with_create_order_exchange_response = Order.copy_updated_with_create_order_exchange_response
+    copy_updated_with_cancel_order_exchange_response = Order.copy_updated_with_cancel_order_exchange_response
+    from_fetch_order_exchange_response = classmethod(Order.from_fetch_order_exchange_response.__func__)
+    csv_fieldnames = classmethod(Order.csv_fieldnames.__func__)
+    classname = staticmethod(Order.classname)
+
+
+class CompactBalance:
+    value_fields: List[str] = [
+        'db_id',
+        'db_update_timestamp',
+        'db_create_timestamp',
+
+        'currency',
+        'exchange_id',
+        'free',
+        'locked',
+        'total',
+        'version',
+        'exchange_timestamp',
+        'app_create_timestamp',
+    ]
+    hash_fields: List[str] = ['exchange_id', 'currency', 'app_create_timestamp']
+    __slots__ = tuple(value_fields) + ('hash_value',)
+
+    required_fields = Balance.required_fields
+    nullable_fields = Balance.nullable_fields
+
+    def __init__(self, **kwargs):
+        """
+        Args:
+            kwargs: See Balance.__init__()
+        """
+        Balance.__init__(self, **kwargs)
+        self.hash_value = hash((self.exchange_id, self.currency, self.app_create_timestamp))
+
+    __eq__ = slots_eq
+
+    def __hash__(self):
+        return self.hash_value
+
+    __add__ = Balance.__add__
+    instance_with_zero_value_fields = classmethod(Balance.instance_with_zero_value_fields.__func__)
+    classname = staticmethod(Balance.classname)
+
+
+class CompactPair:
+    """
+    Unlike Pair, the name variants are built on access instead of being formatted for every instance.
+    """
+    value_fields: List[str] = ['base', 'quote']
+    hash_fields: List[str] = value_fields
+    __slots__ = ('base', 'quote', 'hash_value')
+
+    def __init__(self, base, quote):
+        self.base = base
+        self.quote = quote
+        self.hash_value = hash((base, quote))
+
+    __eq__ = slots_eq
+
+    def __hash__(self):
+        return self.hash_value
+
+    @property
+    def name(self) -> str:
+        return self.quote + '_' + self.base
+
+    @property
+    def name_for_exchange_clients(self) -> str:
+        return self.quote + '/' + self.base
+
+    @property
+    def kaiko_name(self) -> str:
+        return self.quote + self.base
+
+    from_exchange_client_string = classmethod(Pair.from_exchange_client_string.__func__)
+    from_dto_string = classmethod(Pair.from_dto_string.__func__)
+    from_string = staticmethod(Pair.from_string)
+    name_for_base_and_quote = staticmethod(Pair.name_for_base_and_quote)
@@ -0,0 +1,258 @@
+"""
+Opt-in fixed-point alternative to FinancialData for hot paths such as backtest fills and balance ledgers.
+
+FinancialData returns a decimal.Decimal, so every balance, price, and fee operation allocates a new Decimal. A
+FixedPointFinancialData stores a number as an integer count of 10 ** -scale units. The default scale is 8, which is
+satoshi resolution. Arithmetic is integer arithmetic, and products and quotients are rounded half to even, which is
+how Decimal rounds.
+
+Columns of values, such as ticker bids and asks or a ledger of balances, can be converted in one call to int64 numpy
+arrays with to_fixed_point_array() and operated on with the *_arrays functions, without a Python object per element.
+That is where the speedup is. Scalar FixedPointFinancialData arithmetic is pure Python and is slower than the C
+implementation of Decimal, see integration_and_performance_testing/benchmark_financial_data.py, so the scalar class is
+for values that need to interoperate with the arrays, such as the fee or an individual balance.
+An int64 holds about 9.2e10 units at scale 8, which is enough for any balance or price in this app, but intermediate
+products are decomposed so that they don't overflow.
+"""
+from decimal import Decimal
+from typing import Union
+
+import numpy as np
+
+# 1 satoshi = 10 ** -8 BTC
+satoshi_scale = 8
+
+
+def round_half_even_divide(numerator: int, denominator: int) -> int:
+    """
+    numerator / denominator rounded half to even. denominator must be positive.
+    """
+    quotient, remainder = divmod(numerator, denominator)
+    twice_remainder = 2 * remainder
+    if twice_remainder > denominator or (twice_remainder == denominator and quotient % 2 == 1):
+        quotient += 1
+    return quotient
+
+
+def new_fixed_point(raw: int, scale: int) -> 'FixedPointFinancialData':
+    """
+    Construct an instance from a raw int without any conversion. Used by arithmetic operations, which are on the
+    backtest fill path.
+    """
+    instance: FixedPointFinancialData = object.__new__(FixedPointFinancialData)
+    instance.raw = raw
+    instance.scale = scale
+    return instance
+
+
+class FixedPointFinancialData:
+    __slots__ = ('raw', 'scale')
+
+    def __init__(self, number, scale: int = satoshi_scale):
+        """
+        Args:
+            number: int, float, str, Decimal, or FixedPointFinancialData. Floats are converted via Decimal, the same
+                way that FinancialData converts them, and then rounded to "scale" places.
+            scale: number of digits after the decimal point.
+        """
+        self.scale: int = scale
+        if isinstance(number, FixedPointFinancialData):
+            self.raw: int = number.raw if number.scale == scale else round_half_even_divide(
+                number.raw * 10 ** max(scale - number.scale, 0), 10 ** max(number.scale - scale, 0))
+        elif isinstance(number, int):
+            self.raw = number * 10 ** scale
+        else:
+            self.raw = int(Decimal(number).scaleb(scale).to_integral_value())
+
+    @classmethod
+    def from_raw(cls, raw: int, scale: int = satoshi_scale) -> 'FixedPointFinancialData':
+        instance: FixedPointFinancialData = object.__new__(cls)
+        instance.raw = int(raw)
+        instance.scale = scale
+        return instance
+
+    def coerce_raw(self, other) -> int:
+        if type(other) is FixedPointFinancialData and other.scale == self.scale:
+            return other.raw
+        return FixedPointFinancialData(other, self.scale).raw
+
+    def to_decimal(self) -> Decimal:
+        return Decimal(self.raw).scaleb(-self.scale)
+
+    ###########################################
+    # Arithmetic
+    ###########################################
+
+    def __add__(self, other):
+        return new_fixed_point(self.raw + self.coerce_raw(other), self.scale)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return new_fixed_point(self.raw - self.coerce_raw(other), self.scale)
+
+    def __rsub__(self, other):
+        return new_fixed_point(self.coerce_raw(other) - self.raw, self.scale)
+
+    def __mul__(self, other):
+        unit: int = 10 ** self.scale
+        quotient, remainder = divmod(self.raw * self.coerce_raw(other), unit)
+        # inlined round_half_even_divide() because this is the hottest operation in the backtest fill path
+        if 2 * remainder > unit or (2 * remainder == unit and quotient & 1):
+            quotient += 1
+        return new_fixed_point(quotient, self.scale)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        return self.divide_raw(self.raw, self.coerce_raw(other))
+
+    def __rtruediv__(self, other):
+        return self.divide_raw(self.coerce_raw(other), self.raw)
+
+    def divide_raw(self, numerator: int, denominator: int) -> 'FixedPointFinancialData':
+        if denominator == 0:
+            raise ZeroDivisionError('FixedPointFinancialData division by zero')
+        if denominator < 0:
+            numerator, denominator = -numerator, -denominator
+        return new_fixed_point(round_half_even_divide(numerator * 10 ** self.scale, denominator), self.scale)
+
+    def __neg__(self):
+        return new_fixed_point(-self.raw, self.scale)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return new_fixed_point(abs(self.raw), self.scale)
+
+    def __round__(self, ndigits=None):
+        """
+        Rounds half to even, like round() of a Decimal. Supports rounding to FinancialData.order_numerical_field_precision.
+        """
+        if ndigits is None:
+            return round_half_even_divide(self.raw, 10 ** self.scale)
+        if ndigits >= self.scale:
+            return self
+        unit: int = 10 ** (self.scale - ndigits)
+        return new_fixed_point(round_half_even_divide(self.raw, unit) * unit, self.scale)
+
+    ###########################################
+    # Comparisons and conversions
+    ###########################################
+
+    def __eq__(self, other):
+        """
+        Equal to FixedPointFinancialData, int, and Decimal values with exactly the same value, so equal values have
+        equal hashes and can be mixed in dicts and sets. Floats and strs are never equal, because they'd have to be
+        rounded to "scale" places first, and their hashes differ. Convert them to FixedPointFinancialData to compare,
+        or use the ordering methods, which do round them.
+        """
+        if type(other) is FixedPointFinancialData and other.scale == self.scale:
+            return self.raw == other.raw
+        if isinstance(other, (FixedPointFinancialData, int, Decimal)):
+            return self.to_decimal() == (other.to_decimal() if isinstance(other, FixedPointFinancialData) else other)
+        return NotImplemented
+
+    def __lt__(self, other):
+        return self.raw < self.coerce_raw(other)
+
+    def __le__(self, other):
+        return self.raw <= self.coerce_raw(other)
+
+    def __gt__(self, other):
+        return self.raw > self.coerce_raw(other)
+
+    def __ge__(self, other):
+        return self.raw >= self.coerce_raw(other)
+
+    def __hash__(self):
+        # Equal to the hash of an equal Decimal, int, or FixedPointFinancialData of another scale
+        return hash(self.to_decimal())
+
+    def __bool__(self):
+        return self.raw != 0
+
+    def __float__(self):
+        return self.raw / 10 ** self.scale
+
+    def __int__(self):
+        return int(self.to_decimal())
+
+    def __str__(self):
+        return str(self.to_decimal())
+
+    def __repr__(self):
+        return "FixedPointFinancialData('{0}')".format(self)
+
+
+###########################################
+# Batch operations on int64 arrays of raw values
+###########################################
+
+def to_fixed_point_array(values, scale: int = satoshi_scale) -> np.ndarray:
+    """
+    Convert a sequence of numbers to an int64 array of raw values. Float arrays are converted in one vectorized
+    operation. Object arrays, such as a column of FinancialData values, are converted exactly, element by element.
+    """
+    values = np.asarray(values)
+    if values.dtype == object:
+        return np.array([FixedPointFinancialData(value, scale).raw for value in values.ravel()],
+                        dtype=np.int64).reshape(values.shape)
+    return np.rint(values.astype(np.float64) * 10 ** scale).astype(np.int64)
+
+
+def from_fixed_point_array(raw: np.ndarray, scale: int = satoshi_scale) -> np.ndarray:
+    return raw / 10 ** scale
+
+
+def round_half_even_divide_arrays(numerator: np.ndarray, denominator: Union[int, np.ndarray]) -> np.ndarray:
+    """
+    Vectorized round_half_even_divide(). denominator must be positive.
+    """
+    quotient, remainder = np.divmod(numerator, denominator)
+    twice_remainder = 2 * remainder
+    return quotient + ((twice_remainder > denominator) | ((twice_remainder == denominator) & (quotient % 2 == 1)))
+
+
+def multiply_arrays(a: np.ndarray, b: np.ndarray, scale: int = satoshi_scale) -> np.ndarray:
+    """
+    Fixed-point product of raw value arrays. Each operand is split into whole and fractional units so that the
+    intermediate product doesn't overflow int64 unless the result does.
+    """
+    unit: int = 10 ** scale
+    a_whole, a_fraction = np.divmod(np.asarray(a, dtype=np.int64), unit)
+    b_whole, b_fraction = np.divmod(np.asarray(b, dtype=np.int64), unit)
+    return (a_whole * b_whole * unit + a_whole * b_fraction + a_fraction * b_whole +
+            round_half_even_divide_arrays(a_fraction * b_fraction, unit))
+
+
+def divide_arrays(a: np.ndarray, b: np.ndarray, scale: int = satoshi_scale) -> np.ndarray:
+    """
+    Fixed-point quotient of raw value arrays, computed by long division one decimal digit at a time so that the
+    numerator is never multiplied by 10 ** scale.
+    """
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    if np.any(b == 0):
+        raise ZeroDivisionError('FixedPointFinancialData division by zero')
+    sign: np.ndarray = np.sign(a) * np.sign(b)
+    a, b = np.abs(a), np.abs(b)
+
+    quotient, remainder = np.divmod(a, b)
+    for _ in range(scale):
+        digit, remainder = np.divmod(remainder * 10, b)
+        quotient = quotient * 10 + digit
+    twice_remainder = 2 * remainder
+    quotient = quotient + ((twice_remainder > b) | ((twice_remainder == b) & (quotient % 2 == 1)))
+    return sign * quotient
+
+
+def round_array(raw: np.ndarray, ndigits: int, scale: int = satoshi_scale) -> np.ndarray:
+    """
+    Vectorized round(FixedPointFinancialData, ndigits).
+    """
+    if ndigits >= scale:
+        return raw
+    unit: int = 10 ** (scale - ndigits)
+    return round_half_even_divide_arrays(np.asarray(raw, dtype=np.int64), unit) * unit
@@ -6,7 +6,7 @@ from trading_platform.exchanges.data.enums.order_side import OrderSide
 from trading_platform.exchanges.data.enums.order_status import OrderStatus
 from trading_platform.exchanges.data.enums.order_type import OrderType
 from trading_platform.exchanges.data.financial_data import FinancialData, zero
-from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.data.pair import Pair, pair_registry
 from trading_platform.utils.datetime_operations import utc_timestamp, microsecond_timestamp_to_second_timestamp
 
 STRFTIME_MICROSECONDS = '%Y-%m-%dT%H:%M:%SZ'
@@ -277,6 +277,38 @@ class Order:
         copy.remaining = zero
         return copy
 
+    def copy_updated_with_exchange_order(self, exchange_order: 'Order') -> 'Order':
+        """
+        Construct a copy of the current instance with the state of exchange_order, an Order from a fetch_order or
+        fetch_open_orders exchange response. Used to save a new state of an order to the database, because exchange
+        responses don't include app metadata like strategy_execution_id.
+
+        The fields that are overwritten are:
+        - order_status
+        - filled
+        - remaining
+        - exchange_order_id, if the current instance doesn't have one yet
+        - exchange_timestamp, if the current instance doesn't have one yet
+        - app_create_timestamp
+
+        Returns Order: copy of current instance with certain fields modified.
+        """
+        copy = deepcopy(self)
+        copy.order_status = exchange_order.order_status
+        copy.db_id = None
+        copy.db_create_timestamp = None
+        copy.db_update_timestamp = None
+
+        copy.app_create_timestamp = utc_timestamp()
+
+        copy.filled = exchange_order.filled
+        copy.remaining = exchange_order.remaining
+        if copy.exchange_order_id is None:
+            copy.exchange_order_id = exchange_order.exchange_order_id
+        if copy.exchange_timestamp is None:
+            copy.exchange_timestamp = exchange_order.exchange_timestamp
+        return copy
+
     def copy_updated_with_create_order_exchange_response(self, order_data: Dict):
         """
         Construct an open order instance that's a copy of the current instance, but with certain fields
@@ -376,7 +408,7 @@ class Order:
         }
 
         if order_data.get('symbol'):
-            pair: Pair = Pair.from_exchange_client_string(order_data.get('symbol'))
+            pair: Pair = pair_registry.from_exchange_client_string(order_data.get('symbol'))
             if pair:
                 kwargs['base'] = pair.base
                 kwargs['quote'] = pair.quote
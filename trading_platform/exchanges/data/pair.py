@@ -1,7 +1,9 @@
 import re
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 
 alphanumeric_set = '[A-Za-z0-9]'
+# Compiled from_string() patterns by separator character
+patterns_by_separator_char: Dict = {}
 
 
 class Pair:
@@ -52,9 +54,13 @@ class Pair:
 
     @staticmethod
     def from_string(separator_char, pair_string) -> Tuple[Optional[str], Optional[str]]:
-        match_str = '({0}*){1}({2}*)'.format(alphanumeric_set, separator_char, alphanumeric_set)
+        pattern = patterns_by_separator_char.get(separator_char)
+        if pattern is None:
+            pattern = re.compile('({0}*){1}({2}*)'.format(alphanumeric_set, re.escape(separator_char), alphanumeric_set))
+            patterns_by_separator_char[separator_char] = pattern
+
         try:
-            match = re.match(match_str, pair_string)
+            match = pattern.match(pair_string)
         except TypeError:
             print('Error when matching pair_string {0}'.format(pair_string))
             return None, None
@@ -84,4 +90,86 @@ class Pair:
         Returns:
 
         """
-        return '{0}_{1}'.format(quote, base)
\ No newline at end of file
+        return '{0}_{1}'.format(quote, base)
+
+
+class PairRegistry:
+    """
+    Process-wide registry of interned Pairs, so hot paths such as ticker parsing and backtest fills can share one
+    instance per (base, quote) instead of building a new Pair, and formatting its three names, on every call.
+
+    Pairs are looked up by base and quote, or by any of their string forms. Repeated lookups are dict gets that
+    allocate nothing. The returned Pairs are shared, so they must not be modified.
+    """
+    def __init__(self):
+        self.pairs_by_quote_by_base: Dict[str, Dict[str, Pair]] = {}
+        self.pairs_by_name: Dict[str, Pair] = {}
+        self.pairs_by_exchange_client_name: Dict[str, Pair] = {}
+        self.pairs_by_kaiko_name: Dict[str, Pair] = {}
+
+    def get(self, base: str, quote: str) -> Pair:
+        """
+        Returns the interned Pair for base and quote, creating it on the first lookup.
+        """
+        pairs_by_quote: Optional[Dict[str, Pair]] = self.pairs_by_quote_by_base.get(base)
+        if pairs_by_quote is not None:
+            pair: Optional[Pair] = pairs_by_quote.get(quote)
+            if pair is not None:
+                return pair
+        return self.__intern(Pair(base=base, quote=quote))
+
+    def from_exchange_client_string(self, pair_string: str) -> Optional[Pair]:
+        """
+        Args:
+            pair_string str: Example, 'BTC/USDT'. 'BCC' quotes are normalized to 'BCH' like Pair.from_string().
+
+        Returns: None if pair_string can't be parsed
+        """
+        pair: Optional[Pair] = self.pairs_by_exchange_client_name.get(pair_string)
+        if pair is not None:
+            return pair
+
+        quote, base = Pair.from_string('/', pair_string)
+        if quote is None or base is None:
+            return None
+        pair = self.get(base=base, quote=quote)
+        # Also remembers aliases such as 'BCC/BTC' so they skip parsing next time.
+        self.pairs_by_exchange_client_name[pair_string] = pair
+        return pair
+
+    def from_dto_string(self, pair_string: str) -> Optional[Pair]:
+        """
+        Args:
+            pair_string str: Example, 'ETH_BTC'
+
+        Returns: None if pair_string can't be parsed
+        """
+        pair: Optional[Pair] = self.pairs_by_name.get(pair_string)
+        if pair is not None:
+            return pair
+
+        quote, base = Pair.from_string('_', pair_string.rstrip())
+        if quote is None or base is None:
+            return None
+        pair = self.get(base=base, quote=quote)
+        self.pairs_by_name[pair_string] = pair
+        return pair
+
+    def from_kaiko_name(self, kaiko_name: str) -> Optional[Pair]:
+        """
+        Kaiko names have no separator, so only Pairs that have already been interned can be found.
+
+        Args:
+            kaiko_name str: Example, 'ETHBTC'
+        """
+        return self.pairs_by_kaiko_name.get(kaiko_name)
+
+    def __intern(self, pair: Pair) -> Pair:
+        self.pairs_by_quote_by_base.setdefault(pair.base, {})[pair.quote] = pair
+        self.pairs_by_name[pair.name] = pair
+        self.pairs_by_exchange_client_name[pair.name_for_exchange_clients] = pair
+        self.pairs_by_kaiko_name[pair.kaiko_name] = pair
+        return pair
+
+
+pair_registry: PairRegistry = PairRegistry()
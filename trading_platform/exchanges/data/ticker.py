@@ -1,7 +1,7 @@
 from trading_platform.exchanges.data import standardizers
 from trading_platform.exchanges.data.enums import exchange_ids
 from trading_platform.exchanges.data.financial_data import FinancialData
-from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.data.pair import pair_registry
 from trading_platform.utils.datetime_operations import utc_timestamp
 
 
@@ -128,7 +128,7 @@ class Ticker:
         if ticker is None:
             return None, None
 
-        pair = Pair.from_exchange_client_string(ticker.get('symbol'))
+        pair = pair_registry.from_exchange_client_string(ticker.get('symbol'))
 
         if pair is None:
             print('No pair found for ticker data {0}'.format(ticker))
@@ -0,0 +1,175 @@
+"""
+Asyncio counterpart of LiveExchangeService, built on ccxt.async_support clients. Requests are awaitable, so a single
+event loop can drive every exchange at once:
+
+    services = live_subclasses.instantiate_async(live_subclasses.all_live())
+    tickers_by_exchange = await asyncio.gather(*[service.fetch_latest_tickers() for service in services.values()])
+    await asyncio.gather(*[service.close() for service in services.values()])
+
+Responses are standardized into Orders, Tickers, and Balances by the same functions as LiveExchangeService.
+"""
+from typing import Dict, List, Optional
+
+import pandas
+from ccxt import InvalidOrder, OrderNotFound
+
+from trading_platform.exchanges.data.balance import Balance
+from trading_platform.exchanges.data.enums.order_side import OrderSide
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.order import Order
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.data.ticker import Ticker
+from trading_platform.exchanges.live.live_exchange_service import balances_from_exchange_response, \
+    cancel_order_request_args, fetch_order_request_params, limit_order_request_args, tickers_from_exchange_response
+from trading_platform.utils.http_utils import make_async_api_limit_order_request, make_async_api_request
+
+
+class AsyncLiveExchangeService:
+    def __init__(self, exchange_name, exchange_id, client, key, secret, trade_fee, withdrawal_fees):
+        """
+        Args:
+            exchange_name:
+            exchange_id:
+            client: ccxt.async_support client
+            key str:
+            secret str:
+            trade_fee FinancialData:
+            withdrawal_fees pandas.DataFrame:
+        """
+        self.exchange_name = exchange_name
+        self.exchange_id = exchange_id
+        self.key = key
+        self.secret = secret
+        self.trade_fee = trade_fee
+        self.__client = client
+        self.__balances: Dict[str, Balance] = {}
+        self.__orders: Dict[str, Order] = {}
+        self.__tickers: Dict[str, Ticker] = {}
+        self.__withdrawal_fees = withdrawal_fees if withdrawal_fees is not None else pandas.DataFrame()
+
+    def get_client(self):
+        return self.__client
+
+    def get_trade_fee(self) -> FinancialData:
+        return self.trade_fee
+
+    async def close(self):
+        """
+        Closes the client's HTTP session. Must be called before the event loop is closed.
+        """
+        await self.__client.close()
+
+    async def __aenter__(self) -> 'AsyncLiveExchangeService':
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    ###########################################
+    # Trading - Orders
+    ###########################################
+
+    async def cancel_order(self, order) -> Optional[Order]:
+        exchange_order_id, symbol, params = cancel_order_request_args(self.exchange_id, order)
+        try:
+            response = await make_async_api_request(self.__client.cancel_order, exchange_order_id, symbol, params)
+        except InvalidOrder as ex:
+            if 'ORDER_NOT_OPEN' in ex.args[0]:
+                return None
+            else:
+                raise ex
+
+        if response:
+            return order.copy_updated_with_cancel_order_exchange_response(response)
+
+        raise Exception('Order was not cancelled', response)
+
+    async def create_limit_buy_order(self, order, params={}) -> Optional[Order]:
+        if order.order_side != OrderSide.buy:
+            raise Exception('OrderSide != OrderSide.buy')
+        return await self.create_limit_order(order, **params)
+
+    async def create_limit_sell_order(self, order, params={}) -> Optional[Order]:
+        if order.order_side != OrderSide.sell:
+            raise Exception('OrderSide != OrderSide.sell')
+        return await self.create_limit_order(order, **params)
+
+    async def create_limit_order(self, order: Order, **params) -> Optional[Order]:
+        symbol, amount, price, params = limit_order_request_args(self.exchange_id, order, params)
+        limit_order_method = self.__client.create_limit_buy_order if order.order_side == OrderSide.buy else \
+            self.__client.create_limit_sell_order
+        response = await make_async_api_limit_order_request(limit_order_method, symbol, amount, price, params)
+
+        if response is None:
+            return
+
+        return order.copy_updated_with_create_order_exchange_response(response)
+
+    async def fetch_order(self, exchange_order_id, pair, params) -> Optional[Order]:
+        symbol = pair.name_for_exchange_clients if pair is not None else None
+        params = fetch_order_request_params(self.exchange_id, params)
+        response: Dict = await make_async_api_request(self.__client.fetch_order, exchange_order_id, symbol, params)
+
+        if response:
+            return Order.from_fetch_order_exchange_response(response, self.exchange_id)
+
+    async def fetch_open_orders(self, pair: Pair) -> Dict[str, Order]:
+        self.__orders = {}
+        try:
+            order_data_list = await make_async_api_request(self.__client.fetch_open_orders,
+                                                           pair.name_for_exchange_clients)
+        except OrderNotFound:
+            order_data_list = None
+        if order_data_list is None:
+            return self.__orders
+
+        for order_data in order_data_list:
+            order: Order = Order.from_fetch_order_exchange_response(order_data, self.exchange_id)
+            self.__orders[order.order_id] = order
+
+        return self.__orders
+
+    def get_order(self, order_id) -> Optional[Order]:
+        return self.__orders.get(order_id)
+
+    ###########################################
+    # Account state
+    ###########################################
+
+    def get_balance(self, currency) -> Balance:
+        balance: Balance = self.__balances.get(currency)
+        return balance if balance is not None else Balance.instance_with_zero_value_fields()
+
+    def get_balances(self) -> Dict[str, Balance]:
+        return self.__balances
+
+    async def fetch_balances(self) -> Dict[str, Balance]:
+        data = await make_async_api_request(self.__client.fetch_balance)
+        self.__balances = balances_from_exchange_response(self.exchange_id, data)
+        return self.__balances
+
+    ###########################################
+    # Market state
+    ###########################################
+
+    async def fetch_latest_tickers(self) -> List[Ticker]:
+        tickers = await make_async_api_request(self.__client.fetch_tickers)
+        tickers_by_pair_name: Dict[str, Ticker] = tickers_from_exchange_response(self.exchange_id, tickers)
+        self.__tickers.update(tickers_by_pair_name)
+        return list(tickers_by_pair_name.values())
+
+    async def fetch_latest_ticker(self, pair: Pair) -> Optional[Ticker]:
+        response: Dict = await make_async_api_request(self.__client.fetch_ticker, pair.name_for_exchange_clients)
+
+        if response is None:
+            return
+
+        pair_name, ticker = Ticker.from_exchange_data(response, self.exchange_id, Ticker.current_version)
+        self.__tickers[pair_name] = ticker
+        return ticker
+
+    def get_tickers(self) -> Dict[str, Ticker]:
+        return self.__tickers
+
+    def get_ticker(self, pair_name: str) -> Optional[Ticker]:
+        return self.__tickers.get(pair_name)
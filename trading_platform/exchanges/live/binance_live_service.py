@@ -1,4 +1,7 @@
+from typing import Dict
+
 import ccxt
+import ccxt.async_support
 
 from trading_platform.exchanges.data.enums import exchange_names, exchange_ids
 from trading_platform.exchanges.data.financial_data import FinancialData
@@ -11,6 +14,11 @@ class BinanceLiveService:
     """
     exchange_id = exchange_ids.binance
     exchange_name = exchange_names.binance
+    trade_fee = FinancialData(.001)
+
+    @staticmethod
+    def create_async_client(config: Dict) -> ccxt.async_support.Exchange:
+        return ccxt.async_support.binance(config)
 
     def __init__(self, key, secret, withdrawal_fees):
         """
@@ -25,7 +33,7 @@ class BinanceLiveService:
         })
         self.__live_exchange_service = LiveExchangeService(self.exchange_name, self.exchange_id, self.client, key,
                                                            secret,
-                                                           trade_fee=FinancialData(.001),
+                                                           trade_fee=self.trade_fee,
                                                            withdrawal_fees=withdrawal_fees)
 
     def __getattr__(self, name):
@@ -1,6 +1,8 @@
 import os
+from typing import Dict
 
 import ccxt
+import ccxt.async_support
 
 from trading_platform.exchanges.data.enums import exchange_names, exchange_ids
 from trading_platform.exchanges.data.enums.order_side import OrderSide
@@ -44,6 +46,11 @@ class BittrexLiveService:
     """
     exchange_id = exchange_ids.bittrex
     exchange_name = exchange_names.bittrex
+    trade_fee = FinancialData(.0025)
+
+    @staticmethod
+    def create_async_client(config: Dict) -> ccxt.async_support.Exchange:
+        return ccxt.async_support.bittrex(config)
 
     def __init__(self, key, secret, withdrawal_fees):
         """
@@ -58,7 +65,7 @@ class BittrexLiveService:
         })
         self.__live_exchange_service = LiveExchangeService(self.exchange_name, self.exchange_id, self.__client, key,
                                                            secret,
-                                                           trade_fee=FinancialData(.0025),
+                                                           trade_fee=self.trade_fee,
                                                            withdrawal_fees=withdrawal_fees)
 
     def __getattr__(self, name):
@@ -0,0 +1,145 @@
+"""
+Caching layer over an exchange service, so repeated reads of market and account state are served from memory while
+they're fresh enough, instead of each being a REST round trip.
+
+Each data type has a time to live. The *_cached() methods return CachedValues, which have the time the value was
+fetched, and accept a max_age_seconds freshness budget for the read. The ExchangeServiceAbc methods they replace, such
+as fetch_latest_ticker() and fetch_balances(), return plain values so CachedExchangeService can be used in place of the
+service it wraps. Concurrent identical requests share one fetch.
+
+Placing or cancelling an order, or withdrawing, invalidates the cached balances, since they're changed by it. Every
+other method is passed through to the wrapped service.
+
+Example usage:
+    service = CachedExchangeService(live_subclasses.instantiate([BinanceLiveService])[exchange_ids.binance])
+    ticker: CachedValue = service.fetch_latest_ticker_cached(pair, max_age_seconds=1)
+    ticker.value, ticker.age_seconds
+"""
+import time
+from typing import Dict, List, Optional
+
+from trading_platform.exchanges.data.balance import Balance
+from trading_platform.exchanges.data.order import Order
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.data.ticker import Ticker
+from trading_platform.utils.ttl_cache import CachedValue, TtlCache
+
+ticker: str = 'ticker'
+tickers: str = 'tickers'
+balances: str = 'balances'
+markets: str = 'markets'
+
+default_ttl_seconds_by_data_type: Dict[str, float] = {
+    ticker: 2,
+    tickers: 2,
+    balances: 5,
+    markets: 60 * 60,
+}
+
+
+class CachedExchangeService:
+    def __init__(self, exchange_service, ttl_seconds_by_data_type: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            exchange_service: ExchangeServiceAbc
+            ttl_seconds_by_data_type: overrides of default_ttl_seconds_by_data_type
+        """
+        self.exchange_service = exchange_service
+        self.ttl_seconds_by_data_type: Dict[str, float] = dict(default_ttl_seconds_by_data_type)
+        self.ttl_seconds_by_data_type.update(ttl_seconds_by_data_type or {})
+        self.cache: TtlCache = TtlCache()
+
+    def __getattr__(self, name):
+        return getattr(self.exchange_service, name)
+
+    ###########################################
+    # Market state
+    ###########################################
+
+    def fetch_latest_ticker_cached(self, pair: Pair, max_age_seconds: Optional[float] = None) -> \
+            CachedValue[Optional[Ticker]]:
+        return self.cache.get_or_fetch((ticker, pair.name), lambda: self.exchange_service.fetch_latest_ticker(pair),
+                                       self.ttl_seconds_by_data_type[ticker], max_age_seconds)
+
+    def fetch_latest_tickers_cached(self, max_age_seconds: Optional[float] = None) -> CachedValue[List[Ticker]]:
+        def fetch() -> List[Ticker]:
+            fetched_at: float = time.time()
+            tickers_list: List[Ticker] = self.exchange_service.fetch_latest_tickers()
+            # Every ticker in the response is fresh, so single ticker reads can be served from it too.
+            for fetched_ticker in tickers_list or []:
+                pair_name: str = Pair.name_for_base_and_quote(base=fetched_ticker.base, quote=fetched_ticker.quote)
+                self.cache.put((ticker, pair_name), fetched_ticker, self.ttl_seconds_by_data_type[ticker], fetched_at)
+            return tickers_list
+
+        return self.cache.get_or_fetch(tickers, fetch, self.ttl_seconds_by_data_type[tickers], max_age_seconds)
+
+    def load_markets_cached(self, max_age_seconds: Optional[float] = None) -> CachedValue:
+        return self.cache.get_or_fetch(markets, self.exchange_service.load_markets,
+                                       self.ttl_seconds_by_data_type[markets], max_age_seconds)
+
+    def fetch_latest_ticker(self, pair: Pair) -> Optional[Ticker]:
+        return self.fetch_latest_ticker_cached(pair).value
+
+    def fetch_latest_tickers(self) -> List[Ticker]:
+        return self.fetch_latest_tickers_cached().value
+
+    def load_markets(self):
+        return self.load_markets_cached().value
+
+    ###########################################
+    # Account state
+    ###########################################
+
+    def fetch_balances_cached(self, max_age_seconds: Optional[float] = None) -> CachedValue[Dict[str, Balance]]:
+        return self.cache.get_or_fetch(balances, self.exchange_service.fetch_balances,
+                                       self.ttl_seconds_by_data_type[balances], max_age_seconds)
+
+    def fetch_balances(self) -> Dict[str, Balance]:
+        return self.fetch_balances_cached().value
+
+    ###########################################
+    # Invalidation
+    ###########################################
+
+    def invalidate(self, data_type: Optional[str] = None):
+        """
+        Args:
+            data_type: one of default_ttl_seconds_by_data_type. Every data type if None.
+        """
+        if data_type is None:
+            self.cache.invalidate_where(lambda key: True)
+        elif data_type == ticker:
+            self.cache.invalidate_where(lambda key: isinstance(key, tuple) and key[0] == ticker)
+        else:
+            self.cache.invalidate(data_type)
+
+    def cancel_order(self, order) -> Optional[Order]:
+        try:
+            return self.exchange_service.cancel_order(order)
+        finally:
+            self.invalidate(balances)
+
+    def create_limit_buy_order(self, order, params={}) -> Optional[Order]:
+        try:
+            return self.exchange_service.create_limit_buy_order(order, params=params)
+        finally:
+            self.invalidate(balances)
+
+    def create_limit_sell_order(self, order, params={}) -> Optional[Order]:
+        try:
+            return self.exchange_service.create_limit_sell_order(order, params=params)
+        finally:
+            self.invalidate(balances)
+
+    def withdraw(self, currency, amount, address, tag=None, params={}):
+        try:
+            return self.exchange_service.withdraw(currency=currency, amount=amount, address=address, tag=tag,
+                                                  params=params)
+        finally:
+            self.invalidate(balances)
+
+    def withdraw_all(self, currency, address, tag=None, params={}):
+        try:
+            return self.exchange_service.withdraw_all(currency=currency, address=address, tag=tag, params=params)
+        finally:
+            self.invalidate(balances)
@@ -1,6 +1,7 @@
 from typing import List, Dict, Optional
 
 import ccxt
+import ccxt.async_support
 
 from trading_platform.exchanges.data.enums import exchange_names, exchange_ids
 from trading_platform.exchanges.data.financial_data import FinancialData
@@ -27,6 +28,11 @@ class GdaxLiveService():
     """
     exchange_id = exchange_ids.gdax
     exchange_name = exchange_names.gdax
+    trade_fee = FinancialData(.0025)
+
+    @staticmethod
+    def create_async_client(config: Dict) -> ccxt.async_support.Exchange:
+        return ccxt.async_support.gdax(config)
 
     def __init__(self, key, secret, withdrawal_fees):
         """
@@ -41,7 +47,7 @@ class GdaxLiveService():
         })
         self.__live_exchange_service = LiveExchangeService(self.exchange_name, self.exchange_id, self.client, key,
                                                            secret,
-                                                           trade_fee=FinancialData(.0025),
+                                                           trade_fee=self.trade_fee,
                                                            withdrawal_fees=withdrawal_fees)
         self.__tickers = {}
 
@@ -1,6 +1,6 @@
 import pandas
 
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 
 import ccxt
 from ccxt import ExchangeError, InvalidOrder, InvalidAddress
@@ -20,6 +20,150 @@ from trading_platform.utils.datetime_operations import utc_timestamp
 from trading_platform.utils.http_utils import make_api_limit_order_request, make_api_request
 
 
+def cancel_order_request_args(exchange_id: int, order: Order) -> Tuple:
+    """
+    Returns: (exchange_order_id, symbol, params) arguments of a ccxt cancel_order request for order
+    """
+    if exchange_id == exchange_ids.binance:
+        order.exchange_order_id = int(order.exchange_order_id)
+
+    if exchange_id == exchange_ids.kucoin:
+        params: Dict[str, str] = {
+            'type': 'BUY' if order.order_side == OrderSide.buy else 'SELL'
+        }
+    else:
+        params: Dict[str, str] = {}
+
+    pair: Pair = Pair(base=order.base, quote=order.quote)
+    return order.exchange_order_id, pair.name_for_exchange_clients, params
+
+
+def limit_order_request_args(exchange_id: int, order: Order, params: Dict) -> Tuple:
+    """
+    Returns: (symbol, amount, price, params) arguments of a ccxt create_limit_*_order request for order
+    """
+    if exchange_id in [exchange_ids.bittrex, exchange_ids.kucoin]:
+        amount = float(round(order.amount, FinancialData.order_numerical_field_precision))
+        price = float(round(order.price, FinancialData.order_numerical_field_precision))
+    else:
+        amount = order.amount
+        price = order.price
+
+    # Some exchanges allow that id to be sent with a create order request, and it's
+    # useful for recording the id of an order in the app database before attempting an order. Then if the app
+    # fails and restarts, it can look up the state of an order on the exchange with the client_order_id.
+    # In order for this record keeping method to work, Order#from_fetch_order_exchange_response sets "order_id"
+    # to the "clientOrderId" property of the exchange response.
+    if exchange_id == exchange_ids.binance:
+        params['newClientOrderId'] = order.order_id
+
+    pair: Pair = Pair(base=order.base, quote=order.quote)
+    return pair.name_for_exchange_clients, amount, price, params
+
+
+def fetch_order_request_params(exchange_id: int, params: Optional[Dict]) -> Dict:
+    if params is None:
+        params = {}
+
+    # OrderSide.order_side_str is lowercase. Kucoin expects uppercase
+    if exchange_id == exchange_ids.kucoin:
+        params['type'] = params['type'].upper()
+    return params
+
+
+def balances_from_exchange_response(exchange_id: int, data: Dict) -> Dict[str, Balance]:
+    """
+    Standardizes a ccxt fetch_balance response.
+
+    Returns: Balances by currency
+    """
+    balances_by_currency: Dict[str, Balance] = {}
+
+    if exchange_id == exchange_ids.bittrex:
+        balances: List[Dict] = data.get('info')
+        currency_prop_name = 'Currency'
+        free_prop_name = 'Available'
+        locked_prop_name = 'Pending'
+    elif exchange_id == exchange_ids.gdax:
+        balances: List[Dict] = data.get('info')
+        currency_prop_name = 'Currency'
+        free_prop_name = 'Available'
+        locked_prop_name = 'Pending'
+    elif exchange_id == exchange_ids.kucoin:
+        for balance in data.get('info'):
+            locked: FinancialData = FinancialData(balance.get('freezeBalance'))
+            total: FinancialData = FinancialData(balance.get('balance'))
+            free = max(total - locked, zero)
+            currency: str = balance.get('coinType')
+            kwargs = {
+                'db_id': None,
+                'currency': currency,
+                'exchange_id': exchange_id,
+                'free': free,
+                'locked': locked,
+                'total': total,
+                'version': 0,
+                'exchange_timestamp': None,
+                'app_create_timestamp': utc_timestamp(),
+            }
+            balance_instance: Balance = Balance(**kwargs)
+            balances_by_currency[currency] = balance_instance
+
+        return balances_by_currency
+    else:
+        balances = data.get('info').get('balances')
+        currency_prop_name = 'asset'
+        free_prop_name = 'free'
+        locked_prop_name = 'locked'
+
+    if balances is None:
+        return balances_by_currency
+
+    for balance in balances:
+        currency = balance.get(currency_prop_name)
+        if currency is None:
+            continue
+        free = FinancialData(balance.get(free_prop_name, zero))
+        locked = FinancialData(balance.get(locked_prop_name, zero))
+        total = free + locked
+        if total == zero:
+            continue
+        kwargs = {
+            'db_id': None,
+            'currency': currency,
+            'exchange_id': exchange_id,
+            'free': free,
+            'locked': locked,
+            'total': total,
+            'version': 0,
+            'exchange_timestamp': None,
+            'app_create_timestamp': utc_timestamp(),
+        }
+
+        balances_by_currency[currency] = Balance(**kwargs)
+
+    return balances_by_currency
+
+
+def tickers_from_exchange_response(exchange_id: int, tickers: Optional[Dict]) -> Dict[str, Ticker]:
+    """
+    Standardizes a ccxt fetch_tickers response. Tickers without a recognized pair are skipped.
+
+    Returns: Tickers by pair name
+    """
+    tickers_by_pair_name: Dict[str, Ticker] = {}
+    if tickers is None:
+        return tickers_by_pair_name
+
+    for ticker in tickers.values():
+        pair_name, ticker_instance = Ticker.from_exchange_data(ticker, exchange_id, Ticker.current_version)
+        if ticker_instance is None or ticker_instance.base is None or ticker_instance.quote is None:
+            continue
+        tickers_by_pair_name[pair_name] = ticker_instance
+    return tickers_by_pair_name
+
+
+
 class LiveExchangeService(ExchangeServiceAbc):
     """
     Bridge class for any client library we use. Don't call an exchange client library directly, instead call via this
@@ -60,20 +204,9 @@ class LiveExchangeService(ExchangeServiceAbc):
         :param pair: Pair
         :return:
         """
-        if self.exchange_id == exchange_ids.binance:
-            order.exchange_order_id = int(order.exchange_order_id)
-
-        if self.exchange_id == exchange_ids.kucoin:
-            params: Dict[str, str] = {
-                'type': 'BUY' if order.order_side == OrderSide.buy else 'SELL'
-            }
-        else:
-            params: Dict[str, str] = {}
-
-        pair: Pair = Pair(base=order.base, quote=order.quote)
+        exchange_order_id, symbol, params = cancel_order_request_args(self.exchange_id, order)
         try:
-            response = make_api_request(self.__client.cancel_order, order.exchange_order_id,
-                                        pair.name_for_exchange_clients, params)
+            response = make_api_request(self.__client.cancel_order, exchange_order_id, symbol, params)
         except InvalidOrder as ex:
             if 'ORDER_NOT_OPEN' in ex.args[0]:
                 return None
@@ -97,26 +230,9 @@ class LiveExchangeService(ExchangeServiceAbc):
         return self.create_limit_order(order, **params)
 
     def create_limit_order(self, order: Order, **params) -> Optional[Order]:
-        if self.exchange_id in [exchange_ids.bittrex, exchange_ids.kucoin]:
-            amount = float(round(order.amount, FinancialData.order_numerical_field_precision))
-            price = float(round(order.price, FinancialData.order_numerical_field_precision))
-        else:
-            amount = order.amount
-            price = order.price
-
-        # Some exchanges allow that id to be sent with a create order request, and it's
-        # useful for recording the id of an order in the app database before attempting an order. Then if the app
-        # fails and restarts, it can look up the state of an order on the exchange with the client_order_id.
-        # In order for this record keeping method to work, Order#from_fetch_order_exchange_response sets "order_id"
-        # to the "clientOrderId" property of the exchange response.
-        if self.exchange_id == exchange_ids.binance:
-            params['newClientOrderId'] = order.order_id
-
-        pair: Pair = Pair(base=order.base, quote=order.quote)
-
+        symbol, amount, price, params = limit_order_request_args(self.exchange_id, order, params)
         limit_order_method = self.__client.create_limit_buy_order if order.order_side == OrderSide.buy else self.__client.create_limit_sell_order
-        response = make_api_limit_order_request(limit_order_method, pair.name_for_exchange_clients, amount,
-                                                price, params)
+        response = make_api_limit_order_request(limit_order_method, symbol, amount, price, params)
 
         if response is None:
             return
@@ -133,13 +249,7 @@ class LiveExchangeService(ExchangeServiceAbc):
         else:
             symbol = pair.name_for_exchange_clients
 
-        if params is None:
-            params = {}
-
-        # OrderSide.order_side_str is lowercase. Kucoin expects uppercase
-        if self.exchange_id == exchange_ids.kucoin:
-            params['type'] = params['type'].upper()
-
+        params = fetch_order_request_params(self.exchange_id, params)
         response: Dict = make_api_request(self.__client.fetch_order, exchange_order_id, symbol, params)
 
         if response:
@@ -324,70 +434,7 @@ class LiveExchangeService(ExchangeServiceAbc):
         self.__balances = {}
 
         data = make_api_request(self.__client.fetch_balance)
-
-        if self.exchange_id == exchange_ids.bittrex:
-            balances: List[Dict] = data.get('info')
-            currency_prop_name = 'Currency'
-            free_prop_name = 'Available'
-            locked_prop_name = 'Pending'
-        elif self.exchange_id == exchange_ids.gdax:
-            balances: List[Dict] = data.get('info')
-            currency_prop_name = 'Currency'
-            free_prop_name = 'Available'
-            locked_prop_name = 'Pending'
-        elif self.exchange_id == exchange_ids.kucoin:
-            for balance in data.get('info'):
-                locked: FinancialData = FinancialData(balance.get('freezeBalance'))
-                total: FinancialData = FinancialData(balance.get('balance'))
-                free = max(total - locked, zero)
-                currency: str = balance.get('coinType')
-                kwargs = {
-                    'db_id': None,
-                    'currency': currency,
-                    'exchange_id': self.exchange_id,
-                    'free': free,
-                    'locked': locked,
-                    'total': total,
-                    'version': 0,
-                    'exchange_timestamp': None,
-                    'app_create_timestamp': utc_timestamp(),
-                }
-                balance_instance: Balance = Balance(**kwargs)
-                self.__balances[currency] = balance_instance
-
-            return self.__balances
-        else:
-            balances = data.get('info').get('balances')
-            currency_prop_name = 'asset'
-            free_prop_name = 'free'
-            locked_prop_name = 'locked'
-
-        if balances is None:
-            return self.__balances
-
-        for balance in balances:
-            currency = balance.get(currency_prop_name)
-            if currency is None:
-                continue
-            free = FinancialData(balance.get(free_prop_name, zero))
-            locked = FinancialData(balance.get(locked_prop_name, zero))
-            total = free + locked
-            if total == zero:
-                continue
-            kwargs = {
-                'db_id': None,
-                'currency': currency,
-                'exchange_id': self.exchange_id,
-                'free': free,
-                'locked': locked,
-                'total': total,
-                'version': 0,
-                'exchange_timestamp': None,
-                'app_create_timestamp': utc_timestamp(),
-            }
-
-            self.__balances[currency] = Balance(**kwargs)
-
+        self.__balances = balances_from_exchange_response(self.exchange_id, data)
         return self.__balances
 
     ###########################################
@@ -403,19 +450,9 @@ class LiveExchangeService(ExchangeServiceAbc):
 
     def fetch_latest_tickers(self) -> List[Ticker]:
         tickers = make_api_request(self.__client.fetch_tickers)
-
-        if tickers is None:
-            return []
-
-        ticker_instances = []
-        for ticker in tickers.values():
-            pair_name, ticker_instance = Ticker.from_exchange_data(ticker, self.exchange_id, Ticker.current_version)
-            if ticker_instance is None or ticker_instance.base is None or ticker_instance.quote is None:
-                continue
-            ticker_instances.append(ticker_instance)
-            self.__tickers[pair_name] = ticker_instance
-
-        return ticker_instances
+        tickers_by_pair_name: Dict[str, Ticker] = tickers_from_exchange_response(self.exchange_id, tickers)
+        self.__tickers.update(tickers_by_pair_name)
+        return list(tickers_by_pair_name.values())
 
     def fetch_latest_ticker(self, pair: Pair) -> Optional[Ticker]:
         response: Dict = make_api_request(self.__client.fetch_ticker, pair.name_for_exchange_clients)
@@ -2,9 +2,10 @@
 An exchange client is "live" if it queries the actual exchange, not a disk or a stub. These methods are utility methods
 to select all ExchangeClientServiceAbc live subclasses and fetch the API keys and secrets for these subclasses.
 """
-from typing import List
+from typing import Dict, List
 
 from trading_platform.aws_utils.parameter_store_service import ParameterStoreService
+from trading_platform.exchanges.live.async_live_exchange_service import AsyncLiveExchangeService
 from trading_platform.exchanges.live.binance_live_service import BinanceLiveService
 from trading_platform.exchanges.live.bittrex_live_service import BittrexLiveService
 from trading_platform.exchanges.live.gdax_live_service import GdaxLiveService
@@ -62,6 +63,31 @@ def instantiate(subclasses, param_name=exchange_credentials_param, withdrawal_fe
     return exchange_services
 
 
+def instantiate_async(subclasses, param_name=exchange_credentials_param, withdrawal_fees_by_exchange=None) -> \
+        Dict[int, AsyncLiveExchangeService]:
+    """
+    Like instantiate(), but returns AsyncLiveExchangeServices with ccxt.async_support clients. Call close() on each
+    service when done.
+    """
+    credentials = ParameterStoreService.get_parameter(param_name=param_name)
+    withdrawal_fees_by_exchange = withdrawal_fees_by_exchange if withdrawal_fees_by_exchange is not None else {}
+    exchange_services = {}
+    for exchange_service_class in subclasses:
+        credentials_for_exchange = credentials.get(exchange_service_class.exchange_name) or {}
+        key = credentials_for_exchange.get('key')
+        secret = credentials_for_exchange.get('secret')
+        # The service class builds the client, so overrides of the sync client, such as Poloniex's nonce, are kept.
+        client = exchange_service_class.create_async_client({
+            'apiKey': key,
+            'secret': secret
+        })
+        exchange_services[exchange_service_class.exchange_id] = AsyncLiveExchangeService(
+            exchange_service_class.exchange_name, exchange_service_class.exchange_id, client, key, secret,
+            trade_fee=exchange_service_class.trade_fee,
+            withdrawal_fees=withdrawal_fees_by_exchange.get(exchange_service_class.exchange_id))
+    return exchange_services
+
+
 def all_live():
     """
     https://stackoverflow.com/questions/3862310/how-can-i-find-all-subclasses-of-a-class-given-its-name doesn't
@@ -1,4 +1,7 @@
+from typing import Dict
+
 import ccxt
+import ccxt.async_support
 
 from trading_platform.exchanges.data.enums import exchange_names, exchange_ids
 from trading_platform.exchanges.data.financial_data import FinancialData
@@ -11,6 +14,14 @@ class PoloniexLiveService:
     """
     exchange_name = exchange_names.poloniex
     exchange_id = exchange_ids.poloniex
+    trade_fee = FinancialData(.0025)
+
+    @staticmethod
+    def create_async_client(config: Dict) -> ccxt.async_support.Exchange:
+        """
+        Returns: client for AsyncLiveExchangeService, with the same nonce as the client of this service
+        """
+        return AsyncCustomCcxtPoloniex(config)
 
     def __init__(self, key, secret, withdrawal_fees):
         self.client = CustomCcxtPoloniex({
@@ -19,7 +30,7 @@ class PoloniexLiveService:
         })
         self.__live_exchange_service = LiveExchangeService(self.exchange_name, self.exchange_id, self.client, key,
                                                            secret,
-                                                           trade_fee=FinancialData(.0025),
+                                                           trade_fee=self.trade_fee,
                                                            withdrawal_fees=withdrawal_fees)
 
     def __getattr__(self, name):
@@ -33,3 +44,11 @@ class CustomCcxtPoloniex(ccxt.poloniex):
     """
     def nonce(self):
         return self.microseconds()
+
+
+class AsyncCustomCcxtPoloniex(ccxt.async_support.poloniex):
+    """
+    CustomCcxtPoloniex for ccxt.async_support. Concurrent requests are even more likely to reuse a millisecond nonce.
+    """
+    def nonce(self):
+        return self.microseconds()
@@ -32,6 +32,8 @@ from trading_platform.exchanges.data.order import Order
 from trading_platform.exchanges.data.pair import Pair
 from trading_platform.exchanges.exchange_service_abc import ExchangeServiceAbc
 from trading_platform.storage.daos.order_dao import OrderDao
+from trading_platform.utils.circuit_breaker import CircuitBreakerRegistry, circuit_breakers
+from trading_platform.utils.exceptions import CircuitOpenException
 
 
 class OrderExecutionService:
@@ -43,6 +45,7 @@ class OrderExecutionService:
         self.num_order_status_checks = kwargs.get('num_order_status_checks', 3)
         self.scoped_session_maker: scoped_session = kwargs.get('scoped_session_maker')
         self.sleep_time_sec_between_order_checks = kwargs.get('sleep_time_sec_between_order_checks', 4)
+        self.circuit_breakers: CircuitBreakerRegistry = kwargs.get('circuit_breakers', circuit_breakers)
 
         if self.multithreaded:
             self.thread_pool_executer: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=10)
@@ -54,11 +57,31 @@ class OrderExecutionService:
 
     def execute_order_set(self, orders: Set[Order], write_pending_order: bool,
                           check_if_orders_filled: bool) -> Dict[str, Order]:
+        """
+        Executes orders on the healthiest exchanges first, or all at once on the thread pool if multithreaded. Orders
+        on exchanges whose circuit breakers are open are skipped. AsyncOrderExecutionService places orders and polls
+        their status without a thread per order.
+        """
         def execute_order_with_session(order) -> Order:
             return self.execute_order_with_session(order, write_pending_order,
                                                    check_if_order_filled=check_if_orders_filled)
 
-        order_execution_attempts: Iterable[Order] = map(execute_order_with_session, orders)
+        available_orders: List[Order] = []
+        for order in orders:
+            exchange: ExchangeServiceAbc = self.exchanges_by_id.get(order.exchange_id)
+            if self.circuit_breakers.exchange_service_allows_requests(exchange, self.limit_order_method_name(order)):
+                available_orders.append(order)
+            else:
+                self.logger.warning('skipping order_id {0}, circuit breaker is open for exchange {1}'.format(
+                    order.order_id, order.exchange_id))
+        available_orders.sort(key=lambda order: self.circuit_breakers.exchange_service_health(
+            self.exchanges_by_id.get(order.exchange_id)), reverse=True)
+
+        if self.multithreaded:
+            order_execution_attempts: Iterable[Order] = self.thread_pool_executer.map(execute_order_with_session,
+                                                                                      available_orders)
+        else:
+            order_execution_attempts: Iterable[Order] = map(execute_order_with_session, available_orders)
         executed_orders: Iterable[Order] = filter(lambda order: order is not None, order_execution_attempts)
         order_dict = {order.order_id: order for order in executed_orders}
         return order_dict
@@ -95,6 +118,12 @@ class OrderExecutionService:
 
         exchange_method = exchange.create_limit_buy_order if order.order_side == OrderSide.buy else exchange.create_limit_sell_order
 
+        # Fail before writing the pending order if the exchange is failing
+        method_name: str = self.limit_order_method_name(order)
+        if not self.circuit_breakers.exchange_service_allows_requests(exchange, method_name):
+            raise CircuitOpenException('Circuit breaker is open for {0} on exchange {1}'.format(method_name,
+                                                                                               order.exchange_id))
+
         if session is None:
             session = self.scoped_session_maker
         try:
@@ -126,13 +155,18 @@ class OrderExecutionService:
             order:
 
         Returns: Order. The filled order from the exchange, or the latest order snapshot, whose
-            order_status will be either "open" or "partially_filled".
+            order_status will be either "open" or "partially_filled". Polling stops early if the exchange's
+            fetch_order circuit breaker opens.
 
         """
         order_snapshot: Order = order
         for attempt in range(self.num_order_status_checks):
-            order_snapshot: Order = exchange.fetch_order(order.exchange_order_id,
-                                                         pair=Pair(base=order.base, quote=order.quote), params=None)
+            try:
+                order_snapshot: Order = exchange.fetch_order(order.exchange_order_id,
+                                                             pair=Pair(base=order.base, quote=order.quote), params=None)
+            except CircuitOpenException as ex:
+                self.logger.warning('stopped polling order_id {0}: {1}'.format(order.order_id, ex))
+                return order_snapshot
             if order_snapshot is not None and order_snapshot.order_status == order_status:
                 self.logger.info(
                     'order_id {0} has order_status {1}'.format(order_snapshot.order_id, order_snapshot.order_status))
@@ -143,6 +177,13 @@ class OrderExecutionService:
 
         return order_snapshot
 
+    @staticmethod
+    def limit_order_method_name(order: Order) -> str:
+        """
+        Returns: name of the ccxt client method that places order, which keys its circuit breaker
+        """
+        return 'create_limit_buy_order' if order.order_side == OrderSide.buy else 'create_limit_sell_order'
+
     def update_order(self, order: Order, session: Session):
         """
         TODO - this method isn't necessary yet, but implement it.
@@ -0,0 +1,186 @@
+"""
+Reconciles the state of orders in the "orders" table with their state on exchanges, with one fetch_open_orders call per
+exchange and pair instead of one fetch_order call per order.
+
+Orders whose latest snapshot is pending, open, or partially filled are tracked. For each exchange and pair of tracked
+orders, the exchange's open orders are compared with the tracked orders:
+    - tracked orders that are open on the exchange are updated if their order_status or filled amount changed
+    - tracked orders that aren't open on the exchange any more, and were completely filled, are filled
+    - other tracked orders that aren't open on the exchange any more were either filled or cancelled, so these ambiguous
+      orders are checked with fetch_order
+Pending orders without an exchange_order_id that aren't open on the exchange may not have been placed yet, so they're
+left pending.
+
+New snapshots of changed orders are written to the "orders" table in one transaction, and an OrderStatusEvent for each
+is published to subscribers, such as StrategyStateMachineServiceAbc.on_order_status_event.
+
+Example usage:
+    reconciler = OrderStatusReconciler(logger=logger, exchanges_by_id=exchanges_by_id, order_dao=OrderDao(),
+                                       scoped_session_maker=engine.scoped_session_maker)
+    reconciler.subscribe(strategy.on_order_status_event)
+    reconciler.reconcile()
+"""
+from logging import Logger
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session, scoped_session
+
+from trading_platform.exchanges.data.enums.order_status import OrderStatus
+from trading_platform.exchanges.data.financial_data import zero
+from trading_platform.exchanges.data.order import Order
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.exchange_service_abc import ExchangeServiceAbc
+from trading_platform.storage.daos.order_dao import OrderDao
+
+tracked_order_statuses: List[int] = [OrderStatus.pending, OrderStatus.open, OrderStatus.partially_filled]
+
+
+class OrderStatusEvent:
+    def __init__(self, previous_order: Order, order: Order, inferred: bool):
+        """
+        Args:
+            previous_order: latest snapshot of the order before it changed
+            order: new snapshot of the order
+            inferred: True if the change was inferred from open orders, False if it was fetched with fetch_order
+        """
+        self.previous_order = previous_order
+        self.order = order
+        self.inferred = inferred
+
+    @property
+    def order_id(self) -> str:
+        return self.order.order_id
+
+    @property
+    def exchange_id(self) -> int:
+        return self.order.exchange_id
+
+    @property
+    def previous_order_status(self) -> int:
+        return self.previous_order.order_status
+
+    @property
+    def order_status(self) -> int:
+        return self.order.order_status
+
+    def __repr__(self):
+        return 'OrderStatusEvent(order_id={0}, order_status={1} -> {2}, inferred={3})'.format(
+            self.order_id, OrderStatus.statuses_to_names.get(self.previous_order_status),
+            OrderStatus.statuses_to_names.get(self.order_status), self.inferred)
+
+
+class OrderStatusReconciler:
+    def __init__(self, **kwargs):
+        self.logger: Logger = kwargs.get('logger')
+        self.exchanges_by_id: Dict[int, ExchangeServiceAbc] = kwargs.get('exchanges_by_id')
+        self.order_dao: OrderDao = kwargs.get('order_dao')
+        self.scoped_session_maker: scoped_session = kwargs.get('scoped_session_maker')
+        self.subscribers: List[Callable[[OrderStatusEvent], None]] = []
+        # Number of exchange requests made by the latest reconcile() by method name
+        self.requests: Dict[str, int] = {}
+
+    def subscribe(self, subscriber: Callable[[OrderStatusEvent], None]):
+        self.subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: Callable[[OrderStatusEvent], None]):
+        self.subscribers.remove(subscriber)
+
+    def reconcile(self, session: Optional[Session] = None) -> List[OrderStatusEvent]:
+        """
+        Returns: events for the orders that changed, which have also been written and published
+        """
+        if session is None:
+            session = self.scoped_session_maker()
+        self.requests = {'fetch_open_orders': 0, 'fetch_order': 0}
+
+        tracked_orders: List[Order] = self.order_dao.fetch_latest_with_order_statuses(
+            session=session, order_statuses=tracked_order_statuses)
+        orders_by_exchange_and_pair: Dict[Tuple[int, Pair], List[Order]] = {}
+        for order in tracked_orders:
+            orders_by_exchange_and_pair.setdefault((order.exchange_id, Pair(base=order.base, quote=order.quote)),
+                                                   []).append(order)
+
+        events: List[OrderStatusEvent] = []
+        ambiguous_orders: List[Order] = []
+        for (exchange_id, pair), orders in orders_by_exchange_and_pair.items():
+            group_events, group_ambiguous_orders = self.reconcile_with_open_orders(exchange_id, pair, orders)
+            events += group_events
+            ambiguous_orders += group_ambiguous_orders
+
+        for order in ambiguous_orders:
+            event: Optional[OrderStatusEvent] = self.reconcile_with_fetch_order(order)
+            if event is not None:
+                events.append(event)
+
+        if len(events) > 0:
+            self.order_dao.bulk_save(session=session, commit=True, popos=[event.order for event in events])
+        for event in events:
+            self.publish(event)
+        return events
+
+    def reconcile_with_open_orders(self, exchange_id: int, pair: Pair,
+                                   orders: List[Order]) -> Tuple[List[OrderStatusEvent], List[Order]]:
+        """
+        Returns: events for orders whose changes could be inferred from the exchange's open orders, and the orders
+            that need to be checked with fetch_order
+        """
+        exchange: ExchangeServiceAbc = self.exchanges_by_id.get(exchange_id)
+        if exchange is None:
+            self.logger.warning('no exchange service for exchange {0}, not reconciling {1} orders'.format(
+                exchange_id, len(orders)))
+            return [], []
+        try:
+            self.requests['fetch_open_orders'] += 1
+            open_orders_by_order_id: Dict[str, Order] = exchange.fetch_open_orders(pair) or {}
+        except Exception as ex:
+            # Without the open orders, orders that are still open would look like they were closed.
+            self.logger.warning('fetching open {0} orders on exchange {1} failed, not reconciling them: {2!r}'.format(
+                pair.name, exchange_id, ex))
+            return [], []
+        open_orders_by_exchange_order_id: Dict[str, Order] = {
+            open_order.exchange_order_id: open_order for open_order in open_orders_by_order_id.values()}
+
+        events: List[OrderStatusEvent] = []
+        ambiguous_orders: List[Order] = []
+        for order in orders:
+            open_order: Optional[Order] = open_orders_by_exchange_order_id.get(order.exchange_order_id) \
+                if order.exchange_order_id is not None else None
+            if open_order is None:
+                # Binance open orders have the app order_id, so pending orders can be found before they're acknowledged.
+                open_order = open_orders_by_order_id.get(order.order_id)
+
+            if open_order is not None:
+                if open_order.order_status != order.order_status or open_order.filled != order.filled:
+                    events.append(OrderStatusEvent(order, order.copy_updated_with_exchange_order(open_order),
+                                                   inferred=True))
+            elif order.exchange_order_id is None:
+                continue
+            elif order.remaining == zero and order.filled == order.amount and order.amount != zero:
+                events.append(OrderStatusEvent(order, order.filled_order_copy(), inferred=True))
+            else:
+                ambiguous_orders.append(order)
+        return events, ambiguous_orders
+
+    def reconcile_with_fetch_order(self, order: Order) -> Optional[OrderStatusEvent]:
+        exchange: ExchangeServiceAbc = self.exchanges_by_id.get(order.exchange_id)
+        try:
+            self.requests['fetch_order'] += 1
+            exchange_order: Optional[Order] = exchange.fetch_order(order.exchange_order_id,
+                                                                  pair=Pair(base=order.base, quote=order.quote),
+                                                                  params=None)
+        except Exception as ex:
+            self.logger.warning('fetching order_id {0} failed: {1!r}'.format(order.order_id, ex))
+            return None
+        if exchange_order is None or (exchange_order.order_status == order.order_status and
+                                      exchange_order.filled == order.filled):
+            return None
+        return OrderStatusEvent(order, order.copy_updated_with_exchange_order(exchange_order), inferred=False)
+
+    def publish(self, event: OrderStatusEvent):
+        self.logger.info(event)
+        for subscriber in self.subscribers:
+            try:
+                subscriber(event)
+            except Exception as ex:
+                # One failing subscriber shouldn't keep the others from getting the event
+                self.logger.error('order status subscriber {0} failed: {1!r}'.format(subscriber, ex))
@@ -0,0 +1,200 @@
+"""
+Streams depth updates from an exchange WebSocket into L2OrderBooks, and derives a best bid and ask Ticker from every
+update, instead of polling fetch_tickers or fetch_order_book.
+
+Messages use Binance's combined diff depth stream format:
+    {"stream": "ethbtc@depth", "data": {"e": "depthUpdate", "E": 1527811200000, "s": "ETHBTC", "U": 101, "u": 103,
+                                       "b": [["0.0500", "1.5"]], "a": [["0.0510", "0"]]}}
+and snapshots are read from a REST endpoint with Binance's depth response format:
+    GET <snapshot_url>?symbol=ETHBTC -> {"lastUpdateId": 100, "bids": [["0.0500", "1.0"]], "asks": [...]}
+
+Updates that arrive before a book's snapshot are buffered and applied after it. When a sequence gap is detected, the
+book is cleared and resynced from a new snapshot, buffering updates again in the meantime. Snapshots are retried with
+exponential backoff until one is recent enough for the buffered updates, up to max_snapshot_attempts per resync. Raw
+messages can be appended to a JSON lines file with record_path, to be fed back by DepthReplayServer.
+
+Example usage:
+    stream = DepthStream(exchange_ids.binance, 'wss://stream.binance.com:9443/stream?streams=ethbtc@depth',
+                         'https://api.binance.com/api/v1/depth', [Pair(base='BTC', quote='ETH')],
+                         on_ticker=lambda ticker: print(ticker.bid, ticker.ask))
+    asyncio.run(stream.run())
+"""
+import asyncio
+import json
+from typing import Callable, Dict, List, Optional
+
+import aiohttp
+
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.data.ticker import Ticker
+from trading_platform.exchanges.streaming.order_book import L2OrderBook
+from trading_platform.utils.exceptions import SequenceGapException
+
+
+class DepthStream:
+    def __init__(self, exchange_id: int, websocket_url: str, snapshot_url: str, pairs: List[Pair],
+                 on_ticker: Optional[Callable[[Ticker], None]] = None, record_path: Optional[str] = None,
+                 snapshot_limit: int = 1000, max_snapshot_attempts: int = 5, snapshot_retry_seconds: float = 1,
+                 snapshot_wait_seconds: float = 10):
+        """
+        Args:
+            exchange_id:
+            websocket_url: combined depth stream of every pair
+            snapshot_url: REST depth endpoint
+            pairs:
+            on_ticker: called with a Ticker after every update that changes a synced book
+            record_path: JSON lines file that raw messages are appended to
+            snapshot_limit: number of levels per side requested in snapshots
+            max_snapshot_attempts: snapshots fetched per resync before giving up until the next update
+            snapshot_retry_seconds: delay before the second attempt, doubled for each attempt after it
+            snapshot_wait_seconds: maximum time run() waits for pending snapshots once the stream ends
+        """
+        self.exchange_id = exchange_id
+        self.websocket_url = websocket_url
+        self.snapshot_url = snapshot_url
+        self.on_ticker = on_ticker
+        self.record_path = record_path
+        self.snapshot_limit = snapshot_limit
+        self.max_snapshot_attempts = max_snapshot_attempts
+        self.snapshot_retry_seconds = snapshot_retry_seconds
+        self.snapshot_wait_seconds = snapshot_wait_seconds
+
+        self.pairs_by_symbol: Dict[str, Pair] = {pair.kaiko_name: pair for pair in pairs}
+        self.order_books_by_symbol: Dict[str, L2OrderBook] = {
+            symbol: L2OrderBook(exchange_id, pair) for symbol, pair in self.pairs_by_symbol.items()}
+        # Updates received while a book waits for its snapshot
+        self.buffered_updates_by_symbol: Dict[str, List[Dict]] = {symbol: [] for symbol in self.pairs_by_symbol}
+        self.snapshot_tasks_by_symbol: Dict[str, asyncio.Task] = {}
+        self.tickers_by_pair_name: Dict[str, Ticker] = {}
+
+        self.messages: int = 0
+        self.updates_applied: int = 0
+        self.resyncs: int = 0
+
+    def order_book(self, pair: Pair) -> L2OrderBook:
+        return self.order_books_by_symbol[pair.kaiko_name]
+
+    def get_ticker(self, pair_name: str) -> Optional[Ticker]:
+        return self.tickers_by_pair_name.get(pair_name)
+
+    async def run(self, max_messages: Optional[int] = None):
+        """
+        Streams until the WebSocket closes, or max_messages messages have been received.
+        """
+        async with aiohttp.ClientSession() as session:
+            for symbol in self.order_books_by_symbol:
+                self.request_snapshot(session, symbol)
+            try:
+                async with session.ws_connect(self.websocket_url) as websocket:
+                    async for ws_message in websocket:
+                        if ws_message.type != aiohttp.WSMsgType.TEXT:
+                            break
+                        self.record(ws_message.data)
+                        self.handle_message(json.loads(ws_message.data), session)
+                        if max_messages is not None and self.messages >= max_messages:
+                            break
+                # Applies the updates buffered for pending snapshots, so books include every message received. Snapshots
+                # that don't arrive in time are cancelled below.
+                pending_tasks: List[asyncio.Task] = [task for task in self.snapshot_tasks_by_symbol.values()
+                                                     if not task.done()]
+                if len(pending_tasks) > 0:
+                    await asyncio.wait(pending_tasks, timeout=self.snapshot_wait_seconds)
+            finally:
+                for task in self.snapshot_tasks_by_symbol.values():
+                    task.cancel()
+
+    def record(self, raw_message: str):
+        if self.record_path is not None:
+            with open(self.record_path, 'a') as record_file:
+                record_file.write(raw_message.rstrip('\n') + '\n')
+
+    def request_snapshot(self, session: aiohttp.ClientSession, symbol: str):
+        task: Optional[asyncio.Task] = self.snapshot_tasks_by_symbol.get(symbol)
+        if task is None or task.done():
+            self.snapshot_tasks_by_symbol[symbol] = asyncio.ensure_future(self.sync_from_snapshot(session, symbol))
+
+    async def sync_from_snapshot(self, session: aiohttp.ClientSession, symbol: str):
+        """
+        Fetches snapshots until one is recent enough for the buffered updates to be applied after it, with exponential
+        backoff between attempts. After max_snapshot_attempts, the book is left unsynced until the next update
+        requests a snapshot again.
+        """
+        for attempt in range(self.max_snapshot_attempts):
+            if attempt > 0:
+                await asyncio.sleep(self.snapshot_retry_seconds * 2 ** (attempt - 1))
+            try:
+                async with session.get(self.snapshot_url,
+                                       params={'symbol': symbol, 'limit': self.snapshot_limit}) as response:
+                    response.raise_for_status()
+                    snapshot: Dict = await response.json()
+            except aiohttp.ClientError as ex:
+                print('fetching {0} snapshot failed: {1!r}'.format(symbol, ex))
+                continue
+            self.apply_snapshot(symbol, snapshot)
+            if self.order_books_by_symbol[symbol].synced:
+                return
+        print('{0} not synced after {1} snapshots, waiting for the next update'.format(symbol,
+                                                                                       self.max_snapshot_attempts))
+
+    def apply_snapshot(self, symbol: str, snapshot: Dict):
+        """
+        Applies a snapshot, then the updates buffered while waiting for it. If there's a gap between the snapshot and
+        the buffered updates, the book is left unsynced with the updates from the gap on still buffered.
+        """
+        order_book: L2OrderBook = self.order_books_by_symbol[symbol]
+        order_book.apply_snapshot(snapshot['bids'], snapshot['asks'], snapshot['lastUpdateId'])
+        buffered_updates: List[Dict] = self.buffered_updates_by_symbol[symbol]
+        self.buffered_updates_by_symbol[symbol] = []
+        for index, update in enumerate(buffered_updates):
+            self.apply_update(symbol, update)
+            if not order_book.synced:
+                self.buffered_updates_by_symbol[symbol] = buffered_updates[index:]
+                return
+        self.publish_ticker(order_book)
+
+    def handle_message(self, message: Dict, session: Optional[aiohttp.ClientSession] = None):
+        self.messages += 1
+        update: Dict = message.get('data', message)
+        symbol: Optional[str] = update.get('s')
+        if update.get('e') != 'depthUpdate' or symbol not in self.order_books_by_symbol:
+            return
+
+        if not self.order_books_by_symbol[symbol].synced:
+            self.buffered_updates_by_symbol[symbol].append(update)
+            # Restarts the resync if the last one gave up
+            if session is not None:
+                self.request_snapshot(session, symbol)
+            return
+        if self.apply_update(symbol, update):
+            self.publish_ticker(self.order_books_by_symbol[symbol])
+        elif not self.order_books_by_symbol[symbol].synced and session is not None:
+            self.request_snapshot(session, symbol)
+
+    def apply_update(self, symbol: str, update: Dict) -> bool:
+        """
+        Returns: True if the update changed the book. On a sequence gap, the book is cleared and the update buffered
+            until the book is resynced.
+        """
+        order_book: L2OrderBook = self.order_books_by_symbol[symbol]
+        exchange_timestamp: Optional[float] = update['E'] / 1000 if update.get('E') is not None else None
+        try:
+            applied: bool = order_book.apply_update(update['U'], update['u'], update['b'], update['a'],
+                                                    exchange_timestamp)
+        except SequenceGapException as ex:
+            print('{0}, resyncing'.format(ex))
+            self.resyncs += 1
+            self.buffered_updates_by_symbol[symbol] = [update]
+            return False
+        if applied:
+            self.updates_applied += 1
+        return applied
+
+    def publish_ticker(self, order_book: L2OrderBook):
+        if not order_book.synced:
+            return
+        ticker: Optional[Ticker] = order_book.ticker()
+        if ticker is None:
+            return
+        self.tickers_by_pair_name[order_book.pair.name] = ticker
+        if self.on_ticker is not None:
+            self.on_ticker(ticker)
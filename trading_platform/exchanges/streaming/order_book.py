@@ -0,0 +1,150 @@
+"""
+In-memory L2 order book, maintained from a snapshot plus incremental depth updates.
+
+Updates follow Binance's diff depth stream semantics: each update has the ids of its first and final changes, and sets
+the amount at each price level it lists, with an amount of 0 removing the level. An update whose final id is at or
+before the book's last update id is already included in the book and is skipped. Otherwise its first id must be at or
+before the id after the book's last update id, or updates were missed, and SequenceGapException is raised so the caller
+can resync from a new snapshot.
+
+Best bid and ask lookups use heaps of price levels with lazy deletion, so an update costs O(log n) per changed level
+instead of a scan of the book.
+"""
+import heapq
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.data.ticker import Ticker
+from trading_platform.utils.datetime_operations import utc_timestamp
+from trading_platform.utils.exceptions import SequenceGapException
+
+# [price, amount] as strings, like exchange depth responses
+PriceLevel = Sequence[str]
+
+
+class L2OrderBook:
+    def __init__(self, exchange_id: int, pair: Pair):
+        self.exchange_id = exchange_id
+        self.pair = pair
+        self.bids: Dict[Decimal, Decimal] = {}
+        self.asks: Dict[Decimal, Decimal] = {}
+        # Negated bid prices, so the heap's smallest item is the best bid
+        self.bid_heap: List[Decimal] = []
+        self.ask_heap: List[Decimal] = []
+        self.last_update_id: Optional[int] = None
+        self.exchange_timestamp: Optional[float] = None
+
+    @property
+    def synced(self) -> bool:
+        return self.last_update_id is not None
+
+    def clear(self):
+        self.bids = {}
+        self.asks = {}
+        self.bid_heap = []
+        self.ask_heap = []
+        self.last_update_id = None
+
+    def apply_snapshot(self, bids: Iterable[PriceLevel], asks: Iterable[PriceLevel], last_update_id: int):
+        self.clear()
+        self.set_levels(bids, asks)
+        self.last_update_id = last_update_id
+
+    def apply_update(self, first_update_id: int, final_update_id: int, bids: Iterable[PriceLevel],
+                     asks: Iterable[PriceLevel], exchange_timestamp: Optional[float] = None) -> bool:
+        """
+        Returns: True if the update was applied, False if it was already included in the book
+
+        Raises: SequenceGapException if updates between the book's last update and this one were missed. The book is
+            cleared, and must be resynced with apply_snapshot().
+        """
+        if not self.synced:
+            raise SequenceGapException('Order book {0} on exchange {1} has no snapshot'.format(self.pair.name,
+                                                                                              self.exchange_id))
+        if final_update_id <= self.last_update_id:
+            return False
+        if first_update_id > self.last_update_id + 1:
+            message: str = 'Order book {0} on exchange {1} missed updates {2} to {3}'.format(
+                self.pair.name, self.exchange_id, self.last_update_id + 1, first_update_id - 1)
+            self.clear()
+            raise SequenceGapException(message)
+
+        self.set_levels(bids, asks)
+        self.last_update_id = final_update_id
+        if exchange_timestamp is not None:
+            self.exchange_timestamp = exchange_timestamp
+        return True
+
+    def set_levels(self, bids: Iterable[PriceLevel], asks: Iterable[PriceLevel]):
+        for price_string, amount_string in bids:
+            price: Decimal = FinancialData(price_string)
+            amount: Decimal = FinancialData(amount_string)
+            if amount == 0:
+                self.bids.pop(price, None)
+            else:
+                if price not in self.bids:
+                    heapq.heappush(self.bid_heap, -price)
+                self.bids[price] = amount
+        for price_string, amount_string in asks:
+            price = FinancialData(price_string)
+            amount = FinancialData(amount_string)
+            if amount == 0:
+                self.asks.pop(price, None)
+            else:
+                if price not in self.asks:
+                    heapq.heappush(self.ask_heap, price)
+                self.asks[price] = amount
+
+    def best_bid(self) -> Optional[Tuple[Decimal, Decimal]]:
+        """
+        Returns: (price, amount) of the highest bid, or None if there are no bids
+        """
+        # Levels that were removed are popped when they reach the top of the heap.
+        while len(self.bid_heap) > 0 and -self.bid_heap[0] not in self.bids:
+            heapq.heappop(self.bid_heap)
+        if len(self.bid_heap) == 0:
+            return None
+        price: Decimal = -self.bid_heap[0]
+        return price, self.bids[price]
+
+    def best_ask(self) -> Optional[Tuple[Decimal, Decimal]]:
+        """
+        Returns: (price, amount) of the lowest ask, or None if there are no asks
+        """
+        while len(self.ask_heap) > 0 and self.ask_heap[0] not in self.asks:
+            heapq.heappop(self.ask_heap)
+        if len(self.ask_heap) == 0:
+            return None
+        price: Decimal = self.ask_heap[0]
+        return price, self.asks[price]
+
+    def depth(self, levels: int) -> Tuple[List[Tuple[Decimal, Decimal]], List[Tuple[Decimal, Decimal]]]:
+        """
+        Returns: the best levels bids, from highest, and the best levels asks, from lowest
+        """
+        bids = heapq.nlargest(levels, self.bids.items())
+        asks = heapq.nsmallest(levels, self.asks.items())
+        return bids, asks
+
+    def ticker(self) -> Optional[Ticker]:
+        """
+        Returns: a Ticker with the best bid and ask, or None if either side is empty. last is None, since depth
+            updates don't include trades.
+        """
+        best_bid = self.best_bid()
+        best_ask = self.best_ask()
+        if best_bid is None or best_ask is None:
+            return None
+        return Ticker(**{
+            'ask': best_ask[0],
+            'bid': best_bid[0],
+            'last': None,
+            'base': self.pair.base,
+            'quote': self.pair.quote,
+            'exchange_id': self.exchange_id,
+            'exchange_timestamp': self.exchange_timestamp,
+            'app_create_timestamp': utc_timestamp(),
+            'version': Ticker.current_version,
+        })
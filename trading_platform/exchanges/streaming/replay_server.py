@@ -0,0 +1,97 @@
+"""
+Local replay server for testing DepthStream without network access.
+
+DepthReplayServer is an aiohttp server that sends recorded depth messages to every WebSocket client on /ws, and serves
+depth snapshots on /depth. Each snapshot request for a symbol gets that symbol's next snapshot, and the last one is
+repeated, so resyncs after a sequence gap can be given a newer snapshot than the first sync.
+
+Example usage:
+    async with DepthReplayServer('depth_messages.jsonl', {'ETHBTC': [snapshot]}) as server:
+        stream = DepthStream(exchange_ids.binance, server.websocket_url, server.snapshot_url, pairs)
+        await stream.run()
+"""
+import asyncio
+import json
+from typing import Dict, List, Optional, Union
+
+from aiohttp import web
+
+
+def read_recorded_messages(path: str) -> List[str]:
+    """
+    Returns: the raw messages in a JSON lines file written by DepthStream's record_path
+    """
+    with open(path) as record_file:
+        return [line.rstrip('\n') for line in record_file if line.strip() != '']
+
+
+class DepthReplayServer:
+    def __init__(self, messages: Union[str, List], snapshots_by_symbol: Dict[str, List[Dict]],
+                 snapshot_delay_seconds: float = 0, message_interval_seconds: float = 0):
+        """
+        Args:
+            messages: path of a JSON lines recording, or a list of messages as dicts or JSON strings
+            snapshots_by_symbol: snapshots to serve, in order, by symbol. Example,
+                {'ETHBTC': [{'lastUpdateId': 100, 'bids': [['0.05', '1']], 'asks': [['0.051', '2']]}]}
+            snapshot_delay_seconds: delay before answering snapshot requests, so messages are buffered meanwhile
+            message_interval_seconds: delay between messages
+        """
+        if isinstance(messages, str):
+            messages = read_recorded_messages(messages)
+        self.messages: List[str] = [message if isinstance(message, str) else json.dumps(message)
+                                    for message in messages]
+        self.snapshots_by_symbol = snapshots_by_symbol
+        self.snapshot_delay_seconds = snapshot_delay_seconds
+        self.message_interval_seconds = message_interval_seconds
+        self.snapshot_requests_by_symbol: Dict[str, int] = {}
+        self.url: Optional[str] = None
+        self.runner: Optional[web.AppRunner] = None
+
+        self.app = web.Application()
+        self.app.router.add_get('/ws', self.replay)
+        self.app.router.add_get('/depth', self.get_snapshot)
+
+    @property
+    def websocket_url(self) -> str:
+        return '{0}/ws'.format(self.url)
+
+    @property
+    def snapshot_url(self) -> str:
+        return '{0}/depth'.format(self.url)
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port: int = self.runner.addresses[0][1]
+        self.url = 'http://127.0.0.1:{0}'.format(port)
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    async def __aenter__(self) -> 'DepthReplayServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.stop()
+
+    async def replay(self, request):
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        for message in self.messages:
+            await websocket.send_str(message)
+            await asyncio.sleep(self.message_interval_seconds)
+        await websocket.close()
+        return websocket
+
+    async def get_snapshot(self, request):
+        symbol: str = request.query['symbol']
+        snapshots: List[Dict] = self.snapshots_by_symbol.get(symbol, [])
+        if len(snapshots) == 0:
+            return web.json_response({'code': -1121, 'msg': 'Invalid symbol.'}, status=400)
+        requests: int = self.snapshot_requests_by_symbol.get(symbol, 0)
+        self.snapshot_requests_by_symbol[symbol] = requests + 1
+        await asyncio.sleep(self.snapshot_delay_seconds)
+        return web.json_response(snapshots[min(requests, len(snapshots) - 1)])
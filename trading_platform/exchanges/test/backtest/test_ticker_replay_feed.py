@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas
+from nose.tools import eq_, assert_true
+
+from trading_platform.core.services.file_service import FileService
+from trading_platform.exchanges.backtest import backtest_subclasses
+from trading_platform.exchanges.backtest.ticker_replay_feed import TickerReplayFeed, archive_ticker_stream, \
+    csv_ticker_stream, dao_ticker_stream, parquet_ticker_stream
+from trading_platform.exchanges.data.enums import exchange_ids
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.ticker_archive import TickerArchive, write_ticker_archive
+from trading_platform.utils.datetime_operations import seconds_per_day
+
+# 2018-06-01
+start_timestamp = 1527811200.0
+
+
+class CsvOperationConfig:
+    def __init__(self, source_filepath, source_prefix):
+        self.source_filepath = source_filepath
+        self.source_prefix = source_prefix
+
+
+class TickerDaoStub:
+    def __init__(self, tickers):
+        self.tickers = tickers
+        self.num_queries = 0
+
+    def fetch_by_app_create_timestamp_between_range(self, session, start, end):
+        self.num_queries += 1
+        return [ticker for ticker in self.tickers if start <= ticker.app_create_timestamp < end]
+
+
+def ticker_df(exchange_id, quote, timestamps):
+    return pandas.DataFrame([{
+        'app_create_timestamp': timestamp, 'exchange_id': exchange_id, 'base': 'BTC', 'quote': quote,
+        'bid': index + 1.0, 'ask': index + 1.5, 'last': index + 1.0, 'version': 5
+    } for index, timestamp in enumerate(timestamps)])
+
+
+class TestTickerReplayFeed(unittest.TestCase):
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+        self.end_timestamp = start_timestamp + 2 * seconds_per_day
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def csv_stream(self):
+        csv_dir = os.path.join(self.working_dir, 'csv')
+        os.makedirs(csv_dir)
+        for day, date_string in enumerate(['2018-06-01', '2018-06-02']):
+            day_start = start_timestamp + day * seconds_per_day
+            ticker_df(exchange_ids.binance, 'ETH', [day_start + 60, day_start + 120]).to_csv(
+                os.path.join(csv_dir, 'tickers_{0}.csv'.format(date_string)), index=False)
+        return csv_ticker_stream(start_timestamp, self.end_timestamp, CsvOperationConfig(csv_dir, 'tickers_'))
+
+    def test_csv_ticker_stream(self):
+        tickers = list(self.csv_stream())
+        eq_([ticker.app_create_timestamp - start_timestamp for ticker in tickers],
+            [60, 120, seconds_per_day + 60, seconds_per_day + 120])
+        eq_(tickers[0].bid, FinancialData(1))
+
+    def test_parquet_ticker_stream(self):
+        parquet_dir = os.path.join(self.working_dir, 'parquet')
+        FileService.write_ticker_parquet(ticker_df(exchange_ids.bittrex, 'XLM', [
+            start_timestamp + 90, start_timestamp + seconds_per_day + 90, start_timestamp + 2 * seconds_per_day]),
+            parquet_dir)
+        tickers = list(parquet_ticker_stream(parquet_dir, start_timestamp, self.end_timestamp))
+        eq_([ticker.app_create_timestamp - start_timestamp for ticker in tickers], [90, seconds_per_day + 90])
+        eq_(tickers[1].ask, FinancialData(2.5))
+
+    def test_dao_ticker_stream(self):
+        dao = TickerDaoStub(list(self.csv_stream()))
+        tickers = list(dao_ticker_stream(dao, None, start_timestamp, self.end_timestamp))
+        eq_(len(tickers), 4)
+        eq_(dao.num_queries, 48)
+
+    def test_merged_snapshots(self):
+        archive_path = write_ticker_archive(ticker_df(exchange_ids.binance, 'XLM', [start_timestamp + 60,
+                                                                                    start_timestamp + 90]),
+                                            os.path.join(self.working_dir, 'archive'))
+        with TickerArchive(archive_path) as ticker_archive:
+            feed = TickerReplayFeed([self.csv_stream(), archive_ticker_stream(ticker_archive)])
+            snapshots = list(feed)
+
+        eq_([timestamp - start_timestamp for timestamp, _ in snapshots],
+            [60, 90, 120, seconds_per_day + 60, seconds_per_day + 120])
+        first_timestamp, first_snapshot = snapshots[0]
+        eq_(sorted(first_snapshot[exchange_ids.binance]), ['ETH_BTC', 'XLM_BTC'])
+        # XLM_BTC is carried forward from the archive after its last ticker
+        eq_(snapshots[-1][1][exchange_ids.binance]['XLM_BTC'].bid, FinancialData(2))
+        eq_(snapshots[-1][1][exchange_ids.binance]['ETH_BTC'].bid, FinancialData(2))
+
+    def test_no_carry_forward(self):
+        snapshots = list(TickerReplayFeed([self.csv_stream()], carry_forward=False))
+        for _, snapshot in snapshots:
+            eq_(len(snapshot[exchange_ids.binance]), 1)
+
+    def test_replay(self):
+        exchanges_by_id = backtest_subclasses.instantiate()
+        timestamps = []
+        for timestamp in TickerReplayFeed([self.csv_stream()]).replay(exchanges_by_id):
+            timestamps.append(timestamp)
+            ticker = exchanges_by_id[exchange_ids.binance].get_ticker('ETH_BTC')
+            eq_(ticker.app_create_timestamp, timestamp)
+        eq_(len(timestamps), 4)
+        assert_true(exchanges_by_id[exchange_ids.bittrex].get_tickers() == {})
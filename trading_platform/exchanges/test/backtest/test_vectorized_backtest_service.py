@@ -0,0 +1,171 @@
+"""
+Parity tests between VectorizedBacktestService and BacktestExchangeService. Both services are run over the same tickers
+and signals, and the balances, fills, capital gains and losses, and equity of the vectorized service are compared
+against the values computed by BacktestExchangeService.buy_all() and BacktestExchangeService.sell_all().
+"""
+import unittest
+from typing import Dict, List
+
+import numpy as np
+import pandas
+from nose.tools import eq_, assert_almost_equal, assert_greater
+
+from trading_platform.core.test.data import Defaults, eth_withdrawal_fee
+from trading_platform.exchanges.backtest.backtest_exchange_service import BacktestExchangeService
+from trading_platform.exchanges.backtest.vectorized_backtest_service import VectorizedBacktestService, buy_signal, \
+    sell_signal, hold_signal, bid_index, ask_index, VectorizedBacktestResult
+from trading_platform.exchanges.data.enums import exchange_ids
+from trading_platform.exchanges.data.enums.order_side import OrderSide
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.data.ticker import Ticker
+
+
+class TestVectorizedBacktestService(unittest.TestCase):
+    def setUp(self):
+        self.pairs: List[Pair] = [Pair(base='USDT', quote='ETH'), Pair(base='ETH', quote='ARK')]
+        self.eth_usdt_pair: Pair = self.pairs[0]
+        self.trade_fee: FinancialData = Defaults.trade_fee
+        self.initial_base_capital: np.ndarray = np.array([1000.0, 20.0])
+        self.num_timestamps = 200
+
+        random_state = np.random.RandomState(7)
+        self.timestamps: np.ndarray = np.arange(self.num_timestamps, dtype=np.float64) * 60
+        mid_prices: np.ndarray = np.array([400.0, .0015]) * np.exp(
+            np.cumsum(random_state.normal(0, .01, (self.num_timestamps, len(self.pairs))), axis=0))
+        spreads: np.ndarray = mid_prices * .001
+        self.tickers: np.ndarray = np.stack([mid_prices - spreads, mid_prices + spreads], axis=2)
+        self.signals: np.ndarray = random_state.choice([buy_signal, sell_signal, hold_signal],
+                                                       size=(self.num_timestamps, len(self.pairs)), p=[.1, .1, .8])
+        # ARK_ETH capital gains are valued with the ETH_USDT bid
+        self.base_usdt_prices: np.ndarray = np.stack(
+            [np.ones(self.num_timestamps), self.tickers[:, 0, bid_index]], axis=1)
+
+        self.vectorized_service = VectorizedBacktestService(trade_fee=self.trade_fee)
+
+    def backtest_service(self, pair: Pair) -> BacktestExchangeService:
+        withdrawal_fees = pandas.DataFrame([
+            {
+                'currency': pair.base,
+                'withdrawal_fee': eth_withdrawal_fee
+            },
+            {
+                'currency': pair.quote,
+                'withdrawal_fee': Defaults.quote_withdrawal_fee
+            }
+        ])
+        withdrawal_fees.set_index('currency', inplace=True)
+        return BacktestExchangeService(exchange_id=exchange_ids.binance, trade_fee=self.trade_fee,
+                                       withdrawal_fees=withdrawal_fees, echo=False)
+
+    def ticker(self, pair_index: int, time_index: int) -> Ticker:
+        pair: Pair = self.pairs[pair_index]
+        return Ticker(base=pair.base, quote=pair.quote,
+                      bid=FinancialData(self.tickers[time_index, pair_index, bid_index]),
+                      ask=FinancialData(self.tickers[time_index, pair_index, ask_index]),
+                      app_create_timestamp=self.timestamps[time_index])
+
+    def run_backtest_service(self, pair_index: int) -> Dict:
+        """
+        Step through the tickers one at a time, the way backtests use BacktestExchangeService, and record the state of
+        the service after each time step.
+        """
+        pair: Pair = self.pairs[pair_index]
+        service: BacktestExchangeService = self.backtest_service(pair)
+        service.deposit_immediately(pair.base, FinancialData(self.initial_base_capital[pair_index]))
+
+        holding_quote = False
+        fills = []
+        equity = []
+        for time_index in range(self.num_timestamps):
+            ticker: Ticker = self.ticker(pair_index, time_index)
+            service.set_tickers({
+                pair.name: ticker,
+                self.eth_usdt_pair.name: self.ticker(0, time_index)
+            })
+
+            signal = self.signals[time_index, pair_index]
+            if signal == buy_signal and not holding_quote:
+                fills.append(service.buy_all(pair, ticker.ask))
+                holding_quote = True
+            elif signal == sell_signal and holding_quote:
+                fills.append(service.sell_all(pair, ticker.bid))
+                holding_quote = False
+
+            equity.append(service.get_balance(pair.base).total + service.get_balance(pair.quote).total * ticker.bid)
+
+        return {
+            'service': service,
+            'fills': fills,
+            'equity': equity
+        }
+
+    def test_parity_with_backtest_exchange_service(self):
+        result: VectorizedBacktestResult = self.vectorized_service.run(
+            self.timestamps, self.pairs, self.tickers, self.signals, self.initial_base_capital, self.base_usdt_prices)
+
+        for pair_index, pair in enumerate(self.pairs):
+            expected: Dict = self.run_backtest_service(pair_index)
+            service: BacktestExchangeService = expected['service']
+
+            fills_df: pandas.DataFrame = result.fills_df()
+            fills_df = fills_df[fills_df.quote == pair.quote]
+            eq_(len(fills_df), len(expected['fills']))
+            assert_greater(len(fills_df), 2)
+            for fill, expected_fill in zip(fills_df.to_dict(orient='records'), expected['fills']):
+                eq_(fill['order_side'], expected_fill.order_side)
+                assert_almost_equal(fill['price'] / float(expected_fill.price), 1, places=FinancialData.eight_places)
+                assert_almost_equal(fill['amount'] / float(expected_fill.amount), 1, places=FinancialData.eight_places)
+
+            for currency in [pair.base, pair.quote]:
+                assert_almost_equal(float(result.final_balances()[currency].total),
+                                    float(service.get_balance(currency).total), places=FinancialData.eight_places)
+
+            assert_almost_equal(result.capital_gains[:, pair_index].sum(), float(service.capital_gains),
+                                places=FinancialData.six_places)
+            assert_almost_equal(result.capital_losses[:, pair_index].sum(), float(service.capital_losses),
+                                places=FinancialData.six_places)
+
+            for time_index, expected_equity in enumerate(expected['equity']):
+                assert_almost_equal(result.equity[time_index, pair_index] / float(expected_equity), 1,
+                                    places=FinancialData.eight_places)
+
+        expected_equity_curve: np.ndarray = (result.equity * self.base_usdt_prices).sum(axis=1)
+        np.testing.assert_allclose(result.equity_curve, expected_equity_curve)
+
+    def test_ignores_redundant_signals(self):
+        signals: np.ndarray = np.array([[sell_signal], [buy_signal], [buy_signal], [hold_signal], [sell_signal],
+                                        [sell_signal]])
+        tickers: np.ndarray = np.tile([[[1.0, 1.0]]], (len(signals), 1, 1))
+        result: VectorizedBacktestResult = self.vectorized_service.run(
+            np.arange(len(signals)), self.pairs[:1], tickers, signals, np.array([100.0]))
+
+        eq_(result.buys[:, 0].tolist(), [False, True, False, False, False, False])
+        eq_(result.sells[:, 0].tolist(), [False, False, False, False, True, False])
+        eq_(result.fills_df().order_side.tolist(), [OrderSide.buy, OrderSide.sell])
+
+    def test_ignores_signals_without_ticker(self):
+        signals: np.ndarray = np.array([[buy_signal], [buy_signal], [sell_signal], [sell_signal]])
+        tickers: np.ndarray = np.array([[[np.nan, np.nan]], [[1.0, 1.0]], [[np.nan, np.nan]], [[1.0, 1.0]]])
+        result: VectorizedBacktestResult = self.vectorized_service.run(
+            np.arange(len(signals)), self.pairs[:1], tickers, signals, np.array([100.0]))
+
+        eq_(result.buys[:, 0].tolist(), [False, True, False, False])
+        eq_(result.sells[:, 0].tolist(), [False, False, False, True])
+        # held quote is marked to the last known bid when there is no ticker
+        assert_almost_equal(result.equity[2, 0], result.quote_balances[2, 0])
+
+    def test_ticker_matrix_from_df(self):
+        ticker_df = pandas.DataFrame([
+            {'app_create_timestamp': 1, 'base': 'USDT', 'quote': 'ETH', 'bid': 399.0, 'ask': 401.0},
+            {'app_create_timestamp': 1, 'base': 'ETH', 'quote': 'ARK', 'bid': .0015, 'ask': .0016},
+            {'app_create_timestamp': 2, 'base': 'USDT', 'quote': 'ETH', 'bid': 400.0, 'ask': 402.0},
+        ])
+        timestamps, pairs, tickers = VectorizedBacktestService.ticker_matrix_from_df(ticker_df, self.pairs)
+
+        eq_(timestamps.tolist(), [1, 2])
+        eq_(pairs, self.pairs)
+        eq_(tickers.shape, (2, 2, 2))
+        eq_(tickers[1, 0].tolist(), [400.0, 402.0])
+        eq_(tickers[0, 1].tolist(), [.0015, .0016])
+        assert (np.isnan(tickers[1, 1]).all())
@@ -0,0 +1,114 @@
+import unittest
+from copy import deepcopy
+
+from nose.tools import eq_, assert_true, assert_false, assert_not_equal
+
+from trading_platform.core.test import data
+from trading_platform.core.test.exchange_data import binance_fetch_order, binance_ticker
+from trading_platform.exchanges.data.balance import Balance
+from trading_platform.exchanges.data.compact_records import CompactTicker, CompactOrder, CompactBalance, CompactPair
+from trading_platform.exchanges.data.enums import exchange_ids
+from trading_platform.exchanges.data.enums.order_status import OrderStatus
+from trading_platform.exchanges.data.financial_data import FinancialData, zero
+from trading_platform.exchanges.data.order import Order
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.data.ticker import Ticker
+
+
+class TestCompactRecords(unittest.TestCase):
+    def setUp(self):
+        self.ticker_kwargs = data.time_ordered_tickers()[0].__dict__
+        self.order_kwargs = data.order().to_dict()
+        self.balance_kwargs = data.balance(exchange_ids.binance).__dict__
+
+    def test_ticker(self):
+        ticker = Ticker(**self.ticker_kwargs)
+        compact_ticker = CompactTicker(**self.ticker_kwargs)
+
+        assert_false(hasattr(compact_ticker, '__dict__'))
+        eq_(compact_ticker.to_dict(), ticker.to_dict())
+        eq_(CompactTicker.csv_fieldnames(), Ticker.csv_fieldnames())
+        eq_(compact_ticker, CompactTicker(**self.ticker_kwargs))
+        eq_(hash(compact_ticker), hash(CompactTicker(**self.ticker_kwargs)))
+        eq_(len({compact_ticker, CompactTicker(**self.ticker_kwargs)}), 1)
+
+        changed_ticker = CompactTicker(**self.ticker_kwargs)
+        changed_ticker.bid = FinancialData(100)
+        assert_not_equal(compact_ticker, changed_ticker)
+
+    def test_ticker_from_exchange_data(self):
+        pair_name, ticker = Ticker.from_exchange_data(binance_ticker, exchange_ids.binance, Ticker.current_version)
+        compact_pair_name, compact_ticker = CompactTicker.from_exchange_data(binance_ticker, exchange_ids.binance,
+                                                                             Ticker.current_version)
+        eq_(compact_pair_name, pair_name)
+        assert_true(isinstance(compact_ticker, CompactTicker))
+        compact_dict = compact_ticker.to_dict()
+        ticker_dict = ticker.to_dict()
+        del compact_dict['app_create_timestamp']
+        del ticker_dict['app_create_timestamp']
+        eq_(compact_dict, ticker_dict)
+
+    def test_order(self):
+        order = Order(**self.order_kwargs)
+        compact_order = CompactOrder(**self.order_kwargs)
+
+        assert_false(hasattr(compact_order, '__dict__'))
+        eq_(compact_order.to_dict(), order.to_dict())
+        eq_(CompactOrder.csv_fieldnames(), Order.csv_fieldnames())
+        eq_(compact_order, CompactOrder(**self.order_kwargs))
+        eq_(hash(compact_order), hash(CompactOrder(**self.order_kwargs)))
+
+        filled_order = compact_order.filled_order_copy()
+        assert_true(isinstance(filled_order, CompactOrder))
+        eq_(filled_order.order_status, OrderStatus.filled)
+        eq_(filled_order.remaining, zero)
+        eq_(filled_order.order_id, compact_order.order_id)
+        eq_(compact_order.order_status, OrderStatus.open)
+
+        cancelled_order = compact_order.copy_updated_with_cancel_order_exchange_response({})
+        eq_(cancelled_order.order_status, OrderStatus.cancelled_and_partially_filled)
+
+    def test_order_from_fetch_order_exchange_response(self):
+        order = Order.from_fetch_order_exchange_response(binance_fetch_order, exchange_ids.binance)
+        compact_order = CompactOrder.from_fetch_order_exchange_response(binance_fetch_order, exchange_ids.binance)
+        compact_dict = compact_order.to_dict()
+        order_dict = order.to_dict()
+        del compact_dict['app_create_timestamp']
+        del order_dict['app_create_timestamp']
+        eq_(compact_dict, order_dict)
+
+    def test_balance(self):
+        compact_balance = CompactBalance(**self.balance_kwargs)
+        assert_false(hasattr(compact_balance, '__dict__'))
+        for field in CompactBalance.value_fields:
+            eq_(getattr(compact_balance, field), getattr(Balance(**self.balance_kwargs), field))
+
+        balance_hash = hash(compact_balance)
+        compact_balance + CompactBalance(**self.balance_kwargs)
+        eq_(compact_balance.total, FinancialData(30))
+        # numerical fields aren't part of the hash
+        eq_(hash(compact_balance), balance_hash)
+
+        zero_balance = CompactBalance.instance_with_zero_value_fields()
+        assert_true(isinstance(zero_balance, CompactBalance))
+        eq_(zero_balance.free, zero)
+
+    def test_pair(self):
+        pair = Pair(base='ETH', quote='ARK')
+        compact_pair = CompactPair(base='ETH', quote='ARK')
+
+        assert_false(hasattr(compact_pair, '__dict__'))
+        eq_(compact_pair.name, pair.name)
+        eq_(compact_pair.name_for_exchange_clients, pair.name_for_exchange_clients)
+        eq_(compact_pair.kaiko_name, pair.kaiko_name)
+        eq_(compact_pair, CompactPair(base='ETH', quote='ARK'))
+        assert_not_equal(compact_pair, CompactPair(base='BTC', quote='ARK'))
+        eq_({compact_pair: 1}[CompactPair(base='ETH', quote='ARK')], 1)
+
+        parsed_pair = CompactPair.from_exchange_client_string('BCC/BTC')
+        assert_true(isinstance(parsed_pair, CompactPair))
+        eq_(parsed_pair, CompactPair(base='BTC', quote='BCH'))
+
+    def test_deepcopy(self):
+        compact_ticker = CompactTicker(**self.ticker_kwargs)
+        eq_(deepcopy(compact_ticker), compact_ticker)
@@ -0,0 +1,132 @@
+import unittest
+from decimal import Decimal
+
+import numpy as np
+from nose.tools import eq_, raises, assert_true, assert_false
+
+from trading_platform.core.test.data import Defaults
+from trading_platform.exchanges.data import fixed_point_financial_data
+from trading_platform.exchanges.data.financial_data import FinancialData, one
+from trading_platform.exchanges.data.fixed_point_financial_data import FixedPointFinancialData, to_fixed_point_array, \
+    from_fixed_point_array
+
+
+class TestFixedPointFinancialData(unittest.TestCase):
+    def test_init(self):
+        eq_(FixedPointFinancialData(2).raw, 200000000)
+        eq_(FixedPointFinancialData('0.00000001').raw, 1)
+        eq_(FixedPointFinancialData(.1).raw, 10000000)
+        eq_(FixedPointFinancialData(FinancialData(.0015)).raw, 150000)
+        eq_(FixedPointFinancialData(Decimal('1.234567895')).raw, 123456790)
+        eq_(FixedPointFinancialData(1.5, scale=2).raw, 150)
+        eq_(FixedPointFinancialData(FixedPointFinancialData('1.23456789'), scale=4).raw, 12346)
+
+    def test_arithmetic_matches_decimal(self):
+        price = '0.00068001'
+        amount = '1234.5'
+        fixed_price = FixedPointFinancialData(price)
+        fixed_amount = FixedPointFinancialData(amount)
+        decimal_price = Decimal(price)
+        decimal_amount = Decimal(amount)
+
+        eq_((fixed_price + fixed_amount).to_decimal(), decimal_price + decimal_amount)
+        eq_((fixed_amount - fixed_price).to_decimal(), decimal_amount - decimal_price)
+        eq_((fixed_price * fixed_amount).to_decimal(), round(decimal_price * decimal_amount, 8))
+        eq_((fixed_amount / fixed_price).to_decimal(), round(decimal_amount / decimal_price, 8))
+        eq_((-fixed_price).to_decimal(), -decimal_price)
+        eq_(abs(-fixed_price), fixed_price)
+
+    def test_mixed_operands(self):
+        fixed = FixedPointFinancialData('1.5')
+        eq_(fixed + 1, FixedPointFinancialData('2.5'))
+        eq_(1 - fixed, FixedPointFinancialData('-0.5'))
+        eq_(2 * fixed, 3)
+        eq_(3 / fixed, 2)
+        eq_(fixed * Decimal('2'), 3)
+
+    def test_backtest_fill_semantics(self):
+        """
+        Base needed to buy and base received from a sell, as computed by BacktestExchangeService.
+        """
+        trade_fee = FixedPointFinancialData(Defaults.trade_fee)
+        price = FixedPointFinancialData('0.5')
+        amount = FixedPointFinancialData('40')
+        eq_(amount * price * (1 + trade_fee), FixedPointFinancialData('20.04'))
+        eq_(price * amount / (1 + trade_fee), round(Decimal('20') / (one + Defaults.trade_fee), 8))
+
+    def test_comparisons(self):
+        small = FixedPointFinancialData('0.1')
+        large = FixedPointFinancialData('0.2')
+        assert_true(small < large)
+        assert_true(large >= small)
+        assert_true(small <= .1)
+        assert_true(small != large)
+        assert_false(FixedPointFinancialData(0))
+        eq_(max(small, large), large)
+
+    def test_equality_and_hash(self):
+        small = FixedPointFinancialData('0.1')
+        # Equal values have equal hashes, so they can be mixed in dicts and sets
+        for equal in [FixedPointFinancialData(.1), Decimal('0.1'), FinancialData('0.1'),
+                      FixedPointFinancialData('0.1', scale=2)]:
+            assert_true(small == equal)
+            eq_(hash(small), hash(equal))
+        eq_(hash(FixedPointFinancialData(3)), hash(3))
+        eq_({Decimal('0.1'): 'decimal'}[small], 'decimal')
+        # Values that are only equal after rounding to scale places aren't equal
+        assert_false(FixedPointFinancialData('1.2346', scale=4) == FixedPointFinancialData('1.23456789'))
+        assert_false(small == Decimal('0.100000001'))
+        # Floats and strs aren't equal, because their hashes differ
+        assert_false(small == .1)
+        assert_false(small == '0.1')
+        assert_true(small != .1)
+        assert_false(.1 in {small})
+
+    def test_round(self):
+        value = FixedPointFinancialData('1.23456785')
+        eq_(round(value, FinancialData.order_numerical_field_precision), FixedPointFinancialData('1.2345678'))
+        eq_(round(FixedPointFinancialData('1.23456775'), 7), FixedPointFinancialData('1.2345678'))
+        eq_(round(value, FinancialData.two_places), FixedPointFinancialData('1.23'))
+        eq_(round(FixedPointFinancialData('2.5')), 2)
+        eq_(round(value, 7).to_decimal(), round(Decimal('1.23456785'), 7))
+
+    @raises(ZeroDivisionError)
+    def test_divide_by_zero(self):
+        FixedPointFinancialData(1) / 0
+
+
+class TestFixedPointArrays(unittest.TestCase):
+    def setUp(self):
+        random_state = np.random.RandomState(3)
+        self.prices = np.round(random_state.uniform(.00001, 10000, 1000), 8)
+        self.amounts = np.round(random_state.uniform(.001, 1000, 1000), 8)
+
+    def test_to_and_from_fixed_point_array(self):
+        raw = to_fixed_point_array(self.prices)
+        eq_(raw.dtype, np.int64)
+        np.testing.assert_allclose(from_fixed_point_array(raw), self.prices)
+
+        decimals = np.array([FinancialData('0.00068001'), FinancialData(2)], dtype=object)
+        eq_(to_fixed_point_array(decimals).tolist(), [68001, 200000000])
+
+    def test_multiply_arrays_matches_scalar(self):
+        raw = fixed_point_financial_data.multiply_arrays(to_fixed_point_array(self.prices),
+                                                         to_fixed_point_array(self.amounts))
+        expected = [(FixedPointFinancialData(price) * FixedPointFinancialData(amount)).raw for price, amount in
+                    zip(self.prices, self.amounts)]
+        eq_(raw.tolist(), expected)
+
+    def test_divide_arrays_matches_scalar(self):
+        prices = np.concatenate([self.prices, -self.prices[:10]])
+        amounts = np.concatenate([self.amounts, self.amounts[:10]])
+        raw = fixed_point_financial_data.divide_arrays(to_fixed_point_array(prices), to_fixed_point_array(amounts))
+        expected = [(FixedPointFinancialData(price) / FixedPointFinancialData(amount)).raw for price, amount in
+                    zip(prices, amounts)]
+        eq_(raw.tolist(), expected)
+
+    def test_round_array_matches_scalar(self):
+        raw = fixed_point_financial_data.round_array(to_fixed_point_array(self.prices),
+                                                     FinancialData.order_numerical_field_precision)
+        expected = [round(FixedPointFinancialData(price), FinancialData.order_numerical_field_precision).raw for price in
+                    self.prices]
+        eq_(raw.tolist(), expected)
@@ -0,0 +1,34 @@
+import unittest
+
+from nose.tools import eq_, assert_true, assert_is_none
+
+from trading_platform.exchanges.data.pair import Pair, PairRegistry
+
+
+class TestPairRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = PairRegistry()
+
+    def test_get(self):
+        pair = self.registry.get(base='BTC', quote='ETH')
+        eq_(pair, Pair(base='BTC', quote='ETH'))
+        assert_true(self.registry.get(base='BTC', quote='ETH') is pair)
+
+    def test_string_forms(self):
+        pair = self.registry.get(base='BTC', quote='ETH')
+        assert_true(self.registry.from_exchange_client_string('ETH/BTC') is pair)
+        assert_true(self.registry.from_dto_string('ETH_BTC') is pair)
+        assert_true(self.registry.from_kaiko_name('ETHBTC') is pair)
+        assert_is_none(self.registry.from_kaiko_name('XLMBTC'))
+
+    def test_from_exchange_client_string(self):
+        pair = self.registry.from_exchange_client_string('BTC/USDT')
+        eq_(pair, Pair.from_exchange_client_string('BTC/USDT'))
+        assert_true(self.registry.get(base='USDT', quote='BTC') is pair)
+        assert_is_none(self.registry.from_exchange_client_string('BTC_USDT'))
+
+    def test_bcc_normalization(self):
+        pair = self.registry.from_exchange_client_string('BCC/BTC')
+        eq_(pair, Pair(base='BTC', quote='BCH'))
+        assert_true(self.registry.from_exchange_client_string('BCH/BTC') is pair)
+        assert_true(self.registry.from_exchange_client_string('BCC/BTC') is pair)
@@ -0,0 +1,187 @@
+"""
+Local fake exchange for testing async exchange services without network access.
+
+FakeExchangeServer is an aiohttp server with in-memory tickers, balances, and orders, and FakeExchangeClient is a
+ccxt.async_support exchange that talks to it over HTTP, so requests go through ccxt's async session, throttling, and
+error handling like a real exchange client. Responses follow Binance's shapes where the standardization functions
+depend on them.
+
+Example usage:
+    async with FakeExchangeServer() as server:
+        client = FakeExchangeClient({'urls': {'api': {'rest': server.url}}})
+"""
+import itertools
+import json
+from typing import Dict, List, Optional
+
+import ccxt.async_support
+from aiohttp import web
+from ccxt import ExchangeNotAvailable, OrderNotFound
+
+
+class FakeExchangeServer:
+    def __init__(self, tickers: Optional[Dict[str, Dict]] = None, balances: Optional[List[Dict]] = None):
+        """
+        Args:
+            tickers: ccxt-style tickers by symbol. Example, {'ETH/BTC': {'bid': .05, 'ask': .051, ...}}
+            balances: Binance-style balances. Example, [{'asset': 'BTC', 'free': '1.0', 'locked': '0.0'}]
+        """
+        self.tickers = tickers if tickers is not None else {}
+        self.balances = balances if balances is not None else []
+        self.orders_by_id: Dict[str, Dict] = {}
+        self.order_ids = itertools.count(1)
+        # Number of upcoming requests to fail with a 503, to test retries
+        self.failures_remaining: int = 0
+        self.requests: List[str] = []
+        self.url: Optional[str] = None
+        self.runner: Optional[web.AppRunner] = None
+
+        self.app = web.Application(middlewares=[self.fail_middleware])
+        self.app.router.add_get('/tickers', self.get_tickers)
+        self.app.router.add_get('/balance', self.get_balance)
+        self.app.router.add_post('/order', self.create_order)
+        self.app.router.add_get('/order', self.get_order)
+        self.app.router.add_delete('/order', self.cancel_order)
+        self.app.router.add_get('/openOrders', self.get_open_orders)
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port: int = self.runner.addresses[0][1]
+        self.url = 'http://127.0.0.1:{0}'.format(port)
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    async def __aenter__(self) -> 'FakeExchangeServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.stop()
+
+    @web.middleware
+    async def fail_middleware(self, request, handler):
+        self.requests.append('{0} {1}'.format(request.method, request.path))
+        if self.failures_remaining > 0:
+            self.failures_remaining -= 1
+            return web.json_response({'msg': 'unavailable'}, status=503)
+        return await handler(request)
+
+    async def get_tickers(self, request):
+        return web.json_response(self.tickers)
+
+    async def get_balance(self, request):
+        return web.json_response({'balances': self.balances})
+
+    async def create_order(self, request):
+        data: Dict = await request.json()
+        order_id: str = str(next(self.order_ids))
+        order: Dict = {
+            'id': order_id,
+            'clientOrderId': data.get('newClientOrderId'),
+            'symbol': data['symbol'],
+            'side': data['side'],
+            'amount': float(data['amount']),
+            'price': float(data['price']),
+            'filled': 0.0,
+            'status': 'open',
+            'timestamp': 1527811200000,
+        }
+        self.orders_by_id[order_id] = order
+        return web.json_response(order)
+
+    async def get_order(self, request):
+        order: Optional[Dict] = self.orders_by_id.get(request.query.get('id'))
+        if order is None:
+            return web.json_response({'msg': 'order not found'}, status=404)
+        return web.json_response(order)
+
+    async def cancel_order(self, request):
+        order: Optional[Dict] = self.orders_by_id.get(request.query.get('id'))
+        if order is None:
+            return web.json_response({'msg': 'order not found'}, status=404)
+        order['status'] = 'canceled'
+        return web.json_response(order)
+
+    async def get_open_orders(self, request):
+        return web.json_response([order for order in self.orders_by_id.values() if order['status'] == 'open' and
+                                  order['symbol'] == request.query.get('symbol')])
+
+    def fill_order(self, order_id: str):
+        order: Dict = self.orders_by_id[order_id]
+        order['filled'] = order['amount']
+        order['status'] = 'closed'
+
+
+class FakeExchangeClient(ccxt.async_support.Exchange):
+    def describe(self):
+        return self.deep_extend(super().describe(), {
+            'id': 'fake',
+            'name': 'Fake',
+            'rateLimit': 1,
+            'urls': {
+                'api': {
+                    'rest': 'http://127.0.0.1',
+                },
+            },
+        })
+
+    def sign(self, path, api='public', method='GET', params={}, headers=None, body=None):
+        url: str = '{0}/{1}'.format(self.urls['api']['rest'], path)
+        if method == 'POST':
+            body = json.dumps(params)
+            headers = {'Content-Type': 'application/json'}
+        elif params:
+            url += '?' + self.urlencode(params)
+        return {'url': url, 'method': method, 'body': body, 'headers': headers}
+
+    def handle_errors(self, code, reason, url, method, headers, body, response, request_headers, request_body):
+        if code == 503:
+            raise ExchangeNotAvailable(body)
+        if code == 404:
+            raise OrderNotFound(body)
+        return None
+
+    @staticmethod
+    def parse_fake_order(order: Dict) -> Dict:
+        return {
+            'id': order['id'],
+            'symbol': order['symbol'],
+            'side': order['side'],
+            'amount': order['amount'],
+            'price': order['price'],
+            'filled': order['filled'],
+            'remaining': order['amount'] - order['filled'],
+            'cost': order['filled'] * order['price'],
+            'average': order['price'] if order['filled'] > 0 else None,
+            'status': order['status'],
+            'timestamp': order['timestamp'],
+            'info': order,
+        }
+
+    async def fetch_tickers(self, symbols=None, params={}):
+        response: Dict = await self.fetch2('tickers', 'public', 'GET', params)
+        return {symbol: dict(ticker, symbol=symbol) for symbol, ticker in response.items()}
+
+    async def fetch_ticker(self, symbol, params={}):
+        return (await self.fetch_tickers(params=params))[symbol]
+
+    async def fetch_balance(self, params={}):
+        return {'info': await self.fetch2('balance', 'private', 'GET', params)}
+
+    async def create_order(self, symbol, type, side, amount, price=None, params={}):
+        request: Dict = dict(params, symbol=symbol, type=type, side=side, amount=str(amount), price=str(price))
+        return self.parse_fake_order(await self.fetch2('order', 'private', 'POST', request))
+
+    async def fetch_order(self, id, symbol=None, params={}):
+        return self.parse_fake_order(await self.fetch2('order', 'private', 'GET', dict(params, id=id)))
+
+    async def cancel_order(self, id, symbol=None, params={}):
+        return self.parse_fake_order(await self.fetch2('order', 'private', 'DELETE', dict(params, id=id)))
+
+    async def fetch_open_orders(self, symbol=None, since=None, limit=None, params={}):
+        response: List[Dict] = await self.fetch2('openOrders', 'private', 'GET', dict(params, symbol=symbol))
+        return [self.parse_fake_order(order) for order in response]
@@ -0,0 +1,145 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from ccxt import ExchangeNotAvailable
+from nose.tools import assert_raises, assert_true, eq_
+
+from trading_platform.aws_utils.parameter_store_service import ParameterStoreService
+from trading_platform.core.test import data
+from trading_platform.exchanges.data.enums import exchange_ids
+from trading_platform.exchanges.data.enums.order_side import OrderSide
+from trading_platform.exchanges.data.enums.order_status import OrderStatus
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.order import Order
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.live import live_subclasses
+from trading_platform.exchanges.live.async_live_exchange_service import AsyncLiveExchangeService
+from trading_platform.exchanges.live.poloniex_live_service import AsyncCustomCcxtPoloniex, PoloniexLiveService
+from trading_platform.exchanges.test.fake_exchange_server import FakeExchangeClient, FakeExchangeServer
+from trading_platform.utils import http_utils
+from trading_platform.utils.circuit_breaker import circuit_breakers
+from trading_platform.utils.rate_limiter import rate_limiter
+
+
+class TestAsyncLiveExchangeService(unittest.TestCase):
+    tickers = {
+        'ETH/BTC': {'bid': .05, 'ask': .051, 'last': .0505, 'baseVolume': 100, 'quoteVolume': 5,
+                    'timestamp': 1527811200000},
+        'LTC/BTC': {'bid': .015, 'ask': .016, 'last': .0155, 'baseVolume': 200, 'quoteVolume': 3,
+                    'timestamp': 1527811200000},
+    }
+    balances = [
+        {'asset': 'BTC', 'free': '1.5', 'locked': '0.5'},
+        {'asset': 'ETH', 'free': '10', 'locked': '0'},
+    ]
+
+    def setUp(self):
+        circuit_breakers.reset()
+        rate_limiter.reset()
+
+    @staticmethod
+    def create_service(server: FakeExchangeServer) -> AsyncLiveExchangeService:
+        client: FakeExchangeClient = FakeExchangeClient({'urls': {'api': {'rest': server.url}}})
+        return AsyncLiveExchangeService('binance', exchange_ids.binance, client, None, None, FinancialData(.001), None)
+
+    @staticmethod
+    def create_order(order_side: OrderSide) -> Order:
+        return data.order(exchange_ids.binance, order_status=OrderStatus.pending, order_side=order_side,
+                          app_create_timestamp=1527811200, base='BTC', quote='ETH', exchange_order_id=None,
+                          amount=FinancialData(2), filled=FinancialData(0), remaining=FinancialData(2),
+                          price=FinancialData(.05))
+
+    def run_with_service(self, test_coroutine_function):
+        async def run():
+            async with FakeExchangeServer(tickers=self.tickers, balances=self.balances) as server:
+                async with self.create_service(server) as service:
+                    await test_coroutine_function(server, service)
+        asyncio.run(run())
+
+    def test_fetch_latest_tickers(self):
+        async def test(server, service):
+            tickers = await service.fetch_latest_tickers()
+            eq_(len(tickers), 2)
+            eq_(service.get_ticker('ETH_BTC').bid, FinancialData(.05))
+            eq_(service.get_ticker('LTC_BTC').ask, FinancialData(.016))
+        self.run_with_service(test)
+
+    def test_fetch_balances(self):
+        async def test(server, service):
+            balances = await service.fetch_balances()
+            eq_(balances['BTC'].free, FinancialData(1.5))
+            eq_(balances['BTC'].locked, FinancialData(.5))
+            eq_(service.get_balance('ETH').free, FinancialData(10))
+            eq_(service.get_balance('XRP').total, FinancialData(0))
+        self.run_with_service(test)
+
+    def test_order_lifecycle(self):
+        async def test(server, service):
+            order: Order = self.create_order(OrderSide.buy)
+            open_order: Order = await service.create_limit_buy_order(order)
+            eq_(open_order.order_status, OrderStatus.open)
+            eq_(server.orders_by_id[open_order.exchange_order_id]['clientOrderId'], order.order_id)
+
+            pair: Pair = Pair(base='BTC', quote='ETH')
+            open_orders = await service.fetch_open_orders(pair)
+            eq_(len(open_orders), 1)
+
+            server.fill_order(open_order.exchange_order_id)
+            filled_order: Order = await service.fetch_order(open_order.exchange_order_id, pair, None)
+            eq_(filled_order.order_status, OrderStatus.filled)
+            eq_(filled_order.filled, FinancialData(2))
+
+            sell_order: Order = await service.create_limit_sell_order(self.create_order(OrderSide.sell))
+            cancelled_order: Order = await service.cancel_order(sell_order)
+            eq_(cancelled_order.order_status, OrderStatus.cancelled)
+            eq_(len(await service.fetch_open_orders(pair)), 0)
+
+            with assert_raises(Exception):
+                await service.create_limit_sell_order(self.create_order(OrderSide.buy))
+        self.run_with_service(test)
+
+    def test_retry(self):
+        async def test(server, service):
+            server.failures_remaining = http_utils.MAX_RETRIES - 1
+            tickers = await service.fetch_latest_tickers()
+            eq_(len(tickers), 2)
+            eq_(server.requests.count('GET /tickers'), http_utils.MAX_RETRIES)
+
+            # Failures in a fresh window, so the circuit breaker doesn't open before the last retry
+            circuit_breakers.reset()
+            server.failures_remaining = http_utils.MAX_RETRIES
+            with assert_raises(ExchangeNotAvailable):
+                await service.fetch_latest_tickers()
+
+        with mock.patch.object(http_utils, 'SLEEP_SEC_BETWEEN_RETRIES', 0):
+            self.run_with_service(test)
+
+    def test_concurrent_requests(self):
+        """
+        Requests to several exchanges should be in flight at the same time on one event loop.
+        """
+        async def run():
+            async with FakeExchangeServer(tickers=self.tickers, balances=self.balances) as server:
+                services = [self.create_service(server) for _ in range(5)]
+                try:
+                    tickers_by_service = await asyncio.gather(
+                        *[service.fetch_latest_tickers() for service in services])
+                    balances_by_service = await asyncio.gather(*[service.fetch_balances() for service in services])
+                finally:
+                    await asyncio.gather(*[service.close() for service in services])
+            eq_([len(tickers) for tickers in tickers_by_service], [2] * 5)
+            eq_([balances['BTC'].total for balances in balances_by_service], [FinancialData(2)] * 5)
+        asyncio.run(run())
+
+    def test_instantiate_async_keeps_client_overrides(self):
+        async def run():
+            with mock.patch.object(ParameterStoreService, 'get_parameter', return_value={}):
+                services = live_subclasses.instantiate_async([PoloniexLiveService])
+            async with services[exchange_ids.poloniex] as service:
+                client = service.get_client()
+                # The nonce is in microseconds, like CustomCcxtPoloniex's, not ccxt's default milliseconds
+                assert_true(isinstance(client, AsyncCustomCcxtPoloniex))
+                assert_true(abs(client.nonce() - time.time() * 1000000) < 60 * 1000000)
+        asyncio.run(run())
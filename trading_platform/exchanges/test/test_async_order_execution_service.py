@@ -0,0 +1,170 @@
+import asyncio
+import threading
+import time
+import unittest
+from typing import Dict, List
+from unittest import mock
+from unittest.mock import MagicMock
+
+from nose.tools import assert_true, eq_
+
+from trading_platform.core.test import data
+from trading_platform.exchanges import async_order_execution_service
+from trading_platform.exchanges.async_order_execution_service import AsyncOrderExecutionService
+from trading_platform.exchanges.data.enums import exchange_ids
+from trading_platform.exchanges.data.enums.order_side import OrderSide
+from trading_platform.exchanges.data.enums.order_status import OrderStatus
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.order import Order
+from trading_platform.exchanges.live.async_live_exchange_service import AsyncLiveExchangeService
+from trading_platform.exchanges.test.fake_exchange_server import FakeExchangeClient, FakeExchangeServer
+from trading_platform.utils import http_utils
+from trading_platform.utils.circuit_breaker import CircuitBreakerRegistry
+from trading_platform.utils.rate_limiter import rate_limiter
+
+
+class TestAsyncOrderExecutionService(unittest.TestCase):
+    """
+    Places orders on FakeExchangeServers with a mock OrderDao, so no database is needed.
+    """
+    def setUp(self):
+        rate_limiter.reset()
+        self.circuit_breakers = CircuitBreakerRegistry()
+        self.saved_orders: List[Order] = []
+        self.writer_thread_names: List[str] = []
+        self.order_dao = MagicMock()
+        self.order_dao.save.side_effect = self.save
+
+    def save(self, popo=None, session=None, commit=False):
+        self.writer_thread_names.append(threading.current_thread().name)
+        self.saved_orders.append(popo)
+        return popo
+
+    @staticmethod
+    def create_order(exchange_id: int, order_side: OrderSide, price: float) -> Order:
+        return data.order(exchange_id, order_status=OrderStatus.pending, order_side=order_side,
+                          app_create_timestamp=1527811200, base='BTC', quote='ETH', exchange_order_id=None,
+                          amount=FinancialData(2), filled=FinancialData(0), remaining=FinancialData(2),
+                          price=FinancialData(price))
+
+    def run_with_exchanges(self, test_coroutine_function, **service_kwargs):
+        async def run():
+            async with FakeExchangeServer() as binance_server, FakeExchangeServer() as bittrex_server:
+                exchanges_by_id: Dict[int, AsyncLiveExchangeService] = {}
+                for exchange_name, exchange_id, server in [('binance', exchange_ids.binance, binance_server),
+                                                           ('bittrex', exchange_ids.bittrex, bittrex_server)]:
+                    client: FakeExchangeClient = FakeExchangeClient({'urls': {'api': {'rest': server.url}}})
+                    exchanges_by_id[exchange_id] = AsyncLiveExchangeService(exchange_name, exchange_id, client, None,
+                                                                            None, FinancialData(.001), None)
+                kwargs: Dict = {
+                    'logger': MagicMock(),
+                    'exchanges_by_id': exchanges_by_id,
+                    'order_dao': self.order_dao,
+                    'scoped_session_maker': MagicMock(),
+                    'num_order_status_checks': 3,
+                    'sleep_time_sec_between_order_checks': 0,
+                    'circuit_breakers': self.circuit_breakers,
+                }
+                kwargs.update(service_kwargs)
+                service: AsyncOrderExecutionService = AsyncOrderExecutionService(**kwargs)
+                try:
+                    await test_coroutine_function(service, {exchange_ids.binance: binance_server,
+                                                            exchange_ids.bittrex: bittrex_server})
+                finally:
+                    service.close()
+                    await asyncio.gather(*[exchange.close() for exchange in exchanges_by_id.values()])
+        asyncio.run(run())
+
+    def test_execute_order_set(self):
+        orders: List[Order] = [self.create_order(exchange_ids.binance, OrderSide.buy, .05),
+                               self.create_order(exchange_ids.binance, OrderSide.sell, .06),
+                               self.create_order(exchange_ids.bittrex, OrderSide.buy, .05)]
+
+        async def test(service, servers_by_exchange_id):
+            executed_orders: Dict[str, Order] = await service.execute_order_set(orders, write_pending_order=True,
+                                                                                check_if_orders_filled=False)
+            eq_(set(executed_orders), {order.order_id for order in orders})
+            eq_({order.order_status for order in executed_orders.values()}, {OrderStatus.open})
+            eq_(len(servers_by_exchange_id[exchange_ids.binance].orders_by_id), 2)
+            eq_(len(servers_by_exchange_id[exchange_ids.bittrex].orders_by_id), 1)
+
+            # Pending and open snapshots of each order were written, pending first, by the writer thread
+            eq_(len(self.saved_orders), 6)
+            for order in orders:
+                eq_([saved_order.order_status for saved_order in self.saved_orders
+                     if saved_order.order_id == order.order_id], [OrderStatus.pending, OrderStatus.open])
+            assert_true(threading.main_thread().name not in self.writer_thread_names)
+
+            for order in orders:
+                latency = service.latencies_by_order_id[order.order_id]
+                assert_true(latency.stage_seconds[async_order_execution_service.placement] > 0)
+                assert_true(async_order_execution_service.pending_write in latency.stage_seconds)
+                assert_true(async_order_execution_service.placed_write in latency.stage_seconds)
+        self.run_with_exchanges(test)
+
+    def test_writes_off_placement_path(self):
+        """
+        Slow database writes shouldn't delay placing orders.
+        """
+        def slow_save(popo=None, session=None, commit=False):
+            time.sleep(.2)
+            return self.save(popo=popo, session=session, commit=commit)
+        self.order_dao.save.side_effect = slow_save
+        order: Order = self.create_order(exchange_ids.binance, OrderSide.buy, .05)
+
+        async def test(service, servers_by_exchange_id):
+            start_time: float = time.perf_counter()
+            await service.execute_order(order, write_pending_order=True)
+            assert_true(time.perf_counter() - start_time < .2)
+            eq_(self.saved_orders, [])
+            await service.wait_for_writes()
+            eq_([saved_order.order_status for saved_order in self.saved_orders],
+                [OrderStatus.pending, OrderStatus.open])
+        self.run_with_exchanges(test)
+
+    def test_poll_open_orders(self):
+        orders: List[Order] = [self.create_order(exchange_ids.binance, OrderSide.buy, .05),
+                               self.create_order(exchange_ids.bittrex, OrderSide.buy, .05)]
+
+        async def test(service, servers_by_exchange_id):
+            original_fetch_order = service.fetch_order
+
+            async def fetch_order(order: Order):
+                # The binance order fills after its first status check
+                snapshot: Order = await original_fetch_order(order)
+                if order.exchange_id == exchange_ids.binance:
+                    servers_by_exchange_id[exchange_ids.binance].fill_order(order.exchange_order_id)
+                return snapshot
+            service.fetch_order = fetch_order
+
+            executed_orders: Dict[str, Order] = await service.execute_order_set(orders, write_pending_order=False,
+                                                                                check_if_orders_filled=True)
+            eq_(executed_orders[orders[0].order_id].order_status, OrderStatus.filled)
+            eq_(executed_orders[orders[1].order_id].order_status, OrderStatus.open)
+
+            binance_latency = service.latencies_by_order_id[orders[0].order_id]
+            eq_(binance_latency.status_checks, 2)
+            assert_true(async_order_execution_service.fill in binance_latency.stage_seconds)
+            assert_true(async_order_execution_service.filled_write in binance_latency.stage_seconds)
+            eq_(service.latencies_by_order_id[orders[1].order_id].status_checks, 3)
+            eq_([saved_order.order_status for saved_order in self.saved_orders].count(OrderStatus.filled), 1)
+        self.run_with_exchanges(test)
+
+    def test_failed_and_skipped_orders(self):
+        # Both fake exchange clients have the id 'fake', so this opens buy order circuits on both
+        self.circuit_breakers = CircuitBreakerRegistry(min_requests=1)
+        self.circuit_breakers.breaker('fake', 'create_limit_buy_order').record_failure()
+        orders: List[Order] = [self.create_order(exchange_ids.binance, OrderSide.buy, .05),
+                               self.create_order(exchange_ids.bittrex, OrderSide.sell, .05)]
+
+        async def test(service, servers_by_exchange_id):
+            servers_by_exchange_id[exchange_ids.bittrex].failures_remaining = 100
+            executed_orders: Dict[str, Order] = await service.execute_order_set(orders, write_pending_order=True,
+                                                                                check_if_orders_filled=False)
+            eq_(executed_orders, {})
+            # The buy order was skipped, and the sell order failed after its pending write
+            eq_(len(servers_by_exchange_id[exchange_ids.binance].requests), 0)
+            eq_([saved_order.order_id for saved_order in self.saved_orders], [orders[1].order_id])
+
+        with mock.patch.object(http_utils, 'SLEEP_SEC_BETWEEN_RETRIES', 0):
+            self.run_with_exchanges(test)
@@ -0,0 +1,76 @@
+import unittest
+from unittest.mock import MagicMock
+
+from nose.tools import assert_false, assert_true, eq_
+
+from trading_platform.exchanges.data.balance import Balance
+from trading_platform.exchanges.data.enums import exchange_ids
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.data.ticker import Ticker
+from trading_platform.exchanges.live import cached_exchange_service
+from trading_platform.exchanges.live.cached_exchange_service import CachedExchangeService
+
+
+class TestCachedExchangeService(unittest.TestCase):
+    def setUp(self):
+        self.pair = Pair(base='BTC', quote='ETH')
+        self.ticker = Ticker(base='BTC', quote='ETH', exchange_id=exchange_ids.binance, ask=FinancialData(2),
+                             bid=FinancialData(1), last=FinancialData(1.5), app_create_timestamp=1527811200.0,
+                             version=Ticker.current_version)
+        self.exchange_service = MagicMock()
+        self.exchange_service.exchange_id = exchange_ids.binance
+        self.exchange_service.fetch_latest_ticker.return_value = self.ticker
+        self.exchange_service.fetch_latest_tickers.return_value = [self.ticker]
+        self.exchange_service.fetch_balances.return_value = {'BTC': Balance.instance_with_zero_value_fields()}
+        self.exchange_service.load_markets.return_value = {'ETH/BTC': {}}
+        self.service = CachedExchangeService(self.exchange_service)
+
+    def test_hot_reads_served_from_memory(self):
+        eq_(self.service.fetch_latest_ticker(self.pair), self.ticker)
+        eq_(self.service.fetch_latest_ticker(self.pair), self.ticker)
+        eq_(self.exchange_service.fetch_latest_ticker.call_count, 1)
+
+        cached_ticker = self.service.fetch_latest_ticker_cached(self.pair)
+        assert_true(cached_ticker.from_cache)
+        assert_false(cached_ticker.stale)
+        eq_(cached_ticker.ttl_seconds, cached_exchange_service.default_ttl_seconds_by_data_type['ticker'])
+
+        self.service.load_markets()
+        self.service.load_markets()
+        eq_(self.exchange_service.load_markets.call_count, 1)
+
+    def test_freshness_budget(self):
+        self.service.fetch_balances()
+        # A zero second budget needs a new fetch
+        assert_false(self.service.fetch_balances_cached(max_age_seconds=0).from_cache)
+        eq_(self.exchange_service.fetch_balances.call_count, 2)
+
+    def test_tickers_fill_single_ticker_reads(self):
+        eq_(self.service.fetch_latest_tickers(), [self.ticker])
+        assert_true(self.service.fetch_latest_ticker_cached(self.pair).from_cache)
+        self.exchange_service.fetch_latest_ticker.assert_not_called()
+
+    def test_orders_invalidate_balances(self):
+        self.service.fetch_balances()
+        self.service.fetch_latest_ticker(self.pair)
+        order = MagicMock()
+        self.service.create_limit_buy_order(order)
+        self.exchange_service.create_limit_buy_order.assert_called_once_with(order, params={})
+
+        self.service.fetch_balances()
+        eq_(self.exchange_service.fetch_balances.call_count, 2)
+        # Tickers aren't changed by our orders
+        self.service.fetch_latest_ticker(self.pair)
+        eq_(self.exchange_service.fetch_latest_ticker.call_count, 1)
+
+        self.service.withdraw('BTC', FinancialData(1), 'address')
+        self.service.fetch_balances()
+        eq_(self.exchange_service.fetch_balances.call_count, 3)
+
+    def test_ttl_overrides_and_pass_through(self):
+        service = CachedExchangeService(self.exchange_service, ttl_seconds_by_data_type={'ticker': 0})
+        service.fetch_latest_ticker(self.pair)
+        service.fetch_latest_ticker(self.pair)
+        eq_(self.exchange_service.fetch_latest_ticker.call_count, 2)
+        eq_(service.exchange_id, exchange_ids.binance)
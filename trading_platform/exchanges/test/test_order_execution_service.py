@@ -3,13 +3,15 @@ from time import sleep
 import unittest
 from concurrent.futures import as_completed, Future
 from copy import copy
+from types import SimpleNamespace
 from logging import Logger
-from nose.tools import eq_, nottest
+from nose.tools import assert_raises, eq_, nottest
 from sqlalchemy.orm import Session
 from typing import Dict, Set, List, Tuple
 from unittest.mock import MagicMock
 
 from trading_platform.core.services.logging_service import LoggingService
+from trading_platform.core.test import data
 from trading_platform.core.test.util_methods import eq_ignore_certain_fields
 from trading_platform.exchanges.backtest import backtest_subclasses
 from trading_platform.exchanges.backtest.backtest_exchange_service import BacktestExchangeService
@@ -23,7 +25,9 @@ from trading_platform.exchanges.exchange_service_abc import ExchangeServiceAbc
 from trading_platform.exchanges.order_execution_service import OrderExecutionService
 from trading_platform.storage.daos.order_dao import OrderDao
 from trading_platform.storage.sql_alchemy_engine import SqlAlchemyEngine
+from trading_platform.utils.circuit_breaker import CircuitBreakerRegistry
 from trading_platform.utils.datetime_operations import utc_timestamp
+from trading_platform.utils.exceptions import CircuitOpenException
 
 
 class TestOrderExecutionService(unittest.TestCase):
@@ -419,3 +423,75 @@ class TestOrderExecutionService(unittest.TestCase):
             'USDT': FinancialData(1)
         })
         exchange.set_buy_price('{0}_{1}'.format(self.quote, self.base), self.quote_price)
+
+
+class TestOrderExecutionServiceCircuitBreaker(unittest.TestCase):
+    """
+    Uses exchange stubs with ccxt client ids and a mock OrderDao, so no database is needed.
+    """
+    def setUp(self):
+        self.circuit_breakers = CircuitBreakerRegistry(min_requests=1)
+        self.exchanges_by_id: Dict[int, MagicMock] = {}
+        for exchange_id, client_id in [(exchange_ids.binance, 'binance'), (exchange_ids.bittrex, 'bittrex')]:
+            exchange = MagicMock()
+            exchange.get_client.return_value = SimpleNamespace(id=client_id)
+            exchange.create_limit_buy_order.side_effect = lambda order, params: order
+            self.exchanges_by_id[exchange_id] = exchange
+        self.order_dao = MagicMock()
+        self.order_execution_service: OrderExecutionService = OrderExecutionService(**{
+            'logger': MagicMock(),
+            'exchanges_by_id': self.exchanges_by_id,
+            'order_dao': self.order_dao,
+            'multithreaded': False,
+            'num_order_status_checks': 3,
+            'scoped_session_maker': MagicMock(),
+            'sleep_time_sec_between_order_checks': 0,
+            'circuit_breakers': self.circuit_breakers,
+        })
+
+    @staticmethod
+    def buy_order(exchange_id: int) -> Order:
+        return data.order(exchange_id, order_status=OrderStatus.pending, quote='ETH', exchange_order_id=None,
+                          amount=FinancialData(5), filled=FinancialData(0), remaining=FinancialData(5),
+                          price=FinancialData(2))
+
+    def test_execute_order_fails_fast(self):
+        self.circuit_breakers.breaker('bittrex', 'create_limit_buy_order').record_failure()
+        with assert_raises(CircuitOpenException):
+            self.order_execution_service.execute_order(self.exchanges_by_id[exchange_ids.bittrex],
+                                                       self.buy_order(exchange_ids.bittrex), None,
+                                                       write_pending_order=True, check_if_order_filled=False)
+        # The pending order isn't written
+        self.order_dao.save.assert_not_called()
+
+    def test_execute_order_set_skips_open_circuits(self):
+        self.circuit_breakers.breaker('bittrex', 'create_limit_buy_order').record_failure()
+        binance_order: Order = self.buy_order(exchange_ids.binance)
+        executed_orders: Dict[str, Order] = self.order_execution_service.execute_order_set(
+            {binance_order, self.buy_order(exchange_ids.bittrex)}, write_pending_order=False,
+            check_if_orders_filled=False)
+        eq_(list(executed_orders), [binance_order.order_id])
+        self.exchanges_by_id[exchange_ids.bittrex].create_limit_buy_order.assert_not_called()
+
+    def test_execute_order_set_healthiest_first(self):
+        self.circuit_breakers = CircuitBreakerRegistry(min_requests=10)
+        self.order_execution_service.circuit_breakers = self.circuit_breakers
+        self.circuit_breakers.breaker('binance', 'fetch_order').record_success()
+        self.circuit_breakers.breaker('binance', 'fetch_order').record_failure()
+
+        executed_exchange_ids: List[int] = []
+        for exchange_id, exchange in self.exchanges_by_id.items():
+            exchange.create_limit_buy_order.side_effect = lambda order, params: executed_exchange_ids.append(
+                order.exchange_id) or order
+        self.order_execution_service.execute_order_set(
+            {self.buy_order(exchange_ids.binance), self.buy_order(exchange_ids.bittrex)}, write_pending_order=False,
+            check_if_orders_filled=False)
+        eq_(executed_exchange_ids, [exchange_ids.bittrex, exchange_ids.binance])
+
+    def test_poll_stops_when_circuit_opens(self):
+        exchange = self.exchanges_by_id[exchange_ids.binance]
+        exchange.fetch_order.side_effect = CircuitOpenException('open')
+        order: Order = self.buy_order(exchange_ids.binance)
+        eq_(self.order_execution_service.poll_exchange_for_order_status(exchange, OrderStatus.filled, None, order),
+            order)
+        eq_(exchange.fetch_order.call_count, 1)
@@ -0,0 +1,133 @@
+import unittest
+from typing import Dict, List
+from unittest.mock import MagicMock
+
+from nose.tools import assert_false, assert_true, eq_
+
+from trading_platform.core.test import data
+from trading_platform.exchanges.data.enums import exchange_ids
+from trading_platform.exchanges.data.enums.order_status import OrderStatus
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.order import Order
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.order_status_reconciler import OrderStatusEvent, OrderStatusReconciler
+
+
+class TestOrderStatusReconciler(unittest.TestCase):
+    """
+    Uses exchange stubs and a mock OrderDao, so no database is needed.
+    """
+    def setUp(self):
+        self.tracked_orders: List[Order] = []
+        self.order_dao = MagicMock()
+        self.order_dao.fetch_latest_with_order_statuses.side_effect = lambda session, order_statuses: \
+            [order for order in self.tracked_orders if order.order_status in order_statuses]
+        self.binance = MagicMock()
+        self.binance.fetch_open_orders.return_value = {}
+        self.bittrex = MagicMock()
+        self.bittrex.fetch_open_orders.return_value = {}
+        self.reconciler: OrderStatusReconciler = OrderStatusReconciler(**{
+            'logger': MagicMock(),
+            'exchanges_by_id': {exchange_ids.binance: self.binance, exchange_ids.bittrex: self.bittrex},
+            'order_dao': self.order_dao,
+            'scoped_session_maker': MagicMock(),
+        })
+        self.events: List[OrderStatusEvent] = []
+        self.reconciler.subscribe(self.events.append)
+
+    @staticmethod
+    def order(exchange_id: int, exchange_order_id: str, order_status: int = OrderStatus.open, quote: str = 'ETH',
+              filled: float = 0, price: float = .05) -> Order:
+        return data.order(exchange_id, order_status=order_status, strategy_execution_id='strategy',
+                          app_create_timestamp=1527811200, base='BTC', quote=quote,
+                          exchange_order_id=exchange_order_id, amount=FinancialData(2), filled=FinancialData(filled),
+                          remaining=FinancialData(2 - filled), price=FinancialData(price))
+
+    @staticmethod
+    def exchange_order(order: Order, order_status: int, filled: float) -> Order:
+        """
+        Returns: order as an exchange response would have it, without app metadata or the app order_id
+        """
+        return Order(exchange_id=order.exchange_id, exchange_order_id=order.exchange_order_id, order_id='exchange',
+                     base=order.base, quote=order.quote, order_status=order_status, amount=order.amount,
+                     filled=FinancialData(filled), remaining=order.amount - FinancialData(filled), price=order.price,
+                     order_side=order.order_side)
+
+    def test_one_fetch_open_orders_per_exchange_and_pair(self):
+        self.tracked_orders = [self.order(exchange_ids.binance, str(index), price=index + 1) for index in range(10)] + \
+            [self.order(exchange_ids.binance, '10', quote='LTC'), self.order(exchange_ids.bittrex, '11')]
+        self.binance.fetch_open_orders.side_effect = lambda pair: {
+            str(index): self.exchange_order(order, OrderStatus.open, 0)
+            for index, order in enumerate(self.tracked_orders) if order.quote == pair.quote and index < 10}
+        self.bittrex.fetch_open_orders.return_value = {'exchange': self.exchange_order(self.tracked_orders[-1],
+                                                                                        OrderStatus.open, 0)}
+        self.binance.fetch_order.return_value = None
+
+        eq_(self.reconciler.reconcile(), [])
+        eq_(self.reconciler.requests, {'fetch_open_orders': 3, 'fetch_order': 1})
+        eq_(sorted(call[0][0].name for call in self.binance.fetch_open_orders.call_args_list), ['ETH_BTC', 'LTC_BTC'])
+        # The LTC order isn't open any more, and isn't filled, so it's checked with fetch_order
+        self.binance.fetch_order.assert_called_once()
+        self.order_dao.bulk_save.assert_not_called()
+
+    def test_partial_fill_and_disappeared_orders(self):
+        partially_filled: Order = self.order(exchange_ids.binance, '1')
+        filled: Order = self.order(exchange_ids.binance, '2', order_status=OrderStatus.partially_filled, filled=2,
+                                   price=.06)
+        cancelled: Order = self.order(exchange_ids.binance, '3', price=.07)
+        self.tracked_orders = [partially_filled, filled, cancelled]
+        self.binance.fetch_open_orders.return_value = {
+            'exchange': self.exchange_order(partially_filled, OrderStatus.partially_filled, 1)}
+        self.binance.fetch_order.return_value = self.exchange_order(cancelled, OrderStatus.cancelled, 0)
+
+        events: List[OrderStatusEvent] = self.reconciler.reconcile()
+        events_by_order_id: Dict[str, OrderStatusEvent] = {event.order_id: event for event in events}
+        eq_(len(events), 3)
+
+        event: OrderStatusEvent = events_by_order_id[partially_filled.order_id]
+        eq_((event.previous_order_status, event.order_status), (OrderStatus.open, OrderStatus.partially_filled))
+        eq_(event.order.filled, FinancialData(1))
+        eq_(event.order.strategy_execution_id, 'strategy')
+        assert_true(event.inferred)
+
+        eq_(events_by_order_id[filled.order_id].order_status, OrderStatus.filled)
+        assert_true(events_by_order_id[filled.order_id].inferred)
+
+        eq_(events_by_order_id[cancelled.order_id].order_status, OrderStatus.cancelled)
+        assert_false(events_by_order_id[cancelled.order_id].inferred)
+        # Only the ambiguous order was fetched
+        self.binance.fetch_order.assert_called_once_with('3', pair=Pair(base='BTC', quote='ETH'), params=None)
+
+        # The new snapshots are written together, and published
+        self.order_dao.bulk_save.assert_called_once()
+        eq_([order.order_id for order in self.order_dao.bulk_save.call_args[1]['popos']],
+            [event.order_id for event in events])
+        eq_(self.events, events)
+
+    def test_pending_orders(self):
+        acknowledged: Order = self.order(exchange_ids.binance, None, order_status=OrderStatus.pending)
+        not_placed: Order = self.order(exchange_ids.bittrex, None, order_status=OrderStatus.pending)
+        self.tracked_orders = [acknowledged, not_placed]
+        exchange_order: Order = self.exchange_order(acknowledged, OrderStatus.open, 0)
+        exchange_order.exchange_order_id = '1'
+        self.binance.fetch_open_orders.return_value = {acknowledged.order_id: exchange_order}
+
+        events: List[OrderStatusEvent] = self.reconciler.reconcile()
+        eq_([(event.order_id, event.order_status) for event in events], [(acknowledged.order_id, OrderStatus.open)])
+        eq_(events[0].order.exchange_order_id, '1')
+        self.bittrex.fetch_order.assert_not_called()
+
+    def test_failures(self):
+        self.tracked_orders = [self.order(exchange_ids.binance, '1'), self.order(exchange_ids.bittrex, '2')]
+        # Orders aren't treated as closed when open orders can't be fetched
+        self.binance.fetch_open_orders.side_effect = Exception('unavailable')
+        self.bittrex.fetch_order.return_value = self.exchange_order(self.tracked_orders[1], OrderStatus.filled, 2)
+
+        def failing_subscriber(event):
+            raise Exception('failed')
+        self.reconciler.subscribers.insert(0, failing_subscriber)
+
+        events: List[OrderStatusEvent] = self.reconciler.reconcile()
+        eq_([event.order_status for event in events], [OrderStatus.filled])
+        self.binance.fetch_order.assert_not_called()
+        eq_(self.events, events)
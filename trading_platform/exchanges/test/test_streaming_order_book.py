@@ -0,0 +1,177 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from typing import List
+
+from nose.tools import assert_false, assert_is_none, assert_raises, assert_true, eq_
+
+from trading_platform.exchanges.data.enums import exchange_ids
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.pair import Pair
+from trading_platform.exchanges.data.ticker import Ticker
+from trading_platform.exchanges.streaming.depth_stream import DepthStream
+from trading_platform.exchanges.streaming.order_book import L2OrderBook
+from trading_platform.exchanges.streaming.replay_server import DepthReplayServer
+from trading_platform.utils.exceptions import SequenceGapException
+
+
+def depth_update(first_update_id: int, final_update_id: int, bids: List, asks: List, symbol: str = 'ETHBTC'):
+    return {'stream': '{0}@depth'.format(symbol.lower()),
+            'data': {'e': 'depthUpdate', 'E': 1527811200000 + final_update_id, 's': symbol, 'U': first_update_id,
+                     'u': final_update_id, 'b': bids, 'a': asks}}
+
+
+class TestL2OrderBook(unittest.TestCase):
+    def setUp(self):
+        self.order_book = L2OrderBook(exchange_ids.binance, Pair(base='BTC', quote='ETH'))
+        self.order_book.apply_snapshot([['0.050', '1'], ['0.049', '2']], [['0.051', '1'], ['0.052', '3']], 100)
+
+    def test_best_levels(self):
+        eq_(self.order_book.best_bid(), (FinancialData('0.050'), FinancialData(1)))
+        eq_(self.order_book.best_ask(), (FinancialData('0.051'), FinancialData(1)))
+
+        assert_true(self.order_book.apply_update(101, 102, [['0.050', '0'], ['0.0495', '4']], [['0.0505', '2']]))
+        eq_(self.order_book.best_bid(), (FinancialData('0.0495'), FinancialData(4)))
+        eq_(self.order_book.best_ask(), (FinancialData('0.0505'), FinancialData(2)))
+        eq_(self.order_book.last_update_id, 102)
+
+        bids, asks = self.order_book.depth(2)
+        eq_([price for price, amount in bids], [FinancialData('0.0495'), FinancialData('0.049')])
+        eq_([price for price, amount in asks], [FinancialData('0.0505'), FinancialData('0.051')])
+
+    def test_ticker(self):
+        ticker: Ticker = self.order_book.ticker()
+        eq_(ticker.bid, FinancialData('0.050'))
+        eq_(ticker.ask, FinancialData('0.051'))
+        eq_((ticker.base, ticker.quote, ticker.exchange_id), ('BTC', 'ETH', exchange_ids.binance))
+
+        self.order_book.apply_update(101, 101, [['0.050', '0'], ['0.049', '0']], [])
+        assert_is_none(self.order_book.ticker())
+
+    def test_sequence(self):
+        # Already included in the snapshot
+        assert_false(self.order_book.apply_update(90, 100, [['0.050', '0']], []))
+        eq_(self.order_book.best_bid()[0], FinancialData('0.050'))
+        # Overlapping the snapshot
+        assert_true(self.order_book.apply_update(95, 105, [], []))
+
+        with assert_raises(SequenceGapException):
+            self.order_book.apply_update(107, 108, [], [])
+        assert_false(self.order_book.synced)
+        assert_is_none(self.order_book.best_bid())
+        with assert_raises(SequenceGapException):
+            self.order_book.apply_update(109, 109, [], [])
+
+
+class TestDepthStream(unittest.TestCase):
+    def setUp(self):
+        self.pair = Pair(base='BTC', quote='ETH')
+        self.tickers: List[Ticker] = []
+        self.stream = DepthStream(exchange_ids.binance, 'ws://unused', 'http://unused', [self.pair],
+                                  on_ticker=self.tickers.append)
+
+    def test_buffers_until_snapshot(self):
+        self.stream.handle_message(depth_update(95, 100, [['0.048', '1']], []))
+        self.stream.handle_message(depth_update(101, 102, [['0.050', '3']], []))
+        eq_(self.tickers, [])
+
+        self.stream.apply_snapshot('ETHBTC', {'lastUpdateId': 100, 'bids': [['0.050', '1']], 'asks': [['0.051', '1']]})
+        order_book: L2OrderBook = self.stream.order_book(self.pair)
+        eq_(order_book.last_update_id, 102)
+        eq_(order_book.best_bid(), (FinancialData('0.050'), FinancialData(3)))
+        # The update already in the snapshot wasn't applied
+        assert_false(FinancialData('0.048') in order_book.bids)
+        eq_(len(self.tickers), 1)
+        eq_(self.stream.get_ticker(self.pair.name).bid, FinancialData('0.050'))
+
+        self.stream.handle_message(depth_update(103, 103, [], [['0.0505', '1']]))
+        eq_(self.tickers[-1].ask, FinancialData('0.0505'))
+
+    def test_gap_buffers_for_resync(self):
+        self.stream.apply_snapshot('ETHBTC', {'lastUpdateId': 100, 'bids': [['0.050', '1']], 'asks': [['0.051', '1']]})
+        self.stream.handle_message(depth_update(105, 106, [['0.0502', '1']], []))
+        assert_false(self.stream.order_book(self.pair).synced)
+        eq_(self.stream.resyncs, 1)
+        self.stream.handle_message(depth_update(107, 107, [], [['0.0508', '1']]))
+
+        self.stream.apply_snapshot('ETHBTC', {'lastUpdateId': 105, 'bids': [['0.050', '1']], 'asks': [['0.051', '1']]})
+        order_book: L2OrderBook = self.stream.order_book(self.pair)
+        eq_(order_book.last_update_id, 107)
+        eq_(order_book.best_bid()[0], FinancialData('0.0502'))
+        eq_(order_book.best_ask()[0], FinancialData('0.0508'))
+
+    def test_snapshot_older_than_buffered_updates(self):
+        """
+        A snapshot that's always older than the buffered updates is retried a limited number of times, and doesn't
+        keep run() from returning.
+        """
+        messages = [depth_update(150, 151, [['0.0501', '1']], [])]
+        snapshots = {'ETHBTC': [{'lastUpdateId': 100, 'bids': [['0.050', '1']], 'asks': [['0.051', '1']]}]}
+        self.stream.max_snapshot_attempts = 3
+        self.stream.snapshot_retry_seconds = .01
+
+        async def replay():
+            async with DepthReplayServer(messages, snapshots, snapshot_delay_seconds=.1) as server:
+                self.stream.websocket_url = server.websocket_url
+                self.stream.snapshot_url = server.snapshot_url
+                await asyncio.wait_for(self.stream.run(), timeout=5)
+                return server.snapshot_requests_by_symbol
+
+        snapshot_requests = asyncio.run(replay())
+        # Update 150 is buffered before the first snapshot arrives, and every snapshot is missing updates 101 to 149
+        eq_(snapshot_requests, {'ETHBTC': 3})
+        assert_false(self.stream.order_book(self.pair).synced)
+        eq_(self.stream.buffered_updates_by_symbol['ETHBTC'], [messages[0]['data']])
+
+    def test_replay(self):
+        """
+        Replays a recording with a gap, which is recovered from with a second snapshot from the replay server.
+        """
+        messages = [
+            depth_update(99, 101, [['0.0501', '1']], []),
+            depth_update(102, 103, [], [['0.0509', '2']]),
+            {'result': None, 'id': 1},
+            # Updates 104 to 109 were missed
+            depth_update(110, 111, [['0.0503', '1']], []),
+            depth_update(112, 112, [['0.0504', '1']], []),
+        ]
+        snapshots = {'ETHBTC': [
+            {'lastUpdateId': 100, 'bids': [['0.050', '1']], 'asks': [['0.051', '1']]},
+            {'lastUpdateId': 111, 'bids': [['0.0503', '1']], 'asks': [['0.0509', '2']]},
+        ]}
+        record_file, record_path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(record_file)
+        self.stream.record_path = record_path
+        self.addCleanup(os.remove, record_path)
+
+        async def replay():
+            async with DepthReplayServer(messages, snapshots, message_interval_seconds=.02) as server:
+                self.stream.websocket_url = server.websocket_url
+                self.stream.snapshot_url = server.snapshot_url
+                await self.stream.run()
+                return server.snapshot_requests_by_symbol
+
+        snapshot_requests = asyncio.run(replay())
+        eq_(snapshot_requests, {'ETHBTC': 2})
+        eq_(self.stream.resyncs, 1)
+        order_book: L2OrderBook = self.stream.order_book(self.pair)
+        eq_(order_book.last_update_id, 112)
+        eq_(order_book.best_bid()[0], FinancialData('0.0504'))
+        eq_(order_book.best_ask()[0], FinancialData('0.0509'))
+        eq_(self.tickers[-1].bid, FinancialData('0.0504'))
+
+        # The recording replays to the same book
+        with open(record_path) as record_file:
+            eq_([json.loads(line) for line in record_file], messages)
+        stream = DepthStream(exchange_ids.binance, 'ws://unused', 'http://unused', [self.pair])
+
+        async def replay_recording():
+            async with DepthReplayServer(record_path, snapshots) as server:
+                stream.websocket_url = server.websocket_url
+                stream.snapshot_url = server.snapshot_url
+                await stream.run()
+
+        asyncio.run(replay_recording())
+        eq_(stream.order_book(self.pair).best_bid()[0], FinancialData('0.0504'))
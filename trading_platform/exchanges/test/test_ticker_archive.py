@@ -0,0 +1,86 @@
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas
+from nose.tools import eq_, raises, assert_false, assert_is_none
+
+from trading_platform.analytics.profit_service import ProfitService
+from trading_platform.exchanges.backtest import backtest_subclasses
+from trading_platform.exchanges.data.enums import exchange_ids
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.ticker_archive import TickerArchive, write_ticker_archive, ticker_record_dtype
+
+
+class TestTickerArchive(unittest.TestCase):
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+        rows = []
+        # Rows are deliberately out of order.
+        for timestamp, btc_price in [(120.0, 6000.0), (0.0, 5000.0), (60.0, 5500.0)]:
+            rows.append({'app_create_timestamp': timestamp, 'exchange_id': exchange_ids.binance, 'base': 'USDT',
+                         'quote': 'BTC', 'bid': btc_price, 'ask': btc_price + 1, 'last': btc_price})
+            rows.append({'app_create_timestamp': timestamp, 'exchange_id': exchange_ids.bittrex, 'base': 'BTC',
+                         'quote': 'ETH', 'bid': .05, 'ask': .051, 'last': np.nan, 'base_volume': 10.0})
+        self.ticker_df = pandas.DataFrame(rows)
+        self.path = write_ticker_archive(self.ticker_df, os.path.join(self.working_dir, 'tickers'))
+        self.ticker_archive = TickerArchive(self.path)
+
+    def tearDown(self):
+        self.ticker_archive.close()
+        shutil.rmtree(self.working_dir)
+
+    def test_records(self):
+        eq_(len(self.ticker_archive), 6)
+        eq_(self.ticker_archive.records.dtype, ticker_record_dtype)
+        assert_false(self.ticker_archive.records.flags.writeable)
+        eq_(self.ticker_archive.timestamps.tolist(), [0.0, 0.0, 60.0, 60.0, 120.0, 120.0])
+        eq_(sorted(self.ticker_archive.pair_ids_by_name), ['BTC_USDT', 'ETH_BTC'])
+        eq_(os.path.getsize(self.path) % 8, 0)
+
+    def test_steps(self):
+        steps = list(self.ticker_archive.steps())
+        eq_([timestamp for timestamp, _ in steps], [0.0, 60.0, 120.0])
+
+        tickers_by_exchange = steps[1][1]
+        btc_ticker = tickers_by_exchange[exchange_ids.binance]['BTC_USDT']
+        eq_(btc_ticker.bid, FinancialData(5500))
+        eq_(btc_ticker.app_create_timestamp, 60.0)
+        eth_ticker = tickers_by_exchange[exchange_ids.bittrex]['ETH_BTC']
+        eq_(eth_ticker.base_volume, FinancialData(10))
+        assert_is_none(eth_ticker.last)
+        assert_is_none(btc_ticker.base_volume)
+
+    def test_latest_tickers(self):
+        tickers = self.ticker_archive.latest_tickers(90.0)
+        eq_(sorted(tickers), ['BTC_USDT', 'ETH_BTC'])
+        eq_(tickers['BTC_USDT'].bid, FinancialData(5500))
+
+        bittrex_tickers = self.ticker_archive.latest_tickers(90.0, exchange_id=exchange_ids.bittrex)
+        eq_(list(bittrex_tickers), ['ETH_BTC'])
+        eq_(self.ticker_archive.latest_tickers(-1.0), {})
+
+    def test_profit_summary_from_archive(self):
+        exchanges_by_id = backtest_subclasses.instantiate()
+        exchanges_by_id[exchange_ids.binance].deposit_immediately('BTC', FinancialData(1))
+        profit_service = ProfitService(exchanges_by_id=exchanges_by_id,
+                                       initial_datetime=datetime.datetime.utcfromtimestamp(0),
+                                       initial_tickers=self.ticker_archive.latest_tickers(0.0))
+        summary = profit_service.profit_summary_from_archive(self.ticker_archive, 120.0)
+        eq_(summary['gross_profits'], FinancialData(1000))
+        eq_(summary['summary_datetime'], datetime.datetime.utcfromtimestamp(120))
+
+    def test_shared_between_instances(self):
+        other_archive = TickerArchive(self.path)
+        eq_(other_archive.records.tobytes(), self.ticker_archive.records.tobytes())
+        other_archive.close()
+
+    @raises(ValueError)
+    def test_not_an_archive(self):
+        path = os.path.join(self.working_dir, 'not_tickers')
+        with open(path, 'wb') as fileobj:
+            fileobj.write(b'\0' * 64)
+        TickerArchive(path)
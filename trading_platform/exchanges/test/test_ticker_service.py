@@ -1,14 +1,19 @@
 import csv
+import time
 import unittest
 from collections import defaultdict
+from types import SimpleNamespace
+from unittest.mock import MagicMock
 
-from nose.tools import assert_greater, eq_
+from nose.tools import assert_false, assert_greater, assert_less, assert_true, eq_
 
 from trading_platform.exchanges.data.enums import exchange_ids
+from trading_platform.exchanges.data.financial_data import FinancialData
 from trading_platform.exchanges.data.ticker import Ticker
 from trading_platform.exchanges.data.utils import check_required_fields
 from trading_platform.exchanges.live import live_subclasses
 from trading_platform.exchanges.ticker_service import TickerService
+from trading_platform.utils.circuit_breaker import CircuitBreakerRegistry
 
 
 class TestTickerService(unittest.TestCase):
@@ -66,3 +71,69 @@ class TestTickerService(unittest.TestCase):
         if int(ticker.version) >= ticker.first_version_with_volume_fields:
             for field in volume_fields_to_check:
                 assert (getattr(ticker, field) is not None)
+
+
+class ExchangeServiceStub:
+    def __init__(self, exchange_id, delay_seconds=0, error=None, client=None):
+        self.exchange_id = exchange_id
+        self.delay_seconds = delay_seconds
+        self.error = error
+        self.client = client
+
+    def get_client(self):
+        return self.client
+
+    def fetch_latest_tickers(self):
+        time.sleep(self.delay_seconds)
+        if self.error is not None:
+            raise self.error
+        return [Ticker(base='BTC', quote='ETH', exchange_id=self.exchange_id, ask=FinancialData(2),
+                       bid=FinancialData(1), last=FinancialData(1.5), app_create_timestamp=1527811200.0,
+                       version=Ticker.current_version)]
+
+
+class TestTickerServiceConcurrentFetch(unittest.TestCase):
+    def test_fetch_concurrently(self):
+        exchange_services = {exchange_id: ExchangeServiceStub(exchange_id, delay_seconds=.2) for exchange_id in
+                             [exchange_ids.binance, exchange_ids.bittrex, exchange_ids.kraken]}
+        start = time.time()
+        result = TickerService.fetch_latest_tickers_concurrently(exchange_services, timeout_seconds=5)
+        # The exchanges are fetched at the same time
+        assert_less(time.time() - start, .5)
+        assert_true(result.complete)
+        eq_(sorted(ticker.exchange_id for ticker in result.tickers), sorted(exchange_services))
+        for latency_seconds in result.latency_seconds_by_exchange_id.values():
+            assert_greater(latency_seconds, .15)
+
+    def test_partial_results(self):
+        exchange_services = {
+            exchange_ids.binance: ExchangeServiceStub(exchange_ids.binance),
+            exchange_ids.bittrex: ExchangeServiceStub(exchange_ids.bittrex, error=ValueError('exchange down')),
+            exchange_ids.kraken: ExchangeServiceStub(exchange_ids.kraken, delay_seconds=2),
+        }
+        start = time.time()
+        result = TickerService.fetch_latest_tickers_concurrently(exchange_services, timeout_seconds=.3)
+        # A slow exchange doesn't delay the result past the timeout
+        assert_less(time.time() - start, 1)
+        assert_false(result.complete)
+        eq_([ticker.exchange_id for ticker in result.tickers], [exchange_ids.binance])
+        eq_(list(result.errors_by_exchange_id), [exchange_ids.bittrex])
+        assert_true('exchange down' in result.errors_by_exchange_id[exchange_ids.bittrex])
+        eq_(result.timed_out_exchange_ids, [exchange_ids.kraken])
+        eq_(result.latency_seconds_by_exchange_id[exchange_ids.kraken], .3)
+
+    def test_skips_open_circuit(self):
+        breakers = CircuitBreakerRegistry(min_requests=1)
+        breakers.breaker('kraken', 'fetch_tickers').record_failure()
+        kraken = ExchangeServiceStub(exchange_ids.kraken, client=SimpleNamespace(id='kraken'))
+        exchange_services = {
+            exchange_ids.binance: ExchangeServiceStub(exchange_ids.binance, client=SimpleNamespace(id='binance')),
+            exchange_ids.kraken: kraken,
+        }
+        kraken.fetch_latest_tickers = MagicMock()
+        result = TickerService.fetch_latest_tickers_concurrently(exchange_services, timeout_seconds=5,
+                                                                 breakers=breakers)
+        assert_false(result.complete)
+        eq_(result.skipped_exchange_ids, [exchange_ids.kraken])
+        eq_([ticker.exchange_id for ticker in result.tickers], [exchange_ids.binance])
+        kraken.fetch_latest_tickers.assert_not_called()
@@ -0,0 +1,83 @@
+import copy
+import pickle
+import unittest
+
+import numpy as np
+import pandas
+from nose.tools import eq_, assert_is_none, assert_raises, assert_true
+
+from trading_platform.exchanges.backtest import backtest_subclasses
+from trading_platform.exchanges.data.enums import exchange_ids
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.ticker import Ticker
+from trading_platform.exchanges.ticker_service import TickerService
+from trading_platform.exchanges.ticker_store import TickerStore
+
+
+class TestTickerStore(unittest.TestCase):
+    def setUp(self):
+        rows = []
+        # Rows are deliberately out of order.
+        for timestamp in [30.0, 10.0, 20.0]:
+            for exchange_id in [exchange_ids.bittrex, exchange_ids.binance]:
+                rows.append({'app_create_timestamp': timestamp, 'exchange_id': exchange_id, 'base': 'BTC',
+                             'quote': 'ETH', 'bid': timestamp / 1000, 'ask': timestamp / 1000 + .001,
+                             'last': timestamp / 1000, 'version': Ticker.current_version})
+        rows.append({'app_create_timestamp': 15.0, 'exchange_id': exchange_ids.binance, 'base': 'USDT',
+                     'quote': 'BTC', 'bid': 6000.0, 'ask': 6001.0, 'last': np.nan, 'version': Ticker.current_version})
+        self.ticker_df = pandas.DataFrame(rows)
+        self.ticker_store = TickerStore(self.ticker_df)
+
+    def test_latest_ticker(self):
+        ticker = self.ticker_store.latest_ticker(exchange_ids.binance, 'ETH_BTC', 25.0)
+        eq_(ticker.app_create_timestamp, 20.0)
+        eq_(ticker.bid, .02)
+        eq_(ticker.base, 'BTC')
+        eq_(ticker.exchange_id, exchange_ids.binance)
+        eq_(ticker.pair_name, 'ETH_BTC')
+
+        eq_(self.ticker_store.latest_ticker(exchange_ids.binance, 'ETH_BTC', 20.0).app_create_timestamp, 20.0)
+        assert_is_none(self.ticker_store.latest_ticker(exchange_ids.binance, 'ETH_BTC', 9.0))
+        assert_is_none(self.ticker_store.latest_ticker(exchange_ids.binance, 'XLM_BTC', 25.0))
+
+    def test_latest_tickers(self):
+        tickers = self.ticker_store.latest_tickers(exchange_ids.binance, 15.0)
+        eq_(sorted(tickers), ['BTC_USDT', 'ETH_BTC'])
+        eq_(tickers['ETH_BTC'].app_create_timestamp, 10.0)
+        assert_is_none(tickers['BTC_USDT'].last)
+        eq_(list(self.ticker_store.latest_tickers(exchange_ids.binance, 12.0)), ['ETH_BTC'])
+
+    def test_tickers_between(self):
+        pair_range = self.ticker_store.tickers_between(10.0, 30.0, exchange_id=exchange_ids.bittrex,
+                                                       pair_name='ETH_BTC')
+        eq_(len(pair_range), 2)
+        eq_(pair_range.column('app_create_timestamp').tolist(), [10.0, 20.0])
+        # Single pair ranges are views of the store's arrays
+        assert_true(pair_range.column('bid').base is not None)
+        eq_(pair_range[-1].app_create_timestamp, 20.0)
+
+        all_range = self.ticker_store.tickers_between(10.0, 20.0)
+        eq_(len(all_range), 3)
+        eq_([ticker.app_create_timestamp for ticker in all_range], [10.0, 10.0, 15.0])
+
+        eq_(len(self.ticker_store.tickers_between(10.0, 31.0, exchange_id=exchange_ids.binance)), 4)
+        eq_(len(self.ticker_store.tickers_between(40.0, 50.0)), 0)
+
+    def test_to_ticker(self):
+        ticker = self.ticker_store.latest_ticker(exchange_ids.binance, 'ETH_BTC', 30.0).to_ticker()
+        assert_true(isinstance(ticker, Ticker))
+        eq_(ticker.bid, FinancialData(.03))
+        eq_(ticker.quote, 'ETH')
+
+    def test_copy_and_pickle(self):
+        ticker = self.ticker_store.latest_ticker(exchange_ids.binance, 'ETH_BTC', 30.0)
+        eq_(copy.copy(ticker), ticker)
+        eq_(pickle.loads(pickle.dumps(ticker)).to_dict(), ticker.to_dict())
+        with assert_raises(AttributeError):
+            ticker.bid = .04
+
+    def test_set_latest_tickers_from_store(self):
+        exchanges_by_id = backtest_subclasses.instantiate()
+        TickerService.set_latest_tickers_from_store(exchanges_by_id, self.ticker_store, 20.0)
+        eq_(exchanges_by_id[exchange_ids.bittrex].get_ticker('ETH_BTC').bid, .02)
+        eq_(exchanges_by_id[exchange_ids.binance].get_ticker('BTC_USDT').ask, 6001.0)
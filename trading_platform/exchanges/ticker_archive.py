@@ -0,0 +1,212 @@
+"""
+Binary ticker archive that is memory-mapped and read as a numpy structured array, so any number of backtest processes
+can replay the same history from one copy in the OS page cache, without reading or parsing it.
+
+File layout, little-endian:
+    header: magic (8 bytes), format version (uint32), number of pairs (uint32), number of records (uint64), length of
+        the pair dictionary in bytes (uint64)
+    pair dictionary: utf-8 JSON list of [base, quote], padded with spaces to a multiple of 8 bytes. A record's pair_id
+        is an index into this list.
+    records: fixed-size ticker_record_dtype records, sorted by app_create_timestamp
+
+Numerical fields are stored as float64, like the csv and parquet ticker files. Missing values are NaN.
+"""
+import json
+import mmap
+import struct
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas
+
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.pair import Pair, pair_registry
+from trading_platform.exchanges.data.ticker import Ticker
+
+ticker_archive_magic: bytes = b'TICKARCH'
+ticker_archive_format_version: int = 1
+ticker_archive_header: struct.Struct = struct.Struct('<8sIIQQ')
+# Record and pair dictionary alignment
+alignment: int = 8
+
+ticker_record_dtype: np.dtype = np.dtype([
+    ('app_create_timestamp', '<f8'),
+    ('bid', '<f8'),
+    ('ask', '<f8'),
+    ('last', '<f8'),
+    ('base_volume', '<f8'),
+    ('quote_volume', '<f8'),
+    ('pair_id', '<i4'),
+    ('exchange_id', '<i4'),
+])
+ticker_record_float_fields: List[str] = ['bid', 'ask', 'last', 'base_volume', 'quote_volume']
+pair_id_position: int = ticker_record_dtype.names.index('pair_id')
+
+
+def write_ticker_archive(ticker_df: pandas.DataFrame, dest_path: str) -> str:
+    """
+    Args:
+        ticker_df: tickers with at least the app_create_timestamp, exchange_id, base, quote, bid, and ask columns,
+            with app_create_timestamp as a float, in any order.
+        dest_path:
+
+    Returns: dest_path
+    """
+    sorted_df: pandas.DataFrame = ticker_df.sort_values('app_create_timestamp', kind='mergesort')
+    pair_codes, pair_uniques = pandas.MultiIndex.from_arrays(
+        [sorted_df['base'].astype(str), sorted_df['quote'].astype(str)]).factorize()
+    pairs: List[List[str]] = [[base, quote] for base, quote in pair_uniques]
+
+    records: np.ndarray = np.zeros(len(sorted_df), dtype=ticker_record_dtype)
+    records['app_create_timestamp'] = sorted_df['app_create_timestamp'].values
+    records['exchange_id'] = sorted_df['exchange_id'].values
+    records['pair_id'] = pair_codes
+    for field in ticker_record_float_fields:
+        records[field] = pandas.to_numeric(sorted_df[field]).values if field in sorted_df.columns else np.nan
+
+    pair_dictionary: bytes = json.dumps(pairs).encode('utf-8')
+    pair_dictionary += b' ' * (-len(pair_dictionary) % alignment)
+    with open(dest_path, 'wb') as fileobj:
+        fileobj.write(ticker_archive_header.pack(ticker_archive_magic, ticker_archive_format_version, len(pairs),
+                                                 len(records), len(pair_dictionary)))
+        fileobj.write(pair_dictionary)
+        fileobj.write(records.tobytes())
+    return dest_path
+
+
+class TickerArchive:
+    """
+    Read-only view of a file written by write_ticker_archive().
+
+    Example usage:
+        with TickerArchive(path) as ticker_archive:
+            for timestamp, tickers_by_exchange in ticker_archive.steps():
+                ...
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as fileobj:
+            # The mapping stays valid after the file is closed.
+            self.mmap: mmap.mmap = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, format_version, num_pairs, num_records, pair_dictionary_length = ticker_archive_header.unpack_from(
+            self.mmap, 0)
+        if magic != ticker_archive_magic:
+            raise ValueError('{0} is not a ticker archive'.format(path))
+        if format_version != ticker_archive_format_version:
+            raise ValueError('Unsupported ticker archive format version {0}'.format(format_version))
+
+        pair_dictionary_start: int = ticker_archive_header.size
+        records_start: int = pair_dictionary_start + pair_dictionary_length
+        self.pairs: List[Pair] = [pair_registry.get(base=base, quote=quote) for base, quote in json.loads(
+            self.mmap[pair_dictionary_start:records_start].decode('utf-8'))]
+        if len(self.pairs) != num_pairs:
+            raise ValueError('Corrupt pair dictionary in {0}'.format(path))
+        self.pair_ids_by_name: Dict[str, int] = {pair.name: pair_id for pair_id, pair in enumerate(self.pairs)}
+
+        # Zero-copy and read-only, because the mmap is read-only.
+        self.records: np.ndarray = np.frombuffer(self.mmap, dtype=ticker_record_dtype, count=num_records,
+                                                 offset=records_start)
+        self.timestamps: np.ndarray = self.records['app_create_timestamp']
+
+    def __len__(self):
+        return len(self.records)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        # numpy views of the mmap have to be released before it can be closed.
+        self.records = None
+        self.timestamps = None
+        self.mmap.close()
+
+    def step_bounds(self) -> List[Tuple[int, int]]:
+        """
+        Returns: (start, stop) record offsets of each distinct app_create_timestamp, in time order
+        """
+        boundaries: np.ndarray = np.flatnonzero(np.diff(self.timestamps)) + 1
+        starts: np.ndarray = np.concatenate([[0], boundaries]) if len(self.records) else np.array([], dtype=np.int64)
+        stops: np.ndarray = np.append(boundaries, len(self.records)) if len(self.records) else starts
+        return list(zip(starts.tolist(), stops.tolist()))
+
+    def steps(self):
+        """
+        Yields: (timestamp, tickers by pair name by exchange id) for each distinct app_create_timestamp
+        """
+        for start, stop in self.step_bounds():
+            yield float(self.timestamps[start]), self.tickers_by_exchange(start, stop)
+
+    def tickers_by_exchange(self, start: int, stop: int) -> Dict[int, Dict[str, Ticker]]:
+        """
+        Returns: Tickers for records[start:stop], by pair name by exchange id. If a pair has several records for an
+            exchange, the last one is used.
+        """
+        tickers_by_exchange: Dict[int, Dict[str, Ticker]] = {}
+        for record in self.records[start:stop].tolist():
+            ticker: Ticker = self.ticker_from_record(record)
+            tickers_by_exchange.setdefault(ticker.exchange_id, {})[self.pairs[record[pair_id_position]].name] = ticker
+        return tickers_by_exchange
+
+    def tickers(self, start_timestamp: Optional[float] = None, end_timestamp: Optional[float] = None,
+                batch_size: int = 10000):
+        """
+        Yields: Tickers with start_timestamp <= app_create_timestamp < end_timestamp, in time order. Records are
+            converted batch_size at a time, so memory use doesn't depend on the size of the range.
+        """
+        start: int = 0 if start_timestamp is None else int(np.searchsorted(self.timestamps, start_timestamp,
+                                                                           side='left'))
+        stop: int = len(self.records) if end_timestamp is None else int(np.searchsorted(self.timestamps, end_timestamp,
+                                                                                        side='left'))
+        for batch_start in range(start, stop, batch_size):
+            for record in self.records[batch_start:min(batch_start + batch_size, stop)].tolist():
+                yield self.ticker_from_record(record)
+
+    def ticker_from_record(self, record: Tuple) -> Ticker:
+        app_create_timestamp, bid, ask, last, base_volume, quote_volume, pair_id, exchange_id = record
+        pair: Pair = self.pairs[pair_id]
+        return Ticker(**{
+            'ask': FinancialData(ask) if ask == ask else None,
+            'bid': FinancialData(bid) if bid == bid else None,
+            'last': FinancialData(last) if last == last else None,
+            'base_volume': FinancialData(base_volume) if base_volume == base_volume else None,
+            'quote_volume': FinancialData(quote_volume) if quote_volume == quote_volume else None,
+
+            'base': pair.base,
+            'quote': pair.quote,
+            'exchange_id': exchange_id,
+            'app_create_timestamp': app_create_timestamp
+        })
+
+    def latest_tickers(self, timestamp: float, exchange_id: Optional[int] = None) -> Dict[str, Ticker]:
+        """
+        Latest ticker for each pair as of timestamp, in the format used by ProfitService.
+
+        Args:
+            timestamp: records with app_create_timestamp <= timestamp are used
+            exchange_id: if None, tickers from all exchanges are merged, and the latest ticker for a pair on any
+                exchange is used, like ProfitService assumes.
+
+        Returns: Tickers by pair name
+        """
+        stop: int = int(np.searchsorted(self.timestamps, timestamp, side='right'))
+        records: np.ndarray = self.records[:stop]
+        record_indexes: np.ndarray = np.arange(stop)
+        if exchange_id is not None:
+            is_exchange: np.ndarray = records['exchange_id'] == exchange_id
+            records = records[is_exchange]
+            record_indexes = record_indexes[is_exchange]
+
+        # Index of the last record for each pair_id
+        reversed_pair_ids: np.ndarray = records['pair_id'][::-1]
+        _, reversed_positions = np.unique(reversed_pair_ids, return_index=True)
+        latest_indexes: np.ndarray = np.sort(record_indexes[len(records) - 1 - reversed_positions])
+
+        tickers: Dict[str, Ticker] = {}
+        for index in latest_indexes.tolist():
+            for exchange_tickers in self.tickers_by_exchange(index, index + 1).values():
+                tickers.update(exchange_tickers)
+        return tickers
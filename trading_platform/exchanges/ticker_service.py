@@ -1,8 +1,10 @@
 import itertools
 import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 
 import pandas
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 from trading_platform.aws_utils.s3_operations import write_tickers
 from trading_platform.exchanges.backtest.backtest_exchange_service import BacktestExchangeService
@@ -10,14 +12,47 @@ from trading_platform.exchanges.data.financial_data import FinancialData
 from trading_platform.exchanges.data.pair import Pair
 from trading_platform.exchanges.data.ticker import Ticker
 from trading_platform.exchanges.exchange_service_abc import ExchangeServiceAbc
+from trading_platform.exchanges.ticker_store import TickerStore
 from trading_platform.properties import env_properties
+from trading_platform.utils.circuit_breaker import CircuitBreakerRegistry, circuit_breakers
 from trading_platform.utils.logging import print_if_debug_enabled
 
 
+class TickerFetchResult:
+    """
+    Tickers fetched from several exchanges concurrently. Exchanges that failed or timed out have no tickers in the
+    result.
+    """
+    def __init__(self, tickers: List[Ticker], latency_seconds_by_exchange_id: Dict[int, float],
+                 errors_by_exchange_id: Dict[int, str], timed_out_exchange_ids: List[int],
+                 skipped_exchange_ids: Optional[List[int]] = None):
+        """
+        Args:
+            tickers: tickers of the exchanges that responded in time
+            latency_seconds_by_exchange_id: time taken to fetch each exchange's tickers. The timeout for exchanges that
+                timed out.
+            errors_by_exchange_id: traceback of each exchange whose fetch raised an exception
+            timed_out_exchange_ids:
+            skipped_exchange_ids: exchanges that weren't fetched because their circuit breaker was open
+        """
+        self.tickers = tickers
+        self.latency_seconds_by_exchange_id = latency_seconds_by_exchange_id
+        self.errors_by_exchange_id = errors_by_exchange_id
+        self.timed_out_exchange_ids = timed_out_exchange_ids
+        self.skipped_exchange_ids = skipped_exchange_ids if skipped_exchange_ids is not None else []
+
+    @property
+    def complete(self) -> bool:
+        return len(self.errors_by_exchange_id) == 0 and len(self.timed_out_exchange_ids) == 0 and \
+            len(self.skipped_exchange_ids) == 0
+
+
 class TickerService:
     """
     Fetch and save tickers for all exchanges
     """
+    # Seconds to wait for each exchange when fetching concurrently
+    fetch_timeout_seconds: float = 20
 
     def run_ticker_service(self, debug, exchange_services):
         print_if_debug_enabled(debug, 'start fetch_latest_tickers')
@@ -55,23 +90,97 @@ class TickerService:
 
         def fetch_for_exchange(exchange_service):
             tickers_list: List[Ticker] = exchange_service.fetch_latest_tickers()
-            if tickers_list is not None:
-                return tickers_list
+            return tickers_list if tickers_list is not None else []
 
         # flatten lists of tickers for each exchange
         return list(itertools.chain.from_iterable(map(fetch_for_exchange, exchange_services.values())))
 
     @staticmethod
-    def fetch_latest_tickers_and_save(exchange_services):
+    def fetch_latest_tickers_concurrently(exchange_services: Dict[int, ExchangeServiceAbc],
+                                          timeout_seconds: Optional[float] = None,
+                                          breakers: Optional[CircuitBreakerRegistry] = None) -> TickerFetchResult:
         """
-        Fetches latest tickers from exchanges and saves to the database.
+        Fetches the tickers of every exchange at the same time, so the wall time is the latency of the slowest exchange
+        rather than the sum of the latencies. Exchanges that raise an exception or don't respond within timeout_seconds
+        are left out of the result instead of failing the whole fetch. Their requests aren't cancelled, but the result
+        doesn't wait for them. Exchanges whose fetch_tickers circuit breaker is open are skipped without a request.
+
         Args:
             exchange_services:
-            ticker_dao:
-            session:
-        Returns session, list: tickers saved to s3
+            timeout_seconds: defaults to TickerService.fetch_timeout_seconds
+            breakers: defaults to the shared circuit_breakers
+
+        Returns:
         """
-        tickers_list = TickerService.fetch_latest_tickers(exchange_services)
+        timeout_seconds = timeout_seconds if timeout_seconds is not None else TickerService.fetch_timeout_seconds
+        breakers = breakers if breakers is not None else circuit_breakers
+
+        skipped_exchange_ids: List[int] = [
+            exchange_id for exchange_id, exchange_service in exchange_services.items() if
+            not breakers.exchange_service_allows_requests(exchange_service, 'fetch_tickers')]
+        if len(skipped_exchange_ids) > 0:
+            print('Skipping tickers for exchanges with open circuit breakers: {0}'.format(skipped_exchange_ids))
+            exchange_services = {exchange_id: exchange_service for exchange_id, exchange_service in
+                                 exchange_services.items() if exchange_id not in skipped_exchange_ids}
+        if len(exchange_services) == 0:
+            return TickerFetchResult([], {}, {}, [], skipped_exchange_ids)
+
+        def fetch_for_exchange(exchange_service):
+            start: float = time.time()
+            try:
+                tickers_list: List[Ticker] = exchange_service.fetch_latest_tickers()
+                return tickers_list if tickers_list is not None else [], time.time() - start, None
+            except Exception:
+                return [], time.time() - start, traceback.format_exc()
+
+        executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=len(exchange_services))
+        try:
+            futures_by_exchange_id: Dict[int, Future] = {
+                exchange_id: executor.submit(fetch_for_exchange, exchange_service) for exchange_id, exchange_service in
+                exchange_services.items()}
+            wait(futures_by_exchange_id.values(), timeout=timeout_seconds)
+        finally:
+            executor.shutdown(wait=False)
+
+        tickers: List[Ticker] = []
+        latency_seconds_by_exchange_id: Dict[int, float] = {}
+        errors_by_exchange_id: Dict[int, str] = {}
+        timed_out_exchange_ids: List[int] = []
+        for exchange_id, future in futures_by_exchange_id.items():
+            if not future.done():
+                future.cancel()
+                timed_out_exchange_ids.append(exchange_id)
+                latency_seconds_by_exchange_id[exchange_id] = timeout_seconds
+                print('Timed out fetching tickers for exchange {0}'.format(exchange_id))
+                continue
+
+            tickers_list, latency_seconds, error = future.result()
+            latency_seconds_by_exchange_id[exchange_id] = latency_seconds
+            if error is None:
+                tickers.extend(tickers_list)
+            else:
+                errors_by_exchange_id[exchange_id] = error
+                print('Exception fetching tickers for exchange {0}'.format(exchange_id))
+                print(error)
+
+        return TickerFetchResult(tickers, latency_seconds_by_exchange_id, errors_by_exchange_id,
+                                 timed_out_exchange_ids, skipped_exchange_ids)
+
+    @staticmethod
+    def fetch_latest_tickers_and_save(exchange_services, timeout_seconds: Optional[float] = None):
+        """
+        Fetches latest tickers from exchanges concurrently and saves them to s3. Exchanges that fail or time out are
+        left out.
+        Args:
+            exchange_services:
+            timeout_seconds: see fetch_latest_tickers_concurrently()
+        Returns str, list: filepath, tickers saved to s3
+        """
+        fetch_result: TickerFetchResult = TickerService.fetch_latest_tickers_concurrently(exchange_services,
+                                                                                         timeout_seconds)
+        print('ticker fetch latency in seconds by exchange id: {0}'.format(
+            fetch_result.latency_seconds_by_exchange_id))
+        tickers_list = fetch_result.tickers
         filepath = write_tickers(env_properties.EnvProperties.env == 'prod', env_properties.S3.output_bucket,
                                  tickers_list)
         return filepath, tickers_list
@@ -84,6 +193,21 @@ class TickerService:
                                           tickers_for_exchange.to_dict(orient='records')}
             exchange.set_tickers(tickers)
 
+    @staticmethod
+    def set_latest_tickers_from_store(exchange_services: Dict[int, BacktestExchangeService], ticker_store: TickerStore,
+                                      timestamp: float):
+        """
+        Like set_latest_tickers_from_file(), but uses binary searches in a TickerStore loaded once for the whole
+        backtest instead of filtering the ticker DataFrame on every step.
+
+        Args:
+            exchange_services:
+            ticker_store:
+            timestamp: tickers with app_create_timestamp <= timestamp are used
+        """
+        for exchange_id, exchange in exchange_services.items():
+            exchange.set_tickers(ticker_store.latest_tickers(exchange_id, timestamp))
+
     @staticmethod
     def tickers_with_converted_numerical_fields(tickers: Dict[str, Ticker]) -> Dict[str, Ticker]:
         def ticker_with_converted_numerical_fields(ticker: Ticker) -> Ticker:
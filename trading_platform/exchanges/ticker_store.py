@@ -0,0 +1,235 @@
+"""
+Columnar in-memory store of ticker history for backtests.
+
+TickerService.set_latest_tickers_from_file() filters the whole ticker DataFrame and builds a Ticker for every row on
+every step. TickerStore loads the history once into contiguous numpy arrays, ordered by exchange, pair, and
+app_create_timestamp, with the offsets of each (exchange, pair) run. Lookups are binary searches within a run, and
+results are TickerViews, which read fields from the arrays instead of copying them into a new Ticker.
+"""
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas
+
+from trading_platform.core.services.file_service import FileService
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.ticker import Ticker
+
+float_fields: List[str] = ['ask', 'bid', 'last', 'base_volume', 'quote_volume', 'exchange_timestamp']
+object_fields: List[str] = ['base', 'quote', 'version']
+
+
+class TickerView:
+    """
+    Read-only view of one row of a TickerStore, with the same field names as Ticker. Numerical fields are floats, like
+    the Tickers built by TickerService.set_latest_tickers_from_file(). Missing values are None.
+
+    Fields can't be set, so views can't be passed to code that modifies Tickers in place, such as
+    TickerService.tickers_with_converted_numerical_fields(). Use to_ticker() for a modifiable copy.
+    """
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store: 'TickerStore', index: int):
+        self.store = store
+        self.index = index
+
+    def __getattr__(self, field):
+        # Slots and special methods are looked up before they're set, by copy and pickle, and aren't columns.
+        if field in TickerView.__slots__ or field.startswith('__'):
+            raise AttributeError(field)
+        column: Optional[np.ndarray] = self.store.columns.get(field)
+        if column is None:
+            if field in Ticker.required_fields or field in Ticker.nullable_fields:
+                return None
+            raise AttributeError(field)
+        value = column[self.index].item() if column.dtype != object else column[self.index]
+        if isinstance(value, float) and math.isnan(value):
+            return None
+        return value
+
+    def __eq__(self, other):
+        if isinstance(other, TickerView):
+            return self.store is other.store and self.index == other.index
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((id(self.store), self.index))
+
+    def __repr__(self):
+        return 'TickerView({0})'.format(self.to_dict())
+
+    @property
+    def pair_name(self) -> str:
+        return self.store.pair_names[self.index]
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.store.field_names}
+
+    def to_ticker(self) -> Ticker:
+        """
+        Returns: a new Ticker with FinancialData numerical fields, for code that does arithmetic on ticker prices.
+        """
+        ticker: Ticker = Ticker(**self.to_dict())
+        for field in ['ask', 'bid', 'last']:
+            value = getattr(ticker, field)
+            if value is not None:
+                setattr(ticker, field, FinancialData(value))
+        return ticker
+
+
+class TickerRange:
+    """
+    Tickers selected by TickerStore.tickers_between(), in app_create_timestamp order. Indexing returns TickerViews, and
+    column() returns the values of one field. For a single (exchange, pair), the columns are views of the store's
+    arrays.
+    """
+    def __init__(self, store: 'TickerStore', rows):
+        """
+        Args:
+            store:
+            rows: slice or np.ndarray of row indexes into the store's arrays
+        """
+        self.store = store
+        self.rows = rows
+
+    def __len__(self):
+        if isinstance(self.rows, slice):
+            return self.rows.stop - self.rows.start
+        return len(self.rows)
+
+    def __getitem__(self, position: int) -> TickerView:
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        if isinstance(self.rows, slice):
+            return TickerView(self.store, self.rows.start + position)
+        return TickerView(self.store, int(self.rows[position]))
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self[position]
+
+    def column(self, field: str) -> np.ndarray:
+        return self.store.columns[field][self.rows]
+
+
+class TickerStore:
+    def __init__(self, ticker_df: pandas.DataFrame):
+        """
+        Args:
+            ticker_df: ticker history, with at least the app_create_timestamp, exchange_id, base, quote, bid and ask
+                columns, in the format read by FileService.
+        """
+        pair_names: pandas.Series = ticker_df['quote'].astype(str) + '_' + ticker_df['base'].astype(str)
+        order: np.ndarray = np.lexsort((ticker_df['app_create_timestamp'].values, pair_names.values.astype(str),
+                                        ticker_df['exchange_id'].values))
+
+        self.field_names: List[str] = [field for field in ['app_create_timestamp', 'exchange_id'] + object_fields +
+                                       float_fields if field in ticker_df.columns]
+        self.columns: Dict[str, np.ndarray] = {}
+        for field in self.field_names:
+            values: np.ndarray = ticker_df[field].values[order]
+            if field in float_fields or field == 'app_create_timestamp':
+                values = pandas.to_numeric(values).astype(np.float64)
+            elif field == 'exchange_id':
+                values = values.astype(np.int64)
+            else:
+                values = values.astype(object)
+            self.columns[field] = values
+
+        self.pair_names: np.ndarray = pair_names.values[order].astype(object)
+        self.timestamps: np.ndarray = self.columns['app_create_timestamp']
+
+        # (start, stop) offsets of the run of rows for each pair, by exchange id and pair name
+        self.offsets_by_pair_name_by_exchange_id: Dict[int, Dict[str, Tuple[int, int]]] = {}
+        exchange_id_column: np.ndarray = self.columns['exchange_id']
+        run_starts: np.ndarray = np.flatnonzero(np.concatenate([
+            [True],
+            (exchange_id_column[1:] != exchange_id_column[:-1]) | (self.pair_names[1:] != self.pair_names[:-1])
+        ])) if len(order) else np.array([], dtype=np.int64)
+        run_stops: np.ndarray = np.append(run_starts[1:], len(order))
+        for start, stop in zip(run_starts.tolist(), run_stops.tolist()):
+            self.offsets_by_pair_name_by_exchange_id.setdefault(int(exchange_id_column[start]), {})[
+                self.pair_names[start]] = (start, stop)
+
+        # Row indexes of the whole store in app_create_timestamp order, for ranges across pairs
+        self.time_order: np.ndarray = np.argsort(self.timestamps, kind='mergesort')
+        self.time_ordered_timestamps: np.ndarray = self.timestamps[self.time_order]
+
+    @classmethod
+    def from_parquet(cls, source_dir: str, start_timestamp: Optional[float] = None,
+                     end_timestamp: Optional[float] = None, exchange_ids: Optional[List[int]] = None,
+                     pair_names: Optional[List[str]] = None) -> 'TickerStore':
+        """
+        Loads a TickerStore from the parquet dataset written by FileService.write_ticker_parquet().
+        """
+        return cls(FileService.read_ticker_parquet(source_dir, start_timestamp=start_timestamp,
+                                                   end_timestamp=end_timestamp, exchange_ids=exchange_ids,
+                                                   pair_names=pair_names))
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def exchange_ids(self) -> List[int]:
+        return sorted(self.offsets_by_pair_name_by_exchange_id)
+
+    def pair_names_for_exchange(self, exchange_id: int) -> List[str]:
+        return sorted(self.offsets_by_pair_name_by_exchange_id.get(exchange_id, {}))
+
+    def latest_ticker(self, exchange_id: int, pair_name: str, timestamp: float) -> Optional[TickerView]:
+        """
+        Returns: the last ticker with app_create_timestamp <= timestamp, or None if there isn't one.
+        """
+        offsets: Optional[Tuple[int, int]] = self.offsets_by_pair_name_by_exchange_id.get(exchange_id, {}).get(
+            pair_name)
+        if offsets is None:
+            return None
+        start, stop = offsets
+        index: int = start + int(np.searchsorted(self.timestamps[start:stop], timestamp, side='right')) - 1
+        if index < start:
+            return None
+        return TickerView(self, index)
+
+    def latest_tickers(self, exchange_id: int, timestamp: float) -> Dict[str, TickerView]:
+        """
+        Returns: latest ticker as of timestamp for each pair on the exchange, by pair name, which is the format passed
+            to BacktestExchangeService.set_tickers().
+        """
+        tickers: Dict[str, TickerView] = {}
+        for pair_name, (start, stop) in self.offsets_by_pair_name_by_exchange_id.get(exchange_id, {}).items():
+            index: int = start + int(np.searchsorted(self.timestamps[start:stop], timestamp, side='right')) - 1
+            if index >= start:
+                tickers[pair_name] = TickerView(self, index)
+        return tickers
+
+    def tickers_between(self, start_timestamp: float, end_timestamp: float, exchange_id: Optional[int] = None,
+                        pair_name: Optional[str] = None) -> TickerRange:
+        """
+        Args:
+            start_timestamp: inclusive
+            end_timestamp: exclusive
+            exchange_id: if set with pair_name, only tickers for that exchange and pair are returned
+            pair_name:
+
+        Returns: tickers with start_timestamp <= app_create_timestamp < end_timestamp
+        """
+        if exchange_id is not None and pair_name is not None:
+            offsets: Optional[Tuple[int, int]] = self.offsets_by_pair_name_by_exchange_id.get(exchange_id, {}).get(
+                pair_name)
+            if offsets is None:
+                return TickerRange(self, slice(0, 0))
+            start, stop = offsets
+            timestamps: np.ndarray = self.timestamps[start:stop]
+            return TickerRange(self, slice(start + int(np.searchsorted(timestamps, start_timestamp, side='left')),
+                                           start + int(np.searchsorted(timestamps, end_timestamp, side='left'))))
+
+        first: int = int(np.searchsorted(self.time_ordered_timestamps, start_timestamp, side='left'))
+        last: int = int(np.searchsorted(self.time_ordered_timestamps, end_timestamp, side='left'))
+        rows: np.ndarray = self.time_order[first:last]
+        if exchange_id is not None:
+            rows = rows[self.columns['exchange_id'][rows] == exchange_id]
+        if pair_name is not None:
+            rows = rows[self.pair_names[rows] == pair_name]
+        return TickerRange(self, rows)
@@ -0,0 +1,72 @@
+"""
+Compares the memory usage and construction time of a million Ticker and CompactTicker instances, and the time to hash
+them.
+
+Example output on Python 3.11:
+    Ticker: 208 MB, 3.09 seconds to construct, 2.46 seconds to hash
+    CompactTicker: 196 MB, 3.53 seconds to construct, 0.13 seconds to hash
+
+Python 3.11 stores the attributes of a plain instance inline when its __dict__ is never accessed, so the memory saving
+there is small. On Python 3.6 each Ticker also carries a key-sharing __dict__ of several hundred bytes. CompactTicker
+construction includes computing the hash, which makes hashing about 20x faster afterwards.
+
+Usage:
+    python -m trading_platform.integration_and_performance_testing.benchmark_compact_records
+"""
+import time
+import tracemalloc
+from typing import Dict, List
+
+from trading_platform.exchanges.data.compact_records import CompactTicker
+from trading_platform.exchanges.data.enums import exchange_ids
+from trading_platform.exchanges.data.financial_data import FinancialData
+from trading_platform.exchanges.data.ticker import Ticker
+
+num_tickers = 1000000
+
+
+def ticker_kwargs(num: int) -> List[Dict]:
+    bids: List[FinancialData] = [FinancialData(bid) for bid in range(100)]
+    return [{
+        'ask': bids[index % 100],
+        'bid': bids[index % 100],
+        'last': bids[index % 100],
+
+        'base': 'USDT',
+        'quote': 'ETH',
+
+        'exchange_id': exchange_ids.binance,
+        'app_create_timestamp': 1530000000.0 + index,
+        'version': Ticker.current_version
+    } for index in range(num)]
+
+
+def benchmark(ticker_class, kwargs_list: List[Dict]):
+    # Measure memory in a separate pass because tracemalloc slows down construction.
+    tracemalloc.start()
+    tickers: List = [ticker_class(**kwargs) for kwargs in kwargs_list]
+    allocated_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tickers
+
+    start: float = time.time()
+    tickers = [ticker_class(**kwargs) for kwargs in kwargs_list]
+    construction_seconds: float = time.time() - start
+
+    start = time.time()
+    for ticker in tickers:
+        hash(ticker)
+    hash_seconds: float = time.time() - start
+
+    print('{0}: {1:.0f} MB, {2:.2f} seconds to construct, {3:.2f} seconds to hash'.format(
+        ticker_class.__name__, allocated_bytes / 1e6, construction_seconds, hash_seconds))
+
+
+def main():
+    kwargs_list: List[Dict] = ticker_kwargs(num_tickers)
+    benchmark(Ticker, kwargs_list)
+    benchmark(CompactTicker, kwargs_list)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,68 @@
 # TODO - DRY up this class
 import traceback
-from typing import Optional, List
+from typing import Dict, Optional, List
+
+from sqlalchemy import Table
+from sqlalchemy.dialects import postgresql
 
 from trading_platform.exchanges.data.order import Order
 from trading_platform.storage.daos.dao import Dao
 from trading_platform.storage.sql_alchemy_dtos.sql_alchemy_order_dto import SqlAlchemyOrderDto
+from trading_platform.utils.datetime_operations import utc_timestamp
+
+# Maximum number of bind parameters in a Postgres statement
+max_bind_params: int = 32767
 
 
 class OrderDao(Dao):
     def __init__(self):
         super().__init__(dto_class=SqlAlchemyOrderDto)
 
+    def bulk_insert(self, session, popos: List[Order], snapshot_ids: Optional[List[str]] = None,
+                    commit: bool = False) -> int:
+        """
+        Inserts the orders with one multi-row INSERT statement, instead of the one INSERT ... RETURNING per order that
+        bulk_save() makes the ORM send, so a batch is one database round trip. Batches with more than
+        max_bind_params values are split into several statements. db_id isn't fetched.
+
+        Args:
+            session:
+            popos:
+            snapshot_ids: unique id of each order's snapshot. Orders whose snapshot_id is already in the table are
+                skipped, so a batch can be inserted again.
+            commit:
+
+        Returns: number of orders inserted
+        """
+        if len(popos) == 0:
+            return 0
+        table: Table = self.dto_class.__table__
+        columns: List[str] = [column.name for column in table.columns if column.name != 'db_id']
+        db_create_timestamp: float = utc_timestamp()
+        rows: List[Dict] = []
+        for index, popo in enumerate(popos):
+            dto: SqlAlchemyOrderDto = self.dto_class.from_popo(popo)
+            dto.snapshot_id = snapshot_ids[index] if snapshot_ids is not None else None
+            if dto.db_create_timestamp is None:
+                dto.db_create_timestamp = db_create_timestamp
+            rows.append({column: getattr(dto, column) for column in columns})
+
+        rows_per_statement: int = max_bind_params // len(columns)
+        try:
+            inserted: int = 0
+            for start in range(0, len(rows), rows_per_statement):
+                statement = postgresql.insert(table).values(rows[start:start + rows_per_statement]) \
+                    .on_conflict_do_nothing(index_elements=['snapshot_id'])
+                inserted += session.execute(statement).rowcount
+            if commit:
+                session.commit()
+            return inserted
+        except Exception as exception:
+            print('rolling back due to exception')
+            traceback.print_exc()
+            session.rollback()
+            raise exception
+
     def fetch_earliest_with_order_id(self, session, order_id) -> Optional[Order]:
         """
         Fetch the order with the earliest app_create_timestamp.
@@ -74,3 +126,36 @@ class OrderDao(Dao):
             traceback.print_exc()
             session.rollback()
             raise exception
+
+    def fetch_latest_with_order_statuses(self, session, order_statuses, exchange_id=None) -> List[Order]:
+        """
+        Fetch the latest snapshot of each order whose latest order_status is in order_statuses. The latest snapshot is
+        chosen like fetch_latest_with_order_id.
+        Args:
+            session:
+            order_statuses: Iterable[OrderStatus]
+            exchange_id: if not None, only orders on this exchange are fetched
+
+        Returns:
+
+        """
+        order_statuses = list(order_statuses)
+        try:
+            order_ids = session.query(self.dto_class.order_id).filter(self.dto_class.order_status.in_(order_statuses))
+            query = session.query(self.dto_class).filter(self.dto_class.order_id.in_(order_ids))
+            if exchange_id is not None:
+                query = query.filter_by(exchange_id=exchange_id)
+
+            latest_by_order_id = {}
+            for dto in query.all():
+                latest = latest_by_order_id.get(dto.order_id)
+                if latest is None or (dto.order_status, dto.app_create_timestamp) > \
+                        (latest.order_status, latest.app_create_timestamp):
+                    latest_by_order_id[dto.order_id] = dto
+
+            return [dto.to_popo() for dto in latest_by_order_id.values() if dto.order_status in order_statuses]
+        except Exception as exception:
+            print('rolling back due to exception')
+            traceback.print_exc()
+            session.rollback()
+            raise exception
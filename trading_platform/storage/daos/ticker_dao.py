@@ -20,6 +20,23 @@ class TickerDao(Dao):
             session.rollback()
             raise exception
 
+    def fetch_by_app_create_timestamp_between_range(self, session, start, end):
+        """
+        Returns: tickers with start <= app_create_timestamp < end, ordered by app_create_timestamp
+        """
+        try:
+            ticker_daos = session.query(SqlAlchemyTickerDto).filter(and_(
+                SqlAlchemyTickerDto.app_create_timestamp >= start,
+                SqlAlchemyTickerDto.app_create_timestamp < end)).order_by(
+                SqlAlchemyTickerDto.app_create_timestamp, SqlAlchemyTickerDto.db_id).all()
+            tickers = [ticker_dao.to_popo() for ticker_dao in ticker_daos]
+
+            return tickers
+        except Exception as exception:
+            print('rolling back due to exception')
+            session.rollback()
+            raise exception
+
     def fetch_by_exchange_timestamp_gte_range(self, session, start):
         try:
             ticker_daos = session.query(SqlAlchemyTickerDto).filter(SqlAlchemyTickerDto.exchange_timestamp >= start).all()
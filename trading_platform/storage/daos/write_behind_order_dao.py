@@ -0,0 +1,29 @@
+from typing import List
+
+from trading_platform.storage.daos.order_dao import OrderDao
+from trading_platform.storage.order_journal import OrderJournal
+
+
+class WriteBehindOrderDao(OrderDao):
+    """
+    OrderDao whose saves are appended to an OrderJournal, which inserts them into the "orders" table in the background,
+    so saving an order doesn't wait on a database transaction. Can be passed as the order_dao of OrderExecutionService
+    and AsyncOrderExecutionService.
+
+    Reads still query the database, so they don't include snapshots the journal hasn't inserted yet.
+    """
+    def __init__(self, order_journal: OrderJournal):
+        super().__init__()
+        self.order_journal = order_journal
+
+    def save(self, session=None, flush=False, commit=False, popo=None):
+        """
+        session, flush, and commit are ignored. The snapshot is in the journal when this returns.
+        """
+        self.order_journal.append(popo)
+        return popo
+
+    def bulk_save(self, session=None, flush=False, commit=False, popos=None) -> List:
+        for popo in popos:
+            self.order_journal.append(popo)
+        return list(popos)
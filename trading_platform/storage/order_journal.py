@@ -0,0 +1,303 @@
+"""
+Write-behind journal for order snapshots, so saving an order doesn't wait on a database transaction.
+
+Snapshots are appended to a local JSON lines file. A sync thread fsyncs the file, once for every snapshot appended since
+the last fsync, after waiting fsync_interval_seconds for more appends to group with. A separate flush thread, so slow
+inserts don't delay fsyncs,
+    - inserts the snapshots into the "orders" table with OrderDao.bulk_insert, one multi-row INSERT of at most
+      batch_size snapshots per transaction, every flush_interval_seconds or as soon as batch_size snapshots are waiting
+    - records the sequence number of the last inserted snapshot in a checkpoint file, and empties the journal once every
+      snapshot in it has been inserted
+Failed inserts are retried with exponential backoff, and the snapshots stay in the journal meanwhile. When a journal is
+opened, snapshots after the checkpoint are recovered, so the ones that weren't inserted before a crash or close() are
+inserted by the flush thread. A crash between an insert and its checkpoint inserts that batch again, but each snapshot
+has a unique snapshot_id that's written to the "orders" table, and snapshots that are already in the table are skipped.
+
+append() returns once the snapshot has been written to the operating system, which survives a crash of the app. With
+sync=True it also waits for the fsync, which survives a crash of the host.
+
+Example usage:
+    with OrderJournal('/var/lib/trading_platform/orders.jsonl', OrderDao(), engine.scoped_session_maker) as journal:
+        order_execution_service = OrderExecutionService(order_dao=WriteBehindOrderDao(journal), ...)
+"""
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+from copy import deepcopy
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import scoped_session
+
+from trading_platform.exchanges.data.order import Order
+from trading_platform.storage.daos.order_dao import OrderDao
+
+max_retry_seconds: float = 60
+
+
+def order_record(seq: int, snapshot_id: str, order: Order) -> str:
+    order_dict: Dict = order.to_dict()
+    order_dict['strategy_execution_id'] = order.strategy_execution_id
+    return json.dumps({'seq': seq, 'snapshot_id': snapshot_id, 'order': order_dict}, default=str)
+
+
+def order_from_record(record: Dict) -> Order:
+    return Order(**record['order'])
+
+
+class OrderJournal:
+    def __init__(self, path: str, order_dao: OrderDao, scoped_session_maker: scoped_session, batch_size: int = 500,
+                 flush_interval_seconds: float = 1, fsync_interval_seconds: float = .005):
+        """
+        Recovers the snapshots in the journal that haven't been inserted yet. They're inserted once start() is called.
+
+        Args:
+            path: journal file. The checkpoint is written to path + '.checkpoint'.
+            order_dao: OrderDao that inserts into the "orders" table with bulk_insert(). Not a WriteBehindOrderDao.
+            scoped_session_maker:
+            batch_size: maximum number of snapshots per insert
+            flush_interval_seconds: maximum time between inserts, when there are fewer than batch_size snapshots
+            fsync_interval_seconds: time the sync thread waits for more appends before an fsync
+        """
+        self.path = path
+        self.checkpoint_path = path + '.checkpoint'
+        self.order_dao = order_dao
+        self.scoped_session_maker = scoped_session_maker
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.fsync_interval_seconds = fsync_interval_seconds
+
+        self.condition = threading.Condition()
+        # Only one flush at a time, so a batch isn't inserted twice
+        self.flush_lock = threading.Lock()
+        # (seq, snapshot_id, snapshot) of the snapshots that haven't been inserted
+        self.unflushed: List[Tuple[int, str, Order]] = []
+        self.last_seq: int = 0
+        self.synced_seq: int = 0
+        self.flushed_seq: int = 0
+        self.next_flush_time: float = time.time()
+        self.consecutive_flush_failures: int = 0
+        self.closed: bool = False
+        self.threads: List[threading.Thread] = []
+
+        self.appends: int = 0
+        self.fsyncs: int = 0
+        self.flushes: int = 0
+        self.recovered: int = self.recover()
+        self.file = open(self.path, 'a')
+
+    def __enter__(self) -> 'OrderJournal':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start(self):
+        self.threads = [threading.Thread(target=self.run_sync, name='order-journal-sync', daemon=True),
+                        threading.Thread(target=self.run_flush, name='order-journal-flush', daemon=True)]
+        for thread in self.threads:
+            thread.start()
+
+    def close(self):
+        """
+        Syncs the journal and, if the threads were started, makes a last attempt to insert the snapshots that haven't
+        been inserted. Snapshots that still aren't inserted are recovered when the journal is opened again.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join()
+        self.sync()
+        self.file.close()
+
+    ###########################################
+    # Appends
+    ###########################################
+
+    def append(self, order: Order, sync: bool = False) -> int:
+        """
+        Args:
+            order:
+            sync: if True, waits until the snapshot has been fsynced
+
+        Returns: sequence number of the snapshot
+        """
+        snapshot: Order = deepcopy(order)
+        snapshot_id: str = uuid.uuid4().hex
+        with self.condition:
+            if self.closed:
+                raise Exception('OrderJournal {0} is closed'.format(self.path))
+            self.last_seq += 1
+            seq: int = self.last_seq
+            self.file.write(order_record(seq, snapshot_id, snapshot) + '\n')
+            self.file.flush()
+            self.unflushed.append((seq, snapshot_id, snapshot))
+            self.appends += 1
+            self.condition.notify_all()
+
+            if sync and len(self.threads) > 0:
+                self.condition.wait_for(lambda: self.synced_seq >= seq or self.closed)
+        if sync and self.synced_seq < seq:
+            self.sync()
+        return seq
+
+    def sync(self):
+        with self.condition:
+            seq: int = self.last_seq
+            if seq == self.synced_seq:
+                return
+            self.file.flush()
+            file_descriptor: int = self.file.fileno()
+        # Appends can continue during the fsync, and are synced by the next one.
+        os.fsync(file_descriptor)
+        with self.condition:
+            self.synced_seq = max(self.synced_seq, seq)
+            self.fsyncs += 1
+            self.condition.notify_all()
+
+    ###########################################
+    # Inserts
+    ###########################################
+
+    def flush(self) -> bool:
+        """
+        Inserts the snapshots that haven't been inserted yet.
+
+        Returns: True if every snapshot appended before the call has been inserted
+        """
+        with self.flush_lock:
+            with self.condition:
+                unflushed: List[Tuple[int, str, Order]] = list(self.unflushed)
+            for start in range(0, len(unflushed), self.batch_size):
+                if not self.insert(unflushed[start:start + self.batch_size]):
+                    return False
+            return True
+
+    def insert(self, batch: List[Tuple[int, str, Order]]) -> bool:
+        try:
+            session = self.scoped_session_maker()
+            self.order_dao.bulk_insert(session=session, popos=[order for seq, snapshot_id, order in batch],
+                                       snapshot_ids=[snapshot_id for seq, snapshot_id, order in batch], commit=True)
+        except Exception:
+            print('inserting {0} orders from journal {1} failed, retrying'.format(len(batch), self.path))
+            traceback.print_exc()
+            with self.condition:
+                self.consecutive_flush_failures += 1
+                self.next_flush_time = time.time() + min(
+                    self.flush_interval_seconds * 2 ** self.consecutive_flush_failures, max_retry_seconds)
+            return False
+
+        last_seq: int = batch[-1][0]
+        self.write_checkpoint(last_seq)
+        with self.condition:
+            del self.unflushed[:len(batch)]
+            self.flushed_seq = last_seq
+            self.consecutive_flush_failures = 0
+            self.next_flush_time = time.time() + self.flush_interval_seconds
+            self.flushes += 1
+            if len(self.unflushed) == 0:
+                # Every snapshot in the journal has been inserted, and sequence numbers continue from the checkpoint.
+                self.file.seek(0)
+                self.file.truncate()
+        return True
+
+    def write_checkpoint(self, seq: int):
+        temp_path: str = self.checkpoint_path + '.tmp'
+        with open(temp_path, 'w') as checkpoint_file:
+            checkpoint_file.write(str(seq))
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(temp_path, self.checkpoint_path)
+
+    def flush_due(self) -> bool:
+        if len(self.unflushed) == 0:
+            return False
+        if len(self.unflushed) >= self.batch_size and self.consecutive_flush_failures == 0:
+            return True
+        return time.time() >= self.next_flush_time
+
+    def seconds_until_flush_due(self) -> Optional[float]:
+        if len(self.unflushed) == 0:
+            return None
+        return max(self.next_flush_time - time.time(), 0)
+
+    def run_sync(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.closed or self.synced_seq < self.last_seq)
+                if self.closed:
+                    return
+            # Appends that arrive meanwhile are synced by the same fsync
+            time.sleep(self.fsync_interval_seconds)
+            self.sync()
+
+    def run_flush(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.closed or self.flush_due(),
+                                        timeout=self.seconds_until_flush_due())
+                closed: bool = self.closed
+                flush_due: bool = self.flush_due()
+            if closed:
+                self.flush()
+                return
+            if flush_due:
+                self.flush()
+
+    ###########################################
+    # Recovery
+    ###########################################
+
+    def recover(self) -> int:
+        """
+        Reads the snapshots after the checkpoint from the journal. A partially written last line, from a crash during
+        an append, is removed.
+
+        Returns: number of snapshots recovered
+        """
+        checkpoint_seq: int = 0
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as checkpoint_file:
+                checkpoint_seq = int(checkpoint_file.read().strip() or 0)
+
+        last_seq: int = checkpoint_seq
+        if os.path.exists(self.path):
+            valid_bytes: int = 0
+            with open(self.path, 'rb') as journal_file:
+                for line in journal_file:
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError('record without a newline')
+                        record: Dict = json.loads(line)
+                    except ValueError:
+                        print('ignoring partially written record at byte {0} of journal {1}'.format(valid_bytes,
+                                                                                                    self.path))
+                        break
+                    valid_bytes += len(line)
+                    last_seq = max(last_seq, record['seq'])
+                    if record['seq'] > checkpoint_seq:
+                        self.unflushed.append((record['seq'], record['snapshot_id'], order_from_record(record)))
+            if valid_bytes < os.path.getsize(self.path):
+                with open(self.path, 'r+b') as journal_file:
+                    journal_file.truncate(valid_bytes)
+
+        self.last_seq = last_seq
+        self.synced_seq = last_seq
+        self.flushed_seq = checkpoint_seq
+        return len(self.unflushed)
+
+    def metrics(self) -> Dict[str, int]:
+        with self.condition:
+            return {
+                'appends': self.appends,
+                'fsyncs': self.fsyncs,
+                'flushes': self.flushes,
+                'recovered': self.recovered,
+                'unflushed': len(self.unflushed),
+                'last_seq': self.last_seq,
+                'flushed_seq': self.flushed_seq,
+            }
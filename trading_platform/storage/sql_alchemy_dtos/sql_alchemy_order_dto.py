@@ -63,6 +63,9 @@ class SqlAlchemyOrderDto(Base):
     order_id = Column(String, index=True, nullable=False)
     app_create_timestamp = Column(Float, index=True, nullable=False)
     strategy_execution_id = Column(String, index=True, nullable=False)
+    # Unique id of a snapshot written by OrderJournal, so a snapshot that's inserted again after a crash is skipped.
+    # Null for snapshots saved directly.
+    snapshot_id = Column(String, unique=True, nullable=True)
 
     # app metadata
     version = Column(Integer, nullable=False)
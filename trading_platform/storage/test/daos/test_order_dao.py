@@ -2,13 +2,18 @@
 nosetests test.storage.test_order_dao --nocapture
 """
 import math
+import unittest
+from unittest.mock import MagicMock
 
-from nose.tools import eq_, assert_greater
+from nose.tools import eq_, assert_greater, assert_true
+from sqlalchemy.dialects import postgresql
 
 from trading_platform.core.test import data
 from trading_platform.core.test.util_methods import eq_ignore_certain_fields
 from trading_platform.exchanges.data.enums import exchange_ids
+from trading_platform.exchanges.data.enums.order_status import OrderStatus
 from trading_platform.exchanges.data.order import Order
+from trading_platform.storage.daos import order_dao
 from trading_platform.storage.daos.order_dao import OrderDao
 from trading_platform.storage.test.daos.test_dao import TestDao
 
@@ -56,3 +61,63 @@ class TestOrderDao(TestDao):
         self.dto2.db_create_timestamp = second.db_create_timestamp
         eq_(second, self.dto2)
         assert_greater(second.app_create_timestamp, first.app_create_timestamp)
+
+    def test_fetch_latest_with_order_statuses(self):
+        filled = data.order(exchange_ids.binance, order_status=OrderStatus.filled,
+                            app_create_timestamp=self.dto1.app_create_timestamp + 1, order_id=self.dto1.order_id)
+        self.dao.bulk_save(session=self.session, commit=True, popos=[self.dto1, self.dto2, filled])
+        # dto1 and filled are snapshots of the same order, and the order's latest snapshot is filled
+        eq_(filled.order_id, self.dto1.order_id)
+
+        fetched = self.dao.fetch_latest_with_order_statuses(session=self.session, order_statuses=[OrderStatus.open])
+        eq_([order.order_id for order in fetched], [self.dto2.order_id])
+        eq_(self.dao.fetch_latest_with_order_statuses(session=self.session, order_statuses=[OrderStatus.open],
+                                                      exchange_id=exchange_ids.binance), [])
+
+    def test_bulk_insert_skips_inserted_snapshots(self):
+        filled = data.order(exchange_ids.binance, order_status=OrderStatus.filled,
+                            app_create_timestamp=self.dto1.app_create_timestamp + 1, order_id=self.dto1.order_id)
+        eq_(self.dao.bulk_insert(session=self.session, popos=[self.dto1, filled], snapshot_ids=['1', '2'],
+                                 commit=True), 2)
+        # The batch is inserted again, as after a crash before the journal's checkpoint
+        eq_(self.dao.bulk_insert(session=self.session, popos=[self.dto1, filled, self.dto2],
+                                 snapshot_ids=['1', '2', '3'], commit=True), 1)
+        eq_(len(self.dao.fetch_by_order_id(session=self.session, order_id=self.dto1.order_id)), 2)
+        eq_(self.dao.fetch_latest_with_order_id(session=self.session, order_id=self.dto1.order_id).order_status,
+            OrderStatus.filled)
+
+    def test_fetch_latest_with_duplicate_snapshots(self):
+        # Snapshots saved directly have no snapshot_id, so they can be duplicated
+        self.dao.bulk_save(session=self.session, commit=True, popos=[self.dto1, self.dto1, self.dto2])
+        eq_(self.dao.fetch_latest_with_order_id(session=self.session, order_id=self.dto1.order_id).order_id,
+            self.dto1.order_id)
+        fetched = self.dao.fetch_latest_with_order_statuses(session=self.session, order_statuses=[OrderStatus.open])
+        eq_(sorted(order.order_id for order in fetched), sorted([self.dto1.order_id, self.dto2.order_id]))
+
+
+class TestOrderDaoBulkInsert(unittest.TestCase):
+    """
+    Uses a mock session, so no database is needed.
+    """
+    def setUp(self):
+        self.session = MagicMock()
+        self.session.execute.return_value.rowcount = 0
+        self.orders = [data.order(exchange_ids.binance, app_create_timestamp=1527811200. + index) for index in
+                       range(500)]
+
+    def test_one_statement_per_batch(self):
+        OrderDao().bulk_insert(session=self.session, popos=self.orders,
+                               snapshot_ids=[str(index) for index in range(500)], commit=True)
+        eq_(self.session.execute.call_count, 1)
+        self.session.commit.assert_called_once()
+
+        statement = self.session.execute.call_args[0][0]
+        compiled = statement.compile(dialect=postgresql.dialect())
+        eq_(len([name for name in compiled.params if name.startswith('snapshot_id')]), 500)
+        assert_true('ON CONFLICT (snapshot_id) DO NOTHING' in str(compiled))
+
+    def test_statements_split_at_max_bind_params(self):
+        with unittest.mock.patch.object(order_dao, 'max_bind_params', 2000):
+            OrderDao().bulk_insert(session=self.session, popos=self.orders, commit=True)
+        num_columns = len(OrderDao().dto_class.__table__.columns) - 1
+        eq_(self.session.execute.call_count, math.ceil(500 / (2000 // num_columns)))
@@ -60,3 +60,17 @@ class TestTickerDao(TestDao):
 
         fetched = self.dao.fetch_by_exchange_timestamp_gte_range(start=self.dto1.exchange_timestamp, session=self.session)
         eq_(2, len(fetched))
+
+    def test_fetch_by_app_create_timestamp_between_range(self):
+        self.dto2.app_create_timestamp = self.dto1.app_create_timestamp + SECONDS_PER_MIN
+        self.dao.bulk_save(session=self.session, commit=True, popos=[self.dto2, self.dto1])
+
+        fetched = self.dao.fetch_by_app_create_timestamp_between_range(
+            start=self.dto1.app_create_timestamp, end=self.dto2.app_create_timestamp + SECONDS_PER_MIN,
+            session=self.session)
+        eq_([ticker.app_create_timestamp for ticker in fetched],
+            [self.dto1.app_create_timestamp, self.dto2.app_create_timestamp])
+
+        fetched = self.dao.fetch_by_app_create_timestamp_between_range(
+            start=self.dto1.app_create_timestamp, end=self.dto2.app_create_timestamp, session=self.session)
+        eq_(1, len(fetched))
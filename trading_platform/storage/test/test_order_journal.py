@@ -0,0 +1,184 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from typing import List
+from unittest import mock
+from unittest.mock import MagicMock
+
+from nose.tools import assert_raises, assert_true, eq_
+
+from trading_platform.core.test import data
+from trading_platform.core.test.util_methods import eq_ignore_certain_fields
+from trading_platform.exchanges.data.enums import exchange_ids
+from trading_platform.exchanges.data.enums.order_status import OrderStatus
+from trading_platform.exchanges.data.order import Order
+from trading_platform.storage.daos.write_behind_order_dao import WriteBehindOrderDao
+from trading_platform.storage.order_journal import OrderJournal
+
+
+class TestOrderJournal(unittest.TestCase):
+    """
+    Uses a mock OrderDao, so no database is needed.
+    """
+    def setUp(self):
+        self.directory: str = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path: str = os.path.join(self.directory, 'orders.jsonl')
+        self.inserted_batches: List[List[Order]] = []
+        self.inserted_snapshot_ids: List[str] = []
+        self.order_dao = MagicMock()
+        self.order_dao.bulk_insert.side_effect = self.bulk_insert
+
+    def bulk_insert(self, session=None, popos=None, snapshot_ids=None, commit=False):
+        self.inserted_batches.append(popos)
+        self.inserted_snapshot_ids += snapshot_ids
+        return len(popos)
+
+    def inserted_orders(self) -> List[Order]:
+        return [order for batch in self.inserted_batches for order in batch]
+
+    def journal(self, **kwargs) -> OrderJournal:
+        journal_kwargs = {'batch_size': 500, 'flush_interval_seconds': .05, 'fsync_interval_seconds': .001}
+        journal_kwargs.update(kwargs)
+        return OrderJournal(self.path, self.order_dao, MagicMock(), **journal_kwargs)
+
+    @staticmethod
+    def orders(count: int) -> List[Order]:
+        return [data.order(exchange_ids.binance, strategy_execution_id='strategy',
+                           app_create_timestamp=1527811200. + index) for index in range(count)]
+
+    def wait_for(self, condition, timeout_seconds: float = 5):
+        deadline: float = time.time() + timeout_seconds
+        while not condition():
+            if time.time() > deadline:
+                raise AssertionError('timed out')
+            time.sleep(.01)
+
+    def test_write_behind(self):
+        orders: List[Order] = self.orders(3)
+        with self.journal() as journal:
+            dao: WriteBehindOrderDao = WriteBehindOrderDao(journal)
+            dao.save(session=None, commit=True, popo=orders[0])
+            dao.bulk_save(session=None, commit=True, popos=orders[1:])
+            self.wait_for(lambda: journal.metrics()['flushed_seq'] == 3)
+
+        for inserted_order, order in zip(self.inserted_orders(), orders):
+            eq_ignore_certain_fields(inserted_order, order, [])
+        # The journal is emptied once its snapshots are inserted
+        eq_(os.path.getsize(self.path), 0)
+        with open(self.path + '.checkpoint') as checkpoint_file:
+            eq_(checkpoint_file.read(), '3')
+
+    def test_snapshot_at_append(self):
+        order: Order = self.orders(1)[0]
+        journal: OrderJournal = self.journal()
+        journal.append(order)
+        order.order_status = OrderStatus.filled
+        journal.append(order)
+        journal.flush()
+        journal.close()
+        eq_([inserted_order.order_status for inserted_order in self.inserted_orders()],
+            [OrderStatus.open, OrderStatus.filled])
+
+    def test_append_independent_of_insert_latency(self):
+        def slow_bulk_insert(session=None, popos=None, snapshot_ids=None, commit=False):
+            time.sleep(.3)
+            return self.bulk_insert(session=session, popos=popos, snapshot_ids=snapshot_ids, commit=commit)
+        self.order_dao.bulk_insert.side_effect = slow_bulk_insert
+
+        with self.journal(flush_interval_seconds=0) as journal:
+            start_time: float = time.perf_counter()
+            for order in self.orders(20):
+                journal.append(order, sync=True)
+            assert_true(time.perf_counter() - start_time < .3)
+        eq_(len(self.inserted_orders()), 20)
+
+    def test_fsync_batching(self):
+        fsync_calls: List[int] = []
+        original_fsync = os.fsync
+
+        def fsync(file_descriptor):
+            fsync_calls.append(file_descriptor)
+            original_fsync(file_descriptor)
+
+        with mock.patch('trading_platform.storage.order_journal.os.fsync', side_effect=fsync):
+            with self.journal(flush_interval_seconds=60, fsync_interval_seconds=.05) as journal:
+                threads = [threading.Thread(target=journal.append, args=(order,), kwargs={'sync': True})
+                           for order in self.orders(10)]
+                [thread.start() for thread in threads]
+                [thread.join() for thread in threads]
+                eq_(journal.metrics()['appends'], 10)
+                assert_true(journal.metrics()['fsyncs'] < 10)
+
+    def test_batches_and_retries(self):
+        failures: List[int] = [2]
+
+        def failing_bulk_insert(session=None, popos=None, snapshot_ids=None, commit=False):
+            if failures[0] > 0:
+                failures[0] -= 1
+                raise Exception('database unavailable')
+            return self.bulk_insert(session=session, popos=popos, snapshot_ids=snapshot_ids, commit=commit)
+        self.order_dao.bulk_insert.side_effect = failing_bulk_insert
+
+        with mock.patch('trading_platform.storage.order_journal.max_retry_seconds', .05):
+            with self.journal(batch_size=4, flush_interval_seconds=.01) as journal:
+                for order in self.orders(10):
+                    journal.append(order)
+                self.wait_for(lambda: len(self.inserted_orders()) == 10)
+        eq_(failures[0], 0)
+        assert_true(max(len(batch) for batch in self.inserted_batches) <= 4)
+
+    def test_recovery(self):
+        """
+        Snapshots that weren't inserted before a crash are inserted when the journal is opened again.
+        """
+        def failing_bulk_insert(session=None, popos=None, snapshot_ids=None, commit=False):
+            raise Exception('database unavailable')
+        self.order_dao.bulk_insert.side_effect = failing_bulk_insert
+        orders: List[Order] = self.orders(3)
+
+        journal: OrderJournal = self.journal()
+        for order in orders:
+            journal.append(order, sync=True)
+        journal.close()
+        # A crash during an append leaves a partially written record
+        with open(self.path, 'a') as journal_file:
+            journal_file.write('{"seq": 4, "order": {"app_')
+
+        self.order_dao.bulk_insert.side_effect = self.bulk_insert
+        with self.journal() as recovered_journal:
+            eq_(recovered_journal.recovered, 3)
+            eq_(recovered_journal.append(self.orders(4)[3]), 4)
+            self.wait_for(lambda: len(self.inserted_orders()) == 4)
+
+        for inserted_order, order in zip(self.inserted_orders(), orders):
+            eq_ignore_certain_fields(inserted_order, order, [])
+        eq_(self.inserted_orders()[0].strategy_execution_id, 'strategy')
+
+        # Sequence numbers continue from the checkpoint after the journal is emptied
+        with self.journal() as reopened_journal:
+            eq_(reopened_journal.recovered, 0)
+            eq_(reopened_journal.append(orders[0]), 5)
+
+    def test_replay_after_crash_before_checkpoint(self):
+        """
+        A batch that's inserted again, because of a crash between its insert and its checkpoint, has the same
+        snapshot_ids, so OrderDao.bulk_insert skips the snapshots that are already in the table.
+        """
+        orders: List[Order] = self.orders(3)
+        journal: OrderJournal = self.journal()
+        for order in orders:
+            journal.append(order)
+        with mock.patch.object(OrderJournal, 'write_checkpoint', side_effect=Exception('crash')):
+            with assert_raises(Exception):
+                journal.flush()
+        journal.close()
+        eq_(len(set(self.inserted_snapshot_ids)), 3)
+
+        with self.journal() as recovered_journal:
+            eq_(recovered_journal.recovered, 3)
+            self.wait_for(lambda: len(self.inserted_orders()) == 6)
+        eq_(self.inserted_snapshot_ids[3:], self.inserted_snapshot_ids[:3])
@@ -0,0 +1,249 @@
+"""
+Circuit breakers for exchange endpoints, so callers fail fast when an exchange is degraded instead of spending their
+retries on it.
+
+There's a breaker for each exchange and ccxt client method. A breaker is closed while requests succeed. It opens when
+the failure rate over the last window_seconds is at least failure_rate_threshold, after at least min_requests requests.
+While open, requests raise CircuitOpenException without being sent. After open_seconds, the breaker is half open and
+lets half_open_max_requests probe requests through. It closes if they succeed and opens again if one fails.
+
+Only network errors, such as timeouts, rate limits, and exchange downtime, count as failures. Errors like an invalid
+order or insufficient funds mean the exchange is up.
+
+Each breaker also has a health score between 0 and 1, which callers can use to deprioritize exchanges before their
+breakers open.
+
+Example usage:
+    breaker = circuit_breakers.breaker_for_method(client.fetch_tickers)
+    breaker.before_request()
+    ...
+    breaker.record_success(latency_seconds)
+"""
+import collections
+import threading
+import time
+from typing import Deque, Dict, Optional, Tuple
+
+import ccxt
+import requests
+import urllib3
+
+from trading_platform.utils.exceptions import CircuitOpenException
+
+
+class CircuitState:
+    closed = 'closed'
+    open = 'open'
+    half_open = 'half_open'
+
+
+failure_errors = (ccxt.NetworkError, requests.RequestException, urllib3.exceptions.HTTPError)
+
+
+class CircuitBreaker:
+    def __init__(self, name: str = '', failure_rate_threshold: float = .5, window_seconds: float = 60,
+                 min_requests: int = 5, open_seconds: float = 30, half_open_max_requests: int = 1,
+                 slow_request_seconds: float = 5):
+        """
+        Args:
+            name: used in exception messages
+            failure_rate_threshold: failure rate over the window at which the breaker opens
+            window_seconds:
+            min_requests: number of requests in the window before the failure rate is used
+            open_seconds: seconds the breaker stays open before letting probe requests through
+            half_open_max_requests: number of concurrent probe requests while half open
+            slow_request_seconds: latency above which a successful request lowers the health score
+        """
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.window_seconds = window_seconds
+        self.min_requests = min_requests
+        self.open_seconds = open_seconds
+        self.half_open_max_requests = half_open_max_requests
+        self.slow_request_seconds = slow_request_seconds
+
+        self.state: str = CircuitState.closed
+        self.opened_at: float = 0
+        self.half_open_requests: int = 0
+        # (time, succeeded, latency seconds) of the requests in the window
+        self.outcomes: Deque[Tuple[float, bool, float]] = collections.deque()
+        self.lock = threading.Lock()
+
+    def trim_window(self, now: float):
+        while len(self.outcomes) > 0 and self.outcomes[0][0] < now - self.window_seconds:
+            self.outcomes.popleft()
+
+    def current_state(self) -> str:
+        """
+        Returns: the state, which moves from open to half open once open_seconds have passed
+        """
+        with self.lock:
+            if self.state == CircuitState.open and time.monotonic() - self.opened_at >= self.open_seconds:
+                self.state = CircuitState.half_open
+                self.half_open_requests = 0
+            return self.state
+
+    def allows_requests(self) -> bool:
+        state: str = self.current_state()
+        with self.lock:
+            return state == CircuitState.closed or (
+                state == CircuitState.half_open and self.half_open_requests < self.half_open_max_requests)
+
+    def before_request(self):
+        """
+        Raises: CircuitOpenException if the breaker is open, or half open with probe requests already in flight
+        """
+        state: str = self.current_state()
+        with self.lock:
+            if state == CircuitState.closed:
+                return
+            if state == CircuitState.half_open and self.half_open_requests < self.half_open_max_requests:
+                self.half_open_requests += 1
+                return
+            retry_in_seconds: float = max(self.open_seconds - (time.monotonic() - self.opened_at), 0)
+        raise CircuitOpenException('Circuit {0} is {1}, retry in {2:.1f} seconds'.format(self.name, state,
+                                                                                         retry_in_seconds))
+
+    def record_success(self, latency_seconds: float = 0):
+        with self.lock:
+            now: float = time.monotonic()
+            self.outcomes.append((now, True, latency_seconds))
+            self.trim_window(now)
+            if self.state == CircuitState.half_open:
+                self.half_open_requests = max(self.half_open_requests - 1, 0)
+                self.state = CircuitState.closed
+                # The failures that opened the breaker shouldn't open it again.
+                self.outcomes = collections.deque([self.outcomes[-1]])
+
+    def record_failure(self, latency_seconds: float = 0):
+        with self.lock:
+            now: float = time.monotonic()
+            self.outcomes.append((now, False, latency_seconds))
+            self.trim_window(now)
+            if self.state == CircuitState.half_open:
+                self.half_open_requests = max(self.half_open_requests - 1, 0)
+                self.trip(now)
+            elif self.state == CircuitState.closed and len(self.outcomes) >= self.min_requests and \
+                    self.failure_rate() >= self.failure_rate_threshold:
+                self.trip(now)
+
+    def record_outcome(self, error: Optional[BaseException], latency_seconds: float = 0):
+        """
+        Records a request that raised error, or succeeded if error is None. Errors that aren't failure_errors are
+        recorded as successes, since the exchange responded. Interruptions such as a cancelled coroutine aren't
+        recorded.
+        """
+        if error is not None and not isinstance(error, Exception):
+            with self.lock:
+                self.half_open_requests = max(self.half_open_requests - 1, 0)
+        elif error is not None and isinstance(error, failure_errors):
+            self.record_failure(latency_seconds)
+        else:
+            self.record_success(latency_seconds)
+
+    def trip(self, now: float):
+        self.state = CircuitState.open
+        self.opened_at = now
+        print('Circuit {0} opened'.format(self.name))
+
+    def failure_rate(self) -> float:
+        if len(self.outcomes) == 0:
+            return 0
+        return sum(1 for _, succeeded, _ in self.outcomes if not succeeded) / len(self.outcomes)
+
+    def health_score(self) -> float:
+        """
+        Returns: 0 if open, else the success rate over the window, lowered for slow requests and halved while half
+            open. 1 if there were no requests in the window.
+        """
+        state: str = self.current_state()
+        if state == CircuitState.open:
+            return 0
+        with self.lock:
+            self.trim_window(time.monotonic())
+            if len(self.outcomes) == 0:
+                score: float = 1
+            else:
+                score = 1 - self.failure_rate()
+                mean_latency: float = sum(latency for _, _, latency in self.outcomes) / len(self.outcomes)
+                if mean_latency > self.slow_request_seconds:
+                    score *= self.slow_request_seconds / mean_latency
+        return score / 2 if state == CircuitState.half_open else score
+
+
+def client_exchange_name(exchange_service) -> Optional[str]:
+    """
+    Returns: the ccxt id of the exchange service's client, which keys its circuit breakers. None if the service doesn't
+        have a ccxt client.
+    """
+    get_client = getattr(exchange_service, 'get_client', None)
+    exchange_name = getattr(get_client() if get_client is not None else None, 'id', None)
+    return exchange_name if isinstance(exchange_name, str) else None
+
+
+class CircuitBreakerRegistry:
+    def __init__(self, **breaker_kwargs):
+        """
+        Args:
+            breaker_kwargs: CircuitBreaker constructor arguments used for every breaker
+        """
+        self.breaker_kwargs = breaker_kwargs
+        self.breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+        self.lock = threading.Lock()
+
+    def breaker(self, exchange_name: str, method_name: str) -> CircuitBreaker:
+        key: Tuple[str, str] = (exchange_name, method_name)
+        with self.lock:
+            breaker: Optional[CircuitBreaker] = self.breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(name='{0}.{1}'.format(exchange_name, method_name), **self.breaker_kwargs)
+                self.breakers[key] = breaker
+            return breaker
+
+    def breaker_for_method(self, method) -> Optional[CircuitBreaker]:
+        """
+        Returns: the breaker for a ccxt client method, or None if method isn't a ccxt client method
+        """
+        exchange_name: Optional[str] = getattr(getattr(method, '__self__', None), 'id', None)
+        if not isinstance(exchange_name, str):
+            return None
+        return self.breaker(exchange_name, method.__name__)
+
+    def health(self, exchange_name: str, method_name: Optional[str] = None) -> float:
+        """
+        Returns: the health score of the exchange's method, or the lowest health score of the exchange's methods if
+            method_name is None
+        """
+        if method_name is not None:
+            return self.breaker(exchange_name, method_name).health_score()
+        with self.lock:
+            breakers = [breaker for (name, _), breaker in self.breakers.items() if name == exchange_name]
+        return min([breaker.health_score() for breaker in breakers], default=1)
+
+    def allows_requests(self, exchange_name: str, method_name: str) -> bool:
+        return self.breaker(exchange_name, method_name).allows_requests()
+
+    def exchange_service_health(self, exchange_service, method_name: Optional[str] = None) -> float:
+        """
+        Args:
+            exchange_service: ExchangeServiceAbc. Services without a ccxt client, such as backtest services, are
+                healthy.
+            method_name:
+        """
+        exchange_name: Optional[str] = client_exchange_name(exchange_service)
+        if exchange_name is None:
+            return 1
+        return self.health(exchange_name, method_name)
+
+    def exchange_service_allows_requests(self, exchange_service, method_name: str) -> bool:
+        exchange_name: Optional[str] = client_exchange_name(exchange_service)
+        if exchange_name is None:
+            return True
+        return self.allows_requests(exchange_name, method_name)
+
+    def reset(self):
+        with self.lock:
+            self.breakers = {}
+
+
+circuit_breakers: CircuitBreakerRegistry = CircuitBreakerRegistry()
@@ -11,4 +11,12 @@ class DuplicateDataException(Exception):
 
 
 class PortfolioAllocationException(Exception):
-    pass
\ No newline at end of file
+    pass
+
+
+class CircuitOpenException(Exception):
+    pass
+
+
+class SequenceGapException(Exception):
+    pass
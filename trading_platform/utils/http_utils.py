@@ -1,60 +1,108 @@
+import asyncio
 import traceback
-from time import sleep
+from time import monotonic, sleep
 
 import ccxt
 import requests
 import urllib3
 
+from trading_platform.utils.circuit_breaker import circuit_breakers
+from trading_platform.utils.rate_limiter import rate_limiter, retry_delay_seconds
+
 # Exchanges are flakey. Hardcode the max number of retries for now
 MAX_RETRIES = 3
-# Hardcode sleep as well
+# Base of the exponential backoff between retries
 SLEEP_SEC_BETWEEN_RETRIES = 3
 
+retryable_errors = (requests.HTTPError,
+                    ccxt.DDoSProtection,
+                    ccxt.RateLimitExceeded,
+                    ccxt.ExchangeError,
+                    ccxt.ExchangeNotAvailable,
+                    ccxt.RequestTimeout,
+                    urllib3.exceptions.ReadTimeoutError)
+retryable_limit_order_errors = retryable_errors + (ccxt.InvalidOrder,)
+
 
-def make_api_request(method, *args):
+def make_api_request(method, *args, errors=retryable_errors):
+    """
+    Calls method, retrying errors with jittered exponential backoff starting at SLEEP_SEC_BETWEEN_RETRIES. Requests by
+    ccxt client methods are throttled by the shared rate_limiter, and rate limit errors pause every caller of the same
+    exchange and endpoint class for the exchange's Retry-After time.
+
+    Requests by ccxt client methods also go through the method's circuit breaker, so if the exchange is failing,
+    CircuitOpenException is raised without sending the request or retrying.
+    """
     print('executing {0}'.format(method.__name__))
+    bucket, cost = rate_limiter.bucket_and_cost(method, args)
+    breaker = circuit_breakers.breaker_for_method(method)
     recent_error = None
     for retry in range(MAX_RETRIES):
         if retry > 0:
-            sleep(SLEEP_SEC_BETWEEN_RETRIES)
+            sleep(retry_delay_seconds(retry, recent_error, method, bucket, SLEEP_SEC_BETWEEN_RETRIES))
             print('retry attempt number {0}'.format(retry))
+        if breaker is not None:
+            breaker.before_request()
+        if bucket is not None:
+            bucket.acquire(cost)
+        start: float = monotonic()
         try:
-            return method(*args)
-        except (requests.HTTPError,
-                ccxt.DDoSProtection,
-                ccxt.ExchangeError,
-                ccxt.ExchangeNotAvailable,
-                ccxt.RequestTimeout,
-                urllib3.exceptions.ReadTimeoutError
-                ) as request_error:
+            response = method(*args)
+        except BaseException as request_error:
+            if breaker is not None:
+                breaker.record_outcome(request_error, monotonic() - start)
+            if not isinstance(request_error, errors):
+                raise
             recent_error = request_error
             print('error when executing {0}'.format(method.__name__))
             traceback.print_exc()
             continue
+        if breaker is not None:
+            breaker.record_outcome(None, monotonic() - start)
+        return response
     else:
         raise recent_error
 
 
 def make_api_limit_order_request(method, symbol, amount, price, params):
+    return make_api_request(method, symbol, amount, price, params, errors=retryable_limit_order_errors)
+
+
+async def make_async_api_request(method, *args, errors=retryable_errors):
+    """
+    Like make_api_request(), for coroutine methods such as those of ccxt.async_support clients. Waits for the rate
+    limiter and between retries without blocking the event loop.
+    """
     print('executing {0}'.format(method.__name__))
+    bucket, cost = rate_limiter.bucket_and_cost(method, args)
+    breaker = circuit_breakers.breaker_for_method(method)
     recent_error = None
     for retry in range(MAX_RETRIES):
         if retry > 0:
-            sleep(SLEEP_SEC_BETWEEN_RETRIES)
+            await asyncio.sleep(retry_delay_seconds(retry, recent_error, method, bucket, SLEEP_SEC_BETWEEN_RETRIES))
             print('retry attempt number {0}'.format(retry))
+        if breaker is not None:
+            breaker.before_request()
+        if bucket is not None:
+            await bucket.acquire_async(cost)
+        start: float = monotonic()
         try:
-            return method(symbol, amount, price, params)
-        except (requests.HTTPError,
-                ccxt.DDoSProtection,
-                ccxt.ExchangeError,
-                ccxt.ExchangeNotAvailable,
-                ccxt.RequestTimeout,
-                ccxt.InvalidOrder,
-                urllib3.exceptions.ReadTimeoutError
-                ) as request_error:
+            response = await method(*args)
+        except BaseException as request_error:
+            if breaker is not None:
+                breaker.record_outcome(request_error, monotonic() - start)
+            if not isinstance(request_error, errors):
+                raise
             recent_error = request_error
             print('error when executing {0}'.format(method.__name__))
             traceback.print_exc()
             continue
+        if breaker is not None:
+            breaker.record_outcome(None, monotonic() - start)
+        return response
     else:
         raise recent_error
+
+
+async def make_async_api_limit_order_request(method, symbol, amount, price, params):
+    return await make_async_api_request(method, symbol, amount, price, params, errors=retryable_limit_order_errors)
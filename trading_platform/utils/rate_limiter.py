@@ -0,0 +1,250 @@
+"""
+Rate limiting shared by every caller of an exchange API.
+
+Requests are grouped by exchange and endpoint class (market data, account, and order requests), and each group has a
+token bucket. A request takes tokens equal to its weight before it's sent. If the bucket doesn't have enough tokens,
+the tokens are reserved anyway and the caller sleeps until they've refilled, so concurrent callers queue up behind each
+other instead of all sending requests and all getting rate limited.
+
+When an exchange rate limits a request anyway, the bucket is paused for the exchange's Retry-After time, or a jittered
+exponential backoff if there isn't one, which makes every caller of that group wait, not just the one that got the
+error.
+
+Example usage:
+    bucket, cost = rate_limiter.bucket_and_cost(client.fetch_open_orders, ('ETH/BTC',))
+    bucket.acquire(cost)
+    client.fetch_open_orders('ETH/BTC')
+"""
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+import ccxt
+import requests
+
+market_data: str = 'market_data'
+account: str = 'account'
+order: str = 'order'
+
+endpoint_classes_by_method_name: Dict[str, str] = {
+    'fetch_ticker': market_data,
+    'fetch_tickers': market_data,
+    'fetch_order_book': market_data,
+    'fetch_trades': market_data,
+    'fetch_balance': account,
+    'fetch_order': account,
+    'fetch_orders': account,
+    'fetch_open_orders': account,
+    'fetch_my_trades': account,
+    'create_order': order,
+    'create_limit_buy_order': order,
+    'create_limit_sell_order': order,
+    'cancel_order': order,
+    'withdraw': order,
+}
+
+# (tokens per second, capacity) by exchange and endpoint class. Groups that aren't listed refill at the client's
+# ccxt rateLimit, with a one second burst.
+bucket_limits_by_exchange: Dict[str, Dict[str, Tuple[float, float]]] = {
+    # 1200 request weight per minute, and 10 orders per second
+    'binance': {
+        market_data: (20, 1200),
+        account: (20, 1200),
+        order: (10, 10),
+    },
+}
+
+
+def binance_request_weight(method_name: str, args: Tuple) -> float:
+    """
+    Returns: Binance's request weight for a ccxt client method called with args
+    """
+    has_symbol: bool = len(args) > 0 and args[0] is not None
+    if method_name == 'fetch_open_orders':
+        # Fetching open orders without a symbol is weighted as every symbol's open orders
+        return 1 if has_symbol else 40
+    if method_name == 'fetch_tickers':
+        return 40
+    if method_name == 'fetch_balance':
+        return 5
+    return 1
+
+
+request_weight_functions_by_exchange: Dict[str, Callable[[str, Tuple], float]] = {
+    'binance': binance_request_weight,
+}
+
+rate_limit_errors = (ccxt.DDoSProtection, ccxt.RateLimitExceeded)
+backoff_max_seconds: float = 60
+
+
+class TokenBucket:
+    def __init__(self, tokens_per_second: float, capacity: float):
+        self.tokens_per_second = tokens_per_second
+        self.capacity = capacity
+        self.tokens: float = capacity
+        self.updated_at: float = time.monotonic()
+        # Time before which no tokens are handed out, after the exchange rate limited a request
+        self.paused_until: float = 0
+        self.lock = threading.Lock()
+
+    def reserve(self, cost: float = 1) -> float:
+        """
+        Takes cost tokens, letting the number of tokens go negative if there aren't enough, so later callers wait
+        behind this one.
+
+        Returns: seconds to wait before sending the request
+        """
+        with self.lock:
+            now: float = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.tokens_per_second)
+            self.updated_at = now
+            self.tokens -= cost
+            wait_seconds: float = -self.tokens / self.tokens_per_second if self.tokens < 0 else 0
+            return max(wait_seconds, self.paused_until - now)
+
+    def acquire(self, cost: float = 1) -> float:
+        wait_seconds: float = self.reserve(cost)
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+        return wait_seconds
+
+    async def acquire_async(self, cost: float = 1) -> float:
+        wait_seconds: float = self.reserve(cost)
+        if wait_seconds > 0:
+            await asyncio.sleep(wait_seconds)
+        return wait_seconds
+
+    def pause(self, seconds: float):
+        """
+        Makes every caller wait at least seconds before its next request.
+        """
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class RateLimiter:
+    def __init__(self, bucket_limits: Optional[Dict[str, Dict[str, Tuple[float, float]]]] = None):
+        self.bucket_limits = bucket_limits if bucket_limits is not None else bucket_limits_by_exchange
+        self.buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, exchange_name: str, endpoint_class: str, default_tokens_per_second: float = 1) -> TokenBucket:
+        key: Tuple[str, str] = (exchange_name, endpoint_class)
+        with self.lock:
+            bucket: Optional[TokenBucket] = self.buckets.get(key)
+            if bucket is None:
+                limit: Optional[Tuple[float, float]] = self.bucket_limits.get(exchange_name, {}).get(endpoint_class)
+                tokens_per_second, capacity = limit if limit is not None else \
+                    (default_tokens_per_second, max(default_tokens_per_second, 1))
+                bucket = TokenBucket(tokens_per_second, capacity)
+                self.buckets[key] = bucket
+            return bucket
+
+    def bucket_and_cost(self, method, args: Tuple) -> Tuple[Optional[TokenBucket], float]:
+        """
+        Args:
+            method: bound method of a ccxt client
+            args: arguments the method will be called with
+
+        Returns: the bucket for the client's exchange and the method's endpoint class, and the request weight. The
+            bucket is None if method isn't a ccxt client method.
+        """
+        client = getattr(method, '__self__', None)
+        exchange_name: Optional[str] = getattr(client, 'id', None)
+        if not isinstance(exchange_name, str):
+            return None, 1
+
+        method_name: str = method.__name__
+        endpoint_class: str = endpoint_classes_by_method_name.get(method_name, market_data)
+        rate_limit_ms: float = getattr(client, 'rateLimit', None) or 1000
+        bucket: TokenBucket = self.bucket(exchange_name, endpoint_class, 1000 / rate_limit_ms)
+
+        weight_function = request_weight_functions_by_exchange.get(exchange_name)
+        cost: float = weight_function(method_name, args) if weight_function is not None else 1
+        return bucket, cost
+
+    def reset(self):
+        with self.lock:
+            self.buckets = {}
+
+
+rate_limiter: RateLimiter = RateLimiter()
+
+
+def backoff_seconds(retry: int, base_seconds: float, max_seconds: float = backoff_max_seconds) -> float:
+    """
+    Returns: exponential backoff for the retry-th retry, starting at 1, with jitter so callers that failed at the same
+        time don't retry at the same time.
+    """
+    seconds: float = min(max_seconds, base_seconds * 2 ** (retry - 1))
+    return seconds / 2 + random.uniform(0, seconds / 2)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Args:
+        value: Retry-After header, either seconds or an HTTP date
+
+    Returns: seconds to wait, or None if value is missing or invalid
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        retry_at: datetime = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+
+
+def retry_after_seconds(error: Exception, client=None) -> Optional[float]:
+    """
+    Returns: the Retry-After of the response that caused error, or of the client's last response
+    """
+    headers = None
+    response = getattr(error, 'response', None)
+    if response is not None:
+        headers = getattr(response, 'headers', None)
+    if headers is None and client is not None:
+        headers = getattr(client, 'last_response_headers', None)
+    if not headers:
+        return None
+    for name, value in headers.items():
+        if name.lower() == 'retry-after':
+            return parse_retry_after(value)
+    return None
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    if isinstance(error, rate_limit_errors):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in (418, 429)
+    return False
+
+
+def retry_delay_seconds(retry: int, error: Exception, method, bucket: Optional[TokenBucket],
+                        base_seconds: float) -> float:
+    """
+    Returns: seconds to wait before the retry-th retry of method, which failed with error. If error is a rate limit
+        error, bucket is paused for that long too, so that concurrent callers also wait.
+    """
+    delay: float = backoff_seconds(retry, base_seconds)
+    if is_rate_limit_error(error):
+        retry_after: Optional[float] = retry_after_seconds(error, getattr(method, '__self__', None))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if bucket is not None:
+            bucket.pause(delay)
+    return delay
@@ -0,0 +1,136 @@
+import time
+import unittest
+from unittest import mock
+
+import ccxt
+from nose.tools import assert_almost_equal, assert_false, assert_raises, assert_true, eq_
+
+from trading_platform.utils import http_utils
+from trading_platform.utils.circuit_breaker import CircuitBreaker, CircuitBreakerRegistry, CircuitState, \
+    circuit_breakers
+from trading_platform.utils.exceptions import CircuitOpenException
+from trading_platform.utils.rate_limiter import rate_limiter
+
+
+class FakeClient:
+    id = 'kraken'
+    rateLimit = 1
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.calls: int = 0
+
+    def fetch_tickers(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {}
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_at_failure_rate(self):
+        breaker = CircuitBreaker(failure_rate_threshold=.5, min_requests=4, open_seconds=60)
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_failure()
+        # Fewer than min_requests requests
+        eq_(breaker.current_state(), CircuitState.closed)
+        breaker.record_success()
+        eq_(breaker.current_state(), CircuitState.closed)
+        breaker.record_failure()
+        eq_(breaker.current_state(), CircuitState.open)
+        assert_false(breaker.allows_requests())
+        with assert_raises(CircuitOpenException):
+            breaker.before_request()
+        eq_(breaker.health_score(), 0)
+
+    def test_half_open(self):
+        breaker = CircuitBreaker(min_requests=1, open_seconds=.05)
+        breaker.record_failure()
+        eq_(breaker.current_state(), CircuitState.open)
+        time.sleep(.06)
+        eq_(breaker.current_state(), CircuitState.half_open)
+
+        # One probe request at a time
+        breaker.before_request()
+        with assert_raises(CircuitOpenException):
+            breaker.before_request()
+
+        # A failed probe opens the breaker again
+        breaker.record_failure()
+        eq_(breaker.current_state(), CircuitState.open)
+
+        time.sleep(.06)
+        breaker.before_request()
+        breaker.record_success()
+        eq_(breaker.current_state(), CircuitState.closed)
+        eq_(breaker.health_score(), 1)
+
+    def test_record_outcome(self):
+        breaker = CircuitBreaker(min_requests=1)
+        # The exchange responded, so it's healthy
+        breaker.record_outcome(ccxt.InvalidOrder('invalid'))
+        eq_(breaker.current_state(), CircuitState.closed)
+        breaker.record_outcome(ccxt.RequestTimeout('timeout'))
+        eq_(breaker.current_state(), CircuitState.open)
+
+    def test_health_score(self):
+        breaker = CircuitBreaker(min_requests=10, slow_request_seconds=1)
+        eq_(breaker.health_score(), 1)
+        breaker.record_success(.5)
+        breaker.record_failure(.5)
+        assert_almost_equal(breaker.health_score(), .5)
+        breaker.record_success(5)
+        # 2/3 successful, mean latency 2 seconds
+        assert_almost_equal(breaker.health_score(), 2 / 3 * 1 / 2)
+
+
+class TestCircuitBreakerRegistry(unittest.TestCase):
+    def test_health(self):
+        registry = CircuitBreakerRegistry(min_requests=1)
+        registry.breaker('kraken', 'fetch_tickers').record_success()
+        registry.breaker('kraken', 'fetch_order').record_failure()
+        eq_(registry.health('kraken', 'fetch_tickers'), 1)
+        eq_(registry.health('kraken'), 0)
+        eq_(registry.health('binance'), 1)
+        assert_true(registry.allows_requests('kraken', 'fetch_tickers'))
+        assert_false(registry.allows_requests('kraken', 'fetch_order'))
+
+    def test_exchange_service_without_client(self):
+        registry = CircuitBreakerRegistry()
+        eq_(registry.exchange_service_health(object()), 1)
+        assert_true(registry.exchange_service_allows_requests(None, 'fetch_tickers'))
+
+
+class TestMakeApiRequestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        circuit_breakers.reset()
+        rate_limiter.reset()
+
+    def tearDown(self):
+        circuit_breakers.reset()
+
+    def test_fails_fast_when_open(self):
+        client = FakeClient(errors=[ccxt.ExchangeNotAvailable('unavailable')] * 10)
+        breaker: CircuitBreaker = circuit_breakers.breaker('kraken', 'fetch_tickers')
+        with mock.patch.object(http_utils, 'SLEEP_SEC_BETWEEN_RETRIES', 0):
+            with assert_raises(ccxt.ExchangeNotAvailable):
+                http_utils.make_api_request(client.fetch_tickers)
+            eq_(client.calls, http_utils.MAX_RETRIES)
+
+            # The breaker opens after min_requests failures, and the remaining retries aren't sent
+            with assert_raises(CircuitOpenException):
+                http_utils.make_api_request(client.fetch_tickers)
+            eq_(client.calls, breaker.min_requests)
+            eq_(breaker.current_state(), CircuitState.open)
+
+            with assert_raises(CircuitOpenException):
+                http_utils.make_api_request(client.fetch_tickers)
+            eq_(client.calls, breaker.min_requests)
+
+    def test_non_retryable_error_is_success(self):
+        client = FakeClient(errors=[ValueError('bad response')])
+        with assert_raises(ValueError):
+            http_utils.make_api_request(client.fetch_tickers)
+        eq_(client.calls, 1)
+        eq_(circuit_breakers.health('kraken', 'fetch_tickers'), 1)
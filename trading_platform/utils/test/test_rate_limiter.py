@@ -0,0 +1,135 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import ccxt
+from nose.tools import assert_almost_equal, assert_greater, assert_greater_equal, assert_is, assert_is_none, \
+    assert_less_equal, assert_raises, eq_
+
+from trading_platform.utils import http_utils, rate_limiter as rate_limiter_module
+from trading_platform.utils.circuit_breaker import circuit_breakers
+from trading_platform.utils.rate_limiter import RateLimiter, TokenBucket, backoff_seconds, parse_retry_after
+
+
+class FakeClient:
+    id = 'binance'
+    rateLimit = 50
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.last_response_headers = {}
+        self.calls = []
+
+    def fetch_open_orders(self, symbol=None):
+        self.calls.append(time.monotonic())
+        if self.errors:
+            error, headers = self.errors.pop(0)
+            self.last_response_headers = headers
+            raise error
+        return []
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_reserve(self):
+        bucket = TokenBucket(tokens_per_second=10, capacity=2)
+        eq_(bucket.reserve(), 0)
+        eq_(bucket.reserve(), 0)
+        # Empty, so the next caller waits for a token, and the one after waits for two
+        assert_almost_equal(bucket.reserve(), .1, places=2)
+        assert_almost_equal(bucket.reserve(), .2, places=2)
+
+    def test_weighted_cost(self):
+        bucket = TokenBucket(tokens_per_second=10, capacity=10)
+        eq_(bucket.reserve(10), 0)
+        assert_almost_equal(bucket.reserve(5), .5, places=2)
+
+    def test_pause(self):
+        bucket = TokenBucket(tokens_per_second=10, capacity=10)
+        bucket.pause(2)
+        assert_almost_equal(bucket.reserve(), 2, places=1)
+
+    def test_concurrent_callers_are_spaced(self):
+        """
+        Threads that share a bucket should send requests at its rate rather than all at once.
+        """
+        bucket = TokenBucket(tokens_per_second=50, capacity=1)
+        times = []
+        lock = threading.Lock()
+
+        def request():
+            bucket.acquire()
+            with lock:
+                times.append(time.monotonic())
+
+        threads = [threading.Thread(target=request) for _ in range(6)]
+        start = time.monotonic()
+        [thread.start() for thread in threads]
+        [thread.join() for thread in threads]
+        # 1 immediate request, then 5 more at 50 per second
+        assert_greater_equal(max(times) - start, .09)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_bucket_and_cost(self):
+        limiter = RateLimiter()
+        client = FakeClient()
+        bucket, cost = limiter.bucket_and_cost(client.fetch_open_orders, ('ETH/BTC',))
+        eq_(cost, 1)
+        eq_(bucket.capacity, 1200)
+        # Fetching every symbol's open orders is weighted higher, and uses the same bucket
+        same_bucket, cost = limiter.bucket_and_cost(client.fetch_open_orders, ())
+        eq_(cost, 40)
+        assert_is(bucket, same_bucket)
+
+    def test_default_bucket_from_client_rate_limit(self):
+        limiter = RateLimiter()
+        client = FakeClient()
+        client.id = 'kraken'
+        client.rateLimit = 1000
+        bucket, cost = limiter.bucket_and_cost(client.fetch_open_orders, ('ETH/BTC',))
+        eq_(bucket.tokens_per_second, 1)
+        eq_(cost, 1)
+
+    def test_non_client_method(self):
+        bucket, cost = RateLimiter().bucket_and_cost(len, ())
+        assert_is_none(bucket)
+
+
+class TestBackoff(unittest.TestCase):
+    def test_backoff_seconds(self):
+        for retry, seconds in [(1, 3), (2, 6), (3, 12), (10, 60)]:
+            backoff = backoff_seconds(retry, 3)
+            assert_greater_equal(backoff, seconds / 2)
+            assert_less_equal(backoff, seconds)
+
+    def test_parse_retry_after(self):
+        eq_(parse_retry_after('120'), 120)
+        eq_(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0)
+        assert_is_none(parse_retry_after(None))
+        assert_is_none(parse_retry_after('soon'))
+
+
+class TestMakeApiRequest(unittest.TestCase):
+    def setUp(self):
+        rate_limiter_module.rate_limiter.reset()
+        circuit_breakers.reset()
+
+    def test_retry_after_pauses_bucket(self):
+        client = FakeClient(errors=[(ccxt.DDoSProtection('rate limited'), {'Retry-After': '0.3'})])
+        with mock.patch.object(http_utils, 'SLEEP_SEC_BETWEEN_RETRIES', 0):
+            eq_(http_utils.make_api_request(client.fetch_open_orders, 'ETH/BTC'), [])
+        eq_(len(client.calls), 2)
+        assert_greater_equal(client.calls[1] - client.calls[0], .3)
+
+        # The bucket was paused, so other callers of the same exchange and endpoint class waited too
+        bucket, _ = rate_limiter_module.rate_limiter.bucket_and_cost(client.fetch_open_orders, ('ETH/BTC',))
+        assert_greater(bucket.paused_until, client.calls[0] + .29)
+
+    def test_raises_after_max_retries(self):
+        errors = [(ccxt.ExchangeNotAvailable('unavailable'), {})] * http_utils.MAX_RETRIES
+        client = FakeClient(errors=errors)
+        with mock.patch.object(http_utils, 'SLEEP_SEC_BETWEEN_RETRIES', 0):
+            with assert_raises(ccxt.ExchangeNotAvailable):
+                http_utils.make_api_request(client.fetch_open_orders, 'ETH/BTC')
+        eq_(len(client.calls), http_utils.MAX_RETRIES)
@@ -0,0 +1,92 @@
+import threading
+import time
+import unittest
+
+from nose.tools import assert_false, assert_is_none, assert_raises, assert_true, eq_
+
+from trading_platform.utils.ttl_cache import TtlCache
+
+
+class TestTtlCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = TtlCache()
+        self.fetches: int = 0
+
+    def fetch(self, value='value', delay_seconds: float = 0):
+        def fetch_value():
+            self.fetches += 1
+            time.sleep(delay_seconds)
+            return value
+        return fetch_value
+
+    def test_get_or_fetch(self):
+        first = self.cache.get_or_fetch('key', self.fetch(), ttl_seconds=60)
+        eq_(first.value, 'value')
+        assert_false(first.from_cache)
+        second = self.cache.get_or_fetch('key', self.fetch(), ttl_seconds=60)
+        eq_(second.value, 'value')
+        assert_true(second.from_cache)
+        assert_false(second.stale)
+        eq_(self.fetches, 1)
+        eq_(self.cache.metrics()['hits'], 1)
+
+    def test_expiry_and_max_age(self):
+        self.cache.get_or_fetch('key', self.fetch(), ttl_seconds=.05)
+        time.sleep(.06)
+        eq_(self.cache.get('key', max_age_seconds=60).stale, True)
+        assert_is_none(self.cache.get('key', max_age_seconds=.05))
+        self.cache.get_or_fetch('key', self.fetch(), ttl_seconds=.05)
+        eq_(self.fetches, 2)
+
+        # A read with a larger freshness budget than the ttl is served from the cache
+        time.sleep(.06)
+        assert_true(self.cache.get_or_fetch('key', self.fetch(), ttl_seconds=.05, max_age_seconds=60).from_cache)
+        eq_(self.fetches, 2)
+
+    def test_single_flight(self):
+        results = []
+
+        def read():
+            results.append(self.cache.get_or_fetch('key', self.fetch(delay_seconds=.1), ttl_seconds=60))
+
+        threads = [threading.Thread(target=read) for _ in range(5)]
+        [thread.start() for thread in threads]
+        [thread.join() for thread in threads]
+        eq_(self.fetches, 1)
+        eq_([result.value for result in results], ['value'] * 5)
+        eq_(sum(1 for result in results if not result.from_cache), 1)
+        eq_(self.cache.metrics()['shared_fetches'], 4)
+
+    def test_fetch_exception_not_cached(self):
+        def fail():
+            raise ValueError('failed')
+
+        with assert_raises(ValueError):
+            self.cache.get_or_fetch('key', fail, ttl_seconds=60)
+        eq_(self.cache.get_or_fetch('key', self.fetch(), ttl_seconds=60).value, 'value')
+
+    def test_invalidate_during_fetch(self):
+        """
+        A fetch that started before an invalidation shouldn't be cached or shared with later reads.
+        """
+        started = threading.Event()
+
+        def slow_fetch():
+            started.set()
+            time.sleep(.1)
+            return 'old'
+
+        thread = threading.Thread(target=lambda: self.cache.get_or_fetch('key', slow_fetch, ttl_seconds=60))
+        thread.start()
+        started.wait()
+        self.cache.invalidate('key')
+        eq_(self.cache.get_or_fetch('key', self.fetch('new'), ttl_seconds=60).value, 'new')
+        thread.join()
+        eq_(self.cache.get('key', max_age_seconds=60).value, 'new')
+
+    def test_invalidate_where(self):
+        self.cache.put(('ticker', 'ETH_BTC'), 1, ttl_seconds=60)
+        self.cache.put('balances', 2, ttl_seconds=60)
+        self.cache.invalidate_where(lambda key: isinstance(key, tuple))
+        assert_is_none(self.cache.get(('ticker', 'ETH_BTC'), max_age_seconds=60))
+        eq_(self.cache.get('balances', max_age_seconds=60).value, 2)
@@ -0,0 +1,164 @@
+"""
+Thread-safe in-memory cache whose entries expire after a time to live.
+
+Values are returned wrapped in CachedValue, which records when the value was fetched, so callers can tell how stale it
+is. Concurrent get_or_fetch() calls for the same missing or expired key share one fetch: the first caller fetches, and
+the others wait for its result instead of sending identical requests.
+
+Example usage:
+    cache = TtlCache()
+    cached_value = cache.get_or_fetch(('ticker', 'ETH_BTC'), lambda: service.fetch_latest_ticker(pair), ttl_seconds=2)
+    cached_value.value, cached_value.age_seconds
+"""
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class CachedValue(Generic[T]):
+    def __init__(self, value: T, fetched_at: float, ttl_seconds: float, from_cache: bool):
+        """
+        Args:
+            value:
+            fetched_at: epoch seconds when the value was fetched
+            ttl_seconds: time to live the value was cached with
+            from_cache: True if the value was read from the cache, or from another caller's fetch that was in flight
+        """
+        self.value = value
+        self.fetched_at = fetched_at
+        self.ttl_seconds = ttl_seconds
+        self.from_cache = from_cache
+
+    @property
+    def age_seconds(self) -> float:
+        return max(time.time() - self.fetched_at, 0)
+
+    @property
+    def stale(self) -> bool:
+        return self.age_seconds > self.ttl_seconds
+
+    def __repr__(self):
+        return 'CachedValue(value={0}, age_seconds={1:.3f}, ttl_seconds={2}, from_cache={3})'.format(
+            self.value, self.age_seconds, self.ttl_seconds, self.from_cache)
+
+
+class TtlCache:
+    def __init__(self):
+        self.entries: Dict[Hashable, CachedValue] = {}
+        # Fetches in flight, by key
+        self.flights: Dict[Hashable, Future] = {}
+        # Incremented when a key is invalidated, so fetches that started before the invalidation aren't cached
+        self.generations: Dict[Hashable, int] = {}
+        self.lock = threading.Lock()
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.shared_fetches: int = 0
+
+    def get(self, key: Hashable, max_age_seconds: float) -> Optional[CachedValue]:
+        """
+        Returns: the cached value if it's younger than max_age_seconds, else None
+        """
+        with self.lock:
+            entry: Optional[CachedValue] = self.entries.get(key)
+            if entry is None or time.time() - entry.fetched_at > max_age_seconds:
+                return None
+            return CachedValue(entry.value, entry.fetched_at, entry.ttl_seconds, True)
+
+    def put(self, key: Hashable, value, ttl_seconds: float, fetched_at: Optional[float] = None) -> CachedValue:
+        entry: CachedValue = CachedValue(value, fetched_at if fetched_at is not None else time.time(), ttl_seconds,
+                                         False)
+        with self.lock:
+            self.entries[key] = entry
+        return entry
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], T], ttl_seconds: float,
+                     max_age_seconds: Optional[float] = None) -> CachedValue[T]:
+        """
+        Args:
+            key:
+            fetch: called to get the value if the cached value is missing or too old
+            ttl_seconds: time to live of a newly fetched value
+            max_age_seconds: maximum age of a cached value for this read. Defaults to ttl_seconds.
+
+        Returns: the cached value, or the fetched value. Exceptions raised by fetch are raised to every caller waiting
+            for it, and nothing is cached.
+        """
+        max_age_seconds = max_age_seconds if max_age_seconds is not None else ttl_seconds
+        with self.lock:
+            entry: Optional[CachedValue] = self.entries.get(key)
+            if entry is not None and time.time() - entry.fetched_at <= max_age_seconds:
+                self.hits += 1
+                return CachedValue(entry.value, entry.fetched_at, entry.ttl_seconds, True)
+
+            flight: Optional[Future] = self.flights.get(key)
+            # Whether this caller fetches, or waits for another caller's fetch
+            owner: bool = flight is None
+            if owner:
+                self.misses += 1
+                flight = Future()
+                self.flights[key] = flight
+                generation: int = self.generations.get(key, 0)
+            else:
+                self.shared_fetches += 1
+
+        if not owner:
+            shared: CachedValue = flight.result()
+            return CachedValue(shared.value, shared.fetched_at, shared.ttl_seconds, True)
+
+        try:
+            fetched_at: float = time.time()
+            value = fetch()
+        except BaseException as ex:
+            with self.lock:
+                self.end_flight(key, flight)
+            flight.set_exception(ex)
+            raise
+
+        entry = CachedValue(value, fetched_at, ttl_seconds, False)
+        with self.lock:
+            self.end_flight(key, flight)
+            if self.generations.get(key, 0) == generation:
+                self.entries[key] = entry
+        flight.set_result(entry)
+        return entry
+
+    def end_flight(self, key: Hashable, flight: Future):
+        # The flight may have been replaced after an invalidation
+        if self.flights.get(key) is flight:
+            del self.flights[key]
+
+    def invalidate_key(self, key: Hashable):
+        """
+        Must be called with the lock held.
+        """
+        self.entries.pop(key, None)
+        # Later reads start a new fetch instead of waiting for one that started before the invalidation, and that
+        # fetch's value isn't cached.
+        self.flights.pop(key, None)
+        self.generations[key] = self.generations.get(key, 0) + 1
+
+    def invalidate(self, key: Hashable):
+        """
+        Removes the key's value, and keeps fetches that are already in flight from caching or sharing theirs.
+        """
+        with self.lock:
+            self.invalidate_key(key)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]):
+        with self.lock:
+            for key in set(self.entries) | set(self.flights):
+                if predicate(key):
+                    self.invalidate_key(key)
+
+    def metrics(self) -> Dict:
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'shared_fetches': self.shared_fetches,
+                'entries': len(self.entries),
+            }